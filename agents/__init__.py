@@ -3,7 +3,12 @@ Agents Package
 Multi-agent hospital system
 """
 
-from .hospital_agent import HospitalMultiAgentSystem, app, invoke
-
 __all__ = ['HospitalMultiAgentSystem', 'app', 'invoke']
 
+
+def __getattr__(name):
+    # Importing the package stays cheap; hospital_agent (and the shared app) loads on first access
+    if name in __all__:
+        from . import hospital_agent
+        return getattr(hospital_agent, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,55 +6,197 @@ Uses Bedrock AgentCore Runtime + Strands Agents for patient triage and care coor
 import os
 import json
 import yaml
-from typing import Dict, Any, List
+import time
+import textwrap
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Callable, Tuple
 from datetime import datetime
 
 from bedrock_agentcore import BedrockAgentCoreApp
-from strands import Agent
-import boto3
-from botocore.exceptions import ClientError
+
+from core import metrics as core_metrics, usage as core_usage
+from core.aws_clients import get_client, get_resource
+from core.context_loader import PatientContextLoader
+from core.conversation_memory import ConversationMemory
+from core.intent import IntentClassifier, INTENT_AGENTS
+from core.memory_store import memory_store_from_config
+from core.metrics import metrics
+from core.model_policy import ModelPolicy, task_for
+from core.prompt_context import ContextCompactor, compact_json, prompt_stats
+from core.rate_limiter import bedrock_limiter, estimate_tokens
+from core.request_engine import AsyncRequestEngine
+from core.speculation import speculate
+from core.tracing import configure_from_config, tracer, traced
+from core.usage import usage_ledger
+from tools.triage_rules import emergency_response, triage_rules, urgency_decisions
+
+if TYPE_CHECKING:
+    from strands import Agent
+
+# Resolved next to the package, not the working directory; override with HOSPITAL_CONFIG
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config.yaml'
+
+# Agent name -> session memory type written by its handler
+AGENT_MEMORY_TYPES = {agent: intent for intent, agent in INTENT_AGENTS.items()}
+
+# Tokens spent by the speculative specialist run on this thread (None outside speculation)
+_speculation_tokens: contextvars.ContextVar = contextvars.ContextVar('speculation_tokens', default=None)
+
+
+def _usage(result) -> Dict[str, int]:
+    """Token usage from a Strands agent result's metrics (empty when not reported)"""
+    return getattr(getattr(result, 'metrics', None), 'accumulated_usage', None) or {}
+
+
+def _total_tokens(result) -> Optional[int]:
+    """Tokens a Strands agent call consumed, when its metrics report them"""
+    return _usage(result).get('totalTokens')
 
 
 class HospitalMultiAgentSystem:
     """Multi-agent system for hospital patient management"""
     
-    def __init__(self, config_path: str = "config.yaml"):
-        """Initialize the multi-agent system"""
+    def __init__(self, config_path: str = None):
+        """
+        Initialize the multi-agent system
+        
+        Only configuration is read here. AWS clients (shared process-wide via
+        core.aws_clients), the context loader and each Strands agent (with its
+        tools) are built on first use, so import and cold start stay cheap and
+        a request only pays for what it touches.
+        """
         self.app = BedrockAgentCoreApp()
-        self.config = self._load_config(config_path)
+        self.config = self._load_config(config_path or os.getenv('HOSPITAL_CONFIG') or DEFAULT_CONFIG_PATH)
+        self._lazy_values: Dict[str, Any] = {}
+        self._lazy_lock = threading.RLock()
+        
+        # Local fast-path router in front of the supervisor LLM
+        fast_path = self.config['agents']['supervisor'].get('fast_path', {})
+        self.fast_path_enabled = fast_path.get('enabled', True)
+        self.intent_classifier = IntentClassifier(threshold=fast_path.get('confidence_threshold', 0.6))
+        
+        # When the supervisor LLM has to decide, start the classifier's best guess alongside it
+        speculation = self.config['agents']['supervisor'].get('speculation', {})
+        self.speculation_enabled = speculation.get('enabled', False)
+        self.speculation_min_confidence = speculation.get('min_confidence', 0.3)
+        self.speculation_agents = set(speculation.get('agents', ['TriageAgent']))
+        self.speculation_workers = speculation.get('max_workers', 8)
+        
+        # Every agent call shares the process-wide Bedrock rate limiter
+        rate_limit = self.config.get('runtime', {}).get('bedrock_rate_limit', {})
+        bedrock_limiter.configure(
+            requests_per_minute=rate_limit.get('requests_per_minute'),
+            tokens_per_minute=rate_limit.get('tokens_per_minute')
+        )
+        self.rate_limit_timeout = rate_limit.get('acquire_timeout_seconds', bedrock_limiter.acquire_timeout)
+        
+        # Per-stage spans (route, context fetch, agents, tools, Bedrock retries)
+        configure_from_config(self.config)
         
-        # Initialize AWS clients
-        self.dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
-        self.bedrock_runtime = boto3.client('bedrock-runtime', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+        # Request, token, cache and capacity metrics, flushed in the background
+        core_metrics.configure_from_config(self.config)
         
-        # Initialize agents
-        self.supervisor_agent = self._create_supervisor()
-        self.triage_agent = self._create_triage_agent()
-        self.booking_agent = self._create_booking_agent()
-        self.reminder_agent = self._create_reminder_agent()
+        # Token and cost ledger per patient, agent and model
+        core_usage.configure_from_config(self.config)
         
-        # Memory store (in-memory for MVP, can be replaced with Bedrock Memory)
-        self.session_memory = {}
+        # Model tier per call: routing, summaries and confirmations on the fast model
+        self.model_policy = ModelPolicy.from_config(self.config)
         
+        # Each agent sees only the context fields it declares, within its token budget
+        self.compactors = {
+            key: ContextCompactor.for_agent(key, agent_config)
+            for key, agent_config in self.config['agents'].items()
+        }
+        
+        # Recent turns verbatim, older turns folded into a summary off the request path
+        # and persisted through the shared memory store (hospital-memory table by default)
+        self.memory_store = memory_store_from_config(self.config, get_dynamodb=lambda: get_resource('dynamodb'))
+        self.session_memory = ConversationMemory.from_config(
+            self.config, summarizer=self._summarize_conversation, store=self.memory_store
+        )
+    
+    def _lazy(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Build a component once, on first use (safe when requests race to create it)"""
+        value = self._lazy_values.get(name)
+        if value is None:
+            with self._lazy_lock:
+                value = self._lazy_values.get(name)
+                if value is None:
+                    value = self._lazy_values[name] = factory()
+        return value
+    
+    @property
+    def dynamodb(self):
+        return get_resource('dynamodb')
+    
+    @property
+    def bedrock_runtime(self):
+        return get_client('bedrock-runtime')
+    
+    @property
+    def context_loader(self) -> PatientContextLoader:
+        return self._lazy('context_loader', lambda: PatientContextLoader(self.dynamodb))
+    
+    @property
+    def emergency_executor(self) -> ThreadPoolExecutor:
+        return self._lazy('emergency_executor', lambda: ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix='emergency-elaboration'
+        ))
+    
+    @property
+    def speculation_executor(self) -> ThreadPoolExecutor:
+        return self._lazy('speculation_executor', lambda: ThreadPoolExecutor(
+            max_workers=self.speculation_workers, thread_name_prefix='speculative-specialist'
+        ))
+    
+    @property
+    def supervisor_agent(self) -> 'Agent':
+        return self._agent('supervisor')
+    
+    @property
+    def triage_agent(self) -> 'Agent':
+        return self._agent('triage')
+    
+    @property
+    def booking_agent(self) -> 'Agent':
+        return self._agent('booking')
+    
+    @property
+    def reminder_agent(self) -> 'Agent':
+        return self._agent('reminder')
+    
+    def _agent(self, role: str, tier: str = None) -> 'Agent':
+        """A role's Strands agent on a model tier (its model_tier by default), built once per role and tier"""
+        tier = tier or self.model_policy.agent_tier(role)
+        factory = self._create_supervisor if role == 'supervisor' else getattr(self, f'_create_{role}_agent')
+        return self._lazy(f'{role}_agent:{tier}', lambda: factory(self.model_policy.model_id(tier, agent=role)))
+    
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file"""
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
     
-    def _create_supervisor(self) -> Agent:
+    def _create_supervisor(self, model_id: str) -> 'Agent':
         """Create supervisor agent for routing"""
+        from strands import Agent
+        
         config = self.config['agents']['supervisor']
         
         agent = Agent(
             name=config['name'],
             instruction=config['instruction'],
-            model=config['model_id']
+            model=model_id
         )
         
         return agent
     
-    def _create_triage_agent(self) -> Agent:
+    def _create_triage_agent(self, model_id: str) -> 'Agent':
         """Create triage agent for symptom analysis"""
+        from strands import Agent
+        
         config = self.config['agents']['triage']
         
         # Register tools
@@ -63,14 +205,16 @@ class HospitalMultiAgentSystem:
         agent = Agent(
             name=config['name'],
             instruction=config['instruction'],
-            model=config['model_id'],
+            model=model_id,
             tools=[search_symptoms, get_patient_history]
         )
         
         return agent
     
-    def _create_booking_agent(self) -> Agent:
+    def _create_booking_agent(self, model_id: str) -> 'Agent':
         """Create booking agent for appointments"""
+        from strands import Agent
+        
         config = self.config['agents']['booking']
         
         # Register tools
@@ -79,14 +223,16 @@ class HospitalMultiAgentSystem:
         agent = Agent(
             name=config['name'],
             instruction=config['instruction'],
-            model=config['model_id'],
+            model=model_id,
             tools=[check_availability, book_appointment, get_appointments]
         )
         
         return agent
     
-    def _create_reminder_agent(self) -> Agent:
+    def _create_reminder_agent(self, model_id: str) -> 'Agent':
         """Create reminder agent for notifications"""
+        from strands import Agent
+        
         config = self.config['agents']['reminder']
         
         # Register tools
@@ -95,22 +241,108 @@ class HospitalMultiAgentSystem:
         agent = Agent(
             name=config['name'],
             instruction=config['instruction'],
-            model=config['model_id'],
+            model=model_id,
             tools=[send_notification, schedule_reminder]
         )
         
         return agent
     
+    def _run_agent(self, role: str, prompt: str, tier: str = None, max_output_tokens: int = 2000,
+                   patient_id: str = None):
+        """Invoke a role's agent on a model tier through the Bedrock rate limiter, retrying throttles with jittered backoff"""
+        started = time.perf_counter()
+        tier = tier or self.model_policy.agent_tier(role)
+        agent = self._agent(role, tier)
+        prompt = textwrap.dedent(prompt).strip()
+        estimated = estimate_tokens(prompt)
+        name = getattr(agent, 'name', 'agent')
+        with tracer.span(f'agent.{name}', estimated_input_tokens=estimated, tier=tier) as span:
+            result = bedrock_limiter.call(
+                lambda: agent(prompt),
+                tokens=estimated + max_output_tokens,
+                usage=_total_tokens,
+                timeout=self.rate_limit_timeout
+            )
+            span.set(input_tokens=_usage(result).get('inputTokens'), output_tokens=_usage(result).get('outputTokens'))
+        prompt_stats.record(name, estimated, _usage(result).get('inputTokens'))
+        metrics.increment('InputTokens', _usage(result).get('inputTokens', 0), agent=name)
+        metrics.increment('OutputTokens', _usage(result).get('outputTokens', 0), agent=name)
+        spent = _speculation_tokens.get()
+        if spent is not None:
+            spent.append(_total_tokens(result) or 0)
+        latency_ms = (time.perf_counter() - started) * 1000
+        metrics.observe('ModelLatency', latency_ms, tier=tier)
+        usage_ledger.record(self.model_policy.model_id(tier, agent=role), name, _usage(result).get('inputTokens', 0),
+                            _usage(result).get('outputTokens', 0), latency_ms, patient_id=patient_id)
+        return result
+    
+    @traced('route_query')
     def route_query(self, user_message: str, patient_id: str) -> str:
         """Route user query to appropriate agent"""
+        started = time.perf_counter()
+        
+        # Emergencies are answered from the local triage rules before any model call
+        emergency = self._emergency_reply(user_message, patient_id)
+        if emergency is not None:
+            self._count_request('emergency', started)
+            return emergency
         
         # Step 1: Get patient context from memory
         context = self._get_patient_context(patient_id)
         
-        # Step 2: Use supervisor to determine routing
+        # Steps 2-3: Use supervisor to determine routing, then route to the chosen agent
+        agent_name, response = self._select_and_dispatch(user_message, patient_id, context)
+        self._count_request(agent_name, started)
+        return response
+    
+    def _count_request(self, agent_name: str, started: float):
+        """Count a routed request and its latency against the agent that answered it"""
+        metrics.increment('Requests', agent=agent_name)
+        metrics.observe('RequestLatency', (time.perf_counter() - started) * 1000, agent=agent_name)
+    
+    @traced('emergency_reply')
+    def _emergency_reply(self, user_message: str, patient_id: str) -> Optional[str]:
+        """
+        Templated reply when the local triage rules read the message as an emergency
+        
+        Decides in microseconds; the triage agent's elaboration runs in the
+        background and is added to the same session memory turn. Only messages the
+        classifier reads as triage (or as no request at all) are considered; returns
+        None for other messages.
+        """
+        started = time.perf_counter()
+        intent, _ = self.intent_classifier.predict(user_message)
+        urgency, keyword = triage_rules.match_message(user_message, intent)
+        urgency_decisions.record('rules', urgency, time.perf_counter() - started)
+        if urgency != 'Emergency':
+            return None
+        
+        reply = emergency_response(keyword)
+        turn = self._update_memory(patient_id, 'triage', reply)
+        self.emergency_executor.submit(self._elaborate_emergency, user_message, patient_id, turn, started)
+        return reply
+    
+    @traced('emergency_elaboration')
+    def _elaborate_emergency(self, user_message: str, patient_id: str, turn: Dict, started: float):
+        try:
+            elaboration = self._handle_triage(user_message, patient_id, self._get_patient_context(patient_id),
+                                              remember=False)
+            self.session_memory.update(patient_id, turn, elaboration=elaboration)
+            urgency_decisions.record('llm', 'Emergency', time.perf_counter() - started)
+        except Exception as e:
+            print(f"Emergency elaboration failed for {patient_id}: {e}")
+    
+    @traced('select_agent')
+    def _select_agent(self, user_message: str, patient_id: str, context: Dict) -> str:
+        """Pick the specialist agent, asking the supervisor only when the local classifier is unsure"""
+        if self.fast_path_enabled:
+            intent = self.intent_classifier.classify(user_message)
+            if intent:
+                return INTENT_AGENTS[intent]
+        
         supervisor_prompt = f"""
         Patient ID: {patient_id}
-        Patient Context: {json.dumps(context, indent=2)}
+        Recent Interactions: {self.compactors['supervisor'].render(context)}
         
         User Query: {user_message}
         
@@ -122,131 +354,217 @@ class HospitalMultiAgentSystem:
         Respond with ONLY the agent name: TriageAgent, BookingAgent, or ReminderAgent
         """
         
-        routing_result = self.supervisor_agent(supervisor_prompt)
-        agent_name = routing_result.message.strip()
-        
-        # Step 3: Route to appropriate agent
+        tier = self.model_policy.select('routing', agent='supervisor')
+        routing = self._run_agent('supervisor', supervisor_prompt, tier=tier, max_output_tokens=20,
+                                  patient_id=patient_id).message.strip()
+        if tier != self.model_policy.escalation_tier and not any(name in routing for name in INTENT_AGENTS.values()):
+            # The fast model did not name an agent; ask the larger one
+            routing = self._run_agent('supervisor', supervisor_prompt, tier=self.model_policy.escalate('routing'),
+                                      max_output_tokens=20, patient_id=patient_id).message.strip()
+        return routing
+    
+    def _dispatch(self, agent_name: str, user_message: str, patient_id: str, context: Dict,
+                  remember: bool = True) -> str:
+        """Hand the query to the specialist agent chosen by the supervisor"""
         if "Triage" in agent_name:
-            return self._handle_triage(user_message, patient_id, context)
+            return self._handle_triage(user_message, patient_id, context, remember)
         elif "Booking" in agent_name:
-            return self._handle_booking(user_message, patient_id, context)
+            return self._handle_booking(user_message, patient_id, context, remember)
         elif "Reminder" in agent_name:
-            return self._handle_reminder(user_message, patient_id, context)
+            return self._handle_reminder(user_message, patient_id, context, remember)
         else:
             return "I'm not sure how to help with that. Please rephrase your question."
     
-    def _handle_triage(self, message: str, patient_id: str, context: Dict) -> str:
+    def _select_and_dispatch(self, user_message: str, patient_id: str, context: Dict) -> Tuple[str, str]:
+        """
+        Pick the specialist and get its reply
+        
+        When the supervisor LLM has to decide and the classifier has a likely
+        answer among `speculation.agents`, that specialist starts at the same
+        time. Its reply is used if the supervisor agrees; otherwise it is
+        cancelled (or, if already running, discarded with its tokens counted
+        as waste) and the chosen specialist runs as usual.
+        
+        Returns:
+            (agent_name, response)
+        """
+        guess = self._speculation_guess(user_message)
+        if guess is None:
+            agent_name = self._select_agent(user_message, patient_id, context)
+            return agent_name, self._dispatch(agent_name, user_message, patient_id, context)
+        
+        agent_name, reply = speculate(
+            self.speculation_executor, guess,
+            tracer.run_in_context(self._speculate, guess, user_message, patient_id, context),
+            lambda: self._select_agent(user_message, patient_id, context)
+        )
+        if reply is not None:
+            self._update_memory(patient_id, AGENT_MEMORY_TYPES[guess], reply)
+            return agent_name, reply
+        return agent_name, self._dispatch(agent_name, user_message, patient_id, context)
+    
+    def _speculation_guess(self, user_message: str) -> Optional[str]:
+        """The specialist worth starting before the supervisor answers, if any"""
+        if not self.speculation_enabled:
+            return None
+        intent, confidence = self.intent_classifier.predict(user_message)
+        if intent not in INTENT_AGENTS or confidence < self.speculation_min_confidence:
+            return None
+        if self.fast_path_enabled and confidence >= self.intent_classifier.threshold:
+            # The fast path answers without the supervisor; nothing to overlap
+            return None
+        agent_name = INTENT_AGENTS[intent]
+        return agent_name if agent_name in self.speculation_agents else None
+    
+    @traced('speculative_specialist')
+    def _speculate(self, agent_name: str, user_message: str, patient_id: str, context: Dict) -> Tuple[str, int]:
+        """Run a specialist without touching session memory; returns (reply, tokens spent)"""
+        spent: List[int] = []
+        token = _speculation_tokens.set(spent)
+        try:
+            reply = self._dispatch(agent_name, user_message, patient_id, context, remember=False)
+        finally:
+            _speculation_tokens.reset(token)
+        return reply, sum(spent)
+    
+    @traced('handle_triage')
+    def _handle_triage(self, message: str, patient_id: str, context: Dict, remember: bool = True) -> str:
         """Handle triage query"""
         triage_prompt = f"""
         Patient ID: {patient_id}
-        Medical History: {json.dumps(context.get('medical_history', {}), indent=2)}
+        Medical History: {self.compactors['triage'].render(context)}
         
         Patient Query: {message}
         
         Analyze symptoms and provide triage recommendation.
         """
         
-        result = self.triage_agent(triage_prompt)
+        tier = self.model_policy.select('triage', agent='triage')
+        result = self._run_agent('triage', triage_prompt, tier=tier, patient_id=patient_id)
         
         # Store in memory
-        self._update_memory(patient_id, 'triage', result.message)
+        if remember:
+            self._update_memory(patient_id, 'triage', result.message)
         
         return result.message
     
-    def _handle_booking(self, message: str, patient_id: str, context: Dict) -> str:
+    @traced('handle_booking')
+    def _handle_booking(self, message: str, patient_id: str, context: Dict, remember: bool = True) -> str:
         """Handle booking query"""
         booking_prompt = f"""
         Patient ID: {patient_id}
-        Past Appointments: {json.dumps(context.get('appointments', []), indent=2)}
+        Past Appointments: {self.compactors['booking'].render(context)}
         
         Patient Query: {message}
         
         Help the patient with appointment scheduling.
         """
         
-        result = self.booking_agent(booking_prompt)
+        task, confidence = task_for('booking', message)
+        tier = self.model_policy.select(task, agent='booking', confidence=confidence)
+        result = self._run_agent('booking', booking_prompt, tier=tier, patient_id=patient_id)
         
         # Store in memory
-        self._update_memory(patient_id, 'booking', result.message)
+        if remember:
+            self._update_memory(patient_id, 'booking', result.message)
         
         return result.message
     
-    def _handle_reminder(self, message: str, patient_id: str, context: Dict) -> str:
+    @traced('handle_reminder')
+    def _handle_reminder(self, message: str, patient_id: str, context: Dict, remember: bool = True) -> str:
         """Handle reminder query"""
         reminder_prompt = f"""
         Patient ID: {patient_id}
-        Upcoming Reminders: {json.dumps(context.get('reminders', []), indent=2)}
+        Upcoming Reminders: {self.compactors['reminder'].render(context)}
         
         Patient Query: {message}
         
         Help manage reminders and follow-ups.
         """
         
-        result = self.reminder_agent(reminder_prompt)
+        tier = self.model_policy.select('reminder', agent='reminder')
+        result = self._run_agent('reminder', reminder_prompt, tier=tier, patient_id=patient_id)
         
         # Store in memory
-        self._update_memory(patient_id, 'reminder', result.message)
+        if remember:
+            self._update_memory(patient_id, 'reminder', result.message)
         
         return result.message
     
+    @traced('get_patient_context')
     def _get_patient_context(self, patient_id: str) -> Dict:
         """Retrieve patient context from DynamoDB and memory"""
-        context = {
-            'medical_history': {},
-            'appointments': [],
-            'reminders': [],
-            'recent_interactions': []
-        }
-        
-        try:
-            # Get from DynamoDB
-            patients_table = self.dynamodb.Table(os.getenv('PATIENTS_TABLE', 'hospital-patients'))
-            response = patients_table.get_item(Key={'patient_id': patient_id})
-            
-            if 'Item' in response:
-                patient_data = response['Item']
-                context['medical_history'] = patient_data.get('medical_history', {})
-            
-            # Get recent appointments
-            appointments_table = self.dynamodb.Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
-            response = appointments_table.query(
-                KeyConditionExpression='patient_id = :pid',
-                ExpressionAttributeValues={':pid': patient_id},
-                Limit=5
-            )
-            context['appointments'] = response.get('Items', [])
-            
-        except ClientError as e:
-            print(f"Error retrieving patient context: {e}")
+        # Patient record, appointments, reminders and memory are read in parallel
+        context = self.context_loader.load(patient_id)
         
         # Get from session memory
-        if patient_id in self.session_memory:
-            context['recent_interactions'] = self.session_memory[patient_id]
+        context['recent_interactions'] = self.session_memory.turns(patient_id)
+        context['conversation_summary'] = self.session_memory.summary(patient_id)
         
         return context
     
-    def _update_memory(self, patient_id: str, interaction_type: str, content: str):
-        """Update session memory"""
-        if patient_id not in self.session_memory:
-            self.session_memory[patient_id] = []
-        
-        self.session_memory[patient_id].append({
+    def _update_memory(self, patient_id: str, interaction_type: str, content: str) -> Dict:
+        """Update session memory; returns the stored turn"""
+        turn = {
             'type': interaction_type,
             'content': content,
             'timestamp': datetime.utcnow().isoformat()
+        }
+        self.session_memory.append(patient_id, turn)
+        return turn
+    
+    @traced('summarize_conversation')
+    def _summarize_conversation(self, previous: str, turns: List[Dict]) -> str:
+        """Fold older turns into the running summary (runs on the memory's background thread)"""
+        started = time.perf_counter()
+        model_id = self.model_policy.model_id(self.model_policy.select('summarization'))
+        prompt = textwrap.dedent(f"""
+        Update the running summary of a patient's conversation with the hospital assistant.
+        Keep symptoms, urgency levels, appointments and reminders; drop greetings and advice boilerplate.
+        Reply with the updated summary only, at most 120 words.
+        
+        Current summary: {previous or '(none)'}
+        New turns: {compact_json(turns)}
+        """).strip()
+        body = json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 300,
+            "messages": [{"role": "user", "content": prompt}]
         })
         
-        # Keep only last 10 interactions per patient
-        self.session_memory[patient_id] = self.session_memory[patient_id][-10:]
+        def invoke() -> Dict:
+            response = self.bedrock_runtime.invoke_model(
+                modelId=model_id,
+                body=body
+            )
+            return json.loads(response['body'].read())
+        
+        result = bedrock_limiter.call(
+            invoke,
+            tokens=estimate_tokens(prompt) + 300,
+            usage=lambda r: sum(r.get('usage', {}).values()) or None,
+            timeout=self.rate_limit_timeout
+        )
+        usage = result.get('usage', {})
+        metrics.increment('InputTokens', usage.get('input_tokens', 0), agent='summarizer')
+        metrics.increment('OutputTokens', usage.get('output_tokens', 0), agent='summarizer')
+        latency_ms = (time.perf_counter() - started) * 1000
+        metrics.observe('ModelLatency', latency_ms, tier=self.model_policy.tier_of(model_id))
+        usage_ledger.record(model_id, 'summarizer', usage.get('input_tokens', 0), usage.get('output_tokens', 0),
+                            latency_ms)
+        return result['content'][0]['text'].strip()
 
 
 # Create app instance
 hospital_system = HospitalMultiAgentSystem()
 app = hospital_system.app
 
+# Concurrent execution path so one slow Bedrock call doesn't stall other patients
+request_engine = AsyncRequestEngine.from_config(hospital_system, hospital_system.config)
+
 
 @app.entrypoint
-def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
+async def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Main entrypoint for the multi-agent system
     
@@ -255,32 +573,10 @@ def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
         "prompt": "My child has fever and cough",
         "patient_id": "P12345"
     }
+    
+    Returns status "busy" when the request engine's queue is full.
     """
-    try:
-        user_message = payload.get("prompt", "")
-        patient_id = payload.get("patient_id", "UNKNOWN")
-        
-        if not user_message:
-            return {
-                "error": "No prompt provided",
-                "status": "failed"
-            }
-        
-        # Route and process query
-        response = hospital_system.route_query(user_message, patient_id)
-        
-        return {
-            "result": response,
-            "patient_id": patient_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "status": "success"
-        }
-        
-    except Exception as e:
-        return {
-            "error": str(e),
-            "status": "failed"
-        }
+    return await request_engine.invoke(payload)
 
 
 if __name__ == "__main__":
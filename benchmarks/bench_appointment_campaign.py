@@ -0,0 +1,196 @@
+"""
+Benchmark - Appointment Reminder Campaign
+Loads appointments (20,000 by default) spread over a few days into the fake
+hospital-appointments table and reminds everyone with a confirmed
+appointment tomorrow.
+
+Before: one send_appointment_reminder per appointment (get_item, enqueue,
+and an update_item per delivered reminder), timed on a sample and scaled
+up. After: AppointmentReminderCampaign streams DateIndex pages into the
+dispatcher and marks delivered reminders 25 at a time. The first campaign
+"crashes": it stops queueing part-way and loses some of its reminder_sent
+updates. The second, on the same SQLite outbox, must finish the job
+without delivering any reminder twice.
+
+Usage:
+    python -m benchmarks.bench_appointment_campaign --appointments 20000 --failure-rate 0.2
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from botocore.exceptions import ClientError
+
+from core import aws_clients
+from core.fakes import FakeChannel, FakeDynamoDB
+from core.notifications import NotificationDispatcher, SQLiteOutbox
+from core.reminder_campaign import AppointmentReminderCampaign, appointment_reminder, mark_reminders_sent
+
+
+TODAY = datetime(2025, 3, 1)
+TOMORROW = (TODAY + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def load(dynamodb: FakeDynamoDB, appointments: int, days: int, seed: int) -> int:
+    """Write the appointments; returns how many tomorrow still need a reminder"""
+    rng = random.Random(seed)
+    due = 0
+    with dynamodb.Table('hospital-appointments').batch_writer(overwrite_by_pkeys=['appointment_id']) as batch:
+        for n in range(appointments):
+            date = (TODAY + timedelta(days=1 + rng.randrange(days))).strftime('%Y-%m-%d')
+            status = 'confirmed' if rng.random() < 0.9 else 'cancelled'
+            reminded = rng.random() < 0.05
+            due += date == TOMORROW and status == 'confirmed' and not reminded
+            batch.put_item(Item={
+                'appointment_id': f"APT-{n:07d}",
+                'patient_id': f"P{rng.randrange(appointments // 2 or 1):06d}",
+                'department': rng.choice(['Cardiology', 'Orthopedics', 'General Medicine', 'Pediatrics']),
+                'doctor': f"Dr. {rng.choice(['Smith', 'Patel', 'Garcia', 'Chen'])}",
+                'date': date,
+                'time': f"{9 + rng.randrange(8):02d}:{rng.choice(['00', '30'])}",
+                'status': status,
+                'reminder_sent': reminded
+            })
+    return due
+
+
+def per_appointment(dynamodb: FakeDynamoDB, dispatcher: NotificationDispatcher, ids, workers: int):
+    """The old way: every appointment fetched, queued and marked on its own"""
+    table = dynamodb.Table('hospital-appointments')
+
+    def remind(appointment_id: str):
+        appointment = table.get_item(Key={'appointment_id': appointment_id})['Item']
+        if appointment['status'] != 'confirmed' or appointment.get('reminder_sent'):
+            return
+        dispatcher.enqueue(**appointment_reminder(appointment))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(remind, ids))
+    dispatcher.flush(timeout=600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the appointment reminder campaign")
+    parser.add_argument('--appointments', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=5, help="Days the appointments are spread over")
+    parser.add_argument('--latency', type=float, default=0.005, help="Fake DynamoDB latency per call")
+    parser.add_argument('--send-latency', type=float, default=0.02, help="Fake SNS/SES latency per call")
+    parser.add_argument('--failure-rate', type=float, default=0.2, help="Fraction of channel sends that fail")
+    parser.add_argument('--workers', type=int, default=8, help="Dispatcher delivery threads")
+    parser.add_argument('--sample', type=int, default=1000, help="Appointments timed for the per-appointment baseline")
+    parser.add_argument('--interrupt-after', type=int, default=10, help="Pages before the first campaign stops")
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Appointment Reminder Campaign Benchmark")
+    print("=" * 72)
+
+    dynamodb = FakeDynamoDB()
+    due = load(dynamodb, args.appointments, args.days, args.seed)
+    table = dynamodb.Table('hospital-appointments')
+    tomorrow_ids = sorted(key for key, item in table.items.items() if item['date'] == TOMORROW)
+    print(f"{args.appointments:,} appointments over {args.days} days, {len(tomorrow_ids):,} tomorrow, "
+          f"{due:,} needing a reminder")
+    print(f"DynamoDB {args.latency * 1000:.0f}ms, channel {args.send_latency * 1000:.0f}ms, "
+          f"{args.failure_rate:.0%} send failures, {args.workers} delivery workers\n")
+    dynamodb.latency = args.latency
+    aws_clients.set_client('dynamodb', dynamodb, kind='client')
+    aws_clients.set_client('dynamodb', dynamodb, kind='resource')
+
+    def mark_one_by_one(notifications):
+        for notification in notifications:
+            table.update_item(
+                Key={'appointment_id': notification['ref']},
+                UpdateExpression='SET reminder_sent = :val, reminder_sent_at = :time',
+                ExpressionAttributeValues={':val': True, ':time': datetime.utcnow().isoformat()}
+            )
+
+    # Before: one appointment at a time, on a sample (its appointments are reset afterwards)
+    sample = tomorrow_ids[:args.sample]
+    saved = {key: dict(table.items[key]) for key in sample}
+    dispatcher = NotificationDispatcher(
+        SQLiteOutbox(tempfile.mktemp(suffix='.db')),
+        {'email': FakeChannel(latency=args.send_latency, failure_rate=args.failure_rate, seed=1)},
+        workers=args.workers, max_attempts=4, retry_base=0.01,
+        hooks={'appointment_reminder': [mark_one_by_one]}
+    )
+    calls_before = sum(dynamodb.stats['calls'].values())
+    started = time.perf_counter()
+    per_appointment(dynamodb, dispatcher, sample, args.workers)
+    baseline = (time.perf_counter() - started) * len(tomorrow_ids) / len(sample)
+    baseline_calls = (sum(dynamodb.stats['calls'].values()) - calls_before) * len(tomorrow_ids) // len(sample)
+    dispatcher.close()
+    table.items.update(saved)
+
+    # After: the campaign; the first run is cut off and loses some reminder_sent updates
+    outbox_path = tempfile.mktemp(suffix='.db')
+    channel = FakeChannel(latency=args.send_latency, failure_rate=args.failure_rate, seed=2)
+    lost = {'batches': 0}
+
+    def lossy_mark(notifications):
+        lost['batches'] += 1
+        if lost['batches'] % 3:
+            mark_reminders_sent(notifications)
+
+    dispatcher = NotificationDispatcher(SQLiteOutbox(outbox_path), {'email': channel}, workers=args.workers,
+                                        max_attempts=4, retry_base=0.01,
+                                        hooks={'appointment_reminder': [lossy_mark]})
+    enqueue_many, pages = dispatcher.enqueue_many, {'count': 0}
+
+    def interrupted(notifications):
+        pages['count'] += 1
+        if pages['count'] > args.interrupt_after:
+            raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'campaign crashed'}}, 'Query')
+        return enqueue_many(notifications)
+
+    dispatcher.enqueue_many = interrupted
+    calls_before = sum(dynamodb.stats['calls'].values())
+    first = AppointmentReminderCampaign(lambda: dynamodb, dispatcher, mark_sent=None).run(TOMORROW)
+    dispatcher.close()
+
+    dispatcher = NotificationDispatcher(SQLiteOutbox(outbox_path), {'email': channel}, workers=args.workers,
+                                        max_attempts=4, retry_base=0.01,
+                                        hooks={'appointment_reminder': [mark_reminders_sent]})
+    second = AppointmentReminderCampaign(lambda: dynamodb, dispatcher).run(TOMORROW)
+    dispatcher.close()
+    campaign_seconds = first['seconds'] + second['seconds']
+    campaign_calls = sum(dynamodb.stats['calls'].values()) - calls_before
+    delivered = len(channel.deliveries)
+
+    print(f"{'Strategy':<30} {'time':>9} {'reminders/s':>12} {'API calls':>10}")
+    print(f"{'Per appointment (before)':<30} {baseline:8.1f}s {due / baseline:12,.0f} {baseline_calls:10,}"
+          f"  (scaled from {len(sample):,})")
+    print(f"{'DateIndex campaign':<30} {campaign_seconds:8.1f}s {delivered / campaign_seconds:12,.0f} {campaign_calls:10,}")
+
+    # Small runs can finish in fewer pages than --interrupt-after, so the crash never fires
+    crashed = pages['count'] > args.interrupt_after
+    print(f"\nFirst run {f'cut off after {args.interrupt_after} pages' if crashed else 'finished before the cut-off'}: "
+          f"{first['queued']:,} queued, {first['delivered']:,} delivered, every third batch of updates lost")
+    print(f"Second run: {second['due']:,} still due, {second['queued']:,} queued, "
+          f"{second['already_queued']:,} already in the outbox, {second['repaired']:,} marked without resending")
+    print(f"Report: {second['delivered']:,} delivered, {second['failed']:,} failed, {second['pending']:,} pending"
+          + (f"; e.g. {second['failures'][0]['appointment_id']}: {second['failures'][0]['error']}"
+             if second['failures'] else ""))
+
+    duplicates = sum(count - 1 for count in channel.deliveries.values())
+    reminded = {key for key in tomorrow_ids if table.items[key].get('reminder_sent_at')}
+    delivered_ids = {n['ref'] for n in channel.sent}
+    print(f"Duplicate deliveries: {duplicates}; delivered but not marked: {len(delivered_ids - reminded)}")
+    os.remove(outbox_path)
+
+    if (duplicates or delivered + second['failed'] != due or delivered_ids - reminded
+            or second['pending'] or (crashed and not first['failed_dates'])):
+        print("\nCampaign check FAILED")
+        sys.exit(1)
+    print(f"\n✓ {due:,} reminders delivered (or reported failed) exactly once across the crashed and resumed runs")
+
+
+if __name__ == '__main__':
+    main()
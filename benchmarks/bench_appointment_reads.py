@@ -0,0 +1,145 @@
+"""
+Benchmark - Appointment Reads
+Compares the old first-page-only get_appointments, a naive fix that pages
+through the whole partition, and the paginated reader that pushes the date
+range into the PatientIndex key condition, for patients with thousands of
+appointments on a local DynamoDB stand-in.
+
+Usage:
+    python -m benchmarks.bench_appointment_reads --appointments 5000 --latency 0.01
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from core import aws_clients
+from core.fakes import FakeDynamoDB
+from tools import booking_tools
+
+
+TABLE = 'hospital-appointments'
+
+
+def seed(dynamodb: FakeDynamoDB, patient_id: str, appointments: int, today: datetime):
+    """Spread appointments over the past ten years and the next year"""
+    statuses = ['completed'] * 6 + ['cancelled'] * 2 + ['confirmed'] * 2
+    with dynamodb.Table(TABLE).batch_writer() as batch:
+        for n in range(appointments):
+            day = today + timedelta(days=random.randint(-3650, 365))
+            batch.put_item(Item={
+                'appointment_id': f"APT-{patient_id}-{n:05d}",
+                'patient_id': patient_id,
+                'department': 'General Medicine',
+                'doctor': 'Dr. Sarah Johnson',
+                'date': day.strftime('%Y-%m-%d'),
+                'time': f"{random.randint(8, 17):02d}:{random.choice(['00', '30'])}",
+                'reason': 'Routine follow-up',
+                'status': 'confirmed' if day >= today else random.choice(statuses),
+                'reminder_sent': False,
+                'created_at': day.isoformat(),
+                'notes': 'Patient reports stable symptoms. ' * 8
+            })
+
+
+def in_window(item: Dict, start: str, end: str) -> bool:
+    return start <= item.get('date', '') <= end and item.get('status') == 'confirmed'
+
+
+def legacy_first_page(table, patient_id: str, start: str, end: str) -> List[Dict]:
+    """Previous get_appointments: one query, whole items, filtering in Python"""
+    response = table.query(
+        IndexName='PatientIndex',
+        KeyConditionExpression='patient_id = :pid',
+        ExpressionAttributeValues={':pid': patient_id}
+    )
+    return [a for a in response.get('Items', []) if in_window(a, start, end)]
+
+
+def legacy_all_pages(table, patient_id: str, start: str, end: str) -> List[Dict]:
+    """Correct but expensive: follow LastEvaluatedKey over the whole partition"""
+    items, kwargs = [], {}
+    while True:
+        response = table.query(
+            IndexName='PatientIndex',
+            KeyConditionExpression='patient_id = :pid',
+            ExpressionAttributeValues={':pid': patient_id},
+            **kwargs
+        )
+        items.extend(a for a in response.get('Items', []) if in_window(a, start, end))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def measure(dynamodb: FakeDynamoDB, runs: int, func, *args) -> Dict:
+    capacity_before = dynamodb.stats['capacity_units'].get(TABLE, 0)
+    calls_before = dynamodb.stats['calls'].get('Query', 0)
+    started = time.perf_counter()
+    for _ in range(runs):
+        result = func(*args)
+    elapsed = (time.perf_counter() - started) / runs
+    return {
+        'ms': elapsed * 1000,
+        'rcu': (dynamodb.stats['capacity_units'].get(TABLE, 0) - capacity_before) / runs,
+        'queries': (dynamodb.stats['calls'].get('Query', 0) - calls_before) / runs,
+        'returned': len(result if isinstance(result, list) else result['appointments'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark paginated appointment reads")
+    parser.add_argument('--appointments', type=int, default=5000, help="Appointments seeded for the patient")
+    parser.add_argument('--latency', type=float, default=0.01, help="Simulated seconds per DynamoDB call")
+    parser.add_argument('--window-days', type=int, default=30, help="Upcoming window to read")
+    parser.add_argument('--runs', type=int, default=5, help="Repetitions per reader")
+    args = parser.parse_args()
+
+    random.seed(7)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today.strftime('%Y-%m-%d')
+    end = (today + timedelta(days=args.window_days)).strftime('%Y-%m-%d')
+    patient_id = 'P30001'
+
+    dynamodb = FakeDynamoDB()
+    seed(dynamodb, patient_id, args.appointments, today)
+    dynamodb.latency = args.latency
+    aws_clients.set_client('dynamodb', dynamodb, kind='resource')
+    table = dynamodb.Table(TABLE)
+
+    expected = sum(1 for item in table.items.values() if in_window(item, start, end))
+
+    print("=" * 72)
+    print("Appointment Read Benchmark")
+    print("=" * 72)
+    print(f"{args.appointments} appointments, {expected} confirmed in the next {args.window_days} days, "
+          f"{args.latency * 1000:.0f} ms per DynamoDB call\n")
+
+    readers = [
+        ('First page only (before)', legacy_first_page, (table, patient_id, start, end)),
+        ('All pages, Python filter', legacy_all_pages, (table, patient_id, start, end)),
+        ('Key-condition range', booking_tools.get_appointments, (patient_id, 'confirmed', start, end)),
+        ('Key-condition, limit=10', booking_tools.get_appointments, (patient_id, 'confirmed', start, end, 10)),
+    ]
+    print(f"{'Reader':<26} {'latency':>10} {'RCU':>8} {'queries':>8} {'returned':>9}")
+    results = {}
+    for label, func, func_args in readers:
+        results[label] = stats = measure(dynamodb, args.runs, func, *func_args)
+        print(f"{label:<26} {stats['ms']:8.1f}ms {stats['rcu']:8.1f} {stats['queries']:8.0f} {stats['returned']:9d}")
+
+    full, paged = results['All pages, Python filter'], results['Key-condition range']
+    missing = expected - results['First page only (before)']['returned']
+    print(f"\nFirst-page reader silently dropped {missing} of {expected} appointments")
+    print(f"Key-condition reader: {(1 - paged['rcu'] / full['rcu']) * 100:.0f}% fewer RCUs and "
+          f"{(1 - paged['ms'] / full['ms']) * 100:.0f}% lower latency than reading every page")
+
+    first = booking_tools.get_appointments(patient_id, 'confirmed', start, end, limit=10)
+    second = booking_tools.get_appointments(patient_id, 'confirmed', start, end, limit=10, cursor=first['next_cursor'])
+    overlap = {a['appointment_id'] for a in first['appointments']} & {a['appointment_id'] for a in second['appointments']}
+    print(f"Cursor paging: {first['total']} + {second['total']} appointments, {len(overlap)} repeated")
+
+
+if __name__ == '__main__':
+    main()
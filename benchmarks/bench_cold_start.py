@@ -0,0 +1,121 @@
+"""
+Benchmark - Cold Start
+Runs each entry point in a fresh interpreter with `python -X importtime`,
+reporting process wall time, the slowest imports (two levels deep) and the time
+to the first response (local_agent against the fake Bedrock) or to the
+first constructed agent (hospital_agent, which needs strands and
+bedrock_agentcore installed).
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 3 --top 8
+    python -m benchmarks.bench_cold_start --budget-ms 1500   # exit 1 if any scenario is slower
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List, Tuple
+
+
+ROOT = Path(__file__).parent.parent
+
+# name -> code run in a fresh interpreter; each prints a JSON dict of phase timings (ms)
+SCENARIOS = {
+    'import agents': """
+import time; t0 = time.perf_counter()
+import agents
+ready = time.perf_counter()
+import json; print(json.dumps({'ready': (ready - t0) * 1000}))
+""",
+    'hospital_agent ready': """
+import time; t0 = time.perf_counter()
+from agents.hospital_agent import hospital_system
+ready = time.perf_counter()
+hospital_system.triage_agent
+first = time.perf_counter()
+import json; print(json.dumps({'ready': (ready - t0) * 1000, 'first agent': (first - t0) * 1000}))
+""",
+    'local_agent first response': """
+import time; t0 = time.perf_counter()
+import local_agent
+ready = time.perf_counter()
+local_agent.handle_query('I have a mild headache since this morning', 'P12345')
+first = time.perf_counter()
+import json; print(json.dumps({'ready': (ready - t0) * 1000, 'first response': (first - t0) * 1000}))
+"""
+}
+
+
+def parse_importtime(stderr: str, max_depth: int = 1) -> List[Tuple[str, float]]:
+    """Imports up to `max_depth` levels deep and their cumulative time (ms) from -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= max_depth:
+            imports.append(('  ' * depth + name.strip(), int(cumulative) / 1000))
+    return imports
+
+
+def run_scenario(code: str) -> Dict[str, Any]:
+    env = {**os.environ, 'BEDROCK_FAKE': '1', 'RESPONSE_CACHE_DISABLED': '1',
+           'AWS_REGION': os.getenv('AWS_REGION', 'us-east-1')}
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        error = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+        return {'error': error[-1] if error else f"exit code {proc.returncode}"}
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {'wall': wall, 'phases': phases, 'imports': parse_importtime(proc.stderr)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start of the agent entry points")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh interpreters per scenario (median reported)")
+    parser.add_argument('--top', type=int, default=8, help="Slowest imports to list")
+    parser.add_argument('--budget-ms', type=float, help="Fail when a scenario's median wall time exceeds this")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"Cold Start Benchmark (fresh interpreter per run, median of {args.runs})")
+    print("=" * 72)
+
+    over_budget = []
+    for name, code in SCENARIOS.items():
+        runs = [run_scenario(code) for _ in range(args.runs)]
+        failed = next((r for r in runs if 'error' in r), None)
+        print(f"\n{name}")
+        if failed:
+            print(f"  skipped: {failed['error']}")
+            continue
+
+        wall = median(r['wall'] for r in runs)
+        phases = {phase: median(r['phases'][phase] for r in runs) for phase in runs[0]['phases']}
+        print(f"  process wall time {wall:8.1f}ms")
+        for phase, ms in phases.items():
+            print(f"  {phase:<17} {ms:8.1f}ms")
+
+        slowest = sorted(runs[len(runs) // 2]['imports'], key=lambda item: -item[1])[:args.top]
+        print("  slowest imports:")
+        for module, ms in slowest:
+            print(f"    {module:<36} {ms:8.1f}ms")
+
+        if args.budget_ms is not None and wall > args.budget_ms:
+            over_budget.append(name)
+
+    if over_budget:
+        print(f"\nOver the {args.budget_ms:.0f}ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark - Patient Context Loading
+Compares the old serial get_item + query path with PatientContextLoader
+(parallel reads) and load_many (BatchGetItem) against a local DynamoDB
+stand-in with simulated network latency.
+
+Usage:
+    python -m benchmarks.bench_context_loading --latency 0.015 --patients 200
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from core.context_loader import PatientContextLoader
+from core.fakes import FakeDynamoDB
+from core.stats import summarize_latencies
+
+
+def seed(dynamodb: FakeDynamoDB, patients: int) -> List[str]:
+    """Create patients with a handful of appointments and memory entries each"""
+    patient_ids = [f"P{20000 + i}" for i in range(patients)]
+    with dynamodb.Table('hospital-patients').batch_writer() as batch:
+        for pid in patient_ids:
+            batch.put_item(Item={
+                'patient_id': pid,
+                'name': f"Patient {pid}",
+                'medical_history': {'conditions': ['Asthma'], 'allergies': ['Penicillin'], 'medications': []}
+            })
+    with dynamodb.Table('hospital-appointments').batch_writer() as batch:
+        for pid in patient_ids:
+            for n in range(random.randint(1, 8)):
+                batch.put_item(Item={
+                    'appointment_id': f"APT-{pid}-{n}",
+                    'patient_id': pid,
+                    'date': f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+                    'time': '10:00',
+                    'department': 'General Medicine',
+                    'status': 'confirmed'
+                })
+    with dynamodb.Table('hospital-memory').batch_writer() as batch:
+        for pid in patient_ids:
+            for n in range(3):
+                batch.put_item(Item={
+                    'memory_id': f"MEM-{pid}-{n}",
+                    'patient_id': pid,
+                    'memory_type': 'reminder' if n == 0 else 'interaction',
+                    'status': 'scheduled',
+                    'content': 'Follow up on test results'
+                })
+    return patient_ids
+
+
+def serial_context(dynamodb, patient_id: str) -> Dict:
+    """The previous _get_patient_context access pattern: one call after another"""
+    context = {'medical_history': {}, 'appointments': [], 'reminders': []}
+    response = dynamodb.Table('hospital-patients').get_item(Key={'patient_id': patient_id})
+    context['medical_history'] = response.get('Item', {}).get('medical_history', {})
+    response = dynamodb.Table('hospital-appointments').query(
+        IndexName='PatientIndex',
+        KeyConditionExpression='patient_id = :pid',
+        ExpressionAttributeValues={':pid': patient_id},
+        Limit=5
+    )
+    context['appointments'] = response.get('Items', [])
+    response = dynamodb.Table('hospital-memory').query(
+        IndexName='PatientMemoryIndex',
+        KeyConditionExpression='patient_id = :pid',
+        ExpressionAttributeValues={':pid': patient_id}
+    )
+    context['reminders'] = [m for m in response.get('Items', []) if m.get('memory_type') == 'reminder']
+    return context
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark patient context loading")
+    parser.add_argument('--latency', type=float, default=0.015, help="Simulated seconds per DynamoDB call")
+    parser.add_argument('--patients', type=int, default=200, help="Patients to seed and load")
+    parser.add_argument('--batch-size', type=int, default=50, help="Patients per load_many call")
+    args = parser.parse_args()
+
+    dynamodb = FakeDynamoDB()
+    patient_ids = seed(dynamodb, args.patients)
+    dynamodb.latency = args.latency
+    # No patient cache: every row measures DynamoDB reads, not hits left by the previous row
+    loader = PatientContextLoader(dynamodb, cache=None)
+
+    print("=" * 60)
+    print("Patient Context Loading Benchmark")
+    print("=" * 60)
+    print(f"{args.patients} patients, {args.latency * 1000:.0f} ms per DynamoDB call\n")
+
+    serial = summarize_latencies([timed(serial_context, dynamodb, pid) for pid in patient_ids])
+    parallel = summarize_latencies([timed(loader.load, pid) for pid in patient_ids])
+
+    batches = [patient_ids[i:i + args.batch_size] for i in range(0, len(patient_ids), args.batch_size)]
+    batch_time = sum(timed(loader.load_many, batch) for batch in batches)
+
+    for label, stats in (('Serial (before)', serial), ('Parallel load()', parallel)):
+        print(f"{label:<18} p50 {stats['p50'] * 1000:6.1f} ms   p95 {stats['p95'] * 1000:6.1f} ms   "
+              f"p99 {stats['p99'] * 1000:6.1f} ms")
+    print(f"{'Batch load_many()':<18} {batch_time / len(patient_ids) * 1000:6.1f} ms per patient "
+          f"({args.batch_size} per call)")
+    print(f"\nPer-request reduction: {(1 - parallel['p50'] / serial['p50']) * 100:.0f}% at p50")
+    print(f"DynamoDB calls: {dynamodb.stats['calls']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark - Conversation Memory Growth
+Appends many turns for many patients and compares the unbounded per-patient
+list local_agent kept before (MEMORY[patient_id].append(...)) with
+ConversationMemory: total bytes held, and the history one patient's
+prompt would carry (every turn vs summary plus recent turns).
+
+Usage:
+    python -m benchmarks.bench_conversation_memory --patients 2000 --turns 200
+"""
+
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from core.conversation_memory import ConversationMemory
+from core.prompt_context import compact_json
+from core.rate_limiter import estimate_tokens
+
+
+def make_turn(patient: int, n: int) -> Dict[str, Any]:
+    return {
+        'query': f"Patient {patient} follow-up {n}: my headache is back and I feel dizzy",
+        'response': ("**Urgency Level:** Medium. Rest, hydrate and book a General Medicine visit "
+                     "if symptoms persist beyond 48 hours. ")[:200],
+        'agent': ('triage', 'booking', 'reminder')[n % 3],
+        'timestamp': (datetime(2025, 1, 1) + timedelta(minutes=n)).isoformat()
+    }
+
+
+def _bytes(value: Any) -> int:
+    return len(json.dumps(value, default=str).encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation memory growth")
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--turns', type=int, default=200, help="Turns per patient")
+    args = parser.parse_args()
+
+    legacy: Dict[str, List[Dict[str, Any]]] = {}
+    memory = ConversationMemory()
+
+    started = time.perf_counter()
+    for n in range(args.turns):
+        for p in range(args.patients):
+            legacy.setdefault(f"P{p}", []).append(make_turn(p, n))
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for n in range(args.turns):
+        for p in range(args.patients):
+            memory.append(f"P{p}", make_turn(p, n))
+    append_seconds = time.perf_counter() - started
+    memory.flush()
+
+    before = compact_json({'recent_interactions': legacy['P0']})
+    after = compact_json({'recent_interactions': memory.turns('P0'),
+                          'conversation_summary': memory.summary('P0')})
+    stats = memory.stats()
+    legacy_bytes = sum(_bytes(turns) for turns in legacy.values())
+
+    print("=" * 66)
+    print("Conversation Memory Benchmark")
+    print("=" * 66)
+    print(f"{args.patients:,} patients x {args.turns} turns\n")
+    print(f"{'':<28} {'unbounded list':>16} {'ConversationMemory':>20}")
+    print(f"{'memory held':<28} {legacy_bytes / 2 ** 20:>14.1f}MB {stats['bytes'] / 2 ** 20:>18.1f}MB")
+    print(f"{'append time':<28} {legacy_seconds:>15.2f}s {append_seconds:>19.2f}s")
+    print(f"{'history tokens (1 patient)':<28} {estimate_tokens(before):>16,} {estimate_tokens(after):>20,}")
+    print(f"\nFolds: {stats['folds']:,}  dropped turns: {stats['dropped_turns']:,}  "
+          f"fold errors: {stats['fold_errors']}")
+
+
+if __name__ == '__main__':
+    main()
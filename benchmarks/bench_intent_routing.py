@@ -0,0 +1,98 @@
+"""
+Benchmark - Intent Routing
+Checks IntentClassifier against the keyword routing handle_query used
+before (kept below as a reference) and times it. Every message the old
+routing sent to triage must still go to triage; other differences are
+counted (they come from the added keywords and weights). A few fixed
+cases cover symptoms mixed with booking words and symptom stems inside
+longer words.
+
+Usage:
+    python -m benchmarks.bench_intent_routing --messages 20000
+"""
+
+import sys
+import time
+import random
+import argparse
+from typing import List
+
+from core.intent import IntentClassifier
+
+
+PHRASES = [
+    'I have a fever', 'my chest pain is getting worse', 'persistent cough for a week', 'I feel sick',
+    'my knee hurts', 'I have a headache', 'stomachache since lunch', 'feeling dizzy', 'new rash on my arm',
+    'can I book an appointment', 'what is the availability on Friday', 'please schedule a checkup',
+    'I need to reschedule', 'remind me tomorrow', 'send me a notification', 'set up a follow-up',
+    'what are your opening hours', 'thank you', 'who is my doctor'
+]
+EXPECTED = {
+    "I need to book an appointment for my chest pain": 'triage',
+    "I have a headache": 'triage',
+    "Book me in, I've been seasick all week": 'triage',
+    "Can I book an appointment for Friday?": 'booking',
+    "Remind me about my follow-up": 'reminder',
+}
+
+
+def legacy_route(prompt: str) -> str:
+    """handle_query's routing before the classifier (first matching list wins)"""
+    prompt_lower = prompt.lower()
+    if any(word in prompt_lower for word in ['symptom', 'fever', 'cough', 'pain', 'sick', 'hurt']):
+        return 'triage'
+    if any(word in prompt_lower for word in ['appointment', 'book', 'schedule', 'availability']):
+        return 'booking'
+    if any(word in prompt_lower for word in ['remind', 'notification', 'follow-up']):
+        return 'reminder'
+    return 'general'
+
+
+def generate(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [' and '.join(rng.sample(PHRASES, rng.randint(1, 3))) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and parity-check intent routing")
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    messages = generate(args.messages, args.seed)
+    classifier = IntentClassifier()
+
+    print("=" * 66)
+    print("Intent Routing Benchmark")
+    print("=" * 66)
+    print(f"{args.messages:,} messages\n")
+
+    legacy = [legacy_route(m) for m in messages]
+    started = time.perf_counter()
+    routed = [classifier.predict(m)[0] for m in messages]
+    elapsed = time.perf_counter() - started
+    for m in messages:
+        classifier.classify(m)
+
+    lost_triage = sum(old == 'triage' and new != 'triage' for old, new in zip(legacy, routed))
+    differences = sum(old != new for old, new in zip(legacy, routed))
+    wrong = {m: classifier.predict(m)[0] for m, intent in EXPECTED.items() if classifier.predict(m)[0] != intent}
+
+    print(f"  {'triage messages routed elsewhere':<36} {lost_triage:>8,}")
+    print(f"  {'other differences (expected)':<36} {differences - lost_triage:>8,}")
+    print(f"  {'fixed cases wrong':<36} {len(wrong):>8,}")
+    for message, intent in wrong.items():
+        print(f"    {message!r} -> {intent} (expected {EXPECTED[message]})")
+
+    stats = classifier.stats()
+    print(f"\nPredict: {elapsed / args.messages * 1e6:.2f}us per message, "
+          f"fast-path hit rate {stats['hit_rate']:.1%}")
+
+    if lost_triage or wrong:
+        print("\nParity check FAILED")
+        sys.exit(1)
+    print("\n✓ Every symptom message still routes to triage")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark - Metrics Registry
+Measures what recording a counter and a histogram sample costs on the
+request path, then drives local_agent (fake Bedrock with throttling) with
+the EMF and Prometheus textfile exporters flushing in the background and
+checks the output: the Requests counts and RequestLatency samples across
+all EMF lines match the requests sent, the token counters match what the
+fake model reported, and the Prometheus text parses.
+
+Usage:
+    python -m benchmarks.bench_metrics --queries 64 --flush-interval 0.2
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('BEDROCK_FAKE', '1')
+os.environ.setdefault('RESPONSE_CACHE_DISABLED', '1')
+
+import local_agent
+from core.fakes import FakeBedrockRuntime, _default_responder
+from core.metrics import EMFExporter, MetricsRegistry, PrometheusFileExporter, metrics
+from core.rate_limiter import bedrock_limiter
+
+
+QUERIES = [
+    "I have fever and cough. What should I do?",
+    "I'd like to schedule an appointment for next week",
+    "Show my upcoming reminders",
+    "Can I book Pediatrics on Tuesday afternoon?",
+    "I have a mild headache since this morning",
+]
+
+PROMETHEUS_LINE = re.compile(r'^(# TYPE [a-z_][a-z0-9_]* (counter|gauge|histogram)'
+                             r'|[a-z_][a-z0-9_]*(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? -?[0-9.e+-]+)$')
+
+
+def record_cost(iterations: int) -> float:
+    """Seconds per request's worth of recording: one counter increment and one histogram sample"""
+    registry = MetricsRegistry()
+    started = time.perf_counter()
+    for n in range(iterations):
+        registry.increment('Requests', agent='triage')
+        registry.observe('RequestLatency', n % 500, agent='triage')
+    return (time.perf_counter() - started) / iterations
+
+
+def read_emf(path: str):
+    """Sum counters and histogram sample counts over every EMF line in the file"""
+    counters, samples, lines = {}, {}, 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            lines += 1
+            directive = record['_aws']['CloudWatchMetrics'][0]
+            dims = tuple((name, record[name]) for name in directive['Dimensions'][0])
+            for metric in directive['Metrics']:
+                value = record[metric['Name']]
+                key = (metric['Name'], dims)
+                if isinstance(value, dict):
+                    samples[key] = samples.get(key, 0) + sum(value['Counts'])
+                else:
+                    counters[key] = counters.get(key, 0) + value
+    return counters, samples, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the metrics registry")
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--callers', type=int, default=8, help="Concurrent local_agent requests")
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake model latency in seconds")
+    parser.add_argument('--throttle-rate', type=float, default=0.2, help="Fraction of fake Bedrock calls throttled")
+    parser.add_argument('--flush-interval', type=float, default=0.2, help="Seconds between background flushes")
+    parser.add_argument('--iterations', type=int, default=100000, help="Calls timed for the per-record cost")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Metrics Registry Benchmark")
+    print("=" * 72)
+
+    cost = record_cost(args.iterations)
+    print(f"Per request (1 counter + 1 histogram sample): {cost * 1e6:.2f}us\n")
+
+    # Token usage the fake model reports, tallied from the replies it actually sends
+    reported = {'input': 0, 'output': 0}
+    tally_lock = threading.Lock()
+
+    def responder(model_id: str, prompt: str) -> str:
+        text = _default_responder(model_id, prompt)
+        with tally_lock:
+            reported['input'] += len(prompt) // 4
+            reported['output'] += len(text) // 4
+        return text
+
+    emf_path = tempfile.mktemp(suffix='.jsonl')
+    prom_path = tempfile.mktemp(suffix='.prom')
+    metrics.flush()
+    metrics.configure(exporters=[EMFExporter(metrics.namespace, emf_path), PrometheusFileExporter(metrics, prom_path)],
+                      flush_interval=args.flush_interval)
+    local_agent.bedrock_runtime = FakeBedrockRuntime(responder=responder, first_token_latency=args.latency,
+                                                     throttle_rate=args.throttle_rate)
+    bedrock_limiter.configure(requests_per_minute=100000, tokens_per_minute=1e9)
+
+    def ask(n: int):
+        patient_id = f"P{12345 + n % 3}"
+        query = QUERIES[n % len(QUERIES)]
+        if n % 2:
+            return local_agent.handle_query(query, patient_id)
+        return ''.join(local_agent.handle_query_stream(query, patient_id))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        list(pool.map(ask, range(args.queries)))
+    elapsed = time.perf_counter() - started
+    metrics.flush()
+    metrics.configure(exporters=[])
+
+    counters, samples, lines = read_emf(emf_path)
+
+    def total(name, source=counters):
+        return sum(value for (metric, _), value in source.items() if metric == name)
+
+    requests = total('Requests')
+    latency_samples = total('RequestLatency', samples)
+    tokens_in, tokens_out = total('InputTokens'), total('OutputTokens')
+    by_agent = {dict(dims).get('agent'): value for (name, dims), value in counters.items() if name == 'Requests'}
+    print(f"{args.queries} requests in {elapsed:.2f}s -> {lines} EMF lines "
+          f"({args.flush_interval}s flushes)")
+    print(f"Requests by agent: {by_agent}")
+    print(f"Tokens: {tokens_in:,.0f} in / {tokens_out:,.0f} out counted, "
+          f"{reported['input']:,} / {reported['output']:,} reported by the model")
+    print(f"Bedrock throttles: {total('BedrockThrottles'):.0f} counted, "
+          f"{local_agent.bedrock_runtime.throttled} raised by the fake")
+
+    with open(prom_path, encoding='utf-8') as f:
+        prometheus = f.read().splitlines()
+    bad = [line for line in prometheus if not PROMETHEUS_LINE.match(line)]
+    print(f"Prometheus textfile: {len(prometheus)} lines, {len(bad)} malformed")
+    os.remove(emf_path)
+    os.remove(prom_path)
+
+    if (requests != args.queries or latency_samples != args.queries or bad
+            or tokens_in != reported['input'] or tokens_out != reported['output']
+            or total('BedrockThrottles') != local_agent.bedrock_runtime.throttled):
+        print("\nMetrics check FAILED")
+        for line in bad[:5]:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\n✓ Every request, token and throttle accounted for across {lines} background flushes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark - Model Tiering
+Drives local_agent with a mix of triage, booking, plain booking
+confirmations, confirmations that ask for a change, and reminder turns
+against a fake Bedrock whose fast model answers sooner than the standard
+one. The same turns are run with every call on the standard tier and then
+under the config.yaml policy, and compared on latency, cost (usage ledger)
+and per-tier ModelLatency. The run fails if a triage turn or a
+change-requesting confirmation lands on the fast model, or if a plain
+confirmation does not.
+
+Usage:
+    python -m benchmarks.bench_model_tiering --rounds 8 --fast-latency 0.03 --standard-latency 0.12
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('BEDROCK_FAKE', '1')
+os.environ.setdefault('RESPONSE_CACHE_DISABLED', '1')
+
+import local_agent
+from core.fakes import FakeBedrockRuntime
+from core.metrics import metrics
+from core.model_policy import ModelPolicy, load_model_policy
+from core.rate_limiter import bedrock_limiter
+from core.usage import UsageLedger
+
+
+# (query, tier it must run on under the config.yaml policy)
+TURNS = [
+    ("I have fever and cough. What should I do?", 'standard'),
+    ("I'd like to book a Cardiology appointment next week", 'standard'),
+    ("Yes, book it", 'fast'),
+    ("Okay, please book the 10:30 slot", 'fast'),
+    ("Yes, but can we reschedule the appointment to Friday?", 'standard'),
+    ("Remind me about my follow-up", 'standard'),
+    ("I have a rash and feel dizzy", 'standard'),
+    ("Sounds good, confirm the appointment", 'fast'),
+]
+
+
+def run(policy: ModelPolicy, model_latency: dict, rounds: int, callers: int):
+    """Every turn `rounds` times under a policy; returns (elapsed, latencies, ledger, fake)"""
+    local_agent.MODEL_POLICY = policy
+    local_agent.usage_ledger = UsageLedger()
+    fake = FakeBedrockRuntime(model_latency=model_latency)
+    local_agent.bedrock_runtime = fake
+    metrics.snapshot(reset=True)
+
+    def ask(n: int) -> float:
+        query, _ = TURNS[n % len(TURNS)]
+        started = time.perf_counter()
+        local_agent.handle_query(query, f"P{12345 + n % 3}")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        latencies = list(pool.map(ask, range(rounds * len(TURNS))))
+    return time.perf_counter() - started, latencies, local_agent.usage_ledger, fake
+
+
+def tier_latency() -> dict:
+    """Mean ModelLatency per tier since the last reset, from the metrics registry"""
+    means = {}
+    for (name, dims), histogram in metrics.snapshot(reset=True)['histograms'].items():
+        if name == 'ModelLatency':
+            means[dict(dims)['tier']] = (sum(histogram.sums) / sum(histogram.counts), sum(histogram.counts))
+    return means
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model tiering")
+    parser.add_argument('--rounds', type=int, default=8, help="Times each turn is sent")
+    parser.add_argument('--callers', type=int, default=4, help="Concurrent local_agent requests")
+    parser.add_argument('--fast-latency', type=float, default=0.03, help="Fake fast-model latency in seconds")
+    parser.add_argument('--standard-latency', type=float, default=0.12, help="Fake standard-model latency in seconds")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Model Tiering Benchmark")
+    print("=" * 72)
+
+    tiered = load_model_policy()
+    model_latency = {tiered.model_id('fast'): args.fast_latency, tiered.model_id('standard'): args.standard_latency}
+    bedrock_limiter.configure(requests_per_minute=100000, tokens_per_minute=1e9)
+    print(f"Fast tier {tiered.model_id('fast')} ({args.fast_latency * 1000:.0f}ms), "
+          f"standard tier {tiered.model_id('standard')} ({args.standard_latency * 1000:.0f}ms)\n")
+
+    single = ModelPolicy(tiered.tiers, default_tier='standard', escalation_tier='standard')
+    results = {}
+    for label, policy in (('All standard (before)', single), ('Tiered policy (after)', tiered)):
+        elapsed, latencies, ledger, fake = run(policy, model_latency, args.rounds, args.callers)
+        cost = sum(totals['cost'] for totals in ledger.totals('model').values())
+        results[label] = (elapsed, latencies, cost, tier_latency(), fake)
+
+    print(f"{'Policy':<24} {'turns':>6} {'mean':>9} {'wall':>8} {'cost':>10}   per-tier ModelLatency")
+    for label, (elapsed, latencies, cost, tiers, _) in results.items():
+        per_tier = ', '.join(f"{tier} {mean:.0f}ms x{count}" for tier, (mean, count) in sorted(tiers.items()))
+        print(f"{label:<24} {len(latencies):6} {sum(latencies) / len(latencies) * 1000:7.0f}ms "
+              f"{elapsed:7.2f}s ${cost:9.5f}   {per_tier}")
+
+    # Every turn must have run on the tier the policy promises
+    fake = results['Tiered policy (after)'][4]
+    wrong = []
+    for query, expected in TURNS:
+        models = {call['model_id'] for call in fake.calls if f"User Query: {query}" in call['prompt']}
+        if models != {tiered.model_id(expected)}:
+            wrong.append((query, expected, models))
+    stats = tiered.stats()
+    print(f"\nSelections: {stats['selections']}")
+    print(f"Escalations: {stats['escalations']}")
+
+    before, after = results['All standard (before)'], results['Tiered policy (after)']
+    if wrong or after[2] >= before[2]:
+        print("\nTiering check FAILED")
+        for query, expected, models in wrong:
+            print(f"  {query!r}: expected {expected}, ran on {sorted(models)}")
+        sys.exit(1)
+    print(f"\n✓ Triage and change requests stayed on the standard model; confirmations ran on the fast one "
+          f"({1 - after[2] / before[2]:.0%} cheaper)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark - Notification Dispatch
+Concurrent chat requests each send a notification. Compares the previous
+send_notification (DynamoDB put_item plus a channel send, both on the
+request path) with queueing in the dispatcher's outbox, then checks every
+notification was delivered exactly once despite channel failures and
+repeated sends.
+
+Usage:
+    python -m benchmarks.bench_notifications --notifications 2000 --failure-rate 0.1
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from core.fakes import FakeChannel, FakeDynamoDB
+from core.notifications import OUTBOX_BACKENDS, NotificationDispatcher, create_outbox, idempotency_key
+from core.stats import summarize_latencies
+
+
+def timed_calls(func: Callable[[int], None], count: int, callers: int) -> List[float]:
+    def call(i: int) -> float:
+        started = time.perf_counter()
+        func(i)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        return list(pool.map(call, range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the notification dispatcher")
+    parser.add_argument('--notifications', type=int, default=2000)
+    parser.add_argument('--callers', type=int, default=16, help="Concurrent chat requests")
+    parser.add_argument('--workers', type=int, default=4, help="Dispatcher delivery threads")
+    parser.add_argument('--latency', type=float, default=0.01, help="Fake DynamoDB latency per call")
+    parser.add_argument('--send-latency', type=float, default=0.03, help="Fake SNS/SES latency per call")
+    parser.add_argument('--failure-rate', type=float, default=0.1, help="Fraction of channel sends that fail")
+    parser.add_argument('--outbox', default='memory', choices=OUTBOX_BACKENDS)
+    args = parser.parse_args()
+
+    messages = [(f"P{i % 500:05d}", f"Your lab results #{i} are ready.") for i in range(args.notifications)]
+
+    print("=" * 72)
+    print("Notification Dispatch Benchmark")
+    print("=" * 72)
+    print(f"{args.notifications:,} notifications, {args.callers} concurrent requests, DynamoDB "
+          f"{args.latency * 1000:.0f}ms, channel {args.send_latency * 1000:.0f}ms, "
+          f"{args.failure_rate:.0%} send failures\n")
+
+    # Before: record and send inside the request (no retries)
+    dynamodb = FakeDynamoDB(latency=args.latency)
+    channel = FakeChannel(latency=args.send_latency, failure_rate=args.failure_rate, seed=1)
+    table = dynamodb.Table('hospital-memory')
+
+    def send_inline(i: int):
+        patient_id, message = messages[i]
+        key = idempotency_key(patient_id, 'general', message)
+        table.put_item(Item={'memory_id': key, 'patient_id': patient_id, 'memory_type': 'notification',
+                             'message': message, 'status': 'sent'})
+        channel.send_batch([{'key': key, 'patient_id': patient_id, 'type': 'general', 'message': message}])
+
+    started = time.perf_counter()
+    inline = summarize_latencies(timed_calls(send_inline, args.notifications, args.callers))
+    inline_total = time.perf_counter() - started
+    inline_delivered = len(channel.deliveries)
+    inline_calls = sum(dynamodb.stats['calls'].values())
+
+    # After: enqueue in the outbox, deliver from the worker pool; every message is sent twice
+    dynamodb = FakeDynamoDB(latency=args.latency)
+    channel = FakeChannel(latency=args.send_latency, failure_rate=args.failure_rate, seed=1)
+    sqlite_path = tempfile.mktemp(suffix='.db') if args.outbox == 'sqlite' else None
+    dispatcher = NotificationDispatcher(
+        create_outbox(args.outbox, sqlite_path, get_dynamodb=lambda: dynamodb), {'email': channel},
+        get_dynamodb=lambda: dynamodb,
+        workers=args.workers, max_attempts=8, retry_base=0.05, hooks={}
+    )
+
+    def send_queued(i: int):
+        patient_id, message = messages[i % args.notifications]
+        dispatcher.enqueue(patient_id, message)
+
+    started = time.perf_counter()
+    queued = summarize_latencies(timed_calls(send_queued, args.notifications * 2, args.callers))
+    enqueue_total = time.perf_counter() - started
+    drained = dispatcher.flush(timeout=300)
+    delivered_total = time.perf_counter() - started
+    stats = dispatcher.stats()
+    dispatcher.close()
+
+    print(f"{'Strategy':<22} {'p50':>9} {'p95':>9} {'max':>9} {'request time':>13} {'delivered':>10} {'API calls':>10}")
+    print(f"{'Inline (before)':<22} {inline['p50'] * 1000:7.2f}ms {inline['p95'] * 1000:7.2f}ms "
+          f"{inline['max'] * 1000:7.2f}ms {inline_total:12.2f}s {inline_delivered:10,} {inline_calls:10,}")
+    print(f"{'Outbox + workers':<22} {queued['p50'] * 1000:7.2f}ms {queued['p95'] * 1000:7.2f}ms "
+          f"{queued['max'] * 1000:7.2f}ms {enqueue_total:12.2f}s {len(channel.deliveries):10,} "
+          f"{sum(dynamodb.stats['calls'].values()):10,}")
+
+    latency = stats['delivery_latency']
+    duplicates = sum(count - 1 for count in channel.deliveries.values())
+    print(f"\nOutbox: {stats['duplicates']:,} repeated sends ignored, {stats['retries']:,} retries, "
+          f"{stats['failed']:,} failed after {dispatcher.max_attempts} attempts")
+    print(f"Queue to delivery: p50 {latency['p50'] * 1000:.0f}ms, p95 {latency['p95'] * 1000:.0f}ms, "
+          f"all drained in {delivered_total:.2f}s")
+    print(f"Duplicate deliveries: {duplicates}")
+
+    if not drained or duplicates or len(channel.deliveries) + stats['failed'] != args.notifications:
+        print("\nDelivery check FAILED")
+        sys.exit(1)
+    print("\n✓ Every notification delivered (or failed) exactly once")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark - Prompt Context Size
+Compares the context blocks HospitalMultiAgentSystem used to embed
+(json.dumps(..., indent=2) of whole sections, the full context for the
+supervisor) with ContextCompactor output for a long-history patient.
+
+Usage:
+    python -m benchmarks.bench_prompt_size --appointments 40 --interactions 10
+"""
+
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import yaml
+
+from core.context_loader import empty_context
+from core.prompt_context import ContextCompactor
+from core.rate_limiter import estimate_tokens
+
+
+ROOT = Path(__file__).parent.parent
+
+# Sections each prompt embedded before compaction
+LEGACY_SECTIONS = {
+    'supervisor': None,
+    'triage': 'medical_history',
+    'booking': 'appointments',
+    'reminder': 'reminders'
+}
+
+
+def build_context(appointments: int, reminders: int, interactions: int) -> Dict[str, Any]:
+    """Context as PatientContextLoader returns it: whole DynamoDB items"""
+    with open(ROOT / 'data' / 'mock_patients.json') as f:
+        patient = json.load(f)[1]
+    today = datetime(2025, 1, 15)
+    context = empty_context()
+    context['medical_history'] = patient['medical_history']
+    context['appointments'] = [{
+        'appointment_id': f"APT-{n:04d}-8f14e45f-ceea-467f-a8c7",
+        'patient_id': patient['patient_id'],
+        'department': 'General Medicine',
+        'date': (today - timedelta(days=30 * n)).strftime('%Y-%m-%d'),
+        'time': '14:30',
+        'reason': 'Diabetes follow-up and blood pressure review',
+        'doctor': 'Dr. Michael Chen',
+        'status': 'completed' if n else 'confirmed',
+        'created_at': (today - timedelta(days=30 * n + 7)).isoformat(),
+        'reminder_sent': True
+    } for n in range(appointments)]
+    context['reminders'] = [{
+        'memory_id': f"MEM-{n:04d}",
+        'reminder_id': f"MEM-{n:04d}",
+        'patient_id': patient['patient_id'],
+        'memory_type': 'reminder',
+        'type': 'medication',
+        'message': 'Take Metformin 500mg with breakfast and dinner',
+        'scheduled_date': (today + timedelta(days=n)).strftime('%Y-%m-%d'),
+        'status': 'scheduled',
+        'created_at': today.isoformat(),
+        'sent': False
+    } for n in range(reminders)]
+    context['recent_interactions'] = [{
+        'type': 'triage',
+        'content': "**Urgency Level:** Low\n\nBlood sugar readings slightly elevated. " * 4,
+        'timestamp': (today - timedelta(hours=n)).isoformat()
+    } for n in range(interactions)]
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt context size per agent")
+    parser.add_argument('--appointments', type=int, default=40)
+    parser.add_argument('--reminders', type=int, default=15)
+    parser.add_argument('--interactions', type=int, default=10)
+    args = parser.parse_args()
+
+    with open(ROOT / 'config.yaml') as f:
+        agents = yaml.safe_load(f)['agents']
+    context = build_context(args.appointments, args.reminders, args.interactions)
+
+    print("=" * 66)
+    print("Prompt Context Size Benchmark (estimated tokens, ~4 chars each)")
+    print("=" * 66)
+    print(f"{args.appointments} appointments, {args.reminders} reminders, "
+          f"{args.interactions} recent interactions\n")
+    print(f"{'Agent':<12} {'before':>10} {'after':>10} {'budget':>10} {'saved':>8}")
+
+    total_before = total_after = 0
+    for key, section in LEGACY_SECTIONS.items():
+        before = json.dumps(context if section is None else context.get(section), indent=2, default=str)
+        compactor = ContextCompactor.for_agent(key, agents.get(key))
+        after = compactor.render(context)
+        b, a = estimate_tokens(before), estimate_tokens(after)
+        total_before += b
+        total_after += a
+        print(f"{key:<12} {b:>10,} {a:>10,} {compactor.budget_tokens:>10,} {(1 - a / b) * 100:>7.0f}%")
+
+    print(f"\n{'all agents':<12} {total_before:>10,} {total_after:>10,} {'':>10} "
+          f"{(1 - total_after / total_before) * 100:>7.0f}%")
+
+
+if __name__ == '__main__':
+    main()
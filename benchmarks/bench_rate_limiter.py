@@ -0,0 +1,99 @@
+"""
+Benchmark - Bedrock Rate Limiting
+Runs concurrent callers against a fake Bedrock with a service-side request
+quota, comparing the old reactive retry loop (sleep 1/3/7/15 s on
+ThrottlingException) with call_claude going through the adaptive limiter,
+which starts above the quota and has to find it.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter --callers 16 --requests 96 --quota-rpm 600
+"""
+
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+os.environ.setdefault('BEDROCK_FAKE', '1')
+os.environ.setdefault('RESPONSE_CACHE_DISABLED', '1')
+
+import local_agent
+from core.fakes import FakeBedrockRuntime
+from core.rate_limiter import AdaptiveRateLimiter, is_throttling_error
+from core.stats import summarize_latencies
+
+
+def legacy_call(prompt: str, max_retries: int = 5) -> str:
+    """call_claude before the limiter: fixed exponential sleeps, no pacing"""
+    for attempt in range(max_retries):
+        try:
+            response = local_agent.bedrock_runtime.invoke_model(
+                modelId=local_agent.MODEL_ID, body=local_agent._request_body(prompt)
+            )
+            return json.loads(response['body'].read())['content'][0]['text']
+        except Exception as e:
+            if not is_throttling_error(e) or attempt == max_retries - 1:
+                return local_agent.THROTTLED_MESSAGE
+            time.sleep((2 ** attempt) + 1)
+    return local_agent.UNAVAILABLE_MESSAGE
+
+
+def run(call: Callable[[str], str], callers: int, requests: int) -> Dict:
+    def one(n: int) -> float:
+        started = time.perf_counter()
+        reply = call(f"Patient {n}: I have a mild headache since this morning")
+        return time.perf_counter() - started, reply != local_agent.THROTTLED_MESSAGE
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(one, range(requests)))
+    return {
+        'elapsed': time.perf_counter() - started,
+        'latency': summarize_latencies([r[0] for r in results]),
+        'succeeded': sum(1 for r in results if r[1])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Bedrock rate limiting")
+    parser.add_argument('--callers', type=int, default=16, help="Concurrent callers")
+    parser.add_argument('--requests', type=int, default=96, help="Total requests")
+    parser.add_argument('--quota-rpm', type=float, default=600, help="Fake service quota (requests/min)")
+    parser.add_argument('--latency', type=float, default=0.2, help="Fake model latency in seconds")
+    parser.add_argument('--limiter-rpm', type=float, default=900, help="Limiter ceiling (above the quota)")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Bedrock Rate Limiting Benchmark")
+    print("=" * 72)
+    print(f"{args.requests} requests from {args.callers} callers, quota {args.quota_rpm:.0f} rpm, "
+          f"limiter ceiling {args.limiter_rpm:.0f} rpm\n")
+
+    rows: List = []
+    for label, call, limiter in (
+        ('Reactive sleeps (before)', legacy_call, None),
+        ('Adaptive limiter', local_agent.call_claude,
+         AdaptiveRateLimiter(requests_per_minute=args.limiter_rpm, burst_seconds=0.5, acquire_timeout=60)),
+    ):
+        local_agent.bedrock_runtime = FakeBedrockRuntime(first_token_latency=args.latency,
+                                                         quota_rpm=args.quota_rpm, quota_burst=2)
+        if limiter is not None:
+            local_agent.bedrock_limiter = limiter
+        result = run(call, args.callers, args.requests)
+        rows.append((label, result, local_agent.bedrock_runtime.throttled, limiter))
+
+    print(f"{'Strategy':<26} {'total':>8} {'p50':>8} {'p95':>8} {'max':>8} {'throttles':>10} {'ok':>6}")
+    for label, result, throttled, _ in rows:
+        lat = result['latency']
+        print(f"{label:<26} {result['elapsed']:7.1f}s {lat['p50']:7.2f}s {lat['p95']:7.2f}s "
+              f"{lat['max']:7.2f}s {throttled:10d} {result['succeeded']:6d}")
+
+    limiter_stats = rows[-1][3].stats()
+    print(f"\nLimiter settled at {limiter_stats['requests_per_minute']:.0f} rpm "
+          f"({limiter_stats['throttles']} throttles, {limiter_stats['timeouts']} deadline timeouts)")
+
+
+if __name__ == '__main__':
+    main()
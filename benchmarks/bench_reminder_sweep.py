@@ -0,0 +1,168 @@
+"""
+Benchmark - Reminder Sweep
+Schedules reminders (1M by default) in the fake hospital-memory table,
+spread over a month, then finds and queues the ones due by mid-month.
+
+Before: reminders could only be found patient by patient through
+PatientReminderIndex (one query per patient; timed on a sample and
+scaled up). After: ReminderSweeper reads the sharded DueReminderIndex in
+parallel, claims each page conditionally and hands it to the notification
+dispatcher, whose delivery callback marks the reminders sent. The first
+sweep is interrupted part-way; the second (after the lease on the
+claimed-but-unqueued page has run out) must deliver exactly the rest, and
+reminders cancelled before the sweep must stay cancelled.
+
+Usage:
+    python -m benchmarks.bench_reminder_sweep --reminders 1000000 --latency 0.005
+"""
+
+import sys
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from botocore.exceptions import ClientError
+
+from core.fakes import FakeChannel, FakeDynamoDB
+from core.notifications import MemoryOutbox, NotificationDispatcher
+from core.reminder_sweeper import NOTIFICATION_TYPE, ReminderSweeper, due_bucket, mark_swept_reminders_sent
+
+
+START_DATE = datetime(2025, 1, 1)
+
+
+def schedule(dynamodb: FakeDynamoDB, reminders: int, patients: int, days: int, seed: int) -> int:
+    """Write the reminders with batch_writer; returns how many are due by the sweep date"""
+    rng = random.Random(seed)
+    cutoff = (START_DATE + timedelta(days=days // 2)).strftime('%Y-%m-%d')
+    due = 0
+    with dynamodb.Table('hospital-memory').batch_writer(overwrite_by_pkeys=['memory_id']) as batch:
+        for n in range(reminders):
+            reminder_id = f"REM-{n:07d}"
+            scheduled_date = (START_DATE + timedelta(days=rng.randrange(days))).strftime('%Y-%m-%d')
+            due += scheduled_date <= cutoff
+            batch.put_item(Item={
+                'memory_id': reminder_id,
+                'patient_id': f"P{rng.randrange(patients):06d}",
+                'memory_type': 'reminder',
+                'type': 'medication',
+                'message': 'Time for your medication.',
+                'scheduled_date': scheduled_date,
+                'due_bucket': due_bucket(scheduled_date, reminder_id),
+                'status': 'scheduled',
+                'sent': False
+            })
+    return due
+
+
+def per_patient_scan(dynamodb: FakeDynamoDB, patients: int, cutoff: str, workers: int) -> int:
+    """The old way to find due reminders: query PatientReminderIndex for every patient"""
+    table = dynamodb.Table('hospital-memory')
+
+    def due_for(p: int) -> int:
+        response = table.query(
+            IndexName='PatientReminderIndex',
+            KeyConditionExpression='patient_id = :pid AND scheduled_date <= :cutoff',
+            FilterExpression='#status = :status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':pid': f"P{p:06d}", ':cutoff': cutoff, ':status': 'scheduled'}
+        )
+        return response['Count']
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(due_for, range(patients)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reminder sweeper")
+    parser.add_argument('--reminders', type=int, default=1000000)
+    parser.add_argument('--patients', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=30, help="Days the reminders are spread over")
+    parser.add_argument('--latency', type=float, default=0.005, help="Fake DynamoDB latency per call")
+    parser.add_argument('--workers', type=int, default=16, help="Buckets swept in parallel")
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--sample-patients', type=int, default=2000, help="Patients timed for the per-patient baseline")
+    parser.add_argument('--interrupt-after', type=int, default=200, help="Pages before the first sweep is cut off")
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Reminder Sweep Benchmark")
+    print("=" * 72)
+
+    dynamodb = FakeDynamoDB()
+    started = time.perf_counter()
+    due = schedule(dynamodb, args.reminders, args.patients, args.days, args.seed)
+    today = (START_DATE + timedelta(days=args.days // 2)).strftime('%Y-%m-%d')
+    print(f"Scheduled {args.reminders:,} reminders for {args.patients:,} patients over {args.days} days "
+          f"in {time.perf_counter() - started:.1f}s; {due:,} due by {today}")
+    print(f"DynamoDB latency {args.latency * 1000:.0f}ms per call, {args.workers} workers\n")
+    dynamodb.latency = args.latency
+
+    # Before: one query per patient (timed on a sample)
+    sample = min(args.sample_patients, args.patients)
+    started = time.perf_counter()
+    per_patient_scan(dynamodb, sample, today, args.workers)
+    baseline = (time.perf_counter() - started) * args.patients / sample
+
+    # Some due reminders were cancelled after scheduling; they must stay cancelled
+    table = dynamodb.Table('hospital-memory')
+    cancelled = [item['memory_id'] for item in list(table.items.values())[::50] if item['scheduled_date'] <= today]
+    for memory_id in cancelled:
+        table.update_item(Key={'memory_id': memory_id}, UpdateExpression='SET #status = :cancelled',
+                          ExpressionAttributeNames={'#status': 'status'},
+                          ExpressionAttributeValues={':cancelled': 'cancelled'})
+    due -= len(cancelled)
+
+    # After: sweep the due index into the dispatcher's outbox; delivery marks reminders sent
+    channel = FakeChannel(max_batch=25)
+    dispatcher = NotificationDispatcher(MemoryOutbox(), {'email': channel}, workers=4, batch_size=250,
+                                        hooks={NOTIFICATION_TYPE: [lambda sent: mark_swept_reminders_sent(sent, dynamodb)]})
+    pages = {'count': 0}
+
+    def interrupted(notifications):
+        pages['count'] += 1
+        if pages['count'] > args.interrupt_after:
+            raise ClientError({'Error': {'Code': 'RequestLimitExceeded', 'Message': 'sweep cut off'}}, 'Query')
+        dispatcher.enqueue_many(notifications)
+
+    lookback = args.days // 2 + 1
+    calls_before = sum(dynamodb.stats['calls'].values())
+    first = ReminderSweeper(lambda: dynamodb, dispatch=interrupted, flush=dispatcher.flush,
+                            get_dynamodb_client=lambda: dynamodb, workers=args.workers,
+                            page_size=args.page_size, lookback_days=lookback).sweep(today)
+    # The cut-off pages were claimed but never queued; by the next sweep their lease has run out
+    second = ReminderSweeper(lambda: dynamodb, dispatch=dispatcher.enqueue_many, flush=dispatcher.flush,
+                             get_dynamodb_client=lambda: dynamodb, workers=args.workers,
+                             page_size=args.page_size, lookback_days=lookback, lease_seconds=0).sweep(today)
+    sweep_seconds = first['seconds'] + second['seconds']
+    calls = sum(dynamodb.stats['calls'].values()) - calls_before
+
+    print(f"{'Strategy':<30} {'time':>10} {'reminders/s':>13} {'API calls':>11}")
+    print(f"{'Per-patient queries (before)':<30} {baseline:9.1f}s {due / baseline:13,.0f} {args.patients:11,}  (scaled from {sample:,})")
+    print(f"{'Sharded due-index sweep':<30} {sweep_seconds:9.1f}s {due / sweep_seconds:13,.0f} {calls:11,}  (delivery included)")
+
+    stats = dispatcher.stats()
+    dispatcher.close()
+    left = sum(1 for item in table.items.values() if 'due_bucket' in item and item['scheduled_date'] <= today)
+    sent = sum(1 for item in table.items.values() if item.get('status') == 'sent')
+    still_cancelled = sum(1 for memory_id in cancelled if table.items[memory_id]['status'] == 'cancelled')
+    print(f"\nFirst sweep cut off after {args.interrupt_after} pages: {first['queued']:,} claimed, "
+          f"{len(first['failed_buckets'])} buckets unfinished")
+    print(f"Second sweep resumed: {second['queued']:,} claimed")
+    print(f"Outbox: {stats['enqueued']:,} notifications, {stats['duplicates']:,} duplicates, "
+          f"{len(channel.sent):,} delivered; {sent:,} reminders marked sent, {still_cancelled:,}/{len(cancelled):,} "
+          f"cancellations kept; due reminders left in the index: {left:,}")
+
+    if (len(channel.sent) != due or len(channel.deliveries) != due or sent != due
+            or still_cancelled != len(cancelled) or left or not second['delivered']):
+        print("\nSweep check FAILED")
+        sys.exit(1)
+    print(f"\n✓ All {due:,} due reminders delivered exactly once across the interrupted and resumed sweeps, "
+          f"cancellations untouched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark - Speculative Routing
+Replays queries the keyword classifier is unsure about (the ones that reach
+the supervisor LLM) through a stub hospital system with simulated supervisor
+and specialist latency. Each query is run sequentially (supervisor, then
+specialist) and with the classifier's guess started alongside the supervisor
+via core.speculation. Reports latency, hit rate and wasted tokens. The run
+fails if any reply does not come from the agent the supervisor chose, if a
+speculative run writes to memory, or if wasted tokens do not match the
+discarded runs.
+
+Usage:
+    python -m benchmarks.bench_speculation --rounds 10 --supervisor-latency 0.15 --specialist-latency 0.4
+"""
+
+import sys
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.intent import IntentClassifier, INTENT_AGENTS
+from core.speculation import SpeculationStats, speculate
+
+
+# (query, agent the supervisor picks); all below the fast-path threshold
+TURNS = [
+    ("My chest hurts, should I book something?", 'TriageAgent'),
+    ("Is this rash something to book a visit for or can it wait?", 'TriageAgent'),
+    ("I have a rash, can I get an appointment?", 'BookingAgent'),
+    ("Can you remind me about my fever medicine?", 'ReminderAgent'),
+    ("My cough is back, should I book a visit?", 'TriageAgent'),
+    ("I have a headache", 'TriageAgent'),
+]
+
+
+class StubSystem:
+    """
+    Stand-in for HospitalMultiAgentSystem's routing with simulated model latency
+
+    Args:
+        supervisor_latency: Mean seconds per supervisor routing call
+        specialist_latency: Mean seconds per specialist call
+        speculation: Speculate on classifier guesses (else route sequentially)
+        agents: Specialists allowed to run speculatively
+        workers: Speculation pool size
+    """
+
+    def __init__(self, supervisor_latency: float, specialist_latency: float, speculation: bool,
+                 agents: List[str], workers: int):
+        self.supervisor_latency = supervisor_latency
+        self.specialist_latency = specialist_latency
+        self.speculation = speculation
+        self.agents = set(agents)
+        self.classifier = IntentClassifier()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.stats = SpeculationStats()
+        self.memory: List[Tuple[str, str]] = []
+        self.runs: List[Tuple[str, str, int, bool]] = []   # (query, agent, tokens, speculative)
+        self._lock = threading.Lock()
+
+    def _sleep(self, mean: float):
+        time.sleep(random.uniform(0.8 * mean, 1.2 * mean))
+
+    def _select_agent(self, query: str) -> str:
+        self._sleep(self.supervisor_latency)
+        return dict(TURNS)[query]
+
+    def _dispatch(self, agent_name: str, query: str, remember: bool = True) -> Tuple[str, int]:
+        self._sleep(self.specialist_latency)
+        reply, tokens = f"{agent_name}: {query}", 400 + len(query)
+        with self._lock:
+            self.runs.append((query, agent_name, tokens, not remember))
+            if remember:
+                self.memory.append((agent_name, reply))
+        return reply, tokens
+
+    def _guess(self, query: str) -> Optional[str]:
+        intent, confidence = self.classifier.predict(query)
+        if not self.speculation or intent not in INTENT_AGENTS or confidence < 0.3:
+            return None
+        return INTENT_AGENTS[intent] if INTENT_AGENTS[intent] in self.agents else None
+
+    def route(self, query: str) -> Tuple[str, str]:
+        guess = self._guess(query)
+        if guess is None:
+            agent_name = self._select_agent(query)
+            return agent_name, self._dispatch(agent_name, query)[0]
+        agent_name, reply = speculate(self.executor, guess, lambda: self._dispatch(guess, query, remember=False),
+                                      lambda: self._select_agent(query), stats=self.stats)
+        if reply is not None:
+            with self._lock:
+                self.memory.append((agent_name, reply))
+            return agent_name, reply
+        return agent_name, self._dispatch(agent_name, query)[0]
+
+
+def run(system: StubSystem, rounds: int, callers: int) -> Tuple[List[float], List[Tuple[str, str, str]]]:
+    """Every turn `rounds` times; returns (latencies, (query, agent, reply) per request)"""
+    def ask(n: int):
+        query = TURNS[n % len(TURNS)][0]
+        started = time.perf_counter()
+        agent_name, reply = system.route(query)
+        return time.perf_counter() - started, (query, agent_name, reply)
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(ask, range(rounds * len(TURNS))))
+    system.executor.shutdown(wait=True)
+    return [latency for latency, _ in results], [outcome for _, outcome in results]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speculative routing")
+    parser.add_argument('--rounds', type=int, default=10, help="Times each turn is sent")
+    parser.add_argument('--callers', type=int, default=6, help="Concurrent requests")
+    parser.add_argument('--workers', type=int, default=8, help="Speculation pool size")
+    parser.add_argument('--supervisor-latency', type=float, default=0.15, help="Seconds per supervisor call")
+    parser.add_argument('--specialist-latency', type=float, default=0.4, help="Seconds per specialist call")
+    parser.add_argument('--agents', nargs='+', default=['TriageAgent'], help="Specialists allowed to speculate")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Speculative Routing Benchmark")
+    print("=" * 72)
+    print(f"Supervisor {args.supervisor_latency * 1000:.0f}ms, specialist {args.specialist_latency * 1000:.0f}ms, "
+          f"speculating on {', '.join(args.agents)}\n")
+
+    results: Dict[str, Tuple[StubSystem, List[float], list]] = {}
+    for label, speculation in (('Sequential (before)', False), ('Speculative (after)', True)):
+        system = StubSystem(args.supervisor_latency, args.specialist_latency, speculation, args.agents, args.workers)
+        latencies, outcomes = run(system, args.rounds, args.callers)
+        results[label] = (system, latencies, outcomes)
+
+    print(f"{'Mode':<22} {'requests':>9} {'mean':>8} {'p95':>8} {'model calls':>12}")
+    for label, (system, latencies, _) in results.items():
+        print(f"{label:<22} {len(latencies):9} {sum(latencies) / len(latencies) * 1000:6.0f}ms "
+              f"{percentile(latencies, 0.95) * 1000:6.0f}ms {len(system.runs) + len(latencies):12}")
+
+    system, latencies, outcomes = results['Speculative (after)']
+    stats = system.stats.stats()
+    print(f"\nAttempts: {stats['attempts']}, hits: {stats['hits']} ({stats['hit_rate']:.0%}), "
+          f"misses: {stats['misses']} ({stats['cancelled']} cancelled before starting), errors: {stats['errors']}")
+    print(f"Saved per hit: {stats['avg_saved_ms']:.0f}ms, wasted tokens: {stats['wasted_tokens']:,} "
+          f"({stats['wasted_tokens_per_miss']:.0f} per miss)")
+
+    # Replies and memory must only ever come from the supervisor's choice
+    expected = dict(TURNS)
+    wrong = [(query, agent, reply) for query, agent, reply in outcomes
+             if agent != expected[query] or not reply.startswith(f"{agent}:")]
+    stray_memory = [entry for entry in system.memory if not entry[1].startswith(f"{entry[0]}:")]
+    discarded = sum(tokens for query, agent, tokens, speculative in system.runs
+                    if speculative and agent != expected[query])
+    before = results['Sequential (before)'][1]
+    if (wrong or stray_memory or len(system.memory) != len(outcomes) or discarded != stats['wasted_tokens']
+            or stats['hits'] + stats['misses'] + stats['errors'] != stats['attempts']
+            or sum(latencies) >= sum(before)):
+        print("\nSpeculation check FAILED")
+        for query, agent, reply in wrong:
+            print(f"  {query!r}: answered by {agent} ({reply!r}), supervisor chose {expected[query]}")
+        if discarded != stats['wasted_tokens']:
+            print(f"  wasted tokens {stats['wasted_tokens']} != {discarded} spent by discarded runs")
+        if sum(latencies) >= sum(before):
+            print("  speculation was no faster than sequential routing (speculation pool too small?)")
+        sys.exit(1)
+    print(f"\n✓ Every reply came from the supervisor's choice, one memory entry per request; "
+          f"mean latency {1 - sum(latencies) / sum(before):.0%} lower")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark - Request Tracing
+Measures what a span costs with tracing off and with the JSONL sink, then
+drives local_agent (fake Bedrock with throttling) with tracing on and checks
+the trace file: every span's parent is in the file, every request is one
+trace, and the report shows where the time went.
+
+Usage:
+    python -m benchmarks.bench_tracing --queries 64 --throttle-rate 0.2
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('BEDROCK_FAKE', '1')
+os.environ.setdefault('RESPONSE_CACHE_DISABLED', '1')
+
+import local_agent
+from core.fakes import FakeBedrockRuntime
+from core.rate_limiter import bedrock_limiter
+from core.tracing import JSONLSink, load_spans, stage_breakdown, tracer
+
+
+QUERIES = [
+    "I have fever and cough. What should I do?",
+    "I'd like to schedule an appointment for next week",
+    "Show my upcoming reminders",
+    "Can I book Pediatrics on Tuesday afternoon?",
+    "I have a mild headache since this morning",
+]
+
+
+def span_cost(iterations: int) -> float:
+    """Seconds per traced call (a root span with two children) minus the untraced call"""
+    def work():
+        return sum(range(20))
+
+    @tracer.traced('outer')
+    def traced_call():
+        with tracer.span('child.a'):
+            work()
+        with tracer.span('child.b'):
+            work()
+
+    def plain_call():
+        work()
+        work()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        plain_call()
+    plain = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(iterations):
+        traced_call()
+    return (time.perf_counter() - started - plain) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request tracing")
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--callers', type=int, default=8, help="Concurrent local_agent requests")
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake model latency in seconds")
+    parser.add_argument('--throttle-rate', type=float, default=0.2, help="Fraction of fake Bedrock calls throttled")
+    parser.add_argument('--iterations', type=int, default=20000, help="Calls timed for the per-span cost")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Request Tracing Benchmark")
+    print("=" * 72)
+
+    path = tempfile.mktemp(suffix='.jsonl')
+    tracer.configure(None)
+    off = span_cost(args.iterations)
+    tracer.configure(JSONLSink(path))
+    on = span_cost(args.iterations)
+    os.remove(path)
+    print(f"Per traced call (3 spans): {off * 1e6:.2f}us with tracing off, {on * 1e6:.2f}us with the JSONL sink\n")
+
+    # local_agent requests with tracing on; throttled Bedrock calls are retried by the limiter
+    local_agent.bedrock_runtime = FakeBedrockRuntime(first_token_latency=args.latency,
+                                                     throttle_rate=args.throttle_rate)
+    bedrock_limiter.configure(requests_per_minute=100000, tokens_per_minute=1e9)
+    sink = JSONLSink(path)
+    tracer.configure(sink)
+
+    def ask(n: int):
+        patient_id = f"P{12345 + n % 3}"
+        query = QUERIES[n % len(QUERIES)]
+        if n % 2:
+            return local_agent.handle_query(query, patient_id)
+        return ''.join(local_agent.handle_query_stream(query, patient_id))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        list(pool.map(ask, range(args.queries)))
+    elapsed = time.perf_counter() - started
+    tracer.flush()
+    tracer.configure(None)
+
+    spans = load_spans(path)
+    ids = {s['span_id'] for s in spans}
+    orphans = [s for s in spans if s['parent_span_id'] and s['parent_span_id'] not in ids]
+    roots = [s for s in spans if not s['parent_span_id']]
+    report = stage_breakdown(spans)
+    print(f"{args.queries} requests in {elapsed:.2f}s -> {len(spans):,} spans in {len(roots)} traces, "
+          f"{len(orphans)} orphaned spans")
+    print(f"Throttle backoffs traced: {report['stages'].get('bedrock.throttle_backoff', {}).get('count', 0)}\n")
+
+    subprocess.run([sys.executable, '-m', 'core.tracing', path, '--slowest', '1'], check=False)
+    os.remove(path)
+
+    request_roots = [s for s in roots if s['name'] in ('handle_query', 'handle_query_stream')]
+    if orphans or len(request_roots) != args.queries or 'call_claude' not in report['stages']:
+        print("\nTrace check FAILED")
+        sys.exit(1)
+    print(f"\n✓ One trace per request, all {len(spans):,} spans linked to their parents")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark - Triage Rules
+Checks the compiled TriageRules against the keyword scans search_symptoms
+and assess_urgency_with_history used before (kept below as references),
+then times the old per-list scans, the engine per list, and score_batch
+over a whole inbound queue.
+
+Parity is exact for search_symptoms. assess_urgency_with_history used a
+shorter keyword list than search_symptoms; the engine is checked against
+it exactly with that legacy lexicon, and differences under the unified
+lexicon are counted (they all come from the keywords that were missing).
+
+Usage:
+    python -m benchmarks.bench_triage_rules --lists 20000
+"""
+
+import sys
+import copy
+import time
+import random
+import argparse
+from typing import Any, Dict, List
+
+from tools.triage_rules import DEFAULT_RULES, HAS_NUMPY, TriageRules
+
+
+SYMPTOM_PHRASES = [
+    'chest pain', 'Chest Pain radiating to arm', 'difficulty breathing at night', 'severe bleeding from cut',
+    'unconscious briefly', 'had a seizure', 'possible stroke', 'heart attack symptoms', 'feverish',
+    'high fever', 'vomiting since morning', 'severe pain in knee', 'sports injury', 'ear infection',
+    'headache', 'runny nose', 'sore throat', 'tired', 'mild cough', 'back ache', 'rash on arm',
+    'dizzy', 'itchy eyes', 'stomach ache', 'trouble sleeping', 'SEVERE BLEEDING', 'Fever and chills'
+]
+CONDITIONS = ['Type 2 Diabetes', 'Asthma', 'COPD', 'Heart Disease', 'Hypertension', 'Migraine',
+              'Seasonal Allergies', 'Immunocompromised (chemotherapy)', 'GERD']
+
+
+def legacy_search_urgency(symptoms: List[str]) -> str:
+    """Urgency logic of search_symptoms before the rules engine"""
+    high_risk_keywords = ['chest pain', 'difficulty breathing', 'severe bleeding',
+                          'unconscious', 'seizure', 'stroke', 'heart attack']
+    medium_risk_keywords = ['fever', 'vomiting', 'severe pain', 'injury', 'infection']
+    urgency = "Low"
+    for symptom in [s.lower() for s in symptoms]:
+        if any(keyword in symptom for keyword in high_risk_keywords):
+            urgency = "Emergency"
+            break
+        elif any(keyword in symptom for keyword in medium_risk_keywords):
+            urgency = "Medium"
+    return urgency
+
+
+def legacy_assess_urgency(symptoms: List[str], medical_history: Dict[str, Any]) -> str:
+    """assess_urgency_with_history before the rules engine"""
+    urgency_score = 0
+    high_risk_symptoms = ['chest pain', 'difficulty breathing', 'severe bleeding']
+    medium_risk_symptoms = ['fever', 'vomiting', 'severe pain']
+    for symptom in symptoms:
+        symptom_lower = symptom.lower()
+        if any(hrs in symptom_lower for hrs in high_risk_symptoms):
+            urgency_score += 3
+        elif any(mrs in symptom_lower for mrs in medium_risk_symptoms):
+            urgency_score += 2
+        else:
+            urgency_score += 1
+    high_risk_conditions = ['diabetes', 'heart disease', 'asthma', 'copd', 'immunocompromised']
+    patient_conditions = [c.lower() for c in medical_history.get('conditions', [])]
+    if any(hrc in pc for hrc in high_risk_conditions for pc in patient_conditions):
+        urgency_score += 1
+    if urgency_score >= 4:
+        return "Emergency"
+    elif urgency_score >= 3:
+        return "High"
+    elif urgency_score >= 2:
+        return "Medium"
+    return "Low"
+
+
+def legacy_assess_rules() -> Dict[str, Any]:
+    """DEFAULT_RULES narrowed to assess_urgency_with_history's old keyword lists"""
+    rules = copy.deepcopy(DEFAULT_RULES)
+    rules['symptom_tiers'][0]['keywords'] = ['chest pain', 'difficulty breathing', 'severe bleeding']
+    rules['symptom_tiers'][1]['keywords'] = ['fever', 'vomiting', 'severe pain']
+    return rules
+
+
+def generate(lists: int, seed: int):
+    rng = random.Random(seed)
+    symptoms = [rng.sample(SYMPTOM_PHRASES, rng.randint(0, 4)) for _ in range(lists)]
+    conditions = [rng.sample(CONDITIONS, rng.randint(0, 2)) for _ in range(lists)]
+    return symptoms, conditions
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and parity-check the triage rules engine")
+    parser.add_argument('--lists', type=int, default=20000, help="Symptom lists (inbound messages)")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    symptoms, conditions = generate(args.lists, args.seed)
+    histories = [{'conditions': c} for c in conditions]
+    engine = TriageRules(DEFAULT_RULES)
+    legacy_engine = TriageRules(legacy_assess_rules())
+
+    print("=" * 66)
+    print("Triage Rules Benchmark")
+    print("=" * 66)
+    print(f"{args.lists:,} symptom lists, NumPy {'on' if HAS_NUMPY else 'off (pure-Python batch)'}\n")
+
+    # Parity, per list and batched
+    batch = engine.score_batch(symptoms, conditions)
+    legacy_batch = legacy_engine.score_batch(symptoms, conditions)
+    failures = {
+        'search_symptoms (per list)': sum(engine.urgency(s) != legacy_search_urgency(s) for s in symptoms),
+        'search_symptoms (batch)': sum(u != legacy_search_urgency(s) for u, s in zip(batch['urgency'], symptoms)),
+        'assess, legacy lexicon (per list)': sum(
+            legacy_engine.urgency_with_history(s, c) != legacy_assess_urgency(s, h)
+            for s, c, h in zip(symptoms, conditions, histories)),
+        'assess, legacy lexicon (batch)': sum(
+            u != legacy_assess_urgency(s, h) for u, s, h in zip(legacy_batch['history_urgency'], symptoms, histories)),
+    }
+    print("Parity (mismatches):")
+    for check, mismatches in failures.items():
+        print(f"  {check:<36} {mismatches:>8,}")
+    unified = sum(u != legacy_assess_urgency(s, h) for u, s, h in zip(batch['history_urgency'], symptoms, histories))
+    print(f"  {'assess, unified lexicon (expected)':<36} {unified:>8,}")
+
+    # Timing
+    rows = [
+        ('Keyword scans (before)', timed(lambda: [
+            (legacy_search_urgency(s), legacy_assess_urgency(s, h)) for s, h in zip(symptoms, histories)])),
+        ('TriageRules per list', timed(lambda: [
+            (engine.urgency(s), engine.urgency_with_history(s, c)) for s, c in zip(symptoms, conditions)])),
+        ('TriageRules.score_batch', timed(lambda: engine.score_batch(symptoms, conditions))),
+    ]
+    print(f"\n{'Strategy':<26} {'total':>10} {'per list':>10} {'lists/s':>12}")
+    for label, seconds in rows:
+        print(f"{label:<26} {seconds * 1000:8.1f}ms {seconds / args.lists * 1e6:8.2f}us {args.lists / seconds:12,.0f}")
+
+    if any(failures.values()):
+        print("\nParity check FAILED")
+        sys.exit(1)
+    print("\n✓ Parity with the previous triage functions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark - Token and Cost Accounting
+Measures what recording a model call in the usage ledger costs, then drives
+local_agent (fake Bedrock with throttling) with the ledger writing to a
+temporary file and checks it: one record per model reply, token totals that
+match what the fake model reported, per-patient totals that add up, and a
+report that runs.
+
+Usage:
+    python -m benchmarks.bench_usage --queries 64 --batch-size 16
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('BEDROCK_FAKE', '1')
+os.environ.setdefault('RESPONSE_CACHE_DISABLED', '1')
+
+import local_agent
+from core.fakes import FakeBedrockRuntime, _default_responder
+from core.rate_limiter import bedrock_limiter
+from core.usage import UsageLedger, load_records, usage_breakdown, usage_ledger
+
+
+QUERIES = [
+    "I have fever and cough. What should I do?",
+    "I'd like to schedule an appointment for next week",
+    "Show my upcoming reminders",
+    "Can I book Pediatrics on Tuesday afternoon?",
+    "I have a mild headache since this morning",
+]
+
+
+def record_cost(iterations: int, batch_size: int) -> float:
+    """Seconds per recorded call, batched writes to a temporary ledger included"""
+    path = tempfile.mktemp(suffix='.jsonl')
+    ledger = UsageLedger(path, batch_size=batch_size)
+    started = time.perf_counter()
+    for n in range(iterations):
+        ledger.record(local_agent.MODEL_ID, 'triage', 900, 150, 420.0, patient_id=f"P{n % 500:05d}")
+    ledger.flush()
+    elapsed = time.perf_counter() - started
+    os.remove(path)
+    return elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token and cost accounting")
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--callers', type=int, default=8, help="Concurrent local_agent requests")
+    parser.add_argument('--patients', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake model latency in seconds")
+    parser.add_argument('--throttle-rate', type=float, default=0.2, help="Fraction of fake Bedrock calls throttled")
+    parser.add_argument('--batch-size', type=int, default=16, help="Ledger records per write")
+    parser.add_argument('--iterations', type=int, default=50000, help="Calls timed for the per-record cost")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("Token and Cost Accounting Benchmark")
+    print("=" * 72)
+
+    cost = record_cost(args.iterations, args.batch_size)
+    print(f"Per recorded call: {cost * 1e6:.2f}us (writes batched {args.batch_size} at a time)\n")
+
+    # Usage the fake model reports, tallied from the replies it actually sends
+    reported = {'calls': 0, 'input': 0, 'output': 0}
+    tally_lock = threading.Lock()
+
+    def responder(model_id: str, prompt: str) -> str:
+        text = _default_responder(model_id, prompt)
+        with tally_lock:
+            reported['calls'] += 1
+            reported['input'] += len(prompt) // 4
+            reported['output'] += len(text) // 4
+        return text
+
+    path = tempfile.mktemp(suffix='.jsonl')
+    usage_ledger.configure(path=path, batch_size=args.batch_size)
+    local_agent.bedrock_runtime = FakeBedrockRuntime(responder=responder, first_token_latency=args.latency,
+                                                     throttle_rate=args.throttle_rate)
+    bedrock_limiter.configure(requests_per_minute=100000, tokens_per_minute=1e9)
+
+    def ask(n: int):
+        patient_id = f"P{12345 + n % args.patients}"
+        query = QUERIES[n % len(QUERIES)]
+        if n % 2:
+            return local_agent.handle_query(query, patient_id)
+        return ''.join(local_agent.handle_query_stream(query, patient_id))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        list(pool.map(ask, range(args.queries)))
+    elapsed = time.perf_counter() - started
+    usage_ledger.flush()
+    in_memory = usage_ledger.totals('patient')
+    usage_ledger.configure(path=None)
+
+    records = load_records(path)
+    tokens_in = sum(r['input_tokens'] for r in records)
+    tokens_out = sum(r['output_tokens'] for r in records)
+    by_patient = usage_breakdown(records, 'patient')
+    print(f"{args.queries} requests in {elapsed:.2f}s -> {len(records)} ledger records for "
+          f"{reported['calls']} model replies")
+    print(f"Tokens: {tokens_in:,} in / {tokens_out:,} out in the ledger, "
+          f"{reported['input']:,} / {reported['output']:,} reported by the model\n")
+
+    subprocess.run([sys.executable, '-m', 'core.usage', path, '--top', '3'], check=False)
+    os.remove(path)
+
+    patients_match = all(
+        in_memory.get(patient, {}).get('input_tokens') == totals['input_tokens']
+        for patient, totals in by_patient.items()
+    )
+    if (len(records) != reported['calls'] or tokens_in != reported['input'] or tokens_out != reported['output']
+            or len(by_patient) != args.patients or not patients_match):
+        print("Usage check FAILED")
+        sys.exit(1)
+    print(f"✓ Every model reply accounted for, {len(by_patient)} patients' totals match the in-memory aggregates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Load Test - Async Request Engine
+Drives N simulated patients through AsyncRequestEngine against local stubs
+and reports p50/p95/p99 latency.
+
+Usage:
+    python -m benchmarks.load_test --patients 200 --messages 3 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Tuple
+
+from core.request_engine import AsyncRequestEngine, EngineOverloaded
+from core.stats import summarize_latencies
+
+
+SAMPLE_QUERIES = [
+    "I have fever and cough. What should I do?",
+    "I'd like to schedule an appointment for next week",
+    "Show my upcoming reminders",
+    "My chest hurts when I breathe",
+    "Can I book Pediatrics on Tuesday afternoon?"
+]
+
+
+class StubHospitalSystem:
+    """
+    Stand-in for HospitalMultiAgentSystem with simulated service latency
+
+    Args:
+        dynamodb_latency: Mean seconds per DynamoDB context fetch
+        bedrock_latency: Mean seconds per supervisor/specialist model call
+    """
+
+    def __init__(self, dynamodb_latency: float = 0.01, bedrock_latency: float = 0.8):
+        self.dynamodb_latency = dynamodb_latency
+        self.bedrock_latency = bedrock_latency
+
+    def _sleep(self, mean: float):
+        time.sleep(random.uniform(0.5 * mean, 1.5 * mean))
+
+    def _emergency_reply(self, user_message: str, patient_id: str):
+        return None
+
+    def _get_patient_context(self, patient_id: str) -> Dict:
+        self._sleep(self.dynamodb_latency)
+        return {'medical_history': {}, 'appointments': [], 'reminders': [], 'recent_interactions': []}
+
+    def _select_agent(self, user_message: str, patient_id: str, context: Dict) -> str:
+        self._sleep(self.bedrock_latency)
+        return random.choice(['TriageAgent', 'BookingAgent', 'ReminderAgent'])
+
+    def _dispatch(self, agent_name: str, user_message: str, patient_id: str, context: Dict) -> str:
+        self._sleep(self.bedrock_latency)
+        return f"{agent_name} response for {patient_id}"
+
+    def _select_and_dispatch(self, user_message: str, patient_id: str, context: Dict) -> Tuple[str, str]:
+        agent_name = self._select_agent(user_message, patient_id, context)
+        return agent_name, self._dispatch(agent_name, user_message, patient_id, context)
+
+
+async def simulate_patient(engine: AsyncRequestEngine, patient_id: str, messages: int,
+                           think_time: float, latencies: List[float], outcomes: Dict[str, int]):
+    """One patient sending `messages` queries with think time in between"""
+    for _ in range(messages):
+        started = time.perf_counter()
+        try:
+            await engine.route_query(random.choice(SAMPLE_QUERIES), patient_id)
+            latencies.append(time.perf_counter() - started)
+            outcomes['success'] += 1
+        except EngineOverloaded:
+            outcomes['busy'] += 1
+        except asyncio.TimeoutError:
+            outcomes['timeout'] += 1
+        await asyncio.sleep(random.uniform(0, think_time))
+
+
+async def run_load_test(args) -> Dict:
+    system = StubHospitalSystem(dynamodb_latency=args.dynamodb_latency, bedrock_latency=args.bedrock_latency)
+    engine = AsyncRequestEngine(
+        system,
+        max_concurrency=args.concurrency,
+        max_pending=args.max_pending,
+        worker_threads=args.worker_threads,
+        request_timeout=args.timeout
+    )
+
+    latencies: List[float] = []
+    outcomes = {'success': 0, 'busy': 0, 'timeout': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        simulate_patient(engine, f"P{10000 + i}", args.messages, args.think_time, latencies, outcomes)
+        for i in range(args.patients)
+    ])
+    elapsed = time.perf_counter() - started
+    engine.shutdown()
+
+    return {
+        'elapsed': elapsed,
+        'outcomes': outcomes,
+        'latency': summarize_latencies(latencies),
+        'throughput': outcomes['success'] / elapsed if elapsed else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the async request engine against local stubs")
+    parser.add_argument('--patients', type=int, default=200, help="Simulated concurrent patients")
+    parser.add_argument('--messages', type=int, default=3, help="Messages per patient")
+    parser.add_argument('--think-time', type=float, default=0.5, help="Max seconds between a patient's messages")
+    parser.add_argument('--concurrency', type=int, default=16, help="Engine max_concurrency")
+    parser.add_argument('--max-pending', type=int, default=1000, help="Engine max_pending (backpressure)")
+    parser.add_argument('--worker-threads', type=int, default=32, help="Blocking-call pool size")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument('--bedrock-latency', type=float, default=0.8, help="Mean stub Bedrock latency (s)")
+    parser.add_argument('--dynamodb-latency', type=float, default=0.01, help="Mean stub DynamoDB latency (s)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Async Request Engine - Load Test")
+    print("=" * 60)
+    print(f"Patients: {args.patients} x {args.messages} messages, concurrency {args.concurrency}")
+
+    report = asyncio.run(run_load_test(args))
+
+    latency = report['latency']
+    print(f"\nCompleted in {report['elapsed']:.1f}s ({report['throughput']:.1f} req/s)")
+    print(f"Outcomes: {report['outcomes']}")
+    print(f"Latency p50: {latency['p50'] * 1000:.0f} ms")
+    print(f"Latency p95: {latency['p95'] * 1000:.0f} ms")
+    print(f"Latency p99: {latency['p99'] * 1000:.0f} ms")
+    print(f"Latency max: {latency['max'] * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
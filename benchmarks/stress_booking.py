@@ -0,0 +1,86 @@
+"""
+Stress Test - Concurrent Booking
+Fires thousands of parallel bookings at a handful of slots through
+book_appointment plus a second SlotInventory (a second "process" with its
+own stale bitsets) sharing one local DynamoDB stand-in, then asserts that
+no slot was booked twice.
+
+Usage:
+    python -m benchmarks.stress_booking --bookings 5000 --threads 64
+"""
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from core import aws_clients
+from core.fakes import FakeDynamoDB
+from tools import booking_tools
+from tools.slot_inventory import SlotInventory
+
+
+DEPARTMENTS = ['Pediatrics', 'Cardiology', 'General Medicine']
+DATES = ['2025-11-03', '2025-11-04', '2025-11-08']  # two weekdays and a Saturday
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test")
+    parser.add_argument('--bookings', type=int, default=5000, help="Booking attempts")
+    parser.add_argument('--threads', type=int, default=64, help="Parallel workers")
+    parser.add_argument('--latency', type=float, default=0.001, help="Simulated seconds per DynamoDB call")
+    args = parser.parse_args()
+
+    dynamodb = FakeDynamoDB(latency=args.latency)
+    aws_clients.set_client('dynamodb', dynamodb, kind='resource')
+    other_process = SlotInventory(lambda: dynamodb)
+    other_wins = []
+
+    def attempt(n: int) -> bool:
+        department = random.choice(DEPARTMENTS)
+        date = random.choice(DATES)
+        time_slot = random.choice(booking_tools.slot_inventory.slot_times(date))
+        if n % 2:
+            result = booking_tools.book_appointment(f"P{n}", department, date, time_slot, "Stress test")
+            return result.get('status') == 'success'
+        doctor = booking_tools._get_available_doctor(department)
+        appointment_id = str(uuid.uuid4())
+        if other_process.reserve(doctor, date, time_slot, appointment_id):
+            other_wins.append((doctor, date, time_slot))
+            return True
+        return False
+
+    print("=" * 60)
+    print("Concurrent Booking Stress Test")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        outcomes = list(pool.map(attempt, range(args.bookings)))
+    elapsed = time.perf_counter() - started
+
+    table = dynamodb.Table('hospital-appointments')
+    confirmed = [
+        (item['doctor'], item['date'], item['time'])
+        for item in table.items.values() if item.get('status') == 'confirmed'
+    ]
+    held = Counter(confirmed + other_wins)
+    double_booked = {slot: count for slot, count in held.items() if count > 1}
+    capacity = sum(len(booking_tools.slot_inventory.slot_times(d)) for d in DATES) * len(DEPARTMENTS)
+
+    print(f"Attempts: {args.bookings} in {elapsed:.2f}s ({args.bookings / elapsed:.0f}/s)")
+    print(f"Successful bookings: {sum(outcomes)} (capacity {capacity} slots)")
+    print(f"Slot lock items: {sum(1 for k in table.items if str(k).startswith('SLOT#'))}")
+    print(f"Double-booked slots: {len(double_booked)}")
+
+    if double_booked or sum(outcomes) != len(held):
+        print("✗ FAILED: slots booked more than once")
+        sys.exit(1)
+    print("✓ Zero double bookings")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Core Package
+Shared infrastructure for the local agent, AgentCore agents and tools
+"""
@@ -0,0 +1,121 @@
+"""
+AWS Clients
+Process-wide boto3 clients and resources with pooled, keep-alive connections
+"""
+
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+
+# Connections per client; size this above the busiest thread pool that shares it
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '64'))
+
+# Per-service overrides of the defaults in client_config()
+SERVICE_CONFIG = {
+    # The Bedrock rate limiter owns throttling retries (and learns from them), so botocore
+    # must not retry behind its back; model calls also need a long read timeout.
+    'bedrock-runtime': {'retries': {'total_max_attempts': 1, 'mode': 'standard'}, 'read_timeout': 120},
+}
+
+_lock = threading.RLock()
+_session = None
+_instances: Dict[Tuple[str, str], Any] = {}
+_overrides: Dict[Tuple[str, str], Any] = {}
+
+
+def region() -> str:
+    return os.getenv('AWS_REGION', 'us-east-1')
+
+
+def client_config(service: str = None):
+    """
+    botocore Config shared by every client: pooled keep-alive connections and adaptive retries
+
+    Args:
+        service: Service name, to apply its SERVICE_CONFIG overrides
+    """
+    from botocore.config import Config  # deferred with boto3 to keep imports cheap
+
+    options = {
+        'region_name': region(),
+        'max_pool_connections': MAX_POOL_CONNECTIONS,
+        'tcp_keepalive': True,
+        'connect_timeout': 5,
+        'read_timeout': 30,
+        'retries': {'total_max_attempts': int(os.getenv('AWS_MAX_ATTEMPTS', '5')), 'mode': 'adaptive'}
+    }
+    options.update(SERVICE_CONFIG.get(service, {}))
+    return Config(**options)
+
+
+def get_session():
+    """The one boto3 Session of this process (boto3 is imported on first use)"""
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3
+            _session = boto3.session.Session(region_name=region())
+        return _session
+
+
+def _build(kind: str, service: str, **kwargs) -> Any:
+    session = get_session()
+    factory = session.client if kind == 'client' else session.resource
+    return factory(service, config=client_config(service), **kwargs)
+
+
+def _get(kind: str, service: str) -> Any:
+    key = (kind, service)
+    instance = _overrides.get(key) or _instances.get(key)
+    if instance is None:
+        # Creating clients from one session is not thread-safe, so build under the lock
+        with _lock:
+            instance = _overrides.get(key) or _instances.get(key)
+            if instance is None:
+                instance = _instances[key] = _build(kind, service)
+    return instance
+
+
+def get_client(service: str) -> Any:
+    """Shared, thread-safe client for a service (e.g. 'bedrock-runtime'), created on first use"""
+    return _get('client', service)
+
+
+def get_resource(service: str) -> Any:
+    """Shared resource for a service (e.g. 'dynamodb'), created on first use"""
+    return _get('resource', service)
+
+
+def create_resource(service: str, **kwargs) -> Any:
+    """A new, unshared resource (one per worker thread in bulk jobs), still on the shared session"""
+    with _lock:
+        if ('resource', service) in _overrides:
+            return _overrides[('resource', service)]
+        return _build('resource', service, **kwargs)
+
+
+def set_client(service: str, client: Any, kind: str = 'client'):
+    """
+    Inject a stand-in (core.fakes, a moto-backed client, a Stubber-wrapped client)
+
+    Every later get_client/get_resource call for the service returns it,
+    including from modules that were imported before the override.
+
+    Args:
+        service: Service name
+        client: Object to return
+        kind: 'client' or 'resource'
+    """
+    with _lock:
+        _overrides[(kind, service)] = client
+
+
+def reset(overrides_only: bool = False):
+    """Drop injected stand-ins, and unless `overrides_only`, the cached clients and session"""
+    global _session
+    with _lock:
+        _overrides.clear()
+        if not overrides_only:
+            _instances.clear()
+            _session = None
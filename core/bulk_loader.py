@@ -0,0 +1,282 @@
+"""
+Bulk Loader
+Streams records into DynamoDB with batch_writer across a thread pool, and applies batched updates
+"""
+
+import json
+import time
+import random
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Callable, Optional, TextIO, Tuple
+
+from botocore.exceptions import ClientError
+
+
+RETRYABLE_ERRORS = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'InternalServerError',
+    'ServiceUnavailable'
+}
+
+
+def iter_json_stream(stream: TextIO, chunk_size: int = 65536) -> Iterator[Dict[str, Any]]:
+    """
+    Yield objects from NDJSON or a top-level JSON array, one at a time
+
+    Only one read chunk plus the current record is held in memory. Floats
+    are parsed as Decimal, which is what boto3 expects for DynamoDB numbers.
+    """
+    decoder = json.JSONDecoder(parse_float=Decimal)
+    buffer, pos, eof = '', 0, False
+    in_array = None
+
+    while True:
+        # Skip whitespace (and the commas between array elements), reading more as needed
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (in_array and buffer[pos] == ',')):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+
+        if pos >= len(buffer):
+            return
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+            continue
+        if in_array and buffer[pos] == ']':
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = stream.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        if not isinstance(record, dict):
+            raise ValueError(f"Expected a JSON object per record, got {type(record).__name__}")
+        pos = end
+        yield record
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from an NDJSON or JSON-array file"""
+    with open(path, 'r') as f:
+        yield from iter_json_stream(f)
+
+
+class BulkLoader:
+    """
+    Parallel DynamoDB loader built on batch_writer
+
+    Input is consumed lazily in chunks; each chunk is written by a pool
+    worker through its own batch_writer (25-item BatchWriteItem calls,
+    with UnprocessedItems re-sent by boto3). Chunks that still fail with a
+    throttling or transient error are retried with jittered exponential
+    backoff; puts are idempotent, so re-sending part of a chunk is safe.
+    At most `workers * 2` chunks are buffered, so memory stays flat for
+    any input size.
+
+    Args:
+        get_dynamodb: Callable returning a DynamoDB resource, called once per worker thread
+        workers: Concurrent chunk writers (shared across tables)
+        chunk_size: Records per chunk handed to a worker
+        max_retries: Attempts per chunk before its records are counted as failed
+        progress_every: Print progress every N records loaded (0 disables)
+    """
+
+    def __init__(self, get_dynamodb: Callable[[], Any], workers: int = 8, chunk_size: int = 500,
+                 max_retries: int = 5, progress_every: int = 10000):
+        self.get_dynamodb = get_dynamodb
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.progress_every = progress_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+
+    def _resource(self):
+        if not hasattr(self._local, 'dynamodb'):
+            self._local.dynamodb = self.get_dynamodb()
+        return self._local.dynamodb
+
+    def _record(self, table_name: str, loaded: int = 0, failed: int = 0, retries: int = 0):
+        with self._lock:
+            stats = self._tables[table_name]
+            before = stats['loaded']
+            stats['loaded'] += loaded
+            stats['failed'] += failed
+            stats['retries'] += retries
+            total = stats['loaded']
+        if self.progress_every and total // self.progress_every > before // self.progress_every:
+            elapsed = time.perf_counter() - stats['started']
+            print(f"  … {table_name}: {total:,} records ({total / elapsed:,.0f}/s)")
+
+    def _write_chunk(self, table_name: str, chunk: List[Dict[str, Any]], key: Optional[str]):
+        for attempt in range(self.max_retries):
+            try:
+                table = self._resource().Table(table_name)
+                with table.batch_writer(overwrite_by_pkeys=[key] if key else None) as batch:
+                    for item in chunk:
+                        batch.put_item(Item=item)
+                self._record(table_name, loaded=len(chunk))
+                return
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code not in RETRYABLE_ERRORS or attempt == self.max_retries - 1:
+                    print(f"✗ Error writing {len(chunk)} records to {table_name}: {e}")
+                    self._record(table_name, failed=len(chunk))
+                    return
+                self._record(table_name, retries=1)
+                time.sleep(min(0.1 * (2 ** attempt), 5.0) * (0.5 + random.random()))
+
+    def _done(self, future, table_name: str, size: int, in_flight: threading.Semaphore):
+        in_flight.release()
+        error = future.exception()
+        if error is not None:
+            print(f"✗ Error writing {size} records to {table_name}: {error}")
+            self._record(table_name, failed=size)
+
+    def _chunks(self, sources: Dict[str, Iterable[Dict[str, Any]]]) -> Iterator[tuple]:
+        """Round-robin chunks across tables so every table is written concurrently"""
+        iterators = {name: iter(records) for name, records in sources.items()}
+        while iterators:
+            for name in list(iterators):
+                chunk = []
+                for record in iterators[name]:
+                    chunk.append(record)
+                    if len(chunk) >= self.chunk_size:
+                        break
+                if len(chunk) < self.chunk_size:
+                    del iterators[name]
+                if chunk:
+                    yield name, chunk
+
+    def load_tables(self, sources: Dict[str, Iterable[Dict[str, Any]]],
+                    keys: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        Load several tables at once
+
+        Args:
+            sources: Table name -> iterable of items (generators are fine)
+            keys: Table name -> hash key, used to de-duplicate items within a batch
+
+        Returns:
+            Per-table and total loaded/failed/retries counts with throughput
+        """
+        keys = keys or {}
+        started = time.perf_counter()
+        with self._lock:
+            for name in sources:
+                self._tables[name] = {'loaded': 0, 'failed': 0, 'retries': 0, 'started': started}
+
+        in_flight = threading.Semaphore(self.workers * 2)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bulk-loader') as executor:
+            for name, chunk in self._chunks(sources):
+                in_flight.acquire()
+                future = executor.submit(self._write_chunk, name, chunk, keys.get(name))
+                future.add_done_callback(lambda f, name=name, size=len(chunk): self._done(f, name, size, in_flight))
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            tables = {
+                name: {k: v for k, v in self._tables.pop(name).items() if k != 'started'}
+                for name in sources
+            }
+        loaded = sum(t['loaded'] for t in tables.values())
+        return {
+            'tables': tables,
+            'loaded': loaded,
+            'failed': sum(t['failed'] for t in tables.values()),
+            'retries': sum(t['retries'] for t in tables.values()),
+            'seconds': elapsed,
+            'records_per_second': loaded / elapsed if elapsed else 0.0
+        }
+
+    def load(self, table_name: str, records: Iterable[Dict[str, Any]], key: str = None) -> Dict[str, Any]:
+        """Load one table; see load_tables"""
+        return self.load_tables({table_name: records}, {table_name: key} if key else None)
+
+
+# Per-statement errors from BatchExecuteStatement worth sending again
+RETRYABLE_STATEMENT_ERRORS = {
+    'ProvisionedThroughputExceeded',
+    'ThrottlingError',
+    'RequestLimitExceeded',
+    'InternalServerError',
+    'TransactionConflict'
+}
+
+
+def batch_update(client: Any, table_name: str, key: str, updates: List[Tuple],
+                 remove: List[str] = None, max_retries: int = 5) -> Dict[Any, str]:
+    """
+    SET (and REMOVE) attributes on existing items, 25 PartiQL UPDATEs per BatchExecuteStatement call
+
+    Unlike re-putting items with batch_writer, each statement only touches
+    the attributes it sets, so a concurrent change to the same item (say a
+    cancellation) is not overwritten. Updates of missing items, or of items
+    whose attributes no longer match an update's conditions, fail with
+    ConditionalCheckFailed instead of being applied. Throttled statements
+    are re-sent with jittered backoff.
+
+    Args:
+        client: Low-level DynamoDB client (or core.fakes.FakeDynamoDB)
+        table_name: Table to update
+        key: Hash key attribute
+        updates: (key value, {attribute: new value}) pairs, optionally with a
+            third {attribute: expected value} dict the item must match
+        remove: Attributes every statement also REMOVEs
+        max_retries: Attempts per statement before it counts as failed
+
+    Returns:
+        {key value: error code} for the updates that did not apply
+    """
+    from boto3.dynamodb.types import TypeSerializer  # deferred with boto3 to keep imports cheap
+
+    serializer = TypeSerializer()
+    failures = {}
+    for start in range(0, len(updates), 25):
+        pending = []
+        for key_value, values, *conditions in updates[start:start + 25]:
+            expected = conditions[0] if conditions else {}
+            sets = ' '.join(f'SET "{name}" = ?' for name in values)
+            removes = ''.join(f' REMOVE "{name}"' for name in remove or [])
+            where = ''.join(f' AND "{name}" = ?' for name in expected)
+            pending.append((key_value, {
+                'Statement': f'UPDATE "{table_name}" {(sets + removes).strip()} WHERE "{key}" = ?{where}',
+                'Parameters': [serializer.serialize(v) for v in [*values.values(), key_value, *expected.values()]]
+            }))
+        for attempt in range(max_retries):
+            try:
+                responses = client.batch_execute_statement(Statements=[s for _, s in pending])['Responses']
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code not in RETRYABLE_ERRORS or attempt == max_retries - 1:
+                    failures.update({key_value: code for key_value, _ in pending})
+                    break
+            else:
+                retry = []
+                for (key_value, statement), response in zip(pending, responses):
+                    code = response.get('Error', {}).get('Code')
+                    if code in RETRYABLE_STATEMENT_ERRORS and attempt < max_retries - 1:
+                        retry.append((key_value, statement))
+                    elif code:
+                        failures[key_value] = code
+                pending = retry
+                if not pending:
+                    break
+            time.sleep(min(0.1 * (2 ** attempt), 5.0) * (0.5 + random.random()))
+    return failures
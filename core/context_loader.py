@@ -0,0 +1,218 @@
+"""
+Patient Context Loader
+Fetches patient record, appointments, reminders and memory concurrently
+"""
+
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from botocore.exceptions import ClientError
+
+from core.metrics import metrics, record_consumed_capacity
+from core.pagination import QueryPaginator
+from core.patient_cache import patient_cache
+from core.tracing import tracer
+
+
+BATCH_GET_LIMIT = 100
+
+
+def empty_context() -> Dict[str, Any]:
+    """Context shape shared by the supervisor and specialist agents"""
+    return {
+        'medical_history': {},
+        'appointments': [],
+        'reminders': [],
+        'memory': [],
+        'recent_interactions': [],
+        'conversation_summary': ''
+    }
+
+
+class PatientContextLoader:
+    """
+    Loads everything the agents need about a patient in one parallel round trip
+
+    The patient record, the latest appointments (PatientIndex GSI, newest
+    first), the latest scheduled reminders (PatientReminderIndex, newest
+    first) and interaction notes (PatientMemoryIndex) are fetched
+    concurrently, so the latency is the slowest call instead of the sum.
+    Memory reads page until `memory_limit` items pass their filter instead
+    of reading every entry the patient has. `load_many` serves many
+    patients at once with BatchGetItem for the patient records. Slices
+    already in the process-wide patient cache are not re-read.
+
+    Args:
+        dynamodb: boto3 DynamoDB resource (or core.fakes.FakeDynamoDB)
+        cache: Shared patient cache (reads skip DynamoDB on a hit)
+        max_workers: Thread pool size for concurrent reads
+        appointment_limit: Most recent appointments to include
+        memory_limit: Reminders, and separately interaction notes, kept per patient
+    """
+
+    def __init__(self, dynamodb, max_workers: int = 16, appointment_limit: int = 5,
+                 memory_limit: int = 20, cache=patient_cache):
+        self.dynamodb = dynamodb
+        self.cache = cache
+        self.appointment_limit = appointment_limit
+        self.memory_limit = memory_limit
+        self.patients_table = os.getenv('PATIENTS_TABLE', 'hospital-patients')
+        self.appointments_table = os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments')
+        self.memory_table = os.getenv('MEMORY_TABLE', 'hospital-memory')
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='context-loader')
+
+    def _fetch_patient(self, patient_id: str) -> Dict[str, Any]:
+        response = self.dynamodb.Table(self.patients_table).get_item(
+            Key={'patient_id': patient_id}, ReturnConsumedCapacity='TOTAL'
+        )
+        record_consumed_capacity(response)
+        return response.get('Item', {})
+
+    def _fetch_appointments(self, patient_id: str) -> List[Dict[str, Any]]:
+        response = self.dynamodb.Table(self.appointments_table).query(
+            IndexName='PatientIndex',
+            KeyConditionExpression='patient_id = :pid',
+            ExpressionAttributeValues={':pid': patient_id},
+            ScanIndexForward=False,
+            Limit=self.appointment_limit,
+            ReturnConsumedCapacity='TOTAL'
+        )
+        record_consumed_capacity(response)
+        return response.get('Items', [])
+
+    def _fetch_reminders(self, patient_id: str) -> List[Dict[str, Any]]:
+        return list(QueryPaginator(
+            self.dynamodb.Table(self.memory_table),
+            limit=self.memory_limit,
+            IndexName='PatientReminderIndex',
+            KeyConditionExpression='patient_id = :pid',
+            FilterExpression='memory_type = :reminder AND (attribute_not_exists(#status) OR #status = :scheduled)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':pid': patient_id, ':reminder': 'reminder', ':scheduled': 'scheduled'},
+            ScanIndexForward=False
+        ))
+
+    def _fetch_memory(self, patient_id: str) -> List[Dict[str, Any]]:
+        return list(QueryPaginator(
+            self.dynamodb.Table(self.memory_table),
+            limit=self.memory_limit,
+            IndexName='PatientMemoryIndex',
+            KeyConditionExpression='patient_id = :pid',
+            FilterExpression='memory_type = :interaction',
+            ExpressionAttributeValues={':pid': patient_id, ':interaction': 'interaction'}
+        ))
+
+    def _submit(self, patient_id: str, part: str, fetch):
+        """Return a future for one context slice, served from the cache when possible"""
+        if self.cache is not None:
+            cached = self.cache.get(patient_id, part)
+            metrics.increment('CacheHits' if cached is not None else 'CacheMisses', cache='patient_context')
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+        return self._executor.submit(tracer.run_in_context(self._fetch_and_cache, patient_id, part, fetch))
+
+    def _fetch_and_cache(self, patient_id: str, part: str, fetch):
+        with tracer.span(f'dynamodb.{part}'):
+            value = fetch(patient_id)
+        if self.cache is not None:
+            self.cache.set(patient_id, part, value)
+        return value
+
+    def _safe(self, future, default, what: str, patient_id: str):
+        try:
+            return future.result()
+        except ClientError as e:
+            print(f"Error retrieving {what} for {patient_id}: {e}")
+            return default
+
+    def _assemble(self, patient: Dict[str, Any], appointments: List[Dict], reminders: List[Dict],
+                  memory: List[Dict]) -> Dict[str, Any]:
+        context = empty_context()
+        context['medical_history'] = patient.get('medical_history', {})
+        context['appointments'] = appointments
+        context['reminders'] = reminders
+        context['memory'] = memory
+        return context
+
+    def load(self, patient_id: str) -> Dict[str, Any]:
+        """Load one patient's context with all reads in flight at once"""
+        patient = self._submit(patient_id, 'record', self._fetch_patient)
+        appointments = self._submit(patient_id, 'appointments', self._fetch_appointments)
+        reminders = self._submit(patient_id, 'reminders', self._fetch_reminders)
+        memory = self._submit(patient_id, 'memory', self._fetch_memory)
+
+        return self._assemble(
+            self._safe(patient, {}, 'patient record', patient_id),
+            self._safe(appointments, [], 'appointments', patient_id),
+            self._safe(reminders, [], 'reminders', patient_id),
+            self._safe(memory, [], 'memory', patient_id)
+        )
+
+    def batch_get_patients(self, patient_ids: List[str], max_retries: int = 5) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch many patient records with BatchGetItem (100 keys per call)
+
+        UnprocessedKeys are retried with exponential backoff.
+        """
+        unique_ids = list(dict.fromkeys(patient_ids))
+        chunks = [unique_ids[i:i + BATCH_GET_LIMIT] for i in range(0, len(unique_ids), BATCH_GET_LIMIT)]
+
+        def fetch_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+            request = {self.patients_table: {'Keys': [{'patient_id': pid} for pid in chunk]}}
+            items = []
+            for attempt in range(max_retries):
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response.get('Responses', {}).get(self.patients_table, []))
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            else:
+                print(f"Warning: {len(request[self.patients_table]['Keys'])} patient records left unprocessed")
+            return items
+
+        patients = {}
+        for items in self._executor.map(fetch_chunk, chunks):
+            for item in items:
+                patients[item['patient_id']] = item
+        return patients
+
+    def load_many(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load contexts for many patients: one BatchGetItem per 100 records plus parallel index queries"""
+        unique_ids = list(dict.fromkeys(patient_ids))
+        appointments = {pid: self._submit(pid, 'appointments', self._fetch_appointments) for pid in unique_ids}
+        reminders = {pid: self._submit(pid, 'reminders', self._fetch_reminders) for pid in unique_ids}
+        memory = {pid: self._submit(pid, 'memory', self._fetch_memory) for pid in unique_ids}
+
+        patients = {}
+        if self.cache is not None:
+            for pid in unique_ids:
+                cached = self.cache.get(pid, 'record')
+                if cached is not None:
+                    patients[pid] = cached
+        missing = [pid for pid in unique_ids if pid not in patients]
+        if missing:
+            try:
+                fetched = self.batch_get_patients(missing)
+            except ClientError as e:
+                print(f"Error retrieving patient records for {len(missing)} patients: {e}")
+                fetched = None
+            if fetched is not None:
+                for pid in missing:
+                    patients[pid] = fetched.get(pid, {})
+                    if self.cache is not None:
+                        self.cache.set(pid, 'record', patients[pid])
+
+        return {
+            pid: self._assemble(
+                patients.get(pid, {}),
+                self._safe(appointments[pid], [], 'appointments', pid),
+                self._safe(reminders[pid], [], 'reminders', pid),
+                self._safe(memory[pid], [], 'memory', pid)
+            )
+            for pid in unique_ids
+        }
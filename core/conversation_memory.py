@@ -0,0 +1,338 @@
+"""
+Conversation Memory
+Tiered per-patient memory: recent turns verbatim, older turns in a rolling summary
+"""
+
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
+
+
+def _first_sentence(text: str, max_chars: int = 120) -> str:
+    text = ' '.join((text or '').replace('*', '').split())
+    for end in ('. ', '? ', '! '):
+        if end in text:
+            text = text[:text.index(end) + 1]
+            break
+    return text if len(text) <= max_chars else text[:max_chars - 1] + '…'
+
+
+def extractive_summary(previous: str, turns: List[Dict[str, Any]], max_chars: int = 1500) -> str:
+    """
+    Fold turns into a summary without a model call: one line per turn
+
+    Lines are appended to the previous summary and the oldest lines are
+    dropped beyond `max_chars`, so the summary always favours recent history.
+    """
+    lines = previous.splitlines() if previous else []
+    for turn in turns:
+        kind = turn.get('agent') or turn.get('type') or 'general'
+        said = _first_sentence(turn.get('query', ''), 80)
+        answer = _first_sentence(turn.get('response') or turn.get('content') or '')
+        lines.append(f"- {turn.get('timestamp', '')[:10]} {kind}: " + (f"{said} → {answer}" if said else answer))
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str).encode('utf-8'))
+
+
+class ConversationMemory:
+    """
+    Bounded conversation memory for many patients
+
+    Each patient keeps the last `recent_turns` turns verbatim. Older turns
+    wait in a short queue until `summarize_every` of them have built up and
+    are then folded into the patient's summary on a background thread, so
+    the (possibly model-backed) summarizer never runs on the request path.
+    A patient's summary plus turns never exceed `max_bytes_per_patient`,
+    idle patients expire after `ttl` seconds and the least recently active
+    are evicted beyond `max_patients`.
+
+    With a `store` (core.memory_store.MemoryStore) every turn is saved as
+    its own `turn` record, keyed by a time-ordered sequence number, and the
+    summary as one `summary` record that lists the turns folded into it. A
+    patient's records are merged into local state on first use and again
+    every `sync_interval` seconds, so workers taking turns on one session
+    see each other's turns and never overwrite them; a turn missing from
+    the stored summary is queued again for the next fold. Saves are
+    write-behind and never block a turn.
+
+    Args:
+        summarizer: (previous_summary, turns) -> new summary; extractive_summary when None
+        recent_turns: Turns kept verbatim
+        summarize_every: Overflowed turns folded per summarizer call
+        max_bytes_per_patient: Hard cap on summary + turns (turns measured as JSON bytes)
+        max_patients: Patients kept before least-recently-active eviction
+        ttl: Seconds of inactivity before a patient's memory is dropped
+        store: Optional persistent MemoryStore shared across workers
+        sync_interval: Seconds before a patient's local state is merged with the store again
+    """
+
+    # Folded turn ids kept on the summary record; older turns count as folded
+    FOLDED_KEPT = 256
+
+    def __init__(self, summarizer: Callable[[str, List[Dict[str, Any]]], str] = None,
+                 recent_turns: int = 6, summarize_every: int = 4, max_bytes_per_patient: int = 8192,
+                 max_patients: int = 10000, ttl: float = 86400.0, store=None, sync_interval: float = 60.0):
+        self.summarizer = summarizer or extractive_summary
+        self.recent_turns = recent_turns
+        self.summarize_every = summarize_every
+        self.max_bytes_per_patient = max_bytes_per_patient
+        self.max_patients = max_patients
+        self.ttl = ttl
+        self.store = store
+        self.sync_interval = sync_interval
+        self._patients: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='memory-summarizer')
+        self._stats = {'turns': 0, 'folds': 0, 'fold_errors': 0, 'dropped_turns': 0, 'evictions': 0, 'expirations': 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], summarizer=None, store=None) -> 'ConversationMemory':
+        """Build from the `memory.short_term` block in config.yaml"""
+        short_term = config.get('memory', {}).get('short_term', {})
+        return cls(
+            summarizer=summarizer,
+            recent_turns=short_term.get('recent_turns', 6),
+            summarize_every=short_term.get('summarize_every', 4),
+            max_bytes_per_patient=short_term.get('max_bytes_per_patient', 8192),
+            max_patients=short_term.get('max_patients', 10000),
+            ttl=short_term.get('retention_hours', 24) * 3600,
+            store=store,
+            sync_interval=config.get('memory', {}).get('store', {}).get('cache_ttl_seconds', 60)
+        )
+
+    def _state(self, patient_id: str, create: bool = False, touch: bool = True) -> Optional[Dict[str, Any]]:
+        """Patient state, honouring TTL and LRU order (caller holds the lock)"""
+        state = self._patients.get(patient_id)
+        now = time.monotonic()
+        if state is not None and now - state['touched'] > self.ttl:
+            del self._patients[patient_id]
+            self._stats['expirations'] += 1
+            state = None
+        if state is None:
+            if not create:
+                return None
+            state = {'summary': '', 'folded': [], 'unsummarized': [], 'recent': [], 'sizes': {}, 'seqs': {},
+                     'folding': False, 'touched': now, 'synced': now}
+            self._patients[patient_id] = state
+            while len(self._patients) > self.max_patients:
+                self._patients.popitem(last=False)
+                self._stats['evictions'] += 1
+        if touch:
+            state['touched'] = now
+            self._patients.move_to_end(patient_id)
+        return state
+
+    @staticmethod
+    def _new_seq() -> str:
+        """Turn sequence number: orders by time across workers, unique within a nanosecond"""
+        return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+    def _turn_record(self, patient_id: str, seq: str, turn: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'memory_id': f"turn#{patient_id}#{seq}",
+            'patient_id': patient_id,
+            'memory_type': 'turn',
+            'seq': seq,
+            'turn': turn,
+            'expires_at': time.time() + self.ttl
+        }
+
+    def _summary_record(self, patient_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Summary record for the store (caller holds the lock)"""
+        return {
+            'memory_id': f"summary#{patient_id}",
+            'patient_id': patient_id,
+            'memory_type': 'summary',
+            'summary': state['summary'],
+            'folded': state['folded'],
+            'expires_at': time.time() + self.ttl
+        }
+
+    def _hydrate(self, patient_id: str):
+        """Merge the store's summary and turns into local state (first use, then every sync_interval)"""
+        if self.store is None:
+            return
+        with self._lock:
+            state = self._state(patient_id, touch=False)
+            if state is not None and time.monotonic() - state['synced'] < self.sync_interval:
+                return
+        now = time.time()
+        summary = next((r for r in self.store.get(patient_id, 'summary')
+                        if float(r.get('expires_at', now + 1)) > now), None)
+        stored = [r for r in self.store.get(patient_id, 'turn') if float(r.get('expires_at', now + 1)) > now]
+        with self._lock:
+            state = self._state(patient_id, create=bool(summary or stored), touch=False)
+            if state is None:
+                return
+            state['synced'] = time.monotonic()
+            if summary is not None and summary.get('folded', [''])[-1:] > state['folded'][-1:]:
+                state['summary'], state['folded'] = summary.get('summary', ''), list(summary['folded'])
+            # Turns older than the oldest listed fold are in the summary already
+            folded = set(state['folded'])
+            floor = state['folded'][0] if state['folded'] else ''
+            merged = {seq: turn for seq, turn in ((state['seqs'][id(t)], t)
+                                                  for t in state['unsummarized'] + state['recent'])}
+            for record in stored:
+                merged.setdefault(record['seq'], record['turn'])
+            merged = sorted((seq, turn) for seq, turn in merged.items() if seq > floor and seq not in folded)
+            turns = [turn for _, turn in merged]
+            state['seqs'] = {id(turn): seq for seq, turn in merged}
+            state['sizes'] = {id(turn): state['sizes'].get(id(turn)) or _size(turn) for turn in turns}
+            state['recent'] = turns[-self.recent_turns:]
+            state['unsummarized'] = turns[:-self.recent_turns] if len(turns) > self.recent_turns else []
+            self._enforce_cap(state)
+
+    @staticmethod
+    def _turns_bytes(state: Dict[str, Any]) -> int:
+        sizes = state['sizes']
+        return sum(sizes[id(t)] for t in state['unsummarized']) + sum(sizes[id(t)] for t in state['recent'])
+
+    def _enforce_cap(self, state: Dict[str, Any]):
+        """Keep summary + turns under the byte cap: clip the summary's oldest lines, then drop oldest turns"""
+        turns_bytes = self._turns_bytes(state)
+        summary_budget = max(self.max_bytes_per_patient // 4, self.max_bytes_per_patient - turns_bytes)
+        summary = state['summary']
+        while summary and len(summary.encode('utf-8')) > summary_budget:
+            cut = summary.find('\n')
+            summary = summary[cut + 1:] if cut >= 0 else summary[-summary_budget // 2:]
+        state['summary'] = summary
+
+        summary_bytes = len(summary.encode('utf-8'))
+        while turns_bytes + summary_bytes > self.max_bytes_per_patient:
+            queue = state['unsummarized'] if state['unsummarized'] else state['recent']
+            if len(queue) <= (1 if queue is state['recent'] else 0):
+                break
+            dropped = queue.pop(0)
+            turns_bytes -= state['sizes'].pop(id(dropped))
+            state['seqs'].pop(id(dropped), None)
+            self._stats['dropped_turns'] += 1
+
+    def append(self, patient_id: str, turn: Dict[str, Any]):
+        """Record a turn; overflowed turns are summarized in the background"""
+        self._hydrate(patient_id)
+        with self._lock:
+            self._stats['turns'] += 1
+            state = self._state(patient_id, create=True)
+            state['recent'].append(turn)
+            state['sizes'][id(turn)] = _size(turn)
+            if self.store is not None:
+                seq = state['seqs'][id(turn)] = self._new_seq()
+            if len(state['recent']) > self.recent_turns:
+                state['unsummarized'].extend(state['recent'][:-self.recent_turns])
+                state['recent'] = state['recent'][-self.recent_turns:]
+            self._enforce_cap(state)
+            fold = len(state['unsummarized']) >= self.summarize_every and not state['folding']
+            if fold:
+                state['folding'] = True
+            record = self._turn_record(patient_id, seq, turn) if self.store is not None else None
+        if record is not None:
+            self.store.put(record)
+        if fold:
+            self._executor.submit(self._fold, patient_id)
+
+    def update(self, patient_id: str, turn: Dict[str, Any], **changes) -> bool:
+        """
+        Change a turn already recorded with `append` (e.g. a reply completed later)
+
+        Returns False when the turn has since been summarized or dropped; the
+        summary keeps what it was folded with.
+        """
+        with self._lock:
+            state = self._state(patient_id, touch=False)
+            if state is None or id(turn) not in state['sizes']:
+                return False
+            turn.update(changes)
+            state['sizes'][id(turn)] = _size(turn)
+            self._enforce_cap(state)
+            seq = state['seqs'].get(id(turn))
+            record = self._turn_record(patient_id, seq, turn) if self.store is not None and seq else None
+        if record is not None:
+            self.store.put(record)
+        return True
+
+    def _fold(self, patient_id: str):
+        with self._lock:
+            state = self._patients.get(patient_id)
+            if state is None:
+                return
+            previous, turns = state['summary'], list(state['unsummarized'])
+            seqs = [state['seqs'][id(t)] for t in turns if id(t) in state['seqs']]
+
+        try:
+            summary = self.summarizer(previous, turns)
+        except Exception as e:
+            print(f"Summarizer failed for {patient_id}, using extractive summary: {e}")
+            summary = extractive_summary(previous, turns)
+            with self._lock:
+                self._stats['fold_errors'] += 1
+
+        with self._lock:
+            state['folding'] = False
+            if self._patients.get(patient_id) is not state:
+                return
+            # Turns appended meanwhile stay queued; ones the byte cap dropped are already gone
+            folded = {id(t) for t in turns}
+            state['unsummarized'] = [t for t in state['unsummarized'] if id(t) not in folded]
+            for key in folded:
+                state['sizes'].pop(key, None)
+                state['seqs'].pop(key, None)
+            state['summary'] = summary
+            state['folded'] = sorted(set(state['folded']) | set(seqs))[-self.FOLDED_KEPT:]
+            self._stats['folds'] += 1
+            self._enforce_cap(state)
+            again = len(state['unsummarized']) >= self.summarize_every
+            if again:
+                state['folding'] = True
+            record = self._summary_record(patient_id, state) if self.store is not None else None
+        if record is not None:
+            self.store.put(record)
+        if again:
+            self._executor.submit(self._fold, patient_id)
+
+    def turns(self, patient_id: str) -> List[Dict[str, Any]]:
+        """Turns not yet in the summary, oldest first (recent turns plus any awaiting a fold)"""
+        self._hydrate(patient_id)
+        with self._lock:
+            state = self._state(patient_id)
+            return list(state['unsummarized']) + list(state['recent']) if state else []
+
+    def summary(self, patient_id: str) -> str:
+        self._hydrate(patient_id)
+        with self._lock:
+            state = self._state(patient_id)
+            return state['summary'] if state else ''
+
+    def clear(self, patient_id: str = None):
+        with self._lock:
+            if patient_id is None:
+                self._patients.clear()
+            else:
+                self._patients.pop(patient_id, None)
+
+    def flush(self, timeout: float = None):
+        """Wait for background summarization (tests, benchmarks, shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                busy = any(s['folding'] for s in self._patients.values())
+            if not busy or (deadline is not None and time.monotonic() > deadline):
+                return
+            time.sleep(0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                'patients': len(self._patients),
+                'bytes': sum(self._turns_bytes(s) + len(s['summary'].encode('utf-8'))
+                             for s in self._patients.values())
+            }
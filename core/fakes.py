@@ -0,0 +1,713 @@
+"""
+Local Stand-ins for AWS Services
+Fake Bedrock runtime, DynamoDB and notification channel used for offline demos, load tests and benchmarks
+"""
+
+import io
+import re
+import json
+import time
+import random
+import threading
+from typing import Dict, Any, List, Callable, Iterator
+
+from botocore.exceptions import ClientError
+
+from core.rate_limiter import TokenBucket
+from core.notifications import DeliveryError, NotificationChannel
+
+
+def _default_responder(model_id: str, prompt: str) -> str:
+    """Canned reply so the fake is useful without any configuration"""
+    return (
+        "**Urgency Level:** Low\n\n"
+        "**Recommendation:** Monitor symptoms. Home care may be sufficient.\n\n"
+        "**Next Steps:**\n"
+        "1. Rest and hydrate\n"
+        "2. Call if symptoms worsen or persist beyond 3 days"
+    )
+
+
+def _throttling_error(operation: str) -> ClientError:
+    return ClientError(
+        {'Error': {'Code': 'ThrottlingException', 'Message': 'Too many requests, please wait before trying again.'}},
+        operation
+    )
+
+
+class FakeBedrockRuntime:
+    """
+    Drop-in replacement for a boto3 `bedrock-runtime` client
+
+    Args:
+        responder: Callable (model_id, prompt) -> reply text
+        first_token_latency: Seconds to wait before the first chunk / full reply
+        chunk_delay: Seconds to wait between streamed chunks
+        chunk_size: Characters per streamed chunk
+        throttle_first: Number of initial calls that raise ThrottlingException
+        throttle_rate: Fraction of calls throttled at random
+        quota_rpm: Service-side request quota; calls beyond it are throttled
+        quota_burst: Requests the quota admits back to back
+        model_latency: Model ID substring -> first_token_latency for that model (tiered models)
+    """
+
+    def __init__(self, responder: Callable[[str, str], str] = None,
+                 first_token_latency: float = 0.0, chunk_delay: float = 0.0,
+                 chunk_size: int = 16, throttle_first: int = 0, throttle_rate: float = 0.0,
+                 quota_rpm: float = None, quota_burst: float = 1.0, model_latency: Dict[str, float] = None):
+        self.responder = responder or _default_responder
+        self.first_token_latency = first_token_latency
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.throttle_first = throttle_first
+        self.throttle_rate = throttle_rate
+        self.quota = TokenBucket(quota_rpm, quota_burst) if quota_rpm else None
+        self.model_latency = model_latency or {}
+        self.calls: List[Dict[str, Any]] = []
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _start_call(self, operation: str, modelId: str, body: str) -> str:
+        request = json.loads(body)
+        prompt = request['messages'][-1]['content']
+        with self._lock:
+            self.calls.append({'operation': operation, 'model_id': modelId, 'prompt': prompt})
+            throttled = len(self.calls) <= self.throttle_first or random.random() < self.throttle_rate
+            if not throttled and self.quota is not None:
+                throttled = self.quota.wait_time(1) > 0
+                if not throttled:
+                    self.quota.take(1)
+            self.throttled += throttled
+        if throttled:
+            raise _throttling_error(operation)
+        return prompt
+
+    def _latency(self, model_id: str) -> float:
+        for pattern, latency in self.model_latency.items():
+            if pattern in model_id:
+                return latency
+        return self.first_token_latency
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        prompt = self._start_call('InvokeModel', modelId, body)
+        text = self.responder(modelId, prompt)
+        time.sleep(self._latency(modelId))
+        result = {
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}
+        }
+        return {'body': io.BytesIO(json.dumps(result).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        prompt = self._start_call('InvokeModelWithResponseStream', modelId, body)
+        text = self.responder(modelId, prompt)
+        return {'body': self._events(prompt, text, self._latency(modelId))}
+
+    def _events(self, prompt: str, text: str, latency: float) -> Iterator[Dict[str, Any]]:
+        """Yield events shaped like Bedrock's Anthropic messages stream"""
+        def event(payload: Dict[str, Any]) -> Dict[str, Any]:
+            return {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+        time.sleep(latency)
+        yield event({'type': 'message_start',
+                     'message': {'role': 'assistant', 'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': 0}}})
+        yield event({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+        for start in range(0, len(text), self.chunk_size):
+            if start and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield event({'type': 'content_block_delta', 'index': 0,
+                         'delta': {'type': 'text_delta', 'text': text[start:start + self.chunk_size]}})
+        yield event({'type': 'content_block_stop', 'index': 0})
+        yield event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'},
+                     'usage': {'output_tokens': len(text) // 4}})
+        yield event({'type': 'message_stop'})
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB
+# ---------------------------------------------------------------------------
+
+# Key schemas from infrastructure/template.yaml, matched by table-name prefix
+# so environment suffixes (hospital-patients-dev) resolve too
+DEFAULT_TABLE_SCHEMAS = {
+    'hospital-patients': {'key': 'patient_id', 'indexes': {}},
+    'hospital-appointments': {'key': 'appointment_id', 'indexes': {
+        'PatientIndex': ('patient_id', 'date'),
+        'DateIndex': ('date', 'appointment_id')
+    }},
+    'hospital-memory': {'key': 'memory_id', 'indexes': {
+        'PatientMemoryIndex': ('patient_id', None),
+        'PatientReminderIndex': ('patient_id', 'scheduled_date'),
+        'DueReminderIndex': ('due_bucket', 'memory_id')
+    }},
+    'hospital-notification-outbox': {'key': 'idempotency_key', 'indexes': {
+        'StatusIndex': ('status', 'next_attempt')
+    }}
+}
+
+PAGE_SIZE_BYTES = 1024 * 1024
+READ_UNIT_BYTES = 4096
+WRITE_UNIT_BYTES = 1024
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _item_size(item: Dict[str, Any]) -> int:
+    return len(json.dumps(item, default=str))
+
+
+_TOKEN_RE = re.compile(r"\s*(<>|<=|>=|=|<|>|\(|\)|,|[#:]?[A-Za-z_][\w.\-]*)")
+_KEYWORDS = {'AND', 'OR', 'NOT', 'BETWEEN', 'IN'}
+
+
+class _Expression:
+    """
+    Parser/evaluator for the DynamoDB expression subset used in this repo:
+    comparisons, BETWEEN, IN, AND/OR/NOT, parentheses, begins_with,
+    contains, attribute_exists and attribute_not_exists
+    """
+
+    def __init__(self, text: str, names: Dict[str, str], values: Dict[str, Any]):
+        self.names = names or {}
+        self.values = values or {}
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+        self.equalities: Dict[str, Any] = {}
+        self.evaluate = self._parse_or()
+        if self.pos != len(self.tokens):
+            raise _client_error('ValidationException', f"Unexpected token {self.tokens[self.pos]!r}", 'Expression')
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        tokens, pos = [], 0
+        text = text.strip()
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if not match:
+                raise _client_error('ValidationException', f"Invalid expression near {text[pos:]!r}", 'Expression')
+            tokens.append(match.group(1))
+            pos = match.end()
+        return tokens
+
+    def _peek(self) -> str:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ''
+
+    def _take(self, expected: str = None) -> str:
+        token = self._peek()
+        if expected is not None and token.upper() != expected:
+            raise _client_error('ValidationException', f"Expected {expected}, got {token!r}", 'Expression')
+        self.pos += 1
+        return token
+
+    def attribute(self, token: str) -> str:
+        return self.names.get(token, token)
+
+    def _operand(self) -> Callable[[Dict[str, Any]], Any]:
+        token = self._take()
+        if token.startswith(':'):
+            value = self.values[token]
+            return lambda item: value
+        name = self.attribute(token)
+        return lambda item: item.get(name)
+
+    def _parse_or(self):
+        left = self._parse_and()
+        while self._peek().upper() == 'OR':
+            self._take()
+            right = self._parse_and()
+            left = (lambda a, b: lambda item: a(item) or b(item))(left, right)
+        return left
+
+    def _parse_and(self):
+        left = self._parse_not()
+        while self._peek().upper() == 'AND':
+            self._take()
+            right = self._parse_not()
+            left = (lambda a, b: lambda item: a(item) and b(item))(left, right)
+        return left
+
+    def _parse_not(self):
+        if self._peek().upper() == 'NOT':
+            self._take()
+            inner = self._parse_not()
+            return lambda item: not inner(item)
+        return self._parse_term()
+
+    def _parse_term(self):
+        token = self._peek()
+        if token == '(':
+            self._take()
+            inner = self._parse_or()
+            self._take(')')
+            return inner
+
+        function = token.lower()
+        if function in ('attribute_exists', 'attribute_not_exists', 'begins_with', 'contains'):
+            self._take()
+            self._take('(')
+            name = self.attribute(self._take())
+            argument = None
+            if self._peek() == ',':
+                self._take()
+                argument = self._operand()
+            self._take(')')
+            if function == 'attribute_exists':
+                return lambda item: name in item
+            if function == 'attribute_not_exists':
+                return lambda item: name not in item
+            if function == 'begins_with':
+                return lambda item: isinstance(item.get(name), str) and item[name].startswith(argument(item))
+            return lambda item: item.get(name) is not None and argument(item) in item[name]
+
+        attribute_token = token
+        left = self._operand()
+        operator = self._take().upper()
+        if operator == 'BETWEEN':
+            low = self._operand()
+            self._take('AND')
+            high = self._operand()
+            return lambda item: left(item) is not None and low(item) <= left(item) <= high(item)
+        if operator == 'IN':
+            self._take('(')
+            options = [self._operand()]
+            while self._peek() == ',':
+                self._take()
+                options.append(self._operand())
+            self._take(')')
+            return lambda item: any(left(item) == option(item) for option in options)
+
+        right_token = self._peek()
+        right = self._operand()
+        if operator == '=' and right_token.startswith(':'):
+            self.equalities[self.attribute(attribute_token)] = self.values[right_token]
+        comparisons = {
+            '=': lambda a, b: a == b,
+            '<>': lambda a, b: a != b,
+            '<': lambda a, b: a is not None and a < b,
+            '<=': lambda a, b: a is not None and a <= b,
+            '>': lambda a, b: a is not None and a > b,
+            '>=': lambda a, b: a is not None and a >= b
+        }
+        if operator not in comparisons:
+            raise _client_error('ValidationException', f"Unsupported operator {operator!r}", 'Expression')
+        compare = comparisons[operator]
+        return lambda item: compare(left(item), right(item))
+
+
+def _projection(expression: str, names: Dict[str, str]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    fields = [(names or {}).get(f.strip(), f.strip()) for f in expression.split(',')]
+    return lambda item: {f: item[f] for f in fields if f in item}
+
+
+def _apply_update(item: Dict[str, Any], expression: str, names: Dict[str, str], values: Dict[str, Any]):
+    """Apply SET / REMOVE / ADD clauses of an UpdateExpression in place"""
+    names = names or {}
+    values = values or {}
+    clauses = re.split(r'\b(SET|REMOVE|ADD)\b', expression, flags=re.IGNORECASE)
+    for action, body in zip(clauses[1::2], clauses[2::2]):
+        action = action.upper()
+        for part in [p.strip() for p in body.split(',') if p.strip()]:
+            if action == 'SET':
+                target, value = [x.strip() for x in part.split('=', 1)]
+                operands = [names.get(x, x) for x in re.split(r'\s*[+-]\s*', value)]
+                resolved = [values[x] if x.startswith(':') else item.get(x, 0) for x in operands]
+                if len(resolved) == 2:
+                    resolved = [resolved[0] + resolved[1] if '+' in value else resolved[0] - resolved[1]]
+                item[names.get(target, target)] = resolved[0]
+            elif action == 'REMOVE':
+                item.pop(names.get(part, part), None)
+            else:
+                target, value = part.split()
+                name = names.get(target, target)
+                item[name] = item.get(name, 0) + values[value]
+
+
+class FakeDynamoTable:
+    """In-memory table with GSI partitions, conditional writes and 1 MB query pages"""
+
+    def __init__(self, resource: 'FakeDynamoDB', name: str, key: str, indexes: Dict[str, tuple]):
+        self.resource = resource
+        self.name = name
+        self.table_name = name
+        self.key = key
+        self.indexes = indexes
+        self.items: Dict[Any, Dict[str, Any]] = {}
+        self._partitions: Dict[str, Dict[Any, Dict[Any, None]]] = {index: {} for index in indexes}
+        self._lock = threading.RLock()
+
+    # -- bookkeeping ---------------------------------------------------------
+
+    def _index_add(self, item: Dict[str, Any]):
+        for index, (hash_key, range_key) in self.indexes.items():
+            # GSIs are sparse: items missing an index key attribute are not indexed
+            if hash_key in item and (range_key is None or range_key in item):
+                self._partitions[index].setdefault(item[hash_key], {})[item[self.key]] = None
+
+    def _index_remove(self, item: Dict[str, Any]):
+        for index, (hash_key, _) in self.indexes.items():
+            if hash_key in item:
+                members = self._partitions[index].get(item[hash_key])
+                if members is not None:
+                    members.pop(item[self.key], None)
+
+    def _store(self, item: Dict[str, Any]):
+        old = self.items.get(item[self.key])
+        if old is not None:
+            self._index_remove(old)
+        self.items[item[self.key]] = item
+        self._index_add(item)
+
+    def _check(self, item: Dict[str, Any], condition: str, names, values, operation: str):
+        if condition and not _Expression(condition, names, values).evaluate(item or {}):
+            raise _client_error('ConditionalCheckFailedException', 'The conditional request failed', operation)
+
+    def _capacity(self, units: float, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        self.resource._record_capacity(self.name, units)
+        if kwargs.get('ReturnConsumedCapacity') in ('TOTAL', 'INDEXES'):
+            return {'ConsumedCapacity': {'TableName': self.name, 'CapacityUnits': units}}
+        return {}
+
+    # -- item operations -----------------------------------------------------
+
+    def get_item(self, Key: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self.resource._call('GetItem')
+        with self._lock:
+            item = self.items.get(Key[self.key])
+        response = self._capacity(0.5 * max(1, -(-_item_size(item or {}) // READ_UNIT_BYTES)), kwargs)
+        if item is not None:
+            if 'ProjectionExpression' in kwargs:
+                item = _projection(kwargs['ProjectionExpression'], kwargs.get('ExpressionAttributeNames'))(item)
+            response['Item'] = dict(item)
+        return response
+
+    def put_item(self, Item: Dict[str, Any], ConditionExpression: str = None,
+                 ExpressionAttributeNames: Dict[str, str] = None,
+                 ExpressionAttributeValues: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
+        self.resource._call('PutItem')
+        with self._lock:
+            self._check(self.items.get(Item[self.key]), ConditionExpression,
+                        ExpressionAttributeNames, ExpressionAttributeValues, 'PutItem')
+            self._store(dict(Item))
+        return self._capacity(max(1, -(-_item_size(Item) // WRITE_UNIT_BYTES)), kwargs)
+
+    def update_item(self, Key: Dict[str, Any], UpdateExpression: str, ConditionExpression: str = None,
+                    ExpressionAttributeNames: Dict[str, str] = None,
+                    ExpressionAttributeValues: Dict[str, Any] = None,
+                    ReturnValues: str = 'NONE', **kwargs) -> Dict[str, Any]:
+        self.resource._call('UpdateItem')
+        with self._lock:
+            current = self.items.get(Key[self.key])
+            self._check(current, ConditionExpression, ExpressionAttributeNames,
+                        ExpressionAttributeValues, 'UpdateItem')
+            item = dict(current) if current else dict(Key)
+            _apply_update(item, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            self._store(item)
+        response = self._capacity(max(1, -(-_item_size(item) // WRITE_UNIT_BYTES)), kwargs)
+        if ReturnValues == 'ALL_NEW':
+            response['Attributes'] = dict(item)
+        elif ReturnValues == 'ALL_OLD' and current:
+            response['Attributes'] = dict(current)
+        return response
+
+    def delete_item(self, Key: Dict[str, Any], ConditionExpression: str = None,
+                    ExpressionAttributeNames: Dict[str, str] = None,
+                    ExpressionAttributeValues: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
+        self.resource._call('DeleteItem')
+        with self._lock:
+            current = self.items.get(Key[self.key])
+            self._check(current, ConditionExpression, ExpressionAttributeNames,
+                        ExpressionAttributeValues, 'DeleteItem')
+            if current is not None:
+                self._index_remove(current)
+                del self.items[Key[self.key]]
+        return self._capacity(1, kwargs)
+
+    # -- reads ---------------------------------------------------------------
+
+    def query(self, KeyConditionExpression: str, IndexName: str = None,
+              ExpressionAttributeNames: Dict[str, str] = None,
+              ExpressionAttributeValues: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
+        self.resource._call('Query')
+        key_condition = _Expression(KeyConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+
+        if IndexName:
+            if IndexName not in self.indexes:
+                raise _client_error('ValidationException', f"The table does not have the specified index: {IndexName}", 'Query')
+            hash_key, range_key = self.indexes[IndexName]
+        else:
+            hash_key, range_key = self.key, None
+        if hash_key not in key_condition.equalities:
+            raise _client_error('ValidationException', 'Query condition missed key schema element', 'Query')
+        partition_value = key_condition.equalities[hash_key]
+
+        with self._lock:
+            if IndexName:
+                keys = list(self._partitions[IndexName].get(partition_value, {}))
+                candidates = [self.items[k] for k in keys]
+            else:
+                candidates = [self.items[partition_value]] if partition_value in self.items else []
+        candidates = [item for item in candidates if key_condition.evaluate(item)]
+
+        def position(item):
+            return (item.get(range_key, '') if range_key else '', str(item[self.key]))
+
+        candidates.sort(key=position, reverse=not kwargs.get('ScanIndexForward', True))
+        start_key = kwargs.get('ExclusiveStartKey')
+        if start_key:
+            start = self.items.get(start_key[self.key], start_key)
+            marker = position(start)
+            ascending = kwargs.get('ScanIndexForward', True)
+            candidates = [c for c in candidates if (position(c) > marker if ascending else position(c) < marker)]
+
+        limit = kwargs.get('Limit')
+        evaluated, page_bytes = [], 0
+        for item in candidates:
+            if limit is not None and len(evaluated) >= limit:
+                break
+            if page_bytes >= PAGE_SIZE_BYTES:
+                break
+            evaluated.append(item)
+            page_bytes += _item_size(item)
+
+        response: Dict[str, Any] = {}
+        if len(evaluated) < len(candidates):
+            last = evaluated[-1]
+            last_key = {self.key: last[self.key]}
+            if IndexName:
+                last_key[hash_key] = last[hash_key]
+                if range_key and range_key in last:
+                    last_key[range_key] = last[range_key]
+            response['LastEvaluatedKey'] = last_key
+
+        matched = evaluated
+        if kwargs.get('FilterExpression'):
+            item_filter = _Expression(kwargs['FilterExpression'], ExpressionAttributeNames, ExpressionAttributeValues)
+            matched = [item for item in evaluated if item_filter.evaluate(item)]
+        if kwargs.get('ProjectionExpression'):
+            project = _projection(kwargs['ProjectionExpression'], ExpressionAttributeNames)
+            matched = [project(item) for item in matched]
+        else:
+            matched = [dict(item) for item in matched]
+
+        response.update(self._capacity(0.5 * max(1, -(-page_bytes // READ_UNIT_BYTES)), kwargs))
+        if kwargs.get('Select') == 'COUNT':
+            response.update({'Count': len(matched), 'ScannedCount': len(evaluated)})
+        else:
+            response.update({'Items': matched, 'Count': len(matched), 'ScannedCount': len(evaluated)})
+        return response
+
+    def batch_writer(self, overwrite_by_pkeys: List[str] = None) -> 'FakeBatchWriter':
+        return FakeBatchWriter(self)
+
+    def _batch_write(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply a BatchWriteItem; returns the requests left unprocessed"""
+        self.resource._call('BatchWriteItem')
+        deferred = int(len(requests) * self.resource.unprocessed_rate)
+        requests, unprocessed = requests[:len(requests) - deferred], requests[len(requests) - deferred:]
+        with self._lock:
+            for request in requests:
+                if 'PutRequest' in request:
+                    self._store(dict(request['PutRequest']['Item']))
+                else:
+                    key = request['DeleteRequest']['Key'][self.key]
+                    current = self.items.pop(key, None)
+                    if current is not None:
+                        self._index_remove(current)
+        self.resource._record_capacity(self.name, len(requests))
+        return unprocessed
+
+
+class FakeBatchWriter:
+    """
+    Buffers writes and flushes them 25 at a time like boto3's batch_writer,
+    re-sending UnprocessedItems until the buffer drains
+    """
+
+    def __init__(self, table: FakeDynamoTable):
+        self.table = table
+        self._buffer: List[Dict[str, Any]] = []
+
+    def put_item(self, Item: Dict[str, Any]):
+        self._buffer.append({'PutRequest': {'Item': Item}})
+        self._flush_if_full()
+
+    def delete_item(self, Key: Dict[str, Any]):
+        self._buffer.append({'DeleteRequest': {'Key': Key}})
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+        if len(self._buffer) >= 25:
+            self._flush()
+
+    def _flush(self):
+        while self._buffer:
+            batch, self._buffer = self._buffer[:25], self._buffer[25:]
+            self._buffer.extend(self.table._batch_write(batch))
+
+    def __enter__(self) -> 'FakeBatchWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self._flush()
+
+
+_UPDATE_STATEMENT_RE = re.compile(
+    r'^UPDATE "([^"]+)" ((?:SET "[^"]+" = \? ?)*)((?:REMOVE "[^"]+" ?)*)WHERE "([^"]+)" = \?((?: AND "[^"]+" = \?)*)$'
+)
+
+
+class FakeDynamoDB:
+    """
+    Drop-in replacement for `boto3.resource('dynamodb')`
+
+    Also answers `batch_execute_statement` for the PartiQL UPDATEs that
+    core.bulk_loader.batch_update sends, so it can stand in for the
+    low-level client too.
+
+    Each API call sleeps `latency` seconds to stand in for the network round
+    trip, so serial vs. parallel access patterns can be benchmarked locally.
+    Call counts and consumed capacity are tracked in `stats`.
+
+    Args:
+        latency: Seconds per API call
+        schemas: Table-name prefix -> {'key': hash key, 'indexes': {name: (hash, range)}}
+        unprocessed_rate: Fraction of batch_get_item keys / batch-write requests left unprocessed
+    """
+
+    def __init__(self, latency: float = 0.0, schemas: Dict[str, Dict[str, Any]] = None,
+                 unprocessed_rate: float = 0.0):
+        self.latency = latency
+        self.schemas = schemas or DEFAULT_TABLE_SCHEMAS
+        self.unprocessed_rate = unprocessed_rate
+        self.tables: Dict[str, FakeDynamoTable] = {}
+        self.stats: Dict[str, Any] = {'calls': {}, 'capacity_units': {}}
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str):
+        with self._lock:
+            self.stats['calls'][operation] = self.stats['calls'].get(operation, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _record_capacity(self, table_name: str, units: float):
+        with self._lock:
+            self.stats['capacity_units'][table_name] = self.stats['capacity_units'].get(table_name, 0) + units
+
+    def Table(self, name: str) -> FakeDynamoTable:
+        with self._lock:
+            if name not in self.tables:
+                schema = next((s for prefix, s in self.schemas.items() if name.startswith(prefix)), None)
+                if schema is None:
+                    raise _client_error('ResourceNotFoundException', f"Requested resource not found: {name}", 'DescribeTable')
+                self.tables[name] = FakeDynamoTable(self, name, schema['key'], dict(schema.get('indexes', {})))
+            return self.tables[name]
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        self._call('BatchGetItem')
+        if sum(len(request['Keys']) for request in RequestItems.values()) > 100:
+            raise _client_error('ValidationException', 'Too many items requested for the BatchGetItem call', 'BatchGetItem')
+
+        responses, unprocessed = {}, {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            keys = request['Keys']
+            deferred = int(len(keys) * self.unprocessed_rate)
+            if deferred:
+                unprocessed[name] = {**request, 'Keys': keys[-deferred:]}
+                keys = keys[:-deferred]
+            project = None
+            if request.get('ProjectionExpression'):
+                project = _projection(request['ProjectionExpression'], request.get('ExpressionAttributeNames'))
+            found = []
+            with table._lock:
+                for key in keys:
+                    item = table.items.get(key[table.key])
+                    if item is not None:
+                        found.append(project(item) if project else dict(item))
+            responses[name] = found
+            self._record_capacity(name, 0.5 * max(1, len(found)))
+        return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+    def batch_execute_statement(self, Statements: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """PartiQL `UPDATE "table" SET "a" = ? ... [REMOVE "b" ...] WHERE "key" = ? [AND "c" = ? ...]`, up to 25 per call"""
+        from boto3.dynamodb.types import TypeDeserializer
+
+        self._call('BatchExecuteStatement')
+        if len(Statements) > 25:
+            raise _client_error('ValidationException', 'Too many statements in the batch', 'BatchExecuteStatement')
+        deserializer = TypeDeserializer()
+        responses = []
+        for statement in Statements:
+            match = _UPDATE_STATEMENT_RE.match(statement['Statement'])
+            if match is None:
+                raise _client_error('ValidationException', f"Unsupported statement: {statement['Statement']}",
+                                    'BatchExecuteStatement')
+            table_name, sets, removes, key, where = match.groups()
+            names = re.findall(r'SET "([^"]+)"', sets)
+            conditions = re.findall(r'AND "([^"]+)"', where)
+            values = [deserializer.deserialize(v) for v in statement.get('Parameters', [])]
+            key_value, expected = values[len(names)], values[len(names) + 1:]
+            table = self.Table(table_name)
+            with table._lock:
+                current = table.items.get(key_value)
+                if (current is None or table.key != key
+                        or any(current.get(name) != value for name, value in zip(conditions, expected))):
+                    responses.append({'Error': {'Code': 'ConditionalCheckFailed',
+                                                'Message': 'The conditional request failed'}})
+                    continue
+                updated = {**current, **dict(zip(names, values))}
+                for name in re.findall(r'REMOVE "([^"]+)"', removes):
+                    updated.pop(name, None)
+                table._store(updated)
+            self._record_capacity(table_name, 1)
+            responses.append({'TableName': table_name})
+        return {'Responses': responses}
+
+
+class FakeChannel(NotificationChannel):
+    """
+    Stand-in for an SNS/SES notification channel
+
+    Each send_batch call sleeps `latency` seconds for the round trip; a
+    `failure_rate` fraction of notifications fail with a retryable error.
+    `deliveries` counts deliveries per idempotency key, so duplicate sends
+    show up as counts above one.
+
+    Args:
+        latency: Seconds per send_batch call
+        failure_rate: Fraction of notifications that fail per attempt
+        max_batch: Notifications accepted per call
+        seed: Seed for the failure draws
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, max_batch: int = 10, seed: int = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_batch = max_batch
+        self.calls = 0
+        self.deliveries: Dict[str, int] = {}
+        self.sent: List[Dict[str, Any]] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, notification: Dict[str, Any]):
+        error = self.send_batch([notification]).get(notification['key'])
+        if error is not None:
+            raise error
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> Dict[str, DeliveryError]:
+        if self.latency:
+            time.sleep(self.latency)
+        failures = {}
+        with self._lock:
+            self.calls += 1
+            for notification in notifications:
+                if self.failure_rate and self._rng.random() < self.failure_rate:
+                    failures[notification['key']] = DeliveryError('ServiceUnavailable: fake delivery failure')
+                    continue
+                self.deliveries[notification['key']] = self.deliveries.get(notification['key'], 0) + 1
+                self.sent.append(notification)
+        return failures
@@ -0,0 +1,155 @@
+"""
+Intent Classifier
+Local fast-path routing so obvious queries skip the supervisor LLM call
+"""
+
+import re
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Optional trained model (TF-IDF + logistic regression)
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    HAS_SKLEARN = True
+except ImportError:
+    HAS_SKLEARN = False
+
+
+# Seeded from the keyword lists in local_agent.handle_query and the UI's
+# mock_agent_response; weights favour the less ambiguous words
+INTENT_KEYWORDS = {
+    'triage': {
+        'symptom': 1.0, 'fever': 1.0, 'cough': 1.0, 'pain': 1.0, 'sick': 1.0,
+        'hurt': 1.0, 'ache': 1.0, 'vomit': 1.0, 'bleeding': 1.0, 'breath': 1.0,
+        'dizzy': 1.0, 'rash': 1.0, 'chest': 0.5, 'worried': 0.5
+    },
+    'booking': {
+        'appointment': 1.0, 'book': 1.0, 'schedule': 0.5, 'availability': 1.0,
+        'available': 0.5, 'slot': 1.0, 'reschedule': 1.0, 'cancel': 0.5
+    },
+    'reminder': {
+        'remind': 1.0, 'notification': 1.0, 'notify': 1.0, 'follow-up': 1.0,
+        'follow up': 1.0, 'refill': 0.5
+    }
+}
+
+# Matched anywhere in a word, not just at its start ("headache", "seasick")
+SUFFIX_KEYWORDS = {'ache', 'sick'}
+
+# Win whenever one of their keywords matches, as in the original keyword
+# routing: a symptom outranks any booking or reminder wording
+PRIORITY_INTENTS = ('triage',)
+
+# Agent names used by the supervisor in agents/hospital_agent.py
+INTENT_AGENTS = {
+    'triage': 'TriageAgent',
+    'booking': 'BookingAgent',
+    'reminder': 'ReminderAgent'
+}
+
+
+class IntentClassifier:
+    """
+    Keyword intent classifier with an optional trained model
+
+    Keywords match at word starts ("symptom" matches "symptoms"), or
+    anywhere for SUFFIX_KEYWORDS. Confidence is top / (top + runner_up + 0.5),
+    so one clear keyword scores 0.67 and two conflicting keywords score 0.4.
+    A priority intent with any keyword match wins outright and scores
+    own / (own + 0.5). A model trained with `fit` is consulted when the
+    keywords are not confident enough and no priority intent matched.
+
+    Args:
+        keywords: Mapping of intent -> {keyword: weight}
+        threshold: Minimum confidence for `classify` to answer locally
+        priority: Intents that win whenever one of their keywords matches
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, float]] = None, threshold: float = 0.6,
+                 priority: Tuple[str, ...] = PRIORITY_INTENTS):
+        self.threshold = threshold
+        self.priority = priority
+        self.model = None
+        self._patterns = [
+            (intent, re.compile(('' if keyword in SUFFIX_KEYWORDS else r'\b') + re.escape(keyword)), weight)
+            for intent, words in (keywords or INTENT_KEYWORDS).items()
+            for keyword, weight in words.items()
+        ]
+        self._intents = list((keywords or INTENT_KEYWORDS).keys())
+        self._lock = threading.Lock()
+        self._stats = {'classified': 0, 'fast_path_hits': 0, 'fallbacks': 0, 'total_latency_ms': 0.0}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Predict the intent of a message
+
+        Returns:
+            (intent, confidence); intent is "general" when nothing matches
+        """
+        text_lower = text.lower()
+        scores = {intent: 0.0 for intent in self._intents}
+        for intent, pattern, weight in self._patterns:
+            if pattern.search(text_lower):
+                scores[intent] += weight
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        top_intent, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        matched = next((intent for intent in self.priority if scores.get(intent)), None)
+        if matched is not None:
+            return matched, scores[matched] / (scores[matched] + 0.5)
+
+        if top == 0:
+            intent, confidence = 'general', 0.0
+        else:
+            intent, confidence = top_intent, top / (top + runner_up + 0.5)
+
+        if self.model is not None and confidence < self.threshold:
+            probabilities = self.model.predict_proba([text])[0]
+            best = probabilities.argmax()
+            if probabilities[best] > confidence:
+                intent, confidence = self.model.classes_[best], float(probabilities[best])
+
+        return intent, confidence
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Return the intent when confident enough to skip the supervisor, else None
+
+        Every call is counted towards the fast-path hit rate.
+        """
+        started = time.perf_counter()
+        intent, confidence = self.predict(text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        hit = intent in INTENT_AGENTS and confidence >= self.threshold
+        with self._lock:
+            self._stats['classified'] += 1
+            self._stats['total_latency_ms'] += elapsed_ms
+            self._stats['fast_path_hits' if hit else 'fallbacks'] += 1
+
+        return intent if hit else None
+
+    def fit(self, texts: List[str], labels: List[str]):
+        """Train a TF-IDF + logistic regression model on labelled messages (needs scikit-learn)"""
+        if not HAS_SKLEARN:
+            raise RuntimeError("scikit-learn is required to train the intent model")
+        model = make_pipeline(TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True), LogisticRegression(max_iter=1000))
+        model.fit(texts, labels)
+        self.model = model
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate (supervisor calls saved) and classifier latency"""
+        with self._lock:
+            classified = self._stats['classified']
+            return {
+                'classified': classified,
+                'fast_path_hits': self._stats['fast_path_hits'],
+                'supervisor_fallbacks': self._stats['fallbacks'],
+                'hit_rate': self._stats['fast_path_hits'] / classified if classified else 0.0,
+                'avg_latency_ms': self._stats['total_latency_ms'] / classified if classified else 0.0
+            }
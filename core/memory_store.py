@@ -0,0 +1,336 @@
+"""
+Memory Store
+Persistent per-patient memory shared across workers, with pluggable backends
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Tuple
+
+from core.cache import TTLCache
+from core.pagination import QueryPaginator
+
+
+MEMORY_BACKENDS = ('lru', 'sqlite', 'dynamodb')
+
+# Attributes every record carries; everything else travels as one JSON payload
+RECORD_KEYS = ('memory_id', 'patient_id', 'memory_type', 'updated_at')
+
+
+class MemoryBackend(ABC):
+    """
+    Storage for memory records keyed by patient and memory_id
+
+    A record is a dict with `memory_id`, `patient_id` and `memory_type`
+    plus any JSON-serializable fields.
+    """
+
+    @abstractmethod
+    def get(self, patient_id: str, memory_type: str) -> List[Dict[str, Any]]:
+        """A patient's records of one memory type"""
+
+    @abstractmethod
+    def put_many(self, records: List[Dict[str, Any]]):
+        """Insert or replace records by memory_id"""
+
+
+class LRUMemoryBackend(MemoryBackend):
+    """In-process backend: nothing survives a restart, least recently used patients are evicted"""
+
+    def __init__(self, max_patients: int = 10000):
+        self.max_patients = max_patients
+        self._patients: 'OrderedDict[str, Dict[str, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, patient_id: str, memory_type: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = self._patients.get(patient_id)
+            if records is None:
+                return []
+            self._patients.move_to_end(patient_id)
+            return [dict(r) for r in records.values() if r.get('memory_type') == memory_type]
+
+    def put_many(self, records: List[Dict[str, Any]]):
+        with self._lock:
+            for record in records:
+                self._patients.setdefault(record['patient_id'], {})[record['memory_id']] = dict(record)
+                self._patients.move_to_end(record['patient_id'])
+            while len(self._patients) > self.max_patients:
+                self._patients.popitem(last=False)
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """On-disk backend for a single host; survives restarts and is shared by local worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory ("
+                " patient_id TEXT NOT NULL, memory_id TEXT NOT NULL, memory_type TEXT NOT NULL,"
+                " data TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (patient_id, memory_id))"
+            )
+
+    def get(self, patient_id: str, memory_type: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM memory WHERE patient_id = ? AND memory_type = ? ORDER BY updated_at",
+                (patient_id, memory_type)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def put_many(self, records: List[Dict[str, Any]]):
+        rows = [
+            (r['patient_id'], r['memory_id'], r['memory_type'], json.dumps(r, default=str), r.get('updated_at', time.time()))
+            for r in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memory (patient_id, memory_id, memory_type, data, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+
+class DynamoDBMemoryBackend(MemoryBackend):
+    """
+    Backend on the hospital-memory table, read through PatientMemoryIndex
+
+    Record fields other than the keys are stored as one JSON `data`
+    attribute (no float/Decimal or empty-string conversions). Items other
+    tools wrote without `data`, like reminders, are returned as they are.
+    A record's `expires_at` is also written as a number for the table's TTL.
+
+    Args:
+        get_dynamodb: Returns a boto3 DynamoDB resource (or core.fakes.FakeDynamoDB)
+        table_name: Memory table, defaults to env MEMORY_TABLE
+    """
+
+    def __init__(self, get_dynamodb: Callable[[], Any], table_name: str = None):
+        self.get_dynamodb = get_dynamodb
+        self.table_name = table_name or os.getenv('MEMORY_TABLE', 'hospital-memory')
+
+    def _table(self):
+        return self.get_dynamodb().Table(self.table_name)
+
+    def get(self, patient_id: str, memory_type: str) -> List[Dict[str, Any]]:
+        pages = QueryPaginator(
+            self._table(),
+            IndexName='PatientMemoryIndex',
+            KeyConditionExpression='patient_id = :pid',
+            FilterExpression='memory_type = :type',
+            ExpressionAttributeValues={':pid': patient_id, ':type': memory_type}
+        )
+        records = [json.loads(item['data']) if 'data' in item else item for item in pages]
+        return sorted(records, key=lambda r: float(r.get('updated_at', 0)))
+
+    def put_many(self, records: List[Dict[str, Any]]):
+        with self._table().batch_writer(overwrite_by_pkeys=['memory_id']) as batch:
+            for record in records:
+                item = {key: record[key] for key in RECORD_KEYS if key in record}
+                item['updated_at'] = str(record.get('updated_at', time.time()))
+                if 'expires_at' in record:
+                    item['expires_at'] = int(record['expires_at'])
+                item['data'] = json.dumps(record, default=str)
+                batch.put_item(Item=item)
+
+
+class MemoryStore:
+    """
+    Read-through cache and write-behind queue in front of a MemoryBackend
+
+    Reads are served from a local LRU/TTL cache and go to the backend on a
+    miss. Writes update the cache at once and are queued; a background
+    thread sends them in batches every `flush_interval` seconds (or as soon
+    as `batch_size` are waiting), so persistence never adds latency to the
+    response path. Repeated writes of one record before a flush coalesce
+    into a single write, and failed batches are retried on the next flush.
+
+    Args:
+        backend: Where records are persisted
+        cache_size: (patient, memory_type) lists kept in the local cache
+        cache_ttl: Seconds before a cached list is re-read (bounds staleness across workers)
+        flush_interval: Seconds between background flushes
+        batch_size: Queued writes that trigger an early flush
+    """
+
+    def __init__(self, backend: MemoryBackend, cache_size: int = 10000, cache_ttl: float = 60.0,
+                 flush_interval: float = 0.5, batch_size: int = 25):
+        self.backend = backend
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+        self._in_flight: List[Tuple[Tuple[str, str], Dict[str, Any]]] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._stats = {'reads': 0, 'backend_reads': 0, 'read_errors': 0, 'writes': 0,
+                       'coalesced': 0, 'batches': 0, 'written': 0, 'write_errors': 0}
+        self._writer = threading.Thread(target=self._write_loop, name='memory-store-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def get(self, patient_id: str, memory_type: str) -> List[Dict[str, Any]]:
+        """Records of one type for a patient, oldest first (includes writes not yet flushed)"""
+        with self._condition:
+            self._stats['reads'] += 1
+        records = self.cache.get((patient_id, memory_type))
+        if records is None:
+            with self._condition:
+                self._stats['backend_reads'] += 1
+                # Taken before the read: a batch flushed meanwhile may be missing from what it returns
+                unflushed = self._unflushed(patient_id, memory_type)
+            try:
+                records = self.backend.get(patient_id, memory_type)
+            except Exception as e:
+                print(f"Error reading {memory_type} memory for {patient_id}: {e}")
+                with self._condition:
+                    self._stats['read_errors'] += 1
+                records = []
+            with self._condition:
+                unflushed.update(self._unflushed(patient_id, memory_type))
+                merged = {r['memory_id']: r for r in records}
+                for memory_id, record in unflushed.items():
+                    if memory_id not in merged or record['updated_at'] >= float(merged[memory_id].get('updated_at', 0)):
+                        merged[memory_id] = record
+                records = sorted(merged.values(), key=lambda r: float(r.get('updated_at', 0)))
+                self.cache.set((patient_id, memory_type), records)
+        return [dict(r) for r in records]
+
+    def _unflushed(self, patient_id: str, memory_type: str) -> Dict[str, Dict[str, Any]]:
+        """Queued and in-flight records by memory_id, newest wins (caller holds the lock)"""
+        return {r['memory_id']: r for (pid, _), r in self._in_flight + list(self._pending.items())
+                if pid == patient_id and r['memory_type'] == memory_type}
+
+    def put(self, record: Dict[str, Any]):
+        """Save a record: visible to reads immediately, persisted in the background"""
+        missing = [key for key in ('memory_id', 'patient_id', 'memory_type') if not record.get(key)]
+        if missing:
+            raise ValueError(f"Memory record is missing {', '.join(missing)}")
+        record = {**record, 'updated_at': time.time()}
+        patient_id, memory_type = record['patient_id'], record['memory_type']
+
+        with self._condition:
+            cached = self.cache.get((patient_id, memory_type))
+            if cached is not None:
+                self.cache.set((patient_id, memory_type),
+                               [r for r in cached if r['memory_id'] != record['memory_id']] + [record])
+            key = (patient_id, record['memory_id'])
+            if key in self._pending:
+                self._stats['coalesced'] += 1
+                del self._pending[key]
+            self._pending[key] = record
+            self._stats['writes'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                if not self._pending:
+                    if self._closed:
+                        return
+                    continue
+                batch = list(self._pending.items())
+                self._pending.clear()
+                self._in_flight = batch
+
+            try:
+                self.backend.put_many([record for _, record in batch])
+                failed = False
+            except Exception as e:
+                print(f"Error writing {len(batch)} memory records: {e}")
+                failed = True
+
+            with self._condition:
+                self._in_flight = []
+                if failed:
+                    self._stats['write_errors'] += 1
+                    # Re-queue unless a newer version was written meanwhile
+                    for key, record in batch:
+                        self._pending.setdefault(key, record)
+                    if self._closed:
+                        return
+                else:
+                    self._stats['batches'] += 1
+                    self._stats['written'] += len(batch)
+                self._condition.notify_all()
+            if failed:
+                time.sleep(self.flush_interval)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until queued writes are persisted, returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._writer.is_alive():
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Flush and stop the writer thread"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {**self._stats, 'pending': len(self._pending), 'cache': self.cache.stats()}
+
+
+def create_memory_store(backend: str = 'lru', sqlite_path: str = None, get_dynamodb: Callable[[], Any] = None,
+                        table_name: str = None, max_patients: int = 10000, **store_kwargs) -> MemoryStore:
+    """
+    Build a MemoryStore for a backend name
+
+    Args:
+        backend: 'lru' (in-process), 'sqlite' (needs sqlite_path) or 'dynamodb' (needs get_dynamodb)
+        sqlite_path: Database file for the SQLite backend
+        get_dynamodb: Returns the DynamoDB resource for the DynamoDB backend
+        table_name: Memory table for the DynamoDB backend
+        max_patients: Patients kept by the LRU backend
+        **store_kwargs: MemoryStore cache and batching options
+    """
+    if backend == 'lru':
+        return MemoryStore(LRUMemoryBackend(max_patients=max_patients), **store_kwargs)
+    if backend == 'sqlite':
+        if not sqlite_path:
+            raise ValueError("The sqlite memory backend needs a sqlite_path")
+        return MemoryStore(SQLiteMemoryBackend(sqlite_path), **store_kwargs)
+    if backend == 'dynamodb':
+        if get_dynamodb is None:
+            raise ValueError("The dynamodb memory backend needs a get_dynamodb callable")
+        return MemoryStore(DynamoDBMemoryBackend(get_dynamodb, table_name), **store_kwargs)
+    raise ValueError(f"Unknown memory backend {backend!r}, expected one of {', '.join(MEMORY_BACKENDS)}")
+
+
+def memory_store_from_config(config: Dict[str, Any], get_dynamodb: Callable[[], Any] = None) -> MemoryStore:
+    """Build from the `memory.store` block in config.yaml; env MEMORY_BACKEND / MEMORY_SQLITE_PATH override"""
+    store_config = config.get('memory', {}).get('store', {})
+    return create_memory_store(
+        backend=os.getenv('MEMORY_BACKEND', store_config.get('backend', 'lru')),
+        sqlite_path=os.getenv('MEMORY_SQLITE_PATH', store_config.get('sqlite_path')),
+        get_dynamodb=get_dynamodb,
+        max_patients=config.get('memory', {}).get('short_term', {}).get('max_patients', 10000),
+        cache_size=store_config.get('cache_size', 10000),
+        cache_ttl=store_config.get('cache_ttl_seconds', 60),
+        flush_interval=store_config.get('flush_interval_ms', 500) / 1000,
+        batch_size=store_config.get('batch_size', 25)
+    )
@@ -0,0 +1,404 @@
+"""
+Metrics Registry
+In-process counters, gauges and histograms, flushed in the background as
+CloudWatch EMF log lines or Prometheus text so the request path never makes a network call
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Tuple, Callable, Optional, Iterator
+
+
+# Histogram bucket upper bounds; wide enough for milliseconds from cache hits to slow model calls
+DEFAULT_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# CloudWatch EMF accepts at most 100 metrics per log line
+EMF_MAX_METRICS = 100
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, dimensions: Dict[str, Any]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in dimensions.items()))
+
+
+def _escape(label_value: str) -> str:
+    return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Histogram:
+    """Bucket counts plus per-bucket sums, so exported values keep the true mean per bucket"""
+
+    __slots__ = ('counts', 'sums')
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.sums = [0.0] * (buckets + 1)
+
+    def merge(self, other: '_Histogram'):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+            self.sums[i] += other.sums[i]
+
+
+class EMFExporter:
+    """
+    Writes CloudWatch Embedded Metric Format lines (one per dimension set)
+
+    On Lambda / AgentCore, lines on stdout become CloudWatch metrics with
+    no PutMetricData call. Histograms are sent as Values/Counts arrays.
+
+    Args:
+        namespace: CloudWatch namespace
+        path: File to append to, None for stdout
+    """
+
+    def __init__(self, namespace: str, path: str = None):
+        self.namespace = namespace
+        self.path = path
+
+    def export(self, snapshot: Dict[str, Any]):
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        for (name, dims), value in snapshot['counters'].items():
+            groups.setdefault(dims, {})[name] = value
+        for (name, dims), value in snapshot['gauges'].items():
+            groups.setdefault(dims, {})[name] = value
+        for (name, dims), histogram in snapshot['histograms'].items():
+            values, counts = [], []
+            for count, total in zip(histogram.counts, histogram.sums):
+                if count:
+                    values.append(total / count)
+                    counts.append(count)
+            if counts:
+                groups.setdefault(dims, {})[name] = {'Values': values, 'Counts': counts}
+
+        timestamp = int(snapshot['timestamp'] * 1000)
+        lines = []
+        for dims, values in groups.items():
+            names = list(values)
+            for start in range(0, len(names), EMF_MAX_METRICS):
+                chunk = names[start:start + EMF_MAX_METRICS]
+                record = {
+                    '_aws': {
+                        'Timestamp': timestamp,
+                        'CloudWatchMetrics': [{
+                            'Namespace': self.namespace,
+                            'Dimensions': [[k for k, _ in dims]],
+                            'Metrics': [{'Name': n, 'Unit': snapshot['units'].get(n, 'None')} for n in chunk]
+                        }]
+                    },
+                    **dict(dims),
+                    **{n: values[n] for n in chunk}
+                }
+                lines.append(json.dumps(record))
+        if not lines:
+            return
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        else:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
+
+
+class PrometheusFileExporter:
+    """Rewrites a Prometheus text file on every flush (node_exporter textfile collector)"""
+
+    def __init__(self, registry: 'MetricsRegistry', path: str):
+        self.registry = registry
+        self.path = path
+
+    def export(self, snapshot: Dict[str, Any]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render_prometheus())
+        os.replace(tmp_path, self.path)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms aggregated in memory
+
+    Recording a value is a dict update under a lock. A background thread
+    flushes every `flush_interval` seconds: counters and histograms are
+    handed to the exporters as deltas since the last flush (what CloudWatch
+    expects) and folded into running totals (what Prometheus scrapes).
+    Registered gauge callbacks (queue depths, cache sizes) are read only at
+    flush time.
+
+    Args:
+        namespace: Metric namespace (CloudWatch namespace, Prometheus prefix)
+        exporters: Objects with export(snapshot); none keeps metrics in memory only
+        flush_interval: Seconds between flushes
+        buckets: Histogram bucket upper bounds
+    """
+
+    def __init__(self, namespace: str = 'HospitalMultiAgent', exporters: List[Any] = None,
+                 flush_interval: float = 60.0, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.exporters = list(exporters or [])
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._units: Dict[str, str] = {}
+        self._counters: Dict[Key, float] = {}
+        self._histograms: Dict[Key, _Histogram] = {}
+        self._gauges: Dict[Key, float] = {}
+        self._gauge_callbacks: Dict[Key, Callable[[], Optional[float]]] = {}
+        self._counter_totals: Dict[Key, float] = {}
+        self._histogram_totals: Dict[Key, _Histogram] = {}
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._start_flusher()
+        atexit.register(self.flush)
+
+    def increment(self, name: str, value: float = 1, unit: str = 'Count', **dimensions):
+        """Add to a counter (e.g. Requests, InputTokens, BedrockThrottles)"""
+        key = _key(name, dimensions)
+        with self._lock:
+            self._units[name] = unit
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, unit: str = 'Milliseconds', **dimensions):
+        """Record a sample in a histogram (e.g. BedrockLatency)"""
+        key = _key(name, dimensions)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._units[name] = unit
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.sums[index] += value
+
+    def set_gauge(self, name: str, value: float, unit: str = 'None', **dimensions):
+        """Set a gauge to its current value"""
+        key = _key(name, dimensions)
+        with self._lock:
+            self._units[name] = unit
+            self._gauges[key] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], Optional[float]], unit: str = 'None', **dimensions):
+        """Gauge read at flush time (callback returns None to skip)"""
+        with self._lock:
+            self._units[name] = unit
+            self._gauge_callbacks[_key(name, dimensions)] = callback
+
+    @contextmanager
+    def timer(self, name: str, **dimensions) -> Iterator[None]:
+        """Observe the block's duration in milliseconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000, **dimensions)
+
+    def _read_gauges(self) -> Dict[Key, float]:
+        with self._lock:
+            gauges = dict(self._gauges)
+            callbacks = list(self._gauge_callbacks.items())
+        for key, callback in callbacks:
+            try:
+                value = callback()
+            except Exception as e:
+                print(f"Error reading gauge {key[0]}: {e}")
+                continue
+            if value is not None:
+                gauges[key] = float(value)
+        return gauges
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Current counters, histograms (since the last flush), gauges and units
+
+        Args:
+            reset: Start a new interval (what flush does)
+        """
+        gauges = self._read_gauges()
+        with self._lock:
+            counters, histograms = self._counters, self._histograms
+            if reset:
+                self._counters, self._histograms = {}, {}
+                for key, value in counters.items():
+                    self._counter_totals[key] = self._counter_totals.get(key, 0) + value
+                for key, histogram in histograms.items():
+                    total = self._histogram_totals.get(key)
+                    if total is None:
+                        total = self._histogram_totals[key] = _Histogram(len(self.buckets))
+                    total.merge(histogram)
+            else:
+                counters, histograms = dict(counters), dict(histograms)
+            units = dict(self._units)
+        return {'timestamp': time.time(), 'counters': counters, 'histograms': histograms,
+                'gauges': gauges, 'units': units}
+
+    def flush(self):
+        """Hand the interval's metrics to every exporter"""
+        snapshot = self.snapshot(reset=True)
+        for exporter in self.exporters:
+            try:
+                exporter.export(snapshot)
+            except Exception as e:
+                print(f"Error exporting metrics with {type(exporter).__name__}: {e}")
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _start_flusher(self):
+        if self.exporters and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+            self._flusher.start()
+
+    def configure(self, namespace: str = None, exporters: List[Any] = None, flush_interval: float = None):
+        """Replace the namespace, exporters or flush interval (e.g. from config.yaml observability.metrics)"""
+        self.flush()
+        if namespace:
+            self.namespace = namespace
+        if exporters is not None:
+            self.exporters = list(exporters)
+        if flush_interval:
+            self.flush_interval = flush_interval
+        self._start_flusher()
+
+    def _prometheus_name(self, name: str) -> str:
+        snake = re.sub(r'(?<=[a-z0-9])(?=[A-Z])', '_', name).lower()
+        return f"{re.sub(r'[^a-z0-9]', '_', self.namespace.lower())}_{snake}"
+
+    def render_prometheus(self) -> str:
+        """Cumulative metrics in the Prometheus text exposition format"""
+        gauges = self._read_gauges()
+        with self._lock:
+            counters = dict(self._counter_totals)
+            for key, value in self._counters.items():
+                counters[key] = counters.get(key, 0) + value
+            histograms: Dict[Key, _Histogram] = {}
+            for source in (self._histogram_totals, self._histograms):
+                for key, histogram in source.items():
+                    merged = histograms.get(key)
+                    if merged is None:
+                        merged = histograms[key] = _Histogram(len(self.buckets))
+                    merged.merge(histogram)
+
+        def labels(dims, extra: Tuple = ()) -> str:
+            pairs = [f'{k}="{_escape(v)}"' for k, v in tuple(dims) + extra]
+            return '{' + ','.join(pairs) + '}' if pairs else ''
+
+        lines: List[str] = []
+        for kind, series in (('counter', counters), ('gauge', gauges)):
+            typed = set()
+            for (name, dims), value in sorted(series.items()):
+                metric = self._prometheus_name(name) + ('_total' if kind == 'counter' else '')
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} {kind}")
+                lines.append(f"{metric}{labels(dims)} {value:g}")
+        typed = set()
+        for (name, dims), histogram in sorted(histograms.items()):
+            metric = self._prometheus_name(name)
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{metric}_bucket{labels(dims, (('le', le),))} {cumulative}")
+            lines.append(f"{metric}_sum{labels(dims)} {sum(histogram.sums):g}")
+            lines.append(f"{metric}_count{labels(dims)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+    def serve_prometheus(self, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+        """Serve /metrics for Prometheus scrapes on a daemon thread"""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+
+def create_exporters(registry: MetricsRegistry, kinds: str, emf_path: str = None,
+                     prometheus_path: str = None, prometheus_port: int = None) -> List[Any]:
+    """
+    Build exporters from a comma-separated list
+
+    Args:
+        registry: Registry the exporters read from
+        kinds: Any of emf, prometheus, prometheus_file, none
+        emf_path: EMF output file, None for stdout
+        prometheus_path: Text file for prometheus_file
+        prometheus_port: Port for the prometheus /metrics endpoint
+    """
+    exporters = []
+    for kind in (k.strip().lower() for k in (kinds or '').split(',')):
+        if kind in ('', 'none'):
+            continue
+        if kind == 'emf':
+            exporters.append(EMFExporter(registry.namespace, emf_path or None))
+        elif kind == 'prometheus_file':
+            exporters.append(PrometheusFileExporter(registry, prometheus_path or '.cache/metrics.prom'))
+        elif kind == 'prometheus':
+            # Scraped on demand; nothing to push at flush time
+            registry.serve_prometheus(int(prometheus_port or 9464))
+        else:
+            raise ValueError(f"Unknown metrics exporter {kind!r}, expected emf, prometheus, prometheus_file or none")
+    return exporters
+
+
+# One registry per process, shared by local_agent, the AgentCore agents and the tools
+metrics = MetricsRegistry(
+    namespace=os.getenv('METRICS_NAMESPACE', 'HospitalMultiAgent'),
+    flush_interval=float(os.getenv('METRICS_FLUSH_SECONDS', '60'))
+)
+if os.getenv('METRICS_EXPORTER'):
+    metrics.configure(exporters=create_exporters(
+        metrics, os.getenv('METRICS_EXPORTER'), os.getenv('METRICS_EMF_PATH'),
+        os.getenv('METRICS_PROMETHEUS_PATH'), os.getenv('METRICS_PROMETHEUS_PORT')
+    ))
+
+
+def record_consumed_capacity(response: Dict[str, Any]):
+    """Count the capacity a DynamoDB call reported (requested with ReturnConsumedCapacity='TOTAL')"""
+    consumed = response.get('ConsumedCapacity')
+    if consumed and consumed.get('CapacityUnits'):
+        metrics.increment('DynamoDBConsumedCapacity', float(consumed['CapacityUnits']),
+                          table=consumed.get('TableName', 'unknown'))
+
+
+def configure_from_config(config: Dict[str, Any]):
+    """Apply config.yaml observability.metrics to the shared registry (env METRICS_EXPORTER takes precedence)"""
+    settings = config.get('observability', {}).get('metrics', {})
+    if not settings.get('enabled', False) or os.getenv('METRICS_EXPORTER'):
+        return
+    metrics.namespace = settings.get('namespace', metrics.namespace)
+    metrics.configure(
+        exporters=create_exporters(metrics, settings.get('exporter', 'emf'), settings.get('emf_path'),
+                                   settings.get('prometheus_path'), settings.get('prometheus_port')),
+        flush_interval=settings.get('flush_interval_seconds')
+    )
@@ -0,0 +1,212 @@
+"""
+Model Tiering
+Picks the Bedrock model for each call from config.yaml: cheap turns (routing,
+summaries, simple booking confirmations) go to a small fast model and
+escalate to the larger one on low confidence; triage always gets the larger model
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import yaml
+
+from core.metrics import metrics
+
+
+CONFIG_PATH = Path(__file__).parent.parent / 'config.yaml'
+
+# Overridable with the `models` block in config.yaml
+DEFAULT_MODELS = {
+    'tiers': {
+        'fast': 'us.anthropic.claude-3-5-haiku-20241022-v1:0',
+        'standard': 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+    },
+    'default_tier': 'standard',
+    # Task type -> tier; tasks not listed use their agent's model_tier, then default_tier
+    'tasks': {
+        'routing': 'fast',
+        'summarization': 'fast',
+        'booking_confirmation': 'fast'
+    },
+    'escalation': {
+        'tier': 'standard',
+        'min_confidence': 0.7,        # fast-tier calls below this confidence use the escalation tier
+        'pinned_tasks': ['triage']    # always on the escalation tier
+    }
+}
+
+# Short replies that only confirm what the booking agent proposed
+CONFIRMATION_PATTERN = re.compile(
+    r"^\s*(yes|yeah|yep|ok|okay|sure|confirm(ed)?|please do|please book|book it|that works|"
+    r"sounds good|perfect|great)\b", re.IGNORECASE
+)
+# Anything that asks for a change or a question turns a confirmation into a real booking turn
+CHANGE_PATTERN = re.compile(r"\?|\b(but|instead|change|move|resched\w*|cancel|different|other|another|not)\b",
+                            re.IGNORECASE)
+
+
+def confirmation_confidence(message: str) -> float:
+    """
+    How sure we are that a message is a plain confirmation
+
+    Returns:
+        1.0 for a short "yes, book it", 0.4 when a confirmation also asks for
+        a change ("yes, but on Friday?"), 0.0 for anything else
+    """
+    if not CONFIRMATION_PATTERN.match(message):
+        return 0.0
+    if CHANGE_PATTERN.search(message) or len(message.split()) > 12:
+        return 0.4
+    return 1.0
+
+
+def task_for(agent_type: str, message: str) -> Tuple[str, Optional[float]]:
+    """
+    Task type of a specialist turn
+
+    Returns:
+        (task, confidence); booking turns that look like confirmations become
+        'booking_confirmation' with their confirmation confidence
+    """
+    if agent_type == 'booking':
+        confidence = confirmation_confidence(message)
+        if confidence:
+            return 'booking_confirmation', confidence
+    return agent_type, None
+
+
+class ModelPolicy:
+    """
+    Chooses a model tier per call
+
+    A task's tier comes from `tasks`, else the calling agent's tier, else
+    `default_tier`. Pinned tasks always run on the escalation tier; any other
+    call below `min_confidence` is escalated to it, and callers escalate a
+    fast-tier answer they cannot use with `escalate`. An agent with its own
+    model ID (`agents.<key>.model_id`) uses it instead of the escalation
+    tier's model, so the Strands agents keep the model they were configured
+    with while local_agent keeps the tier's.
+
+    Args:
+        tiers: Tier name -> Bedrock model ID
+        default_tier: Tier for tasks and agents with no rule
+        tasks: Task type -> tier
+        agent_tiers: Agent key (supervisor, triage, ...) -> tier
+        escalation_tier: Tier low-confidence and pinned calls run on
+        min_confidence: Confidence below which a call is escalated
+        pinned_tasks: Tasks never sent below the escalation tier
+        agent_models: Agent key -> model ID used in place of the escalation tier's
+    """
+
+    def __init__(self, tiers: Dict[str, str], default_tier: str = 'standard', tasks: Dict[str, str] = None,
+                 agent_tiers: Dict[str, str] = None, escalation_tier: str = 'standard',
+                 min_confidence: float = 0.7, pinned_tasks: List[str] = None,
+                 agent_models: Dict[str, str] = None):
+        self.tiers = dict(tiers)
+        self.default_tier = default_tier
+        self.tasks = dict(tasks or {})
+        self.agent_tiers = dict(agent_tiers or {})
+        self.escalation_tier = escalation_tier
+        self.min_confidence = min_confidence
+        self.pinned_tasks = set(pinned_tasks or [])
+        self.agent_models = dict(agent_models or {})
+        for tier in [default_tier, escalation_tier, *self.tasks.values(), *self.agent_tiers.values()]:
+            if tier not in self.tiers:
+                raise ValueError(f"Unknown model tier {tier!r}, expected one of {sorted(self.tiers)}")
+        self._models = {model_id: escalation_tier for model_id in self.agent_models.values()}
+        self._models.update({model_id: tier for tier, model_id in self.tiers.items()})
+        self._lock = threading.Lock()
+        self._selections: Dict[Tuple[str, str], int] = {}
+        self._escalations: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ModelPolicy':
+        """
+        Build the policy from config.yaml's `models` block and agents' model_tier
+
+        BEDROCK_MODEL_ID and BEDROCK_FAST_MODEL_ID override the standard and fast
+        tiers; an agent's own model_id still wins for that agent.
+        """
+        models = {**DEFAULT_MODELS, **(config.get('models') or {})}
+        escalation = {**DEFAULT_MODELS['escalation'], **(models.get('escalation') or {})}
+        tiers = dict(models['tiers'])
+        for tier, env in (('standard', 'BEDROCK_MODEL_ID'), ('fast', 'BEDROCK_FAST_MODEL_ID')):
+            if os.getenv(env) and tier in tiers:
+                tiers[tier] = os.getenv(env)
+        return cls(
+            tiers,
+            default_tier=models['default_tier'],
+            tasks=models['tasks'],
+            agent_tiers={key: agent['model_tier'] for key, agent in config.get('agents', {}).items()
+                         if isinstance(agent, dict) and agent.get('model_tier')},
+            escalation_tier=escalation['tier'],
+            min_confidence=escalation['min_confidence'],
+            pinned_tasks=escalation['pinned_tasks'],
+            agent_models={key: agent['model_id'] for key, agent in config.get('agents', {}).items()
+                          if isinstance(agent, dict) and agent.get('model_id')}
+        )
+
+    def select(self, task: str, agent: str = None, confidence: float = None) -> str:
+        """
+        Tier for a call
+
+        Args:
+            task: Task type (routing, summarization, booking_confirmation, triage, ...)
+            agent: Agent key making the call, for its model_tier
+            confidence: How sure the caller is the cheap path fits (None when not applicable)
+        """
+        tier = self.tasks.get(task) or self.agent_tiers.get(agent) or self.default_tier
+        if task in self.pinned_tasks:
+            tier = self.escalation_tier
+        elif confidence is not None and confidence < self.min_confidence and tier != self.escalation_tier:
+            tier = self.escalation_tier
+            self._count_escalation(task)
+        with self._lock:
+            self._selections[(task, tier)] = self._selections.get((task, tier), 0) + 1
+        metrics.increment('ModelSelections', task=task, tier=tier)
+        return tier
+
+    def escalate(self, task: str) -> str:
+        """Tier to retry on after a lower tier's answer was unusable"""
+        self._count_escalation(task)
+        return self.escalation_tier
+
+    def _count_escalation(self, task: str):
+        with self._lock:
+            self._escalations[task] = self._escalations.get(task, 0) + 1
+        metrics.increment('ModelEscalations', task=task)
+
+    def agent_tier(self, agent: str) -> str:
+        """An agent's own tier (its model_tier, else default_tier)"""
+        return self.agent_tiers.get(agent, self.default_tier)
+
+    def model_id(self, tier: str, agent: str = None) -> str:
+        """Bedrock model ID for a tier, or for an agent on that tier when the agent has its own model"""
+        if tier == self.escalation_tier and agent in self.agent_models:
+            return self.agent_models[agent]
+        return self.tiers[tier]
+
+    def tier_of(self, model_id: str) -> str:
+        """Tier a model ID belongs to ('custom' for models outside the policy)"""
+        return self._models.get(model_id, 'custom')
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls per task and tier, and escalations per task"""
+        with self._lock:
+            selections: Dict[str, Dict[str, int]] = {}
+            for (task, tier), count in self._selections.items():
+                selections.setdefault(task, {})[tier] = count
+            return {'selections': selections, 'escalations': dict(self._escalations)}
+
+
+def load_model_policy(config_path: Path = None) -> ModelPolicy:
+    """Model policy from config.yaml (HOSPITAL_CONFIG or the file next to the package), falling back to the defaults"""
+    try:
+        with open(config_path or os.getenv('HOSPITAL_CONFIG') or CONFIG_PATH, 'r') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+    return ModelPolicy.from_config(config)
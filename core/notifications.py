@@ -0,0 +1,905 @@
+"""
+Notification Dispatch
+Outbox-backed queue that delivers patient notifications off the request path
+"""
+
+import os
+import json
+import time
+import uuid
+import heapq
+import random
+import atexit
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, List, Callable, Optional
+
+from botocore.exceptions import ClientError
+
+from core.metrics import metrics
+from core.stats import summarize_latencies
+
+
+OUTBOX_BACKENDS = ('memory', 'sqlite', 'dynamodb')
+
+# Channel errors worth retrying; anything else fails the notification at once
+RETRYABLE_ERRORS = {
+    'Throttling',
+    'ThrottlingException',
+    'Throttled',
+    'TooManyRequestsException',
+    'InternalError',
+    'InternalFailure',
+    'ServiceUnavailable',
+    'KMSThrottlingException'
+}
+
+
+# Callbacks run after delivery, by notification type (see on_delivered)
+DELIVERY_HOOKS: Dict[str, List[Callable[[List[Dict[str, Any]]], None]]] = {}
+
+
+def on_delivered(notification_type: str, callback: Callable[[List[Dict[str, Any]]], None]):
+    """
+    Run `callback(notifications)` on a delivery worker with each batch of delivered notifications of this type
+
+    Callbacks get a whole batch so follow-up writes can be batched too.
+    """
+    DELIVERY_HOOKS.setdefault(notification_type, []).append(callback)
+
+
+def idempotency_key(patient_id: str, notification_type: str, message: str, ref: str = None) -> str:
+    """
+    Stable key for one logical notification
+
+    Notifications for the same patient and type with the same `ref` (e.g.
+    an appointment_id), or without a ref the same message, share a key.
+    Enqueuing one again is a no-op while the first is still known to the
+    outbox, so retried tool calls never notify a patient twice.
+    """
+    payload = json.dumps([patient_id, notification_type, ref, message if ref is None else None])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DeliveryError(Exception):
+    """A channel could not deliver a notification; `retryable` says whether to try again"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _client_failure(error: ClientError) -> DeliveryError:
+    code = error.response.get('Error', {}).get('Code')
+    return DeliveryError(str(error), retryable=code in RETRYABLE_ERRORS)
+
+
+class Outbox(ABC):
+    """
+    Durable list of notifications waiting for delivery, keyed by idempotency key
+
+    Records move pending -> sending -> sent | failed; a failed attempt
+    puts the record back to pending with a later `next_attempt`.
+    """
+
+    @abstractmethod
+    def add(self, record: Dict[str, Any]) -> bool:
+        """Store a new pending record; False when its key is already known"""
+
+    def add_many(self, records: List[Dict[str, Any]]) -> List[bool]:
+        """add() for many records, one result per record"""
+        return [self.add(record) for record in records]
+
+    @abstractmethod
+    def claim(self, limit: int, now: float) -> List[Dict[str, Any]]:
+        """Take up to `limit` pending records due by `now` and mark them sending"""
+
+    @abstractmethod
+    def next_due(self) -> Optional[float]:
+        """Earliest next_attempt among pending records (None when there are none)"""
+
+    @abstractmethod
+    def update(self, records: List[Dict[str, Any]]):
+        """Save records after an attempt (status sent, failed or pending again)"""
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Records for the keys the outbox still holds"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Records per status"""
+
+
+class MemoryOutbox(Outbox):
+    """In-process outbox: fast, but queued notifications are lost on restart"""
+
+    def __init__(self, max_finished: int = 100000):
+        self.max_finished = max_finished
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._due: List[tuple] = []
+        self._finished: 'OrderedDict[str, None]' = OrderedDict()
+        self._counts = {'pending': 0, 'sending': 0, 'sent': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        with self._lock:
+            if record['key'] in self._records:
+                return False
+            self._records[record['key']] = dict(record)
+            heapq.heappush(self._due, (record['next_attempt'], record['key']))
+            self._counts['pending'] += 1
+            return True
+
+    def claim(self, limit: int, now: float) -> List[Dict[str, Any]]:
+        with self._lock:
+            claimed = []
+            while self._due and self._due[0][0] <= now and len(claimed) < limit:
+                _, key = heapq.heappop(self._due)
+                record = self._records[key]
+                record['status'] = 'sending'
+                claimed.append(dict(record))
+            self._counts['pending'] -= len(claimed)
+            self._counts['sending'] += len(claimed)
+            return claimed
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return self._due[0][0] if self._due else None
+
+    def update(self, records: List[Dict[str, Any]]):
+        with self._lock:
+            for record in records:
+                self._records[record['key']] = dict(record)
+                self._counts['sending'] -= 1
+                self._counts[record['status']] += 1
+                if record['status'] == 'pending':
+                    heapq.heappush(self._due, (record['next_attempt'], record['key']))
+                else:
+                    self._finished[record['key']] = None
+            # Finished records only serve de-duplication; keep the most recent ones
+            while len(self._finished) > self.max_finished:
+                key, _ = self._finished.popitem(last=False)
+                self._counts[self._records.pop(key)['status']] -= 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: dict(self._records[key]) for key in keys if key in self._records}
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class SQLiteOutbox(Outbox):
+    """
+    On-disk outbox that survives restarts
+
+    Records left `sending` by a crash are retried when the outbox is
+    reopened, so delivery is at-least-once; the idempotency key travels
+    with every send for channels that can de-duplicate on it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " key TEXT PRIMARY KEY, status TEXT NOT NULL, next_attempt REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+            self._conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (key, status, next_attempt, data) VALUES (?, ?, ?, ?)",
+                (record['key'], record['status'], record['next_attempt'], json.dumps(record, default=str))
+            )
+        return cursor.rowcount == 1
+
+    def add_many(self, records: List[Dict[str, Any]]) -> List[bool]:
+        # One transaction instead of a commit per record
+        added = []
+        with self._lock, self._conn:
+            for record in records:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO outbox (key, status, next_attempt, data) VALUES (?, ?, ?, ?)",
+                    (record['key'], record['status'], record['next_attempt'], json.dumps(record, default=str))
+                )
+                added.append(cursor.rowcount == 1)
+        return added
+
+    def claim(self, limit: int, now: float) -> List[Dict[str, Any]]:
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT key, data FROM outbox WHERE status = 'pending' AND next_attempt <= ?"
+                " ORDER BY next_attempt LIMIT ?", (now, limit)
+            ).fetchall()
+            self._conn.executemany("UPDATE outbox SET status = 'sending' WHERE key = ?", [(key,) for key, _ in rows])
+        return [{**json.loads(data), 'status': 'sending'} for _, data in rows]
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def update(self, records: List[Dict[str, Any]]):
+        rows = [(r['status'], r['next_attempt'], json.dumps(r, default=str), r['key']) for r in records]
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE outbox SET status = ?, next_attempt = ?, data = ? WHERE key = ?", rows)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        records = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, status, data FROM outbox WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                records.update({key: {**json.loads(data), 'status': status} for key, status, data in rows})
+        return records
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {'pending': 0, 'sending': 0, 'sent': 0, 'failed': 0, **dict(rows)}
+
+
+class DynamoDBOutbox(Outbox):
+    """
+    Outbox on a DynamoDB table, shared by every worker and Lambda container
+
+    Items are keyed by idempotency_key and found through StatusIndex
+    (status + next_attempt). Adding and claiming are conditional writes, so
+    two containers never queue or send the same notification twice. A
+    claim is a lease: records still `sending` after `lease` seconds (the
+    claimer crashed or was frozen) are claimed again, so delivery is
+    at-least-once as with SQLiteOutbox. Finished records expire after
+    `retention` seconds through the table's TTL on `expires_at`; until then
+    they de-duplicate re-sends. `counts` reads pending and sending from the
+    table, but sent and failed are this process's own totals.
+
+    Args:
+        get_dynamodb: Returns a boto3 DynamoDB resource (or core.fakes.FakeDynamoDB)
+        table_name: Outbox table, defaults to env NOTIFY_OUTBOX_TABLE
+        lease: Seconds before a claimed record may be claimed again
+        retention: Seconds finished records are kept
+    """
+
+    def __init__(self, get_dynamodb: Callable[[], Any], table_name: str = None,
+                 lease: float = 300.0, retention: float = 30 * 86400):
+        self.get_dynamodb = get_dynamodb
+        self.table_name = table_name or os.getenv('NOTIFY_OUTBOX_TABLE', 'hospital-notification-outbox')
+        self.lease = lease
+        self.retention = retention
+        self._finished = {'sent': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    def _table(self):
+        return self.get_dynamodb().Table(self.table_name)
+
+    @staticmethod
+    def _item(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'idempotency_key': record['key'],
+            'status': record['status'],
+            'next_attempt': Decimal(str(record['next_attempt'])),
+            'data': json.dumps(record, default=str)
+        }
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        try:
+            self._table().put_item(Item=self._item(record), ConditionExpression='attribute_not_exists(idempotency_key)')
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+    def _query(self, status: str, now: float = None, **kwargs) -> Dict[str, Any]:
+        """StatusIndex query for one status, oldest next_attempt first (only those due by `now` if given)"""
+        values = {':status': status}
+        condition = '#status = :status'
+        if now is not None:
+            condition += ' AND next_attempt <= :now'
+            values[':now'] = Decimal(str(now))
+        return self._table().query(IndexName='StatusIndex', KeyConditionExpression=condition,
+                                   ExpressionAttributeNames={'#status': 'status'},
+                                   ExpressionAttributeValues=values, **kwargs)
+
+    def claim(self, limit: int, now: float) -> List[Dict[str, Any]]:
+        table = self._table()
+        claimed = []
+        # Pending records first, then leases that ran out
+        for status in ('pending', 'sending'):
+            for item in self._query(status, now, Limit=limit - len(claimed)).get('Items', []):
+                try:
+                    table.update_item(
+                        Key={'idempotency_key': item['idempotency_key']},
+                        UpdateExpression='SET #status = :sending, next_attempt = :lease',
+                        ConditionExpression='#status = :seen AND next_attempt = :seen_at',
+                        ExpressionAttributeNames={'#status': 'status'},
+                        ExpressionAttributeValues={':sending': 'sending', ':lease': Decimal(str(now + self.lease)),
+                                                   ':seen': status, ':seen_at': item['next_attempt']}
+                    )
+                except ClientError as e:
+                    if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                        continue  # another worker claimed it first
+                    raise
+                claimed.append({**json.loads(item['data']), 'status': 'sending'})
+            if len(claimed) >= limit:
+                break
+        return claimed
+
+    def next_due(self) -> Optional[float]:
+        due = [items[0]['next_attempt'] for items in
+               (self._query(status, Limit=1).get('Items', []) for status in ('pending', 'sending')) if items]
+        return float(min(due)) if due else None
+
+    def update(self, records: List[Dict[str, Any]]):
+        expires_at = int(time.time() + self.retention)
+        with self._table().batch_writer(overwrite_by_pkeys=['idempotency_key']) as batch:
+            for record in records:
+                item = self._item(record)
+                if record['status'] in self._finished:
+                    item['expires_at'] = expires_at
+                batch.put_item(Item=item)
+        with self._lock:
+            for record in records:
+                if record['status'] in self._finished:
+                    self._finished[record['status']] += 1
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        dynamodb = self.get_dynamodb()
+        unique = list(dict.fromkeys(keys))
+        records = {}
+        for start in range(0, len(unique), 100):
+            request = {self.table_name: {'Keys': [{'idempotency_key': key} for key in unique[start:start + 100]]}}
+            for attempt in range(5):
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    records[item['idempotency_key']] = {**json.loads(item['data']), 'status': item['status']}
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        return records
+
+    def counts(self) -> Dict[str, int]:
+        counts = {}
+        for status in ('pending', 'sending'):
+            counts[status], start_key = 0, {}
+            while True:
+                response = self._query(status, Select='COUNT', **start_key)
+                counts[status] += response.get('Count', 0)
+                if 'LastEvaluatedKey' not in response:
+                    break
+                start_key = {'ExclusiveStartKey': response['LastEvaluatedKey']}
+        with self._lock:
+            return {**counts, **self._finished}
+
+
+class NotificationChannel(ABC):
+    """
+    One way of reaching a patient (SMS, email, push)
+
+    `send_batch` returns the notifications that were not delivered as
+    {idempotency key: DeliveryError}; an empty dict means all went out.
+    """
+
+    max_batch = 1
+
+    @abstractmethod
+    def send(self, notification: Dict[str, Any]):
+        """Deliver one notification, raising DeliveryError (or ClientError) when it did not go out"""
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> Dict[str, DeliveryError]:
+        failures = {}
+        for notification in notifications:
+            try:
+                self.send(notification)
+            except DeliveryError as e:
+                failures[notification['key']] = e
+            except ClientError as e:
+                failures[notification['key']] = _client_failure(e)
+        return failures
+
+
+class SNSChannel(NotificationChannel):
+    """
+    Publishes to an SNS topic, up to 10 notifications per PublishBatch call
+
+    Subscriptions route messages by the `patient_id` and `notification_type`
+    message attributes. On a FIFO topic the idempotency key is the
+    deduplication id, so SNS drops re-sends after a crash.
+
+    Args:
+        get_sns: Returns a boto3 SNS client
+        topic_arn: Topic to publish to
+    """
+
+    max_batch = 10
+
+    def __init__(self, get_sns: Callable[[], Any], topic_arn: str):
+        self.get_sns = get_sns
+        self.topic_arn = topic_arn
+        self.fifo = topic_arn.endswith('.fifo')
+
+    def _entry(self, index: int, notification: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            'Id': str(index),
+            'Message': notification['message'],
+            'Subject': f"Hospital Notification - {notification['type']}"[:100],
+            'MessageAttributes': {
+                'patient_id': {'DataType': 'String', 'StringValue': notification['patient_id']},
+                'notification_type': {'DataType': 'String', 'StringValue': notification['type']}
+            }
+        }
+        if self.fifo:
+            entry['MessageGroupId'] = notification['patient_id']
+            entry['MessageDeduplicationId'] = notification['key'][:128]
+        return entry
+
+    def send(self, notification: Dict[str, Any]):
+        error = self.send_batch([notification]).get(notification['key'])
+        if error is not None:
+            raise error
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> Dict[str, DeliveryError]:
+        try:
+            response = self.get_sns().publish_batch(
+                TopicArn=self.topic_arn,
+                PublishBatchRequestEntries=[self._entry(i, n) for i, n in enumerate(notifications)]
+            )
+        except ClientError as e:
+            error = _client_failure(e)
+            return {n['key']: error for n in notifications}
+        return {
+            notifications[int(failed['Id'])]['key']: DeliveryError(
+                f"{failed.get('Code')}: {failed.get('Message', '')}", retryable=not failed.get('SenderFault', False))
+            for failed in response.get('Failed', [])
+        }
+
+
+class SESChannel(NotificationChannel):
+    """
+    Sends each notification as a plain-text email through SES
+
+    Args:
+        get_ses: Returns a boto3 SES client
+        sender: Verified From address
+        lookup_address: patient_id -> email address, used when a notification has no `address`
+    """
+
+    def __init__(self, get_ses: Callable[[], Any], sender: str,
+                 lookup_address: Callable[[str], Optional[str]] = None):
+        self.get_ses = get_ses
+        self.sender = sender
+        self.lookup_address = lookup_address
+
+    def send(self, notification: Dict[str, Any]):
+        address = notification.get('address')
+        if not address and self.lookup_address:
+            address = self.lookup_address(notification['patient_id'])
+        if not address:
+            raise DeliveryError(f"No email address for {notification['patient_id']}", retryable=False)
+        self.get_ses().send_email(
+            Source=self.sender,
+            Destination={'ToAddresses': [address]},
+            Message={
+                'Subject': {'Data': f"Hospital Notification - {notification['type']}"},
+                'Body': {'Text': {'Data': notification['message']}}
+            }
+        )
+
+
+class NotificationDispatcher:
+    """
+    Queue notifications in an Outbox and deliver them from a worker pool
+
+    `enqueue` only writes the outbox and returns, so a chat response never
+    waits on SNS/SES or DynamoDB. Each worker claims up to `batch_size` due
+    notifications, sends them per channel in the channel's batch size,
+    records the outcomes in the memory table with one batch write, and
+    reschedules failed sends with jittered exponential backoff until
+    `max_attempts`. Callbacks registered with `on_delivered` run with each
+    batch of delivered notifications of their type (e.g. to mark appointments).
+
+    Args:
+        outbox: Where queued notifications are kept
+        channels: Channel name (e.g. 'email', 'sms') -> NotificationChannel
+        get_dynamodb: Returns the DynamoDB resource for delivery records (None to skip them)
+        table_name: Memory table for delivery records, defaults to env MEMORY_TABLE
+        workers: Delivery threads
+        batch_size: Notifications claimed per worker iteration
+        max_attempts: Sends before a notification is marked failed
+        retry_base: Seconds before the first retry (doubles per attempt, with jitter)
+        retry_cap: Longest delay between attempts
+        poll_interval: Longest a worker sleeps before re-checking the outbox
+        hooks: Delivery callbacks by type, defaults to the module's DELIVERY_HOOKS
+    """
+
+    def __init__(self, outbox: Outbox, channels: Dict[str, NotificationChannel],
+                 get_dynamodb: Callable[[], Any] = None, table_name: str = None, workers: int = 4,
+                 batch_size: int = 25, max_attempts: int = 5, retry_base: float = 1.0,
+                 retry_cap: float = 300.0, poll_interval: float = 1.0,
+                 hooks: Dict[str, List[Callable[[List[Dict[str, Any]]], None]]] = None):
+        self.outbox = outbox
+        self.channels = channels
+        self.get_dynamodb = get_dynamodb
+        self.table_name = table_name or os.getenv('MEMORY_TABLE', 'hospital-memory')
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.poll_interval = poll_interval
+        self._hooks = DELIVERY_HOOKS if hooks is None else hooks
+        self._unrecorded: List[Dict[str, Any]] = []
+        self._latencies: deque = deque(maxlen=10000)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+        self._stats = {'enqueued': 0, 'duplicates': 0, 'sent': 0, 'retries': 0, 'failed': 0,
+                       'batches': 0, 'record_writes': 0, 'record_errors': 0, 'hook_errors': 0}
+        self._workers = [
+            threading.Thread(target=self._work_loop, name=f'notification-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        metrics.register_gauge('NotificationsPending', lambda: self.outbox.counts().get('pending', 0))
+        atexit.register(self.close)
+
+    def enqueue(self, patient_id: str, message: str, notification_type: str = 'general',
+                channel: str = 'email', ref: str = None, address: str = None,
+                key: str = None, **fields) -> Dict[str, Any]:
+        """
+        Queue a notification for delivery and return at once
+
+        Args:
+            patient_id: Patient identifier
+            message: Notification text
+            notification_type: Type (appointment_reminder, reminder, alert, general)
+            channel: Key of `channels` to deliver through
+            ref: Record the notification is about (part of the default idempotency key)
+            address: Destination override (e.g. an email address)
+            key: Idempotency key, derived from the fields above when omitted
+            **fields: Extra JSON-serializable fields kept with the notification
+
+        Returns:
+            notification_id, idempotency key and status 'queued' (or 'duplicate')
+        """
+        record = self._new_record(patient_id, message, notification_type, channel, ref, address, key, **fields)
+        added = self.outbox.add(record)
+        with self._condition:
+            self._stats['enqueued' if added else 'duplicates'] += 1
+            if added:
+                self._condition.notify()
+        return self._receipt(record, added)
+
+    def enqueue_many(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        enqueue() for many notifications with one outbox write
+
+        Args:
+            notifications: enqueue() keyword arguments, one dict per notification
+
+        Returns:
+            One enqueue() result per notification
+        """
+        records = [self._new_record(**notification) for notification in notifications]
+        added = self.outbox.add_many(records)
+        with self._condition:
+            new = sum(added)
+            self._stats['enqueued'] += new
+            self._stats['duplicates'] += len(records) - new
+            if new:
+                self._condition.notify_all()
+        return [self._receipt(record, was_added) for record, was_added in zip(records, added)]
+
+    def _new_record(self, patient_id: str, message: str, notification_type: str = 'general',
+                    channel: str = 'email', ref: str = None, address: str = None,
+                    key: str = None, **fields) -> Dict[str, Any]:
+        if channel not in self.channels:
+            raise ValueError(f"Unknown notification channel {channel!r}, expected one of {', '.join(self.channels)}")
+        key = key or idempotency_key(patient_id, notification_type, message, ref)
+        now = time.time()
+        return {
+            **fields,
+            'key': key,
+            'notification_id': str(uuid.UUID(key[:32])),
+            'patient_id': patient_id,
+            'type': notification_type,
+            'message': message,
+            'channel': channel,
+            'ref': ref,
+            'address': address,
+            'status': 'pending',
+            'attempts': 0,
+            'queued_at': now,
+            'next_attempt': now
+        }
+
+    @staticmethod
+    def _receipt(record: Dict[str, Any], added: bool) -> Dict[str, Any]:
+        return {
+            'notification_id': record['notification_id'],
+            'idempotency_key': record['key'],
+            'status': 'queued' if added else 'duplicate',
+            'channel': record['channel'],
+            'queued_at': datetime.utcfromtimestamp(record['queued_at']).isoformat()
+        }
+
+    def _wait_time(self) -> float:
+        next_due = self.outbox.next_due()
+        if next_due is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(0.0, next_due - time.time()))
+
+    def _work_loop(self):
+        while True:
+            batch = self.outbox.claim(self.batch_size, time.time())
+            if not batch:
+                with self._condition:
+                    if self._closed:
+                        return
+                    self._condition.wait(self._wait_time())
+                continue
+            with self._condition:
+                self._in_flight += len(batch)
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                # Never lose a claimed batch: put it back for another attempt
+                print(f"Error delivering {len(batch)} notifications: {e}")
+                self.outbox.update([self._reschedule(n, DeliveryError(str(e))) for n in batch])
+            finally:
+                with self._condition:
+                    self._in_flight -= len(batch)
+                    self._condition.notify_all()
+
+    def _send(self, batch: List[Dict[str, Any]]) -> Dict[str, DeliveryError]:
+        by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        for notification in batch:
+            by_channel.setdefault(notification['channel'], []).append(notification)
+        failures = {}
+        for name, notifications in by_channel.items():
+            channel = self.channels.get(name)
+            if channel is None:
+                error = DeliveryError(f"Unknown channel {name!r}", retryable=False)
+                failures.update({n['key']: error for n in notifications})
+                continue
+            for start in range(0, len(notifications), channel.max_batch):
+                chunk = notifications[start:start + channel.max_batch]
+                try:
+                    failures.update(channel.send_batch(chunk))
+                except Exception as e:
+                    error = e if isinstance(e, DeliveryError) else DeliveryError(str(e))
+                    failures.update({n['key']: error for n in chunk})
+        return failures
+
+    def _reschedule(self, notification: Dict[str, Any], error: DeliveryError) -> Dict[str, Any]:
+        attempts = notification['attempts']
+        if not error.retryable or attempts >= self.max_attempts:
+            return {**notification, 'status': 'failed', 'last_error': str(error)}
+        ceiling = min(self.retry_cap, self.retry_base * (2 ** (attempts - 1)))
+        return {**notification, 'status': 'pending', 'last_error': str(error),
+                'next_attempt': time.time() + ceiling / 2 + random.uniform(0, ceiling / 2)}
+
+    def _deliver(self, batch: List[Dict[str, Any]]):
+        for notification in batch:
+            notification['attempts'] += 1
+        failures = self._send(batch)
+        now = time.time()
+        finished, retried = [], []
+        for notification in batch:
+            error = failures.get(notification['key'])
+            if error is None:
+                finished.append({**notification, 'status': 'sent', 'sent_at': now, 'last_error': None})
+                continue
+            updated = self._reschedule(notification, error)
+            (retried if updated['status'] == 'pending' else finished).append(updated)
+
+        self._record(finished)
+        self.outbox.update(finished + retried)
+
+        delivered = [n for n in finished if n['status'] == 'sent']
+        by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for notification in delivered:
+            by_type.setdefault(notification['type'], []).append(notification)
+        for notification_type, notifications in by_type.items():
+            for callback in self._hooks.get(notification_type, []):
+                try:
+                    callback(notifications)
+                except Exception as e:
+                    print(f"Error in {notification_type} delivery callback: {e}")
+                    with self._condition:
+                        self._stats['hook_errors'] += 1
+        with self._condition:
+            self._stats['batches'] += 1
+            self._stats['sent'] += len(delivered)
+            self._stats['failed'] += len(finished) - len(delivered)
+            self._stats['retries'] += len(retried)
+            self._latencies.extend(n['sent_at'] - n['queued_at'] for n in delivered)
+        for notification in finished:
+            metrics.increment('NotificationsSent' if notification['status'] == 'sent' else 'NotificationsFailed',
+                              type=notification['type'])
+        if retried:
+            metrics.increment('NotificationRetries', len(retried))
+
+    def _record(self, finished: List[Dict[str, Any]]):
+        """Write delivery records (sent or failed) to the memory table in one batch"""
+        if self.get_dynamodb is None:
+            return
+        with self._condition:
+            records, self._unrecorded = self._unrecorded + finished, []
+        if not records:
+            return
+        try:
+            with self.get_dynamodb().Table(self.table_name).batch_writer(overwrite_by_pkeys=['memory_id']) as batch:
+                for n in records:
+                    item = {
+                        'memory_id': n['notification_id'],
+                        'notification_id': n['notification_id'],
+                        'memory_type': 'notification',
+                        'patient_id': n['patient_id'],
+                        'type': n['type'],
+                        'message': n['message'],
+                        'channel': n['channel'],
+                        'status': n['status'],
+                        'attempts': n['attempts'],
+                        'idempotency_key': n['key'],
+                        'queued_at': datetime.utcfromtimestamp(n['queued_at']).isoformat()
+                    }
+                    if n.get('sent_at'):
+                        item['sent_at'] = datetime.utcfromtimestamp(n['sent_at']).isoformat()
+                    if n.get('last_error'):
+                        item['error'] = n['last_error']
+                    batch.put_item(Item=item)
+            with self._condition:
+                self._stats['record_writes'] += 1
+        except Exception as e:
+            # The sends already happened; keep the records for the next batch instead of re-sending
+            print(f"Error recording {len(records)} notifications: {e}")
+            with self._condition:
+                self._stats['record_errors'] += 1
+                self._unrecorded = records + self._unrecorded
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued notification is delivered or failed, returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            counts = self.outbox.counts()
+            with self._condition:
+                if not counts['pending'] and not counts['sending'] and not self._in_flight:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not any(w.is_alive() for w in self._workers):
+                    return False
+                self._condition.notify_all()
+                self._condition.wait(min(remaining, 0.05))
+
+    def close(self, timeout: float = 10.0):
+        """Deliver what is due, then stop the workers (later retries stay in the outbox)"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = {**self._stats, 'in_flight': self._in_flight,
+                     'delivery_latency': summarize_latencies(list(self._latencies))}
+        return {**stats, 'outbox': self.outbox.counts()}
+
+
+def create_outbox(backend: str = 'memory', sqlite_path: str = None, get_dynamodb: Callable[[], Any] = None,
+                  table_name: str = None) -> Outbox:
+    """
+    Build an Outbox for a backend name
+
+    Args:
+        backend: 'memory' (in-process), 'sqlite' (needs sqlite_path; survives restarts on one host)
+            or 'dynamodb' (needs get_dynamodb; shared by every worker, use it on Lambda)
+        sqlite_path: Database file for the SQLite outbox
+        get_dynamodb: Returns the DynamoDB resource for the DynamoDB outbox
+        table_name: Outbox table for the DynamoDB outbox
+    """
+    if backend == 'memory':
+        return MemoryOutbox()
+    if backend == 'sqlite':
+        if not sqlite_path:
+            raise ValueError("The sqlite outbox needs a sqlite_path")
+        os.makedirs(os.path.dirname(sqlite_path) or '.', exist_ok=True)
+        return SQLiteOutbox(sqlite_path)
+    if backend == 'dynamodb':
+        if get_dynamodb is None:
+            raise ValueError("The dynamodb outbox needs get_dynamodb")
+        return DynamoDBOutbox(get_dynamodb, table_name)
+    raise ValueError(f"Unknown outbox backend {backend!r}, expected one of {', '.join(OUTBOX_BACKENDS)}")
+
+
+def _patient_email(patient_id: str) -> Optional[str]:
+    """Email address from the patient record (through the shared patient cache)"""
+    from core.aws_clients import get_resource
+    from core.patient_cache import patient_cache
+
+    table = get_resource('dynamodb').Table(os.getenv('PATIENTS_TABLE', 'hospital-patients'))
+    patient = patient_cache.get_or_load(
+        patient_id, 'record',
+        lambda: table.get_item(Key={'patient_id': patient_id}).get('Item', {})
+    )
+    return patient.get('contact', {}).get('email') if patient else None
+
+
+def create_dispatcher_from_env() -> NotificationDispatcher:
+    """
+    Dispatcher configured from the environment
+
+    NOTIFY_SES_SENDER enables SES for 'email'; NOTIFY_SNS_TOPIC_ARN enables
+    SNS for 'sms' (and for 'email' when there is no SES sender). Channels
+    without AWS settings deliver to a local FakeChannel, so the chat flow
+    works offline. Inside a Lambda they are left out instead, so those
+    notifications are refused rather than reported sent, and having no
+    channel at all raises. NOTIFY_OUTBOX picks 'memory' (default), 'sqlite'
+    (at NOTIFY_OUTBOX_PATH) or 'dynamodb' (NOTIFY_OUTBOX_TABLE).
+    """
+    from core.aws_clients import get_client, get_resource
+    from core.fakes import FakeChannel
+
+    topic_arn = os.getenv('NOTIFY_SNS_TOPIC_ARN')
+    sender = os.getenv('NOTIFY_SES_SENDER')
+    sns = SNSChannel(lambda: get_client('sns'), topic_arn) if topic_arn else None
+    in_lambda = bool(os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+    local = FakeChannel() if not (sns and sender) and not in_lambda else None
+    channels = {
+        'email': SESChannel(lambda: get_client('ses'), sender, _patient_email) if sender else (sns or local),
+        'sms': sns or local
+    }
+    channels = {name: channel for name, channel in channels.items() if channel is not None}
+    if not channels:
+        raise RuntimeError("No notification channel configured in Lambda: set NOTIFY_SNS_TOPIC_ARN "
+                           "and/or NOTIFY_SES_SENDER (the local FakeChannel never delivers)")
+    return NotificationDispatcher(
+        create_outbox(os.getenv('NOTIFY_OUTBOX', 'memory'), os.getenv('NOTIFY_OUTBOX_PATH', '.cache/notifications.db'),
+                      get_dynamodb=lambda: get_resource('dynamodb'), table_name=os.getenv('NOTIFY_OUTBOX_TABLE')),
+        channels,
+        get_dynamodb=lambda: get_resource('dynamodb'),
+        workers=int(os.getenv('NOTIFY_WORKERS', '4')),
+        max_attempts=int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+    )
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """The process-wide dispatcher, started on first use"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = create_dispatcher_from_env()
+    return _dispatcher
+
+
+def set_dispatcher(dispatcher: Optional[NotificationDispatcher]):
+    """Replace the process-wide dispatcher (benchmarks, tests); None rebuilds it from env on next use"""
+    global _dispatcher
+    with _dispatcher_lock:
+        _dispatcher = dispatcher
@@ -0,0 +1,81 @@
+"""
+DynamoDB Pagination
+Generator-based query paging with opaque cursors for callers
+"""
+
+import json
+import base64
+from decimal import Decimal
+from typing import Dict, Any, Iterator, Optional
+
+from core.metrics import record_consumed_capacity
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Turn a LastEvaluatedKey into an opaque, URL-safe cursor string"""
+    if not last_evaluated_key:
+        return None
+    payload = json.dumps(last_evaluated_key, sort_keys=True, default=lambda v: str(v) if isinstance(v, Decimal) else v)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Inverse of encode_cursor; None or empty means start from the beginning"""
+    if not cursor:
+        return None
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
+
+class QueryPaginator:
+    """
+    Iterate a DynamoDB query across pages, following LastEvaluatedKey
+
+    With `limit`, iteration stops after that many matching items and
+    `next_cursor` is set so the caller can fetch the next N later. Each
+    request asks for at most the items still needed, so a cursor always
+    falls on a page boundary.
+
+    Args:
+        table: boto3 Table (or core.fakes table)
+        limit: Maximum items to yield, None for all
+        cursor: Cursor returned by a previous paginator
+        **query_kwargs: Passed to table.query on every page
+    """
+
+    def __init__(self, table, limit: int = None, cursor: str = None, **query_kwargs):
+        self.table = table
+        self.limit = limit
+        self.query_kwargs = query_kwargs
+        self.start_key = decode_cursor(cursor)
+        self.next_cursor: Optional[str] = None
+        self.pages = 0
+        self.scanned_count = 0
+        self.consumed_capacity = 0.0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        yielded = 0
+        start_key = self.start_key
+        while True:
+            kwargs = dict(self.query_kwargs, ReturnConsumedCapacity='TOTAL')
+            if start_key:
+                kwargs['ExclusiveStartKey'] = start_key
+            if self.limit is not None:
+                kwargs['Limit'] = self.limit - yielded
+
+            response = self.table.query(**kwargs)
+            self.pages += 1
+            self.scanned_count += response.get('ScannedCount', 0)
+            self.consumed_capacity += float(response.get('ConsumedCapacity', {}).get('CapacityUnits', 0))
+            record_consumed_capacity(response)
+
+            for item in response.get('Items', []):
+                yielded += 1
+                yield item
+
+            start_key = response.get('LastEvaluatedKey')
+            if not start_key:
+                self.next_cursor = None
+                return
+            if self.limit is not None and yielded >= self.limit:
+                self.next_cursor = encode_cursor(start_key)
+                return
@@ -0,0 +1,64 @@
+"""
+Patient Context Cache
+Process-wide cache of patient data shared by the agents and tools
+"""
+
+import os
+from typing import Any, Callable, Dict, Iterable
+
+from core.cache import TTLCache
+
+
+# Cached slices of a patient's context; writes invalidate only the slice they touch
+PARTS = ('record', 'appointments', 'reminders', 'memory')
+
+
+class PatientContextCache:
+    """
+    Per-patient cache of the patient record, appointments, reminders and memory entries
+
+    Entries expire after `ttl` seconds and the least recently used are
+    evicted beyond `max_size`. Tools that write to DynamoDB call
+    `invalidate` (or `update`) so the next read sees their change.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    def get(self, patient_id: str, part: str) -> Any:
+        return self._cache.get((patient_id, part))
+
+    def set(self, patient_id: str, part: str, value: Any):
+        self._cache.set((patient_id, part), value)
+
+    def get_or_load(self, patient_id: str, part: str, loader: Callable[[], Any]) -> Any:
+        """Read-through lookup; `loader` runs on a miss and its result is cached"""
+        value = self._cache.get((patient_id, part))
+        if value is None:
+            value = loader()
+            self._cache.set((patient_id, part), value)
+        return value
+
+    def update(self, patient_id: str, part: str, func: Callable[[Any], Any]):
+        """Apply `func` to a cached slice in place of a re-read (no-op when not cached)"""
+        value = self._cache.get((patient_id, part))
+        if value is not None:
+            self._cache.set((patient_id, part), func(value))
+
+    def invalidate(self, patient_id: str, parts: Iterable[str] = PARTS):
+        """Drop cached slices for a patient after a write"""
+        for part in ([parts] if isinstance(parts, str) else parts):
+            self._cache.invalidate((patient_id, part))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, evictions, expirations and invalidations for TTL tuning"""
+        return self._cache.stats()
+
+
+patient_cache = PatientContextCache(
+    max_size=int(os.getenv('PATIENT_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('PATIENT_CACHE_TTL', '300'))
+)
@@ -0,0 +1,155 @@
+"""
+Prompt Context Compaction
+Per-agent context fields, compact serialization and a token budget
+"""
+
+import json
+import threading
+from typing import Dict, Any, List, Optional
+
+from core.rate_limiter import estimate_tokens
+
+
+# Context each agent needs, by section; list sections keep these keys per item
+# and text sections (like the conversation summary) are kept whole.
+# Overridable per agent with `context.fields` in config.yaml.
+DEFAULT_CONTEXT_FIELDS = {
+    'supervisor': {
+        'conversation_summary': [],
+        'recent_interactions': ['type']
+    },
+    'triage': {
+        'medical_history': ['conditions', 'allergies', 'medications'],
+        'conversation_summary': []
+    },
+    'booking': {
+        'appointments': ['date', 'time', 'department', 'doctor', 'status']
+    },
+    'reminder': {
+        'reminders': ['type', 'message', 'scheduled_date']
+    }
+}
+
+DEFAULT_BUDGETS = {'supervisor': 200, 'triage': 800, 'booking': 600, 'reminder': 600}
+
+# Chronological sections lose their oldest entries first; the rest are newest-first
+CHRONOLOGICAL_SECTIONS = {'recent_interactions', 'memory'}
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _clip(text: Any, max_chars: int) -> Any:
+    if isinstance(text, str) and len(text) > max_chars:
+        return text[:max_chars - 1] + '…'
+    return text
+
+
+class ContextCompactor:
+    """
+    Renders the slice of patient context one agent needs within a token budget
+
+    Only the declared sections and fields are kept, long strings are
+    clipped, and if the result is still over budget whole entries are
+    dropped from the largest list section (oldest history first) and
+    replaced by an `<section>_omitted` count, so the model knows more
+    exists without paying for it.
+
+    Args:
+        fields: Section -> keys to keep (dict sections) or keys per item (list sections)
+        budget_tokens: Estimated token ceiling for the rendered context
+        max_text_chars: Longest string value kept verbatim
+    """
+
+    def __init__(self, fields: Dict[str, List[str]], budget_tokens: int = 600, max_text_chars: int = 200):
+        self.fields = fields
+        self.budget_tokens = budget_tokens
+        self.max_text_chars = max_text_chars
+
+    @classmethod
+    def for_agent(cls, agent_key: str, agent_config: Dict[str, Any] = None) -> 'ContextCompactor':
+        """Build from the agent's `context` block in config.yaml, falling back to the defaults"""
+        context_config = (agent_config or {}).get('context', {})
+        return cls(
+            fields=context_config.get('fields', DEFAULT_CONTEXT_FIELDS.get(agent_key, {})),
+            budget_tokens=context_config.get('budget_tokens', DEFAULT_BUDGETS.get(agent_key, 600)),
+            max_text_chars=context_config.get('max_text_chars', 200)
+        )
+
+    def project(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the declared sections and fields, dropping empty values"""
+        projected = {}
+        for section, keys in self.fields.items():
+            value = context.get(section)
+            if isinstance(value, dict):
+                kept = {k: _clip(value[k], self.max_text_chars) for k in keys if value.get(k) not in (None, '', [], {})}
+            elif isinstance(value, list):
+                kept = [
+                    {k: _clip(item[k], self.max_text_chars) for k in keys if item.get(k) not in (None, '', [], {})}
+                    for item in value if isinstance(item, dict)
+                ]
+            else:
+                kept = value
+            if kept not in (None, '', [], {}):
+                projected[section] = kept
+        return projected
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Compact JSON of the agent's context, trimmed to the token budget"""
+        data = self.project(context)
+        text = compact_json(data)
+        omitted: Dict[str, int] = {}
+
+        while estimate_tokens(text) > self.budget_tokens:
+            lists = [s for s, v in data.items() if isinstance(v, list) and v]
+            if not lists:
+                break
+            section = max(lists, key=lambda s: len(compact_json(data[s])))
+            data[section].pop(0 if section in CHRONOLOGICAL_SECTIONS else -1)
+            omitted[section] = omitted.get(section, 0) + 1
+            data[f"{section}_omitted"] = omitted[section]
+            text = compact_json(data)
+
+        # Still over: keep the most recent part of text sections (summaries grow at the end)
+        for section in [s for s, v in data.items() if isinstance(v, str)]:
+            excess = (estimate_tokens(text) - self.budget_tokens) * 4
+            if excess <= 0:
+                break
+            data[section] = '…' + data[section][excess + 1:]
+            text = compact_json(data)
+
+        return text
+
+
+class PromptTokenStats:
+    """Per-agent input-token counts: our estimate and, when reported, Bedrock's"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, float]] = {}
+
+    def record(self, agent: str, estimated_tokens: int, input_tokens: Optional[int] = None):
+        with self._lock:
+            stats = self._agents.setdefault(agent, {'calls': 0, 'estimated_tokens': 0, 'input_tokens': 0, 'reported_calls': 0})
+            stats['calls'] += 1
+            stats['estimated_tokens'] += estimated_tokens
+            if input_tokens is not None:
+                stats['input_tokens'] += input_tokens
+                stats['reported_calls'] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Totals and per-call averages by agent"""
+        with self._lock:
+            return {
+                agent: {
+                    **s,
+                    'avg_estimated_tokens': s['estimated_tokens'] / s['calls'],
+                    'avg_input_tokens': s['input_tokens'] / s['reported_calls'] if s['reported_calls'] else None
+                }
+                for agent, s in self._agents.items()
+            }
+
+
+prompt_stats = PromptTokenStats()
@@ -0,0 +1,285 @@
+"""
+Bedrock Rate Limiter
+Client-side token buckets on requests and tokens per minute, adjusted by AIMD
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+from botocore.exceptions import ClientError
+
+from core.metrics import metrics
+from core.tracing import tracer
+
+
+THROTTLING_CODES = {'throttlingexception', 'toomanyrequestsexception', 'servicequotaexceededexception'}
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity will not free up before the caller's deadline"""
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Bedrock throttling as a ClientError (throttlingException mid-stream) or a Strands model error"""
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code', '').lower() in THROTTLING_CODES
+    return 'throttl' in type(error).__name__.lower()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for rate limiting (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`
+
+    Not thread-safe on its own; AdaptiveRateLimiter guards it. A request
+    larger than the capacity is admitted once the bucket is full and
+    leaves it in debt, so oversized prompts are slowed rather than stuck.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate_per_minute: float):
+        self._refill(time.monotonic())
+        self.rate = rate_per_minute / 60.0
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 when available now)"""
+        self._refill(time.monotonic())
+        needed = min(amount, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def take(self, amount: float):
+        self._refill(time.monotonic())
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill(time.monotonic())
+        self.level = min(self.capacity, self.level + amount)
+
+
+class AdaptiveRateLimiter:
+    """
+    Shared client-side limiter for Bedrock calls
+
+    Callers reserve one request plus an estimated token count before each
+    call and settle the reservation afterwards with the real usage. Both
+    budgets start at the configured ceilings; every throttle cuts them
+    multiplicatively (at most once per `cooldown` seconds, so a burst of
+    rejections counts once) and every success adds back a small step, so
+    the client converges just under the service quota instead of
+    hammering it. Waiters queue in FIFO order and fail fast with
+    RateLimitTimeout when their deadline cannot be met.
+
+    Args:
+        requests_per_minute: Request ceiling
+        tokens_per_minute: Token ceiling (input + output)
+        burst_seconds: Request bucket capacity, in seconds of throughput
+        min_fraction: Lowest share of the ceilings AIMD may reduce to
+        increase_step: Share of the ceilings added back per success
+        decrease_factor: Multiplier applied on a throttle
+        cooldown: Minimum seconds between two decreases
+        acquire_timeout: Default seconds a caller may queue
+    """
+
+    def __init__(self, requests_per_minute: float = 50, tokens_per_minute: float = 200000,
+                 burst_seconds: float = 2.0, min_fraction: float = 0.05, increase_step: float = 0.02,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0, acquire_timeout: float = 30.0):
+        self.min_fraction = min_fraction
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.acquire_timeout = acquire_timeout
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self._fraction = 1.0
+        self._last_decrease = 0.0
+        self._stats = {'acquired': 0, 'timeouts': 0, 'throttles': 0, 'successes': 0, 'queued_seconds': 0.0}
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self._build_buckets()
+
+    def _build_buckets(self):
+        self._requests = TokenBucket(self.requests_per_minute,
+                                     max(1.0, self.requests_per_minute / 60.0 * self.burst_seconds))
+        # Bedrock accounts tokens per minute and reserves max_tokens up front,
+        # so the token bucket holds a full minute rather than a short burst
+        self._tokens = TokenBucket(self.tokens_per_minute, self.tokens_per_minute)
+        self._apply_fraction()
+
+    def configure(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                  burst_seconds: float = None):
+        """Change the ceilings (e.g. from config.yaml); the AIMD share is kept"""
+        with self._cond:
+            self.requests_per_minute = requests_per_minute or self.requests_per_minute
+            self.tokens_per_minute = tokens_per_minute or self.tokens_per_minute
+            self.burst_seconds = burst_seconds or self.burst_seconds
+            self._build_buckets()
+            self._cond.notify_all()
+
+    def _apply_fraction(self):
+        self._requests.set_rate(self.requests_per_minute * self._fraction)
+        self._tokens.set_rate(self.tokens_per_minute * self._fraction)
+
+    def acquire(self, tokens: int = 0, timeout: float = None) -> float:
+        """
+        Block until one request and `tokens` tokens are available
+
+        Args:
+            tokens: Tokens to reserve (estimated input plus max output)
+            timeout: Seconds to wait at most, defaults to acquire_timeout
+
+        Returns:
+            Seconds spent queueing
+
+        Raises:
+            RateLimitTimeout: If the reservation cannot be made in time
+        """
+        started = time.monotonic()
+        deadline = started + (self.acquire_timeout if timeout is None else timeout)
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] is ticket:
+                        wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+                        if wait <= 0:
+                            self._requests.take(1)
+                            self._tokens.take(tokens)
+                            waited = now - started
+                            self._stats['acquired'] += 1
+                            self._stats['queued_seconds'] += waited
+                            return waited
+                        if now + wait > deadline:
+                            raise RateLimitTimeout(f"Bedrock capacity not available within {deadline - started:.1f}s")
+                        self._cond.wait(wait)
+                    else:
+                        if now >= deadline:
+                            raise RateLimitTimeout(f"Bedrock capacity not available within {deadline - started:.1f}s")
+                        self._cond.wait(deadline - now)
+            except RateLimitTimeout:
+                self._stats['timeouts'] += 1
+                raise
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def on_success(self, reserved: int = 0, used: Optional[int] = None):
+        """Additive increase, and settle the token reservation against real usage"""
+        with self._cond:
+            self._stats['successes'] += 1
+            if used is not None and used != reserved:
+                if used < reserved:
+                    self._tokens.give(reserved - used)
+                else:
+                    self._tokens.take(used - reserved)
+            if self._fraction < 1.0:
+                self._fraction = min(1.0, self._fraction + self.increase_step)
+                self._apply_fraction()
+            self._cond.notify_all()
+
+    def on_throttle(self, reserved: int = 0):
+        """Multiplicative decrease; the rejected call's tokens were never used"""
+        with self._cond:
+            self._stats['throttles'] += 1
+            self._tokens.give(reserved)
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self._fraction = max(self.min_fraction, self._fraction * self.decrease_factor)
+                self._apply_fraction()
+            self._cond.notify_all()
+
+    def release(self, reserved: int = 0):
+        """Return a reservation after a call that failed for another reason"""
+        with self._cond:
+            self._tokens.give(reserved)
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+        """Jittered exponential delay before retry `attempt` (0-based)"""
+        ceiling = min(cap, base * (2 ** attempt))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def call(self, func: Callable[[], Any], tokens: int = 0, usage: Callable[[Any], Optional[int]] = None,
+             max_retries: int = 5, timeout: float = None) -> Any:
+        """
+        Run `func` under the limiter, retrying throttles with jittered backoff
+
+        Args:
+            func: The Bedrock call
+            tokens: Tokens to reserve per attempt
+            usage: Maps func's result to the tokens it really used
+            max_retries: Attempts before the throttling error is re-raised
+            timeout: Overall deadline in seconds, defaults to acquire_timeout
+
+        Raises:
+            RateLimitTimeout: If the deadline passes while queueing or backing off
+        """
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        for attempt in range(max_retries):
+            with tracer.span('bedrock.rate_limit_wait', tokens=tokens):
+                waited = self.acquire(tokens, timeout=max(0.0, deadline - time.monotonic()))
+            metrics.observe('BedrockQueueWait', waited * 1000)
+            started = time.perf_counter()
+            try:
+                with tracer.span('bedrock.invoke', attempt=attempt + 1):
+                    result = func()
+            except Exception as e:
+                metrics.observe('BedrockLatency', (time.perf_counter() - started) * 1000)
+                if not is_throttling_error(e):
+                    metrics.increment('BedrockErrors')
+                    self.release(tokens)
+                    raise
+                metrics.increment('BedrockThrottles')
+                self.on_throttle(tokens)
+                if attempt == max_retries - 1:
+                    raise
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay > deadline:
+                    raise RateLimitTimeout("Bedrock still throttling at the request deadline") from e
+                print(f"Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+                with tracer.span('bedrock.throttle_backoff', attempt=attempt + 1):
+                    time.sleep(delay)
+                continue
+            metrics.observe('BedrockLatency', (time.perf_counter() - started) * 1000)
+            self.on_success(tokens, usage(result) if usage else None)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the current effective rates"""
+        with self._cond:
+            return {
+                **self._stats,
+                'queued': len(self._queue),
+                'fraction': self._fraction,
+                'requests_per_minute': self.requests_per_minute * self._fraction,
+                'tokens_per_minute': self.tokens_per_minute * self._fraction
+            }
+
+
+# One limiter per process, shared by local_agent and the AgentCore agents
+bedrock_limiter = AdaptiveRateLimiter(
+    requests_per_minute=float(os.getenv('BEDROCK_MAX_RPM', '50')),
+    tokens_per_minute=float(os.getenv('BEDROCK_MAX_TPM', '200000')),
+    acquire_timeout=float(os.getenv('BEDROCK_ACQUIRE_TIMEOUT', '30'))
+)
+metrics.register_gauge('BedrockRateFraction', lambda: bedrock_limiter.stats()['fraction'])
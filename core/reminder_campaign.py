@@ -0,0 +1,214 @@
+"""
+Appointment Reminder Campaign
+Queues reminders for every confirmed appointment on a date range and reports how delivery went
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Callable
+
+from botocore.exceptions import ClientError
+
+from core.aws_clients import get_client
+from core.bulk_loader import batch_update
+from core.notifications import NotificationDispatcher, get_dispatcher, on_delivered
+from core.patient_cache import patient_cache
+
+
+DATE_INDEX = 'DateIndex'
+NOTIFICATION_TYPE = 'appointment_reminder'
+
+# Attributes a reminder needs (DateIndex projects only these besides its keys)
+REMINDER_FIELDS = 'appointment_id, patient_id, department, doctor, #date, #time, #status, reminder_sent'
+
+
+def appointment_reminder_message(appointment: Dict[str, Any]) -> str:
+    """Reminder text for one appointment"""
+    return f"""
+Appointment Reminder
+
+Date: {appointment['date']}
+Time: {appointment['time']}
+Department: {appointment['department']}
+Doctor: {appointment.get('doctor', 'TBD')}
+
+Please arrive 15 minutes early.
+Bring your insurance card and ID.
+
+To cancel or reschedule, please call (555) 123-4567.
+    """.strip()
+
+
+def appointment_reminder(appointment: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Notification (enqueue kwargs) for one appointment
+
+    The appointment_id is the idempotency ref, so a reminder sent on its own
+    (send_appointment_reminder) and one sent by a campaign are the same
+    notification and go out once.
+    """
+    return {
+        'patient_id': appointment['patient_id'],
+        'message': appointment_reminder_message(appointment),
+        'notification_type': NOTIFICATION_TYPE,
+        'ref': appointment['appointment_id']
+    }
+
+
+def mark_reminders_sent(notifications: List[Dict[str, Any]]) -> Dict[Any, str]:
+    """
+    Delivery callback: set reminder_sent on the appointments, 25 per batched update
+
+    Returns:
+        {appointment_id: error code} for appointments that could not be marked
+    """
+    sent_at = datetime.utcnow().isoformat()
+    failures = batch_update(
+        get_client('dynamodb'), os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'), 'appointment_id',
+        [(n['ref'], {'reminder_sent': True, 'reminder_sent_at': sent_at}) for n in notifications]
+    )
+    if failures:
+        print(f"Could not mark {len(failures)} appointments as reminded: {sorted(set(failures.values()))}")
+    for patient_id in {n['patient_id'] for n in notifications if n['ref'] not in failures}:
+        patient_cache.invalidate(patient_id, 'appointments')
+    return failures
+
+
+on_delivered(NOTIFICATION_TYPE, mark_reminders_sent)
+
+
+class AppointmentReminderCampaign:
+    """
+    Reminds every patient with a confirmed appointment in a date range
+
+    Appointments are streamed a page at a time from DateIndex (date +
+    appointment_id), keeping only confirmed ones whose reminder_sent is
+    still false, and each page is queued with one enqueue_many call. Dates
+    are read by `workers` threads and sends run on the dispatcher's worker
+    pool, so concurrency is bounded on both sides. Delivered reminders are
+    marked with batched updates (mark_reminders_sent).
+
+    Safe to re-run after a crash: appointments already marked are filtered
+    out, and the rest map to the same idempotency keys, so the outbox skips
+    reminders it already holds. Reminders the outbox shows as sent but that
+    were never marked (crash between send and update) are marked without
+    sending again. This relies on an outbox that survives the crash:
+    NOTIFY_OUTBOX=dynamodb on Lambda (a container's disk does not outlive
+    it), or NOTIFY_OUTBOX=sqlite for local runs.
+
+    Args:
+        get_dynamodb: Returns the DynamoDB resource
+        dispatcher: Notification dispatcher, defaults to the shared one
+        table_name: Appointments table, defaults to env APPOINTMENTS_TABLE
+        workers: Dates streamed at once
+        page_size: Appointments per query page
+        mark_sent: Marks delivered reminders (mark_reminders_sent by default)
+    """
+
+    def __init__(self, get_dynamodb: Callable[[], Any], dispatcher: NotificationDispatcher = None,
+                 table_name: str = None, workers: int = 4, page_size: int = 200,
+                 mark_sent: Callable[[List[Dict[str, Any]]], Any] = mark_reminders_sent):
+        self.get_dynamodb = get_dynamodb
+        self.dispatcher = dispatcher
+        self.table_name = table_name or os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments')
+        self.workers = workers
+        self.page_size = page_size
+        self.mark_sent = mark_sent
+        self._lock = threading.Lock()
+
+    def iter_pages(self, date: str) -> Iterator[Dict[str, Any]]:
+        """Query pages of confirmed, not yet reminded appointments on one date"""
+        table = self.get_dynamodb().Table(self.table_name)
+        query = {
+            'IndexName': DATE_INDEX,
+            'KeyConditionExpression': '#date = :date',
+            'FilterExpression': '#status = :confirmed AND (attribute_not_exists(reminder_sent) OR reminder_sent = :false)',
+            'ProjectionExpression': REMINDER_FIELDS,
+            'ExpressionAttributeNames': {'#date': 'date', '#time': 'time', '#status': 'status'},
+            'ExpressionAttributeValues': {':date': date, ':confirmed': 'confirmed', ':false': False},
+            'Limit': self.page_size
+        }
+        while True:
+            response = table.query(**query)
+            yield response
+            if 'LastEvaluatedKey' not in response:
+                return
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _queue_date(self, date: str, report: Dict[str, Any], receipts: Dict[str, Dict[str, Any]]):
+        dispatcher = self.dispatcher or get_dispatcher()
+        for page in self.iter_pages(date):
+            appointments = page.get('Items', [])
+            results = dispatcher.enqueue_many([appointment_reminder(a) for a in appointments]) if appointments else []
+            with self._lock:
+                report['scanned'] += page.get('ScannedCount', len(appointments))
+                report['due'] += len(appointments)
+                for appointment, result in zip(appointments, results):
+                    report['queued' if result['status'] == 'queued' else 'already_queued'] += 1
+                    receipts[result['idempotency_key']] = {**result, 'appointment_id': appointment['appointment_id']}
+
+    def run(self, start_date: str, end_date: str = None, wait: bool = True, timeout: float = 900.0) -> Dict[str, Any]:
+        """
+        Queue reminders for start_date..end_date (inclusive) and report on delivery
+
+        Args:
+            start_date: First appointment date (YYYY-MM-DD)
+            end_date: Last appointment date, defaults to start_date
+            wait: Wait for the dispatcher to deliver (or give up on) every reminder before reporting
+            timeout: Longest to wait for delivery, in seconds
+
+        Returns:
+            Counts (due, queued, already_queued, delivered, failed, pending, repaired), failed
+            dates and sample failures, elapsed seconds and reminders delivered per second
+        """
+        dispatcher = self.dispatcher or get_dispatcher()
+        first = datetime.strptime(start_date, '%Y-%m-%d')
+        last = datetime.strptime(end_date or start_date, '%Y-%m-%d')
+        dates = [(first + timedelta(days=n)).strftime('%Y-%m-%d') for n in range((last - first).days + 1)]
+
+        started = time.perf_counter()
+        report = {'dates': dates, 'scanned': 0, 'due': 0, 'queued': 0, 'already_queued': 0, 'failed_dates': []}
+        receipts: Dict[str, Dict[str, Any]] = {}
+
+        def run_date(date: str):
+            try:
+                self._queue_date(date, report, receipts)
+            except ClientError as e:
+                print(f"Error reading appointments for {date}: {e}")
+                with self._lock:
+                    report['failed_dates'].append(date)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(run_date, dates))
+        report['queue_seconds'] = time.perf_counter() - started
+
+        if wait:
+            dispatcher.flush(timeout=timeout)
+        records = dispatcher.outbox.get_many(list(receipts))
+        statuses = {key: record['status'] for key, record in records.items()}
+
+        # Sent by an earlier run whose update never happened: mark now instead of sending again
+        unmarked = [records[key] for key, receipt in receipts.items()
+                    if receipt['status'] == 'duplicate' and statuses.get(key) == 'sent']
+        if unmarked and self.mark_sent:
+            self.mark_sent(unmarked)
+
+        elapsed = time.perf_counter() - started
+        delivered = sum(1 for key in receipts if statuses.get(key) == 'sent')
+        failed = [key for key in receipts if statuses.get(key) == 'failed']
+        report.update({
+            'delivered': delivered,
+            'failed': len(failed),
+            'pending': len(receipts) - delivered - len(failed),
+            'repaired': len(unmarked),
+            'failures': [
+                {'appointment_id': receipts[key]['appointment_id'], 'error': records[key].get('last_error')}
+                for key in failed[:20]
+            ],
+            'seconds': elapsed,
+            'delivered_per_second': delivered / elapsed if elapsed else 0.0
+        })
+        return report
@@ -0,0 +1,274 @@
+"""
+Reminder Sweeper
+Finds due reminders through a sharded due-date index and hands them to the notification dispatcher
+"""
+
+import os
+import time
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from core.aws_clients import get_client
+from core.bulk_loader import batch_update
+from core.notifications import get_dispatcher, on_delivered
+
+
+# Shards per due date; must stay the same between scheduling and sweeping
+REMINDER_SHARDS = int(os.getenv('REMINDER_SHARDS', '16'))
+
+DUE_INDEX = 'DueReminderIndex'
+CHECKPOINT_ID = 'reminder-sweeper#checkpoint'
+NOTIFICATION_TYPE = 'scheduled_reminder'
+
+
+def due_bucket(scheduled_date: str, reminder_id: str, shards: int = None) -> str:
+    """
+    Partition key of a reminder in DueReminderIndex, e.g. '2025-01-15#07'
+
+    Spreading one day's reminders over `shards` partitions keeps any one
+    partition from getting hot and lets a sweep read them in parallel.
+    """
+    shard = zlib.crc32(reminder_id.encode('utf-8')) % (shards or REMINDER_SHARDS)
+    return f"{scheduled_date}#{shard:02d}"
+
+
+def reminder_message(reminder: Dict[str, Any]) -> Dict[str, Any]:
+    """Notification (enqueue kwargs) for a due reminder"""
+    return {
+        'patient_id': reminder['patient_id'],
+        'message': reminder.get('message', ''),
+        'notification_type': NOTIFICATION_TYPE,
+        'ref': reminder['memory_id'],
+        'reminder_type': reminder.get('type')
+    }
+
+
+class ReminderSweeper:
+    """
+    Moves due reminders from DueReminderIndex into the notification outbox
+
+    Scheduled reminders carry a `due_bucket` (date + shard), so one day's
+    reminders live in REMINDER_SHARDS small GSI partitions instead of being
+    found patient by patient. A sweep queries every bucket from the last
+    checkpoint through today in parallel, a page at a time. Each reminder
+    is claimed with a conditional update (`scheduled` -> `queued`), and only
+    the claims that succeeded are handed to `dispatch`, so a concurrent
+    cancel or edit is never overwritten. A claimed reminder keeps its
+    `due_bucket` until the dispatcher delivers it; the delivery callback
+    then marks it `sent` and drops it out of the sparse index.
+
+    The index itself is the progress marker: an interrupted sweep resumes
+    with the reminders not yet claimed, and a claim still undelivered after
+    `lease_seconds` (say, lost with an in-memory outbox when a Lambda froze)
+    is claimed and dispatched again; the dispatcher's idempotency keys stop
+    a reminder still in a durable outbox from going out twice. Before the
+    checkpoint moves, the sweep waits up to `flush_timeout` for `flush`; it
+    only records the last date with no failed bucket and no undelivered
+    claim, so later sweeps skip dates that are done.
+
+    Args:
+        get_dynamodb: Returns the DynamoDB resource
+        dispatch: Takes a page of reminder notifications (default: the shared dispatcher's enqueue_many)
+        flush: Waits up to the given seconds for dispatched reminders to be delivered, True when
+            all were (default: the shared dispatcher's flush when `dispatch` is the default)
+        get_dynamodb_client: Returns the low-level DynamoDB client for conditional claims
+        table_name: Memory table, defaults to env MEMORY_TABLE
+        shards: Buckets per due date
+        workers: Buckets swept at once
+        page_size: Reminders per query page / dispatch call
+        lookback_days: How far back the first sweep (no checkpoint) starts
+        lease_seconds: How long a claim may stay undelivered before it is dispatched again
+    """
+
+    def __init__(self, get_dynamodb: Callable[[], Any],
+                 dispatch: Callable[[List[Dict[str, Any]]], Any] = None,
+                 flush: Callable[[float], bool] = None, get_dynamodb_client: Callable[[], Any] = None,
+                 table_name: str = None, shards: int = None, workers: int = 8,
+                 page_size: int = 500, lookback_days: int = 7, lease_seconds: float = 900):
+        self.get_dynamodb = get_dynamodb
+        self.dispatch = dispatch or _enqueue_many
+        self.flush = flush or (_flush if dispatch is None else None)
+        self.get_dynamodb_client = get_dynamodb_client or (lambda: get_client('dynamodb'))
+        self.table_name = table_name or os.getenv('MEMORY_TABLE', 'hospital-memory')
+        self.shards = shards or REMINDER_SHARDS
+        self.workers = workers
+        self.page_size = page_size
+        self.lookback_days = lookback_days
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+
+    def _table(self):
+        return self.get_dynamodb().Table(self.table_name)
+
+    def checkpoint(self) -> Optional[str]:
+        """Last due date whose buckets were fully swept"""
+        item = self._table().get_item(Key={'memory_id': CHECKPOINT_ID}).get('Item')
+        return item.get('swept_through') if item else None
+
+    def _save_checkpoint(self, swept_through: str):
+        self._table().put_item(Item={
+            'memory_id': CHECKPOINT_ID,
+            'memory_type': 'sweeper_checkpoint',
+            'swept_through': swept_through,
+            'updated_at': datetime.utcnow().isoformat()
+        })
+
+    def _dates(self, today: str) -> List[str]:
+        checkpoint = self.checkpoint()
+        end = datetime.strptime(today, '%Y-%m-%d')
+        if checkpoint:
+            # The checkpoint date is swept again: reminders may still be scheduled onto it
+            start = min(datetime.strptime(checkpoint, '%Y-%m-%d'), end)
+        else:
+            start = end - timedelta(days=self.lookback_days)
+        return [(start + timedelta(days=n)).strftime('%Y-%m-%d') for n in range((end - start).days + 1)]
+
+    def _claims(self, items: List[Dict[str, Any]], now: datetime) -> Tuple[list, list, int]:
+        """
+        Split a page into conditional claims, index removals and claims still leased
+
+        Returns:
+            (claims, removals, leased) as batch_update entries and a count
+        """
+        queued_at = now.isoformat()
+        expired = (now - timedelta(seconds=self.lease_seconds)).isoformat()
+        claims, removals, leased = [], [], 0
+        for item in items:
+            status = item.get('status', 'scheduled')
+            if status == 'scheduled':
+                claims.append((item['memory_id'], {'status': 'queued', 'queued_at': queued_at},
+                               {'status': 'scheduled'}))
+            elif status == 'queued' and item.get('queued_at', '') <= expired:
+                # Claimed by an earlier sweep but never delivered
+                claims.append((item['memory_id'], {'queued_at': queued_at},
+                               {'status': 'queued', 'queued_at': item.get('queued_at')}))
+            elif status == 'queued':
+                leased += 1
+            else:
+                # Cancelled or already sent: just leave the index
+                removals.append((item['memory_id'], {}, {'status': status}))
+        return claims, removals, leased
+
+    def _sweep_bucket(self, bucket: str, stats: Dict[str, Any]):
+        table = self._table()
+        query = {
+            'IndexName': DUE_INDEX,
+            'KeyConditionExpression': 'due_bucket = :bucket',
+            'ExpressionAttributeValues': {':bucket': bucket},
+            'Limit': self.page_size
+        }
+        while True:
+            response = table.query(**query)
+            items = response.get('Items', [])
+            claims, removals, leased = self._claims(items, datetime.utcnow())
+            unclaimed = {}
+            if claims:
+                # Another sweep, a cancel or an edit got there first (or the claim kept being throttled)
+                unclaimed = batch_update(self.get_dynamodb_client(), self.table_name, 'memory_id', claims)
+                claimed = {key for key, *_ in claims} - set(unclaimed)
+                if claimed:
+                    self.dispatch([reminder_message(r) for r in items if r['memory_id'] in claimed])
+            if removals:
+                batch_update(self.get_dynamodb_client(), self.table_name, 'memory_id', removals, remove=['due_bucket'])
+            with self._lock:
+                stats['pages'] += 1
+                stats['queued'] += len(claims) - len(unclaimed)
+                stats['unclaimed'] += len(unclaimed)
+                stats['leased'] += leased
+                if len(claims) > len(unclaimed) or leased:
+                    stats['undelivered_dates'].add(bucket.split('#')[0])
+            if 'LastEvaluatedKey' not in response:
+                return
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def sweep(self, today: str = None, flush_timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Queue every reminder due on or before `today`
+
+        Args:
+            today: Due date cutoff (YYYY-MM-DD), defaults to the current UTC date
+            flush_timeout: Seconds to wait for the queued reminders to be delivered
+
+        Returns:
+            Reminders queued, pages read, claims lost to concurrent changes, claims still leased,
+            whether every claim was delivered, failed buckets, dates swept and elapsed seconds
+        """
+        today = today or datetime.utcnow().strftime('%Y-%m-%d')
+        started = time.perf_counter()
+        dates = self._dates(today)
+        stats = {'queued': 0, 'pages': 0, 'unclaimed': 0, 'leased': 0, 'failed_buckets': [],
+                 'undelivered_dates': set()}
+
+        errors = []
+
+        def run(bucket: str):
+            try:
+                self._sweep_bucket(bucket, stats)
+            except ClientError as e:
+                with self._lock:
+                    stats['failed_buckets'].append(bucket)
+                    errors.append(e)
+
+        buckets = [f"{date}#{shard:02d}" for date in dates for shard in range(self.shards)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(run, buckets))
+        if errors:
+            stats['failed_buckets'].sort()
+            print(f"Error sweeping {len(errors)} reminder buckets (next sweep resumes them): {errors[0]}")
+
+        # Claims count as done once delivered; leased claims of another sweep never do
+        delivered = not stats['queued'] or (self.flush is not None and self.flush(flush_timeout))
+        unsettled = {bucket.split('#')[0] for bucket in stats['failed_buckets']}
+        if not delivered or stats['leased']:
+            unsettled |= stats['undelivered_dates']
+
+        # Advance to the newest date before the first unsettled one
+        swept_through = None
+        for date in dates:
+            if date in unsettled:
+                break
+            swept_through = date
+        if swept_through:
+            self._save_checkpoint(swept_through)
+        stats.pop('undelivered_dates')
+        return {**stats, 'delivered': delivered, 'dates': dates, 'seconds': time.perf_counter() - started}
+
+
+def _enqueue_many(notifications: List[Dict[str, Any]]):
+    get_dispatcher().enqueue_many(notifications)
+
+
+def _flush(timeout: float) -> bool:
+    return get_dispatcher().flush(timeout)
+
+
+def mark_swept_reminders_sent(notifications: List[Dict[str, Any]], client: Any = None,
+                              table_name: str = None) -> Dict[Any, str]:
+    """
+    Delivery callback: record that swept reminders went out and drop them from DueReminderIndex
+
+    Only reminders still `queued` are marked, so a cancellation made while
+    the reminder was in flight is kept (the next sweep drops it from the index).
+
+    Returns:
+        {memory_id: error code} for reminders that could not be marked
+    """
+    sent_at = datetime.utcnow().isoformat()
+    failures = batch_update(
+        client or get_client('dynamodb'), table_name or os.getenv('MEMORY_TABLE', 'hospital-memory'), 'memory_id',
+        [(n['ref'], {'status': 'sent', 'sent': True, 'sent_at': sent_at, 'notification_id': n['notification_id']},
+          {'status': 'queued'})
+         for n in notifications],
+        remove=['due_bucket']
+    )
+    if failures:
+        print(f"Could not mark {len(failures)} delivered reminders as sent: {sorted(set(failures.values()))}")
+    return failures
+
+
+on_delivered(NOTIFICATION_TYPE, mark_swept_reminders_sent)
@@ -0,0 +1,217 @@
+"""
+Async Request Engine
+Serves many concurrent patient conversations from one AgentCore worker
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Tuple
+
+from core.metrics import metrics
+from core.rate_limiter import RateLimitTimeout
+from core.tracing import tracer
+
+
+class EngineOverloaded(Exception):
+    """Raised when the engine's pending-request queue is full"""
+
+
+class AsyncRequestEngine:
+    """
+    Asyncio execution path for HospitalMultiAgentSystem.route_query
+
+    The supervisor, specialist agents and DynamoDB context fetch are blocking
+    boto3/Strands calls, so each stage runs on a bounded thread pool while the
+    event loop keeps accepting other patients. At most `max_concurrency`
+    conversations are processed at once; up to `max_pending` more may wait,
+    beyond that requests are rejected immediately (backpressure). Messages
+    from the same patient are processed in arrival order. A request that times
+    out returns at once but keeps its slot (and its patient's turn) until the
+    blocking call already running for it returns; its remaining stages are
+    skipped. Messages the local triage rules read as an emergency are answered
+    before any of this, so they are never queued or rejected.
+    """
+
+    def __init__(self, system, max_concurrency: int = 16, max_pending: int = 64,
+                 worker_threads: int = 32, request_timeout: float = 60.0):
+        self.system = system
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.request_timeout = request_timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix='agent-io')
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._patient_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self._waiting = 0
+
+        self.stats = {
+            'accepted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'in_flight': 0,
+            'emergency_fast_path': 0
+        }
+        metrics.register_gauge('EngineInFlight', lambda: self.stats['in_flight'])
+        metrics.register_gauge('EngineWaiting', lambda: self._waiting)
+
+    @classmethod
+    def from_config(cls, system, config: Dict) -> 'AsyncRequestEngine':
+        """Build an engine from the `runtime` block of config.yaml"""
+        runtime = config.get('runtime', {})
+        return cls(
+            system,
+            max_concurrency=runtime.get('max_concurrency', 16),
+            max_pending=runtime.get('max_pending', 64),
+            worker_threads=runtime.get('worker_threads', 32),
+            request_timeout=runtime.get('request_timeout_seconds', 60.0)
+        )
+
+    async def run_blocking(self, func: Callable, *args, **kwargs):
+        """Run a blocking Bedrock/DynamoDB call on the bounded worker pool"""
+        loop = asyncio.get_running_loop()
+        # Carry the current trace onto the worker thread
+        return await loop.run_in_executor(self._executor, tracer.run_in_context(func, *args, **kwargs))
+
+    async def route_query(self, user_message: str, patient_id: str) -> str:
+        """
+        Route a query through supervisor and specialist without blocking the loop
+
+        Raises:
+            EngineOverloaded: If the pending queue is full
+            asyncio.TimeoutError: If the request exceeds request_timeout
+        """
+        with tracer.span('route_query'):
+            return await self._route_query(user_message, patient_id)
+
+    async def _route_query(self, user_message: str, patient_id: str) -> str:
+        started = time.perf_counter()
+        if self._waiting >= self.max_pending:
+            self.stats['rejected'] += 1
+            metrics.increment('EngineRejected')
+            raise EngineOverloaded(f"{self._waiting} requests already waiting")
+
+        self.stats['accepted'] += 1
+        self._waiting += 1
+        lock, users = self._patient_locks.get(patient_id, (asyncio.Lock(), 0))
+        self._patient_locks[patient_id] = (lock, users + 1)
+        queued_at = time.perf_counter()
+        try:
+            await lock.acquire()
+            try:
+                await self._slots.acquire()
+            except BaseException:
+                lock.release()
+                raise
+        except BaseException:
+            # Cancelled while still waiting for a slot
+            self._release_patient(patient_id)
+            raise
+        finally:
+            self._waiting -= 1
+
+        queue_wait_ms = (time.perf_counter() - queued_at) * 1000
+        tracer.current().set(queue_wait_ms=queue_wait_ms)
+        metrics.observe('EngineQueueWait', queue_wait_ms)
+        self.stats['in_flight'] += 1
+        # The slot and patient lock go back only when the work itself is done, not when the caller stops waiting
+        work = asyncio.ensure_future(self._route(user_message, patient_id, started,
+                                                 time.perf_counter() + self.request_timeout))
+        work.add_done_callback(lambda done: self._finish(done, lock, patient_id))
+        try:
+            response = await asyncio.wait_for(asyncio.shield(work), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            self.stats['timed_out'] += 1
+            metrics.increment('EngineTimeouts')
+            raise
+        except Exception:
+            self.stats['failed'] += 1
+            metrics.increment('EngineFailures')
+            raise
+        self.stats['completed'] += 1
+        return response
+
+    def _finish(self, work: asyncio.Future, lock: asyncio.Lock, patient_id: str):
+        """Free a request's slot and patient lock once its blocking calls have returned"""
+        if not work.cancelled():
+            work.exception()  # already raised to the caller, or the caller timed out
+        self.stats['in_flight'] -= 1
+        self._slots.release()
+        lock.release()
+        self._release_patient(patient_id)
+
+    def _release_patient(self, patient_id: str):
+        lock, users = self._patient_locks[patient_id]
+        if users == 1:
+            del self._patient_locks[patient_id]
+        else:
+            self._patient_locks[patient_id] = (lock, users - 1)
+
+    async def _route(self, user_message: str, patient_id: str, started: float, deadline: float) -> str:
+        # Writes the patient's memory too, so it runs under the same lock and slot
+        emergency = await self.run_blocking(self.system._emergency_reply, user_message, patient_id)
+        if emergency is not None:
+            self.stats['emergency_fast_path'] += 1
+            self._count_request('emergency', started)
+            return emergency
+
+        context = await self.run_blocking(self.system._get_patient_context, patient_id)
+        if time.perf_counter() > deadline:
+            # The caller has already timed out; skip the model calls
+            raise asyncio.TimeoutError
+        agent_name, response = await self.run_blocking(self.system._select_and_dispatch, user_message,
+                                                       patient_id, context)
+        self._count_request(agent_name, started)
+        return response
+
+    def _count_request(self, agent_name: str, started: float):
+        metrics.increment('Requests', agent=agent_name)
+        metrics.observe('RequestLatency', (time.perf_counter() - started) * 1000, agent=agent_name)
+
+    async def invoke(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Async counterpart of the AgentCore `invoke` entrypoint"""
+        user_message = payload.get("prompt", "")
+        patient_id = payload.get("patient_id", "UNKNOWN")
+
+        if not user_message:
+            return {
+                "error": "No prompt provided",
+                "status": "failed"
+            }
+
+        try:
+            response = await self.route_query(user_message, patient_id)
+        except EngineOverloaded:
+            return {
+                "error": "The assistant is handling too many conversations. Please try again shortly.",
+                "status": "busy"
+            }
+        except RateLimitTimeout:
+            return {
+                "error": "The AI service is at its rate limit. Please try again shortly.",
+                "status": "throttled"
+            }
+        except asyncio.TimeoutError:
+            return {
+                "error": f"Request timed out after {self.request_timeout} seconds",
+                "status": "failed"
+            }
+        except Exception as e:
+            return {
+                "error": str(e),
+                "status": "failed"
+            }
+
+        return {
+            "result": response,
+            "patient_id": patient_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "status": "success"
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,126 @@
+"""
+Response Cache
+Reuses Claude responses for repeated and near-duplicate patient prompts
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+from core.cache import TTLCache
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share a key"""
+    text = re.sub(r"[^\w\s-]", " ", prompt.lower())
+    return " ".join(text.split())
+
+
+def cache_key(agent_type: str, prompt: str, prompt_fields: Dict[str, Any], model_id: str = None) -> str:
+    """
+    Build a cache key from the agent, normalized prompt, patient fields and model
+
+    `prompt_fields` must be exactly the patient-context values rendered into
+    the agent's system prompt. Triage prompts carry allergies and conditions,
+    so a triage response is only reused while those are unchanged. The model
+    is part of the key so an answer from one model tier is never served for
+    a request routed to another.
+    """
+    payload = json.dumps([agent_type, normalize_prompt(prompt), prompt_fields, model_id],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SQLiteResponseStore:
+    """On-disk response store that survives restarts"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, response: str, ttl: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, time.time() + ttl)
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired rows, returns the number removed"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class ResponseCache:
+    """
+    Two-level response cache: in-memory LRU/TTL in front of optional SQLite
+
+    Args:
+        max_size: In-memory entries kept (LRU eviction)
+        ttl: Seconds a response may be reused
+        sqlite_path: Optional database file for the on-disk backend
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600.0, sqlite_path: str = None):
+        self.ttl = ttl
+        self.memory = TTLCache(max_size=max_size, ttl=ttl)
+        self.disk = SQLiteResponseStore(sqlite_path) if sqlite_path else None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'stores': 0}
+
+    def get(self, agent_type: str, prompt: str, prompt_fields: Dict[str, Any],
+            model_id: str = None) -> Optional[str]:
+        """Return a cached response for this prompt, patient context and model, if any"""
+        key = cache_key(agent_type, prompt, prompt_fields, model_id)
+        response = self.memory.get(key)
+
+        if response is None and self.disk is not None:
+            response = self.disk.get(key)
+            if response is not None:
+                self.memory.set(key, response)
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+
+        with self._lock:
+            self._stats['hits' if response is not None else 'misses'] += 1
+        return response
+
+    def put(self, agent_type: str, prompt: str, prompt_fields: Dict[str, Any], response: str,
+            model_id: str = None):
+        """Cache a successful response"""
+        key = cache_key(agent_type, prompt, prompt_fields, model_id)
+        self.memory.set(key, response)
+        if self.disk is not None:
+            self.disk.set(key, response, self.ttl)
+        with self._lock:
+            self._stats['stores'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the cache as a whole and its in-memory tier"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'memory': self.memory.stats(),
+                'disk_enabled': self.disk is not None
+            }
@@ -0,0 +1,133 @@
+"""
+Speculative Routing
+Bookkeeping for running the likely specialist alongside the supervisor LLM:
+how often the guess is confirmed, the latency that saves and the tokens discarded runs waste
+"""
+
+import time
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from core.metrics import metrics
+
+
+class SpeculationStats:
+    """
+    Outcomes of speculative specialist runs
+
+    A hit is a guess the supervisor confirmed (the specialist's reply is
+    used and the overlap with the supervisor call is saved); a miss is a
+    guess it overruled (the run is cancelled if it has not started, else
+    its reply is discarded and its tokens are wasted).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'attempts': 0, 'hits': 0, 'misses': 0, 'cancelled': 0, 'errors': 0,
+                       'saved_seconds': 0.0, 'wasted_tokens': 0}
+
+    def record_attempt(self, agent: str):
+        with self._lock:
+            self._stats['attempts'] += 1
+        metrics.increment('SpeculationAttempts', agent=agent)
+
+    def record_hit(self, agent: str, saved_seconds: float):
+        with self._lock:
+            self._stats['hits'] += 1
+            self._stats['saved_seconds'] += saved_seconds
+        metrics.increment('SpeculationHits', agent=agent)
+        metrics.observe('SpeculationSavedLatency', saved_seconds * 1000, agent=agent)
+
+    def record_miss(self, agent: str, cancelled: bool = False):
+        with self._lock:
+            self._stats['misses'] += 1
+            self._stats['cancelled'] += cancelled
+        metrics.increment('SpeculationMisses', agent=agent)
+
+    def record_waste(self, agent: str, tokens: int):
+        """Tokens spent by a run whose reply was discarded (counted when the run finishes)"""
+        with self._lock:
+            self._stats['wasted_tokens'] += tokens
+        metrics.increment('SpeculationWastedTokens', tokens, agent=agent)
+
+    def record_error(self, agent: str):
+        with self._lock:
+            self._stats['errors'] += 1
+        metrics.increment('SpeculationErrors', agent=agent)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, latency saved per hit and tokens wasted per miss"""
+        with self._lock:
+            s = dict(self._stats)
+        decided = s['hits'] + s['misses']
+        return {
+            **s,
+            'hit_rate': s['hits'] / decided if decided else 0.0,
+            'avg_saved_ms': s['saved_seconds'] * 1000 / s['hits'] if s['hits'] else 0.0,
+            'wasted_tokens_per_miss': s['wasted_tokens'] / s['misses'] if s['misses'] else 0.0
+        }
+
+
+speculation_stats = SpeculationStats()
+
+
+def speculate(executor: Executor, guess: str, run_guess: Callable[[], Tuple[str, int]],
+              select: Callable[[], str], stats: SpeculationStats = None) -> Tuple[str, Optional[str]]:
+    """
+    Start the guessed specialist on `executor` while `select` picks the real one
+
+    Args:
+        executor: Pool the speculative run is submitted to
+        guess: Agent name expected from `select`
+        run_guess: Runs the guessed specialist; returns (reply, tokens spent)
+        select: The supervisor's choice of agent (runs on the calling thread)
+        stats: Where outcomes are recorded (the module's speculation_stats by default)
+
+    Returns:
+        (agent_name, reply); reply is None when the supervisor chose another
+        agent or the speculative run failed, and the caller dispatches as usual
+    """
+    stats = stats or speculation_stats
+    stats.record_attempt(guess)
+    started = time.perf_counter()
+
+    def timed() -> Tuple[str, int, float]:
+        reply, tokens = run_guess()
+        return reply, tokens, time.perf_counter() - started
+
+    future = executor.submit(timed)
+    try:
+        agent_name = select()
+    except Exception:
+        # No supervisor answer to confirm the guess: count it as a miss so its tokens are not lost
+        _discard(stats, guess, future)
+        raise
+    supervisor_seconds = time.perf_counter() - started
+
+    if guess in agent_name:
+        try:
+            reply, _, specialist_seconds = future.result()
+        except Exception as e:
+            print(f"Speculative {guess} failed, running it again: {e}")
+            stats.record_error(guess)
+            return agent_name, None
+        stats.record_hit(guess, min(supervisor_seconds, specialist_seconds))
+        return agent_name, reply
+
+    _discard(stats, guess, future)
+    return agent_name, None
+
+
+def _discard(stats: SpeculationStats, agent: str, future: Future):
+    """Cancel a speculative run the supervisor did not confirm, or count its tokens as waste once it finishes"""
+    if future.cancel():
+        stats.record_miss(agent, cancelled=True)
+    else:
+        stats.record_miss(agent)
+        future.add_done_callback(lambda done: _count_waste(stats, agent, done))
+
+
+def _count_waste(stats: SpeculationStats, agent: str, future: Future):
+    if not future.cancelled() and future.exception() is None:
+        stats.record_waste(agent, future.result()[1])
@@ -0,0 +1,39 @@
+"""
+Latency Statistics
+Percentile helpers shared by benchmarks and reports
+"""
+
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile
+    
+    Args:
+        values: Samples (any order)
+        pct: Percentile between 0 and 100
+    
+    Returns:
+        The percentile value, or 0.0 for no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(values: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as count, mean, p50/p95/p99 and max"""
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values)
+    }
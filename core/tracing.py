@@ -0,0 +1,382 @@
+"""
+Request Tracing
+Lightweight spans across the agent pipeline, exported to JSONL (or OpenTelemetry),
+plus a report that turns a trace file into a per-stage latency breakdown
+
+Usage:
+    TRACE_SINK=jsonl streamlit run ui/streamlit_app.py
+    python -m core.tracing .cache/traces.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import random
+import argparse
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Iterator
+
+from core.stats import summarize_latencies
+
+try:
+    from opentelemetry import trace as otel_trace
+    HAS_OTEL = True
+except ImportError:
+    HAS_OTEL = False
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed stage of a request; attributes can be added while it is open"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'start', 'end',
+                 'status', 'error', '_started', '_otel')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.end = None
+        self.status = 'ok'
+        self.error = None
+        self._started = time.perf_counter()
+        self._otel = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OpenTelemetry-shaped record (ids in hex, times in Unix nanoseconds)"""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id,
+            'name': self.name,
+            'start_time_unix_nano': int(self.start * 1e9),
+            'end_time_unix_nano': int(self.end * 1e9),
+            'duration_ms': (self.end - self.start) * 1000,
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace was not sampled"""
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JSONLSink:
+    """
+    Appends finished spans to a JSON-lines file
+
+    Spans are buffered and written when their trace's root span ends (or
+    `buffer_size` spans pile up), so a request costs one write.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 256):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(json.dumps(span.to_dict(), default=str))
+            if span.parent_id is None or len(self._buffer) >= self.buffer_size:
+                self._write()
+
+    def _write(self):
+        if self._buffer:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+
+class Tracer:
+    """
+    Records nested spans per request
+
+    `span(name)` is a context manager and `traced(name)` a decorator; the
+    current span lives in a contextvar, so spans nest across function calls
+    and asyncio tasks, and across threads for work started with `run_in_context`.
+    With no sink configured every span is a shared no-op, so instrumented code
+    costs a function call. Sampling is decided once per trace, at its root.
+
+    Args:
+        sink: Where finished spans go (anything with export(span) and flush()), None to disable
+        sample_rate: Fraction of traces recorded
+        otel: Also open an OpenTelemetry span per span (needs opentelemetry-api and a configured SDK)
+    """
+
+    def __init__(self, sink: Any = None, sample_rate: float = 1.0, otel: bool = False):
+        self.configure(sink, sample_rate, otel)
+        atexit.register(self.flush)
+
+    def configure(self, sink: Any = None, sample_rate: float = 1.0, otel: bool = False):
+        """Replace the sink and sampling (e.g. from config.yaml observability.tracing)"""
+        if otel and not HAS_OTEL:
+            print("opentelemetry is not installed; spans are only written to the configured sink")
+            otel = False
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self._otel = otel_trace.get_tracer('hospital-multi-agent') if otel else None
+        self.enabled = sink is not None or self._otel is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Any]:
+        """
+        Time a block as a child of the current span (or as a new trace)
+
+        Args:
+            name: Stage name, e.g. 'route_query' or 'tool.book_appointment'
+            **attributes: JSON-serializable details (agent, attempt, ...)
+
+        Yields:
+            The span; call span.set(key=value) to add attributes
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        parent = _current_span.get()
+        if parent is _NOOP_SPAN or (parent is None and random.random() >= self.sample_rate):
+            # Unsampled trace: keep its children unsampled too
+            token = _current_span.set(_NOOP_SPAN)
+            try:
+                yield _NOOP_SPAN
+            finally:
+                self._reset(token)
+            return
+
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex,
+                    parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        otel_context = self._otel.start_as_current_span(name, attributes=attributes) if self._otel else None
+        if otel_context is not None:
+            span._otel = otel_context.__enter__()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = span.start + (time.perf_counter() - span._started)
+            self._reset(token)
+            if otel_context is not None:
+                span._otel.set_attributes({k: v for k, v in span.attributes.items()
+                                           if isinstance(v, (str, bool, int, float))})
+                otel_context.__exit__(None, None, None)
+            if self.sink is not None:
+                self.sink.export(span)
+
+    @staticmethod
+    def _reset(token: contextvars.Token):
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context (e.g. garbage collected)
+            pass
+
+    def traced(self, name: str = None) -> Callable:
+        """Decorator form of span(), named after the function by default"""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current(self) -> Any:
+        """The open span (a no-op span outside any trace)"""
+        return _current_span.get() or _NOOP_SPAN
+
+    def run_in_context(self, func: Callable, *args, **kwargs) -> Callable[[], Any]:
+        """Bind func to the caller's context so spans it opens on another thread nest under the current one"""
+        if not self.enabled:
+            return functools.partial(func, *args, **kwargs)
+        return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+    def flush(self):
+        if self.sink is not None and hasattr(self.sink, 'flush'):
+            self.sink.flush()
+
+
+def create_sink(kind: str = None, path: str = None) -> Any:
+    """
+    Build a span sink
+
+    Args:
+        kind: 'jsonl', or '' / 'none' for no sink
+        path: JSONL file, defaults to env TRACE_PATH or .cache/traces.jsonl
+    """
+    kind = (kind or '').lower()
+    if kind in ('', 'none', 'otel'):
+        return None
+    if kind == 'jsonl':
+        return JSONLSink(path or os.getenv('TRACE_PATH', '.cache/traces.jsonl'))
+    raise ValueError(f"Unknown trace sink {kind!r}, expected jsonl, otel or none")
+
+
+# One tracer per process, shared by local_agent, the AgentCore agents and the tools
+tracer = Tracer(
+    sink=create_sink(os.getenv('TRACE_SINK')),
+    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '1.0')),
+    otel=os.getenv('TRACE_SINK', '').lower() == 'otel' or bool(os.getenv('TRACE_OTEL'))
+)
+traced = tracer.traced
+
+
+def configure_from_config(config: Dict[str, Any]):
+    """Apply config.yaml observability.tracing to the shared tracer (env TRACE_SINK takes precedence)"""
+    tracing = config.get('observability', {}).get('tracing', {})
+    sink = tracing.get('sink', 'none')
+    if os.getenv('TRACE_SINK') or sink == 'none':
+        return
+    tracer.configure(create_sink(sink, tracing.get('path')), tracing.get('sample_rate', 1.0), otel=sink == 'otel')
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """Read a JSONL trace file, skipping lines cut off by a crash"""
+    spans = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def stage_breakdown(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-stage latency over a set of spans
+
+    Self time is a span's duration minus its children's (floored at zero,
+    since children can run in parallel), i.e. time spent in the stage itself.
+
+    Returns:
+        'traces' (root count and latency summary) and 'stages': name -> count,
+        errors, total/self seconds and latency summaries (seconds)
+    """
+    children: Dict[str, float] = {}
+    for span in spans:
+        if span.get('parent_span_id'):
+            children[span['parent_span_id']] = children.get(span['parent_span_id'], 0.0) + span['duration_ms']
+
+    durations: Dict[str, List[float]] = {}
+    self_times: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    roots = []
+    for span in spans:
+        seconds = span['duration_ms'] / 1000
+        durations.setdefault(span['name'], []).append(seconds)
+        self_times.setdefault(span['name'], []).append(
+            max(0.0, span['duration_ms'] - children.get(span['span_id'], 0.0)) / 1000
+        )
+        errors[span['name']] = errors.get(span['name'], 0) + (span.get('status') == 'error')
+        if not span.get('parent_span_id'):
+            roots.append(seconds)
+
+    return {
+        'traces': summarize_latencies(roots),
+        'stages': {
+            name: {
+                'count': len(values),
+                'errors': errors[name],
+                'total': sum(values),
+                'self_total': sum(self_times[name]),
+                'latency': summarize_latencies(values),
+                'self': summarize_latencies(self_times[name])
+            }
+            for name, values in durations.items()
+        }
+    }
+
+
+def _print_tree(spans: List[Dict[str, Any]], trace_id: str):
+    in_trace = sorted((s for s in spans if s['trace_id'] == trace_id), key=lambda s: s['start_time_unix_nano'])
+    by_parent: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in in_trace:
+        by_parent.setdefault(span.get('parent_span_id'), []).append(span)
+    start = in_trace[0]['start_time_unix_nano'] if in_trace else 0
+
+    def show(span: Dict[str, Any], depth: int):
+        offset = (span['start_time_unix_nano'] - start) / 1e6
+        flag = '  !' if span.get('status') == 'error' else ''
+        print(f"  {offset:9.1f}ms {span['duration_ms']:9.1f}ms  {'  ' * depth}{span['name']}{flag}")
+        for child in by_parent.get(span['span_id'], []):
+            show(child, depth + 1)
+
+    known = {s['span_id'] for s in in_trace}
+    for span in in_trace:
+        if span.get('parent_span_id') not in known:
+            show(span, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency breakdown of a trace file")
+    parser.add_argument('path', nargs='?', default=os.getenv('TRACE_PATH', '.cache/traces.jsonl'))
+    parser.add_argument('--stage', help="Only traces whose root span has this name (e.g. route_query)")
+    parser.add_argument('--slowest', type=int, default=1, help="Print the span tree of the N slowest traces")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No trace file at {args.path} (run with TRACE_SINK=jsonl)")
+        sys.exit(1)
+    spans = load_spans(args.path)
+    if args.stage:
+        keep = {s['trace_id'] for s in spans if not s.get('parent_span_id') and s['name'] == args.stage}
+        spans = [s for s in spans if s['trace_id'] in keep]
+    if not spans:
+        print("No spans found")
+        sys.exit(1)
+
+    report = stage_breakdown(spans)
+    traces = report['traces']
+    print(f"{traces['count']:,} traces, {len(spans):,} spans; end to end p50 {traces['p50'] * 1000:.0f}ms, "
+          f"p95 {traces['p95'] * 1000:.0f}ms, p99 {traces['p99'] * 1000:.0f}ms\n")
+    print(f"{'Stage':<34} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'self p50':>9} {'self %':>7} {'err':>5}")
+    all_self = sum(stage['self_total'] for stage in report['stages'].values()) or 1.0
+    for name, stage in sorted(report['stages'].items(), key=lambda item: -item[1]['self_total']):
+        latency = stage['latency']
+        print(f"{name[:34]:<34} {stage['count']:7,} {latency['p50'] * 1000:7.1f}ms {latency['p95'] * 1000:7.1f}ms "
+              f"{latency['p99'] * 1000:7.1f}ms {latency['max'] * 1000:7.1f}ms {stage['self']['p50'] * 1000:7.1f}ms "
+              f"{stage['self_total'] / all_self:6.1%} {stage['errors']:5}")
+
+    roots = sorted((s for s in spans if not s.get('parent_span_id')), key=lambda s: -s['duration_ms'])
+    for root in roots[:args.slowest]:
+        print(f"\nSlowest trace {root['trace_id']} ({root['duration_ms']:.0f}ms):")
+        _print_tree(spans, root['trace_id'])
+
+
+if __name__ == '__main__':
+    main()
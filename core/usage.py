@@ -0,0 +1,267 @@
+"""
+Token Usage Accounting
+Per-call Bedrock usage (tokens, model, agent, patient, latency) aggregated in
+memory and appended to a JSONL ledger in batches, plus a report of the top consumers
+
+Usage:
+    USAGE_LEDGER=.cache/usage.jsonl streamlit run ui/streamlit_app.py
+    python -m core.usage .cache/usage.jsonl --top 10
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.stats import summarize_latencies
+
+
+# USD per million input / output tokens, matched by substring of the model ID (first match wins)
+DEFAULT_PRICING: List[Tuple[str, Tuple[float, float]]] = [
+    ('claude-3-5-haiku', (0.80, 4.00)),
+    ('claude-3-haiku', (0.25, 1.25)),
+    ('haiku', (1.00, 5.00)),
+    ('opus', (15.00, 75.00)),
+    ('sonnet', (3.00, 15.00)),
+]
+
+# Aggregates kept per value of each dimension
+DIMENSIONS = ('agent', 'patient', 'model')
+
+
+def _totals() -> Dict[str, float]:
+    return {'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0, 'latency_ms': 0.0}
+
+
+class UsageLedger:
+    """
+    Records the usage of every model call
+
+    Each call is folded into per-agent, per-patient and per-model totals in
+    memory and buffered; the buffer is appended to the ledger file once
+    `batch_size` records pile up, every `flush_interval` seconds, and at exit,
+    so a call costs a dict update and the file sees one write per batch.
+
+    Args:
+        path: JSONL ledger file, None to keep usage in memory only
+        batch_size: Records buffered before a write
+        flush_interval: Seconds between background writes of a partial batch
+        pricing: (model ID substring, (input, output) USD per million tokens) pairs
+    """
+
+    def __init__(self, path: str = None, batch_size: int = 100, flush_interval: float = 30.0,
+                 pricing: List[Tuple[str, Tuple[float, float]]] = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pricing = list(pricing or DEFAULT_PRICING)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._totals: Dict[str, Dict[str, Dict[str, float]]] = {dim: {} for dim in DIMENSIONS}
+        self._flusher: Optional[threading.Thread] = None
+        self._start_flusher()
+        atexit.register(self.flush)
+
+    def cost(self, model_id: str, input_tokens: int, output_tokens: int) -> float:
+        """USD for a call, 0.0 for a model with no known price"""
+        for pattern, (input_price, output_price) in self.pricing:
+            if pattern in model_id:
+                return (input_tokens * input_price + output_tokens * output_price) / 1e6
+        return 0.0
+
+    def record(self, model_id: str, agent: str, input_tokens: int, output_tokens: int,
+               latency_ms: float, patient_id: str = None) -> Dict[str, Any]:
+        """
+        Account for one model call
+
+        Args:
+            model_id: Bedrock model ID
+            agent: Agent that made the call (triage, booking, supervisor, ...)
+            input_tokens: Prompt tokens Bedrock reported
+            output_tokens: Completion tokens Bedrock reported
+            latency_ms: Wall time of the call, retries included
+            patient_id: Patient the call served, None for background work
+
+        Returns:
+            The ledger record
+        """
+        record = {
+            'timestamp': time.time(),
+            'model': model_id,
+            'agent': agent,
+            'patient': patient_id or '-',
+            'input_tokens': input_tokens or 0,
+            'output_tokens': output_tokens or 0,
+            'latency_ms': round(latency_ms, 1),
+            'cost': self.cost(model_id, input_tokens or 0, output_tokens or 0)
+        }
+        with self._lock:
+            for dim in DIMENSIONS:
+                totals = self._totals[dim].get(record[dim])
+                if totals is None:
+                    totals = self._totals[dim][record[dim]] = _totals()
+                totals['calls'] += 1
+                for field in ('input_tokens', 'output_tokens', 'cost', 'latency_ms'):
+                    totals[field] += record[field]
+            if self.path:
+                self._buffer.append(record)
+                full = len(self._buffer) >= self.batch_size
+            else:
+                full = False
+        if full:
+            self.flush()
+        return record
+
+    def totals(self, by: str = 'agent') -> Dict[str, Dict[str, float]]:
+        """In-memory totals (calls, tokens, cost, latency) per agent, patient or model"""
+        with self._lock:
+            return {key: dict(totals) for key, totals in self._totals[by].items()}
+
+    def top(self, by: str = 'patient', n: int = 10, field: str = 'cost') -> List[Tuple[str, Dict[str, float]]]:
+        """The `n` biggest consumers along a dimension, ranked by `field`"""
+        return sorted(self.totals(by).items(), key=lambda item: -item[1][field])[:n]
+
+    def flush(self):
+        """Append buffered records to the ledger file"""
+        with self._write_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+            if not records or not self.path:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(record) + '\n' for record in records))
+            except OSError as e:
+                print(f"Error writing usage ledger {self.path}: {e}")
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _start_flusher(self):
+        if self.path and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='usage-flusher', daemon=True)
+            self._flusher.start()
+
+    def configure(self, path: str = None, batch_size: int = None, flush_interval: float = None,
+                  pricing: List[Tuple[str, Tuple[float, float]]] = None):
+        """Point the ledger at a file or change batching (e.g. from config.yaml observability.usage)"""
+        self.flush()
+        self.path = path or None
+        if batch_size:
+            self.batch_size = batch_size
+        if flush_interval:
+            self.flush_interval = flush_interval
+        if pricing:
+            self.pricing = list(pricing)
+        self._start_flusher()
+
+
+def parse_pricing(pricing: Dict[str, Any]) -> List[Tuple[str, Tuple[float, float]]]:
+    """Turn config.yaml's {model substring: {input, output}} (USD per million tokens) into pricing pairs"""
+    return [(pattern, (float(p['input']), float(p['output']))) for pattern, p in (pricing or {}).items()]
+
+
+# One ledger per process, shared by local_agent and the AgentCore agents
+usage_ledger = UsageLedger(
+    path=os.getenv('USAGE_LEDGER') or None,
+    batch_size=int(os.getenv('USAGE_BATCH_SIZE', '100'))
+)
+
+
+def configure_from_config(config: Dict[str, Any]):
+    """Apply config.yaml observability.usage to the shared ledger (env USAGE_LEDGER takes precedence)"""
+    settings = config.get('observability', {}).get('usage', {})
+    if not settings.get('enabled', True):
+        return
+    # Configured prices are checked before the defaults
+    pricing = parse_pricing(settings.get('pricing'))
+    usage_ledger.configure(
+        path=os.getenv('USAGE_LEDGER') or settings.get('ledger'),
+        batch_size=settings.get('batch_size'),
+        flush_interval=settings.get('flush_interval_seconds'),
+        pricing=pricing + DEFAULT_PRICING if pricing else None
+    )
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """Read a JSONL usage ledger, skipping lines cut off by a crash"""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def usage_breakdown(records: List[Dict[str, Any]], by: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Totals and per-call averages along one dimension
+
+    Returns:
+        value -> calls, input/output tokens, cost, avg_input_tokens (the
+        prompt size), avg_output_tokens and a latency summary (seconds)
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    latencies: Dict[str, List[float]] = {}
+    for record in records:
+        key = record.get(by, '-')
+        totals = groups.get(key)
+        if totals is None:
+            totals = groups[key] = _totals()
+        totals['calls'] += 1
+        for field in ('input_tokens', 'output_tokens', 'cost', 'latency_ms'):
+            totals[field] += record.get(field, 0)
+        latencies.setdefault(key, []).append(record.get('latency_ms', 0) / 1000)
+    for key, totals in groups.items():
+        totals['avg_input_tokens'] = totals['input_tokens'] / totals['calls']
+        totals['avg_output_tokens'] = totals['output_tokens'] / totals['calls']
+        totals['latency'] = summarize_latencies(latencies[key])
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token and cost report from a usage ledger")
+    parser.add_argument('path', nargs='?', default=os.getenv('USAGE_LEDGER', '.cache/usage.jsonl'))
+    parser.add_argument('--top', type=int, default=10, help="Patients listed as top consumers")
+    parser.add_argument('--sort', choices=['cost', 'input_tokens', 'output_tokens', 'calls'], default='cost')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No usage ledger at {args.path} (run with USAGE_LEDGER set)")
+        sys.exit(1)
+    records = load_records(args.path)
+    if not records:
+        print("No usage records found")
+        sys.exit(1)
+
+    total_cost = sum(r.get('cost', 0) for r in records) or 1e-12
+    print(f"{len(records):,} model calls, {sum(r.get('input_tokens', 0) for r in records):,} input / "
+          f"{sum(r.get('output_tokens', 0) for r in records):,} output tokens, "
+          f"${sum(r.get('cost', 0) for r in records):,.4f}\n")
+
+    for by, limit in (('agent', None), ('model', None), ('patient', args.top)):
+        groups = sorted(usage_breakdown(records, by).items(), key=lambda item: -item[1][args.sort])
+        title = by.capitalize() if limit is None else f"Top {limit} {by}s"
+        print(f"{title:<34} {'calls':>7} {'avg in':>8} {'avg out':>8} {'p50':>8} {'p95':>8} {'cost':>10} {'share':>6}")
+        for key, totals in groups[:limit]:
+            latency = totals['latency']
+            print(f"{str(key)[:34]:<34} {totals['calls']:7,} {totals['avg_input_tokens']:8,.0f} "
+                  f"{totals['avg_output_tokens']:8,.0f} {latency['p50'] * 1000:6.0f}ms {latency['p95'] * 1000:6.0f}ms "
+                  f"${totals['cost']:9.4f} {totals['cost'] / total_cost:6.1%}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
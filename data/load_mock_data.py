@@ -1,42 +1,83 @@
 """
 Load mock FHIR-like data into DynamoDB
 Run this script to populate test data for the hackathon demo
+
+Usage:
+    python load_mock_data.py                                   # demo patients, appointments, memory
+    python load_mock_data.py --input patients.ndjson           # NDJSON or JSON array, streamed
+    python load_mock_data.py --synthetic 100000 --workers 16   # generated population for load tests
+    python load_mock_data.py --synthetic 100000 --write-ndjson patients.ndjson
+    python load_mock_data.py --synthetic 100000 --fake         # dry run against the in-memory stand-in
 """
 
+import argparse
 import json
 import os
-import boto3
-from botocore.exceptions import ClientError
+import sys
+import random
+from pathlib import Path
+from typing import Dict, Any, Iterator, List
+
 from datetime import datetime, timedelta
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def load_patients(table_name: str, data_file: str = 'mock_patients.json'):
-    """Load patient data into DynamoDB"""
-    dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
-    table = dynamodb.Table(table_name)
-    
-    # Load mock data
-    with open(data_file, 'r') as f:
-        patients = json.load(f)
-    
-    # Insert patients
-    for patient in patients:
-        try:
-            table.put_item(Item=patient)
-            print(f"✓ Loaded patient: {patient['name']} ({patient['patient_id']})")
-        except ClientError as e:
-            print(f"✗ Error loading patient {patient['patient_id']}: {e}")
-    
-    print(f"\nTotal patients loaded: {len(patients)}")
+from core.aws_clients import create_resource
+from core.bulk_loader import BulkLoader, iter_records
+from core.fakes import FakeDynamoDB
+from core.reminder_sweeper import due_bucket
 
 
-def create_sample_appointments(table_name: str):
-    """Create sample appointments for demo"""
-    dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
-    table = dynamodb.Table(table_name)
-    
-    # Sample appointments
-    appointments = [
+DATA_FILE = Path(__file__).parent / 'mock_patients.json'
+
+DOCTORS = {
+    'Pediatrics': 'Dr. Sarah Johnson',
+    'General Medicine': 'Dr. Michael Chen',
+    'Cardiology': 'Dr. Emily Rodriguez',
+    'Emergency': 'Dr. James Wilson',
+    'Orthopedics': 'Dr. Lisa Anderson'
+}
+FIRST_NAMES = ['Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Elijah', 'Sophia', 'Mateo', 'Mia', 'Lucas',
+               'Amelia', 'Ethan', 'Harper', 'James', 'Aisha', 'Wei', 'Priya', 'Diego', 'Fatima', 'Yuki']
+LAST_NAMES = ['Johnson', 'Chen', 'Rodriguez', 'Smith', 'Patel', 'Nguyen', 'Garcia', 'Kim', 'Williams',
+              'Brown', 'Okafor', 'Müller', 'Silva', 'Cohen', 'Ivanova', 'Hassan', 'Tanaka', 'Lopez']
+CONDITIONS = ['Asthma', 'Type 2 Diabetes', 'Hypertension', 'Seasonal Allergies', 'Migraine',
+              'Osteoarthritis', 'Hypothyroidism', 'GERD', 'Anxiety', 'High Cholesterol']
+ALLERGIES = ['Penicillin', 'Peanuts', 'Sulfa drugs', 'Latex', 'Shellfish', 'Aspirin', 'Ibuprofen']
+MEDICATIONS = ['Albuterol inhaler', 'Metformin 500mg', 'Lisinopril 10mg', 'Atorvastatin 20mg',
+               'Levothyroxine 50mcg', 'Omeprazole 20mg', 'Sertraline 50mg', 'Zyrtec']
+BLOOD_TYPES = ['O+', 'O-', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-']
+INSURERS = [('Blue Cross', 'BC'), ('Aetna', 'AET'), ('UnitedHealthcare', 'UHC'), ('Cigna', 'CIG')]
+VISIT_REASONS = ['Annual physical', 'Follow-up visit', 'Medication review', 'Lab results review',
+                 'Chest pain evaluation', 'Joint pain', 'Asthma checkup', 'Blood pressure check']
+
+
+def get_dynamodb():
+    """A DynamoDB resource for one BulkLoader worker thread (pooled config, shared session)"""
+    return create_resource('dynamodb')
+
+
+def _default_loader() -> BulkLoader:
+    return BulkLoader(get_dynamodb, progress_every=0)
+
+
+def _report(label: str, result: Dict[str, Any]):
+    print(f"\nTotal {label} loaded: {result['loaded']:,} "
+          f"in {result['seconds']:.1f}s ({result['records_per_second']:,.0f} records/s)")
+    if result['retries'] or result['failed']:
+        print(f"  retried chunks: {result['retries']}, failed records: {result['failed']}")
+
+
+def load_patients(table_name: str, data_file: str = DATA_FILE, loader: BulkLoader = None) -> Dict[str, Any]:
+    """Stream patient data (NDJSON or JSON array) into DynamoDB"""
+    result = (loader or _default_loader()).load(table_name, iter_records(data_file), key='patient_id')
+    _report('patients', result)
+    return result
+
+
+def sample_appointments() -> List[Dict[str, Any]]:
+    """Sample appointments for demo"""
+    return [
         {
             'appointment_id': 'APT-001',
             'patient_id': 'P12345',
@@ -74,24 +115,18 @@ def create_sample_appointments(table_name: str):
             'reminder_sent': False
         }
     ]
-    
-    for appointment in appointments:
-        try:
-            table.put_item(Item=appointment)
-            print(f"✓ Created appointment: {appointment['appointment_id']} for {appointment['patient_id']}")
-        except ClientError as e:
-            print(f"✗ Error creating appointment {appointment['appointment_id']}: {e}")
-    
-    print(f"\nTotal appointments created: {len(appointments)}")
 
 
-def initialize_memory_table(table_name: str):
-    """Initialize memory table with sample data"""
-    dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
-    table = dynamodb.Table(table_name)
-    
-    # Sample memory entries
-    memories = [
+def create_sample_appointments(table_name: str, loader: BulkLoader = None) -> Dict[str, Any]:
+    """Create sample appointments for demo"""
+    result = (loader or _default_loader()).load(table_name, sample_appointments(), key='appointment_id')
+    _report('appointments', result)
+    return result
+
+
+def sample_memories() -> List[Dict[str, Any]]:
+    """Sample memory entries for demo"""
+    return [
         {
             'memory_id': 'MEM-001',
             'patient_id': 'P12345',
@@ -107,50 +142,203 @@ def initialize_memory_table(table_name: str):
             'timestamp': (datetime.now() - timedelta(days=1)).isoformat()
         }
     ]
-    
-    for memory in memories:
-        try:
-            table.put_item(Item=memory)
-            print(f"✓ Created memory entry: {memory['memory_id']}")
-        except ClientError as e:
-            print(f"✗ Error creating memory {memory['memory_id']}: {e}")
-    
-    print(f"\nTotal memory entries created: {len(memories)}")
 
 
-if __name__ == '__main__':
-    import sys
-    
+def initialize_memory_table(table_name: str, loader: BulkLoader = None) -> Dict[str, Any]:
+    """Initialize memory table with sample data"""
+    result = (loader or _default_loader()).load(table_name, sample_memories(), key='memory_id')
+    _report('memory entries', result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data for load testing
+# ---------------------------------------------------------------------------
+
+def _rng(seed: int, index: int, stream: int) -> random.Random:
+    """Independent, reproducible generator per patient and record type"""
+    return random.Random(f"{seed}:{index}:{stream}")
+
+
+def synthetic_patient_id(index: int, start: int = 100000) -> str:
+    return f"P{start + index}"
+
+
+def synthetic_patient(index: int, start: int = 100000, seed: int = 0) -> Dict[str, Any]:
+    """One FHIR-like patient shaped like the records in mock_patients.json"""
+    rng = _rng(seed, index, 0)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    born = datetime(1940, 1, 1) + timedelta(days=rng.randint(0, 365 * 80))
+    insurer, prefix = rng.choice(INSURERS)
+    return {
+        'patient_id': synthetic_patient_id(index, start),
+        'name': f"{first} {last}",
+        'date_of_birth': born.strftime('%Y-%m-%d'),
+        'gender': rng.choice(['Female', 'Male']),
+        'contact': {
+            'email': f"{first.lower()}.{last.lower()}{index}@example.com",
+            'phone': f"+1-555-{rng.randint(0, 9999):04d}"
+        },
+        'medical_history': {
+            'conditions': rng.sample(CONDITIONS, rng.randint(0, 3)),
+            'allergies': rng.sample(ALLERGIES, rng.randint(0, 2)),
+            'medications': rng.sample(MEDICATIONS, rng.randint(0, 3)),
+            'blood_type': rng.choice(BLOOD_TYPES),
+            'immunizations': ['Flu vaccine 2024'] if rng.random() < 0.6 else []
+        },
+        'insurance': {
+            'provider': insurer,
+            'policy_number': f"{prefix}-{rng.randint(10000000, 99999999)}"
+        },
+        'last_visit': (datetime.now() - timedelta(days=rng.randint(1, 720))).strftime('%Y-%m-%d'),
+        'primary_physician': rng.choice(list(DOCTORS.values()))
+    }
+
+
+def generate_patients(count: int, start: int = 100000, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Lazily generate `count` synthetic patients"""
+    for index in range(count):
+        yield synthetic_patient(index, start, seed)
+
+
+def generate_appointments(count: int, per_patient: int = 3, start: int = 100000,
+                          seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Past and upcoming appointments for the synthetic patients"""
+    today = datetime.now()
+    for index in range(count):
+        rng = _rng(seed, index, 1)
+        patient_id = synthetic_patient_id(index, start)
+        for n in range(per_patient):
+            department = rng.choice(list(DOCTORS))
+            day = today + timedelta(days=rng.randint(-365, 60))
+            yield {
+                'appointment_id': f"APT-{patient_id}-{n}",
+                'patient_id': patient_id,
+                'department': department,
+                'date': day.strftime('%Y-%m-%d'),
+                'time': f"{rng.randint(8, 17):02d}:{rng.choice(['00', '30'])}",
+                'reason': rng.choice(VISIT_REASONS),
+                'doctor': DOCTORS[department],
+                'status': 'confirmed' if day >= today else rng.choice(['completed', 'completed', 'cancelled']),
+                'created_at': (day - timedelta(days=rng.randint(1, 30))).isoformat(),
+                'reminder_sent': False
+            }
+
+
+def generate_memory(count: int, per_patient: int = 2, start: int = 100000,
+                    seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Interaction notes and scheduled reminders for the synthetic patients"""
+    today = datetime.now()
+    for index in range(count):
+        rng = _rng(seed, index, 2)
+        patient_id = synthetic_patient_id(index, start)
+        for n in range(per_patient):
+            memory_id = f"MEM-{patient_id}-{n}"
+            if rng.random() < 0.3:
+                scheduled_date = (today + timedelta(days=rng.randint(0, 30))).strftime('%Y-%m-%d')
+                yield {
+                    'memory_id': memory_id,
+                    'reminder_id': memory_id,
+                    'patient_id': patient_id,
+                    'memory_type': 'reminder',
+                    'type': rng.choice(['appointment', 'medication', 'follow_up', 'test']),
+                    'message': 'Please remember your upcoming care step.',
+                    'scheduled_date': scheduled_date,
+                    'due_bucket': due_bucket(scheduled_date, memory_id),
+                    'status': 'scheduled',
+                    'created_at': today.isoformat(),
+                    'sent': False
+                }
+            else:
+                yield {
+                    'memory_id': memory_id,
+                    'patient_id': patient_id,
+                    'memory_type': 'interaction',
+                    'content': f"Patient asked about {rng.choice(VISIT_REASONS).lower()}.",
+                    'timestamp': (today - timedelta(days=rng.randint(0, 365))).isoformat()
+                }
+
+
+def write_ndjson(records: Iterator[Dict[str, Any]], path: str) -> int:
+    """Write records one JSON object per line; returns the count written"""
+    written = 0
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + '\n')
+            written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load mock or synthetic hospital data into DynamoDB")
+    parser.add_argument('--input', help="Patients file to load (NDJSON or JSON array)")
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate and load N synthetic patients")
+    parser.add_argument('--appointments-per-patient', type=int, default=3)
+    parser.add_argument('--memory-per-patient', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0, help="Seed for reproducible synthetic data")
+    parser.add_argument('--write-ndjson', metavar='PATH', help="Write synthetic patients to NDJSON instead of loading")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent batch writers")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Records per worker chunk")
+    parser.add_argument('--fake', action='store_true', help="Load into the in-memory DynamoDB stand-in (dry run)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Hospital Multi-Agent System - Data Loader")
     print("=" * 60)
     print()
-    
+
+    if args.write_ndjson:
+        count = write_ndjson(generate_patients(args.synthetic, seed=args.seed), args.write_ndjson)
+        print(f"✓ Wrote {count:,} synthetic patients to {args.write_ndjson}")
+        return
+
     # Get table names from environment or use defaults
     patients_table = os.getenv('PATIENTS_TABLE', 'hospital-patients')
     appointments_table = os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments')
     memory_table = os.getenv('MEMORY_TABLE', 'hospital-memory')
     
-    print(f"Target Tables:")
+    print(f"Target Tables{' (in-memory stand-in)' if args.fake else ''}:")
     print(f"  - Patients: {patients_table}")
     print(f"  - Appointments: {appointments_table}")
     print(f"  - Memory: {memory_table}")
     print()
+
+    if args.fake:
+        fake = FakeDynamoDB()
+        factory = lambda: fake
+    else:
+        factory = get_dynamodb
+    loader = BulkLoader(factory, workers=args.workers, chunk_size=args.chunk_size,
+                        progress_every=10000 if args.synthetic else 0)
     
     try:
-        # Load patients
-        print("Loading patient data...")
-        load_patients(patients_table)
-        print()
-        
-        # Create appointments
-        print("Creating sample appointments...")
-        create_sample_appointments(appointments_table)
-        print()
-        
-        # Initialize memory
-        print("Initializing memory table...")
-        initialize_memory_table(memory_table)
+        if args.synthetic:
+            print(f"Generating and loading {args.synthetic:,} synthetic patients...")
+            result = loader.load_tables(
+                {
+                    patients_table: generate_patients(args.synthetic, seed=args.seed),
+                    appointments_table: generate_appointments(args.synthetic, args.appointments_per_patient, seed=args.seed),
+                    memory_table: generate_memory(args.synthetic, args.memory_per_patient, seed=args.seed)
+                },
+                keys={patients_table: 'patient_id', appointments_table: 'appointment_id', memory_table: 'memory_id'}
+            )
+            for name, stats in result['tables'].items():
+                print(f"  {name}: {stats['loaded']:,} loaded, {stats['failed']} failed, {stats['retries']} retries")
+            _report('records', result)
+        else:
+            # Load patients
+            print("Loading patient data...")
+            load_patients(patients_table, args.input or DATA_FILE, loader)
+            print()
+
+            # Create appointments
+            print("Creating sample appointments...")
+            create_sample_appointments(appointments_table, loader)
+            print()
+
+            # Initialize memory
+            print("Initializing memory table...")
+            initialize_memory_table(memory_table, loader)
         print()
         
         print("=" * 60)
@@ -161,3 +349,6 @@ if __name__ == '__main__':
         print(f"\n✗ Error during data loading: {e}")
         sys.exit(1)
 
+
+if __name__ == '__main__':
+    main()
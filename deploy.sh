@@ -93,6 +93,9 @@ sam deploy \
     --capabilities CAPABILITY_IAM \
     --parameter-overrides \
         Environment=${ENVIRONMENT} \
+        CreateDueReminderIndex=${CREATE_DUE_REMINDER_INDEX:-true} \
+        NotifySesSender=${NOTIFY_SES_SENDER:-} \
+        NotifySnsTopicArn=${NOTIFY_SNS_TOPIC_ARN:-} \
     --no-confirm-changeset \
     --no-fail-on-empty-changeset
 
@@ -6,12 +6,26 @@ Runs entirely locally with Bedrock API calls
 import json
 import os
 from datetime import datetime
-from typing import Dict, Any
-import boto3
+from typing import Dict, Any, Iterator, Optional, Tuple
 import time
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from pathlib import Path
 
+from core.aws_clients import client_config, get_client, get_resource
+from core.cache import TTLCache
+from core.conversation_memory import ConversationMemory
+from core.intent import IntentClassifier
+from core.memory_store import create_memory_store
+from core.metrics import metrics
+from core.model_policy import load_model_policy, task_for
+from core.prompt_context import prompt_stats
+from core.rate_limiter import RateLimitTimeout, bedrock_limiter, estimate_tokens, is_throttling_error
+from core.response_cache import ResponseCache
+from core.tracing import tracer, traced
+from core.usage import usage_ledger
+from tools.triage_rules import emergency_response, triage_rules, urgency_decisions
+
 # Try to import streamlit for secrets support
 try:
     import streamlit as st
@@ -39,101 +53,298 @@ def load_mock_data():
 
 # Initialize
 PATIENTS = load_mock_data()
-APPOINTMENTS = {}
-MEMORY = {}
+
+# Session memory and appointments persist through a shared store (in-process LRU by default)
+MEMORY_STORE = create_memory_store(
+    backend=os.getenv('MEMORY_BACKEND', 'lru'),
+    sqlite_path=os.getenv('MEMORY_SQLITE_PATH'),
+    get_dynamodb=lambda: get_resource('dynamodb'),
+    max_patients=int(os.getenv('MEMORY_MAX_PATIENTS', '10000'))
+)
+# Recent turns verbatim, older ones folded into an extractive summary (no model call)
+MEMORY = ConversationMemory(
+    recent_turns=int(os.getenv('MEMORY_RECENT_TURNS', '6')),
+    max_bytes_per_patient=int(os.getenv('MEMORY_MAX_BYTES', '8192')),
+    max_patients=int(os.getenv('MEMORY_MAX_PATIENTS', '10000')),
+    store=MEMORY_STORE
+)
+INTENT_CLASSIFIER = IntentClassifier()
+
+# Model elaborations of templated emergency replies, latest per patient
+EMERGENCY_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='emergency-elaboration')
+EMERGENCY_FOLLOWUPS = TTLCache(max_size=1000, ttl=3600)
+
+# Cache of Claude responses keyed on normalized prompt + patient fields in the prompt
+RESPONSE_CACHE = None if os.getenv('RESPONSE_CACHE_DISABLED') else ResponseCache(
+    max_size=int(os.getenv('RESPONSE_CACHE_SIZE', '512')),
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', '3600')),
+    sqlite_path=os.getenv('RESPONSE_CACHE_PATH')
+)
+
+# Model tiers from config.yaml `models` (env BEDROCK_MODEL_ID / BEDROCK_FAST_MODEL_ID override)
+MODEL_POLICY = load_model_policy()
+MODEL_ID = MODEL_POLICY.model_id(MODEL_POLICY.escalation_tier)
+MAX_TOKENS = 2000
+
+THROTTLED_MESSAGE = "I apologize, but I'm experiencing high demand right now. Please wait 30 seconds and try again. This is a temporary AWS rate limit that will reset shortly."
+UNAVAILABLE_MESSAGE = "Service temporarily unavailable. Please wait 30 seconds and try again."
+INTERRUPTED_MESSAGE = "\n\n_Response interrupted. Please try again in a moment._"
 
 # Initialize Bedrock client with credentials from Streamlit secrets or environment
 def get_bedrock_client():
     """Get Bedrock client with credentials from Streamlit secrets or environment"""
+    if os.getenv('BEDROCK_FAKE'):
+        # Local stand-in for offline demos and tests
+        from core.fakes import FakeBedrockRuntime
+        return FakeBedrockRuntime(throttle_rate=float(os.getenv('BEDROCK_FAKE_THROTTLE_RATE', '0')))
+    
     if HAS_STREAMLIT and hasattr(st, 'secrets'):
         # Use Streamlit secrets (for Streamlit Cloud)
         try:
+            import boto3
             bedrock_runtime = boto3.client(
                 'bedrock-runtime',
                 region_name=st.secrets.get('AWS_REGION', 'us-east-1'),
                 aws_access_key_id=st.secrets.get('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=st.secrets.get('AWS_SECRET_ACCESS_KEY')
+                aws_secret_access_key=st.secrets.get('AWS_SECRET_ACCESS_KEY'),
+                config=client_config('bedrock-runtime')
             )
             return bedrock_runtime
         except Exception as e:
             print(f"Could not load from Streamlit secrets: {e}")
     
-    # Fall back to default credentials (for local use)
-    return boto3.client('bedrock-runtime', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+    # Fall back to default credentials (for local use), shared with the rest of the process
+    return get_client('bedrock-runtime')
 
 bedrock_runtime = get_bedrock_client()
 
-def call_claude(prompt: str, max_retries: int = 5) -> str:
-    """Call Claude via Bedrock with exponential backoff retry logic"""
+def _request_body(prompt: str) -> str:
+    """Build the Anthropic messages request body"""
+    return json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": MAX_TOKENS,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    })
+
+def _usage_tokens(usage: Dict[str, Any]) -> int:
+    """Input plus output tokens reported by Bedrock"""
+    return usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+
+def _record_usage(prompt: str, agent_type: str, patient_id: str, model_id: str, usage: Dict[str, Any],
+                  started: float):
+    """Account for a completed call's Bedrock-reported tokens (prompt stats, metrics and the usage ledger)"""
+    latency_ms = (time.perf_counter() - started) * 1000
+    prompt_stats.record(agent_type, estimate_tokens(prompt), usage.get('input_tokens'))
+    metrics.increment('InputTokens', usage.get('input_tokens', 0), agent=agent_type)
+    metrics.increment('OutputTokens', usage.get('output_tokens', 0), agent=agent_type)
+    metrics.observe('ModelLatency', latency_ms, tier=MODEL_POLICY.tier_of(model_id))
+    usage_ledger.record(model_id, agent_type, usage.get('input_tokens', 0), usage.get('output_tokens', 0),
+                        latency_ms, patient_id=patient_id)
+
+def select_model(prompt: str, agent_type: str) -> str:
+    """
+    Model for an agent turn under the tiering policy
+    
+    Booking confirmations go by how plainly they confirm; other turns by the
+    intent classifier's confidence, so a fast-tier agent escalates on unclear queries.
+    """
+    task, confidence = task_for(agent_type, prompt)
+    if confidence is None:
+        _, confidence = INTENT_CLASSIFIER.predict(prompt)
+    return MODEL_POLICY.model_id(MODEL_POLICY.select(task, agent=agent_type, confidence=confidence))
+
+@traced('call_claude')
+def call_claude(prompt: str, max_retries: int = 5, agent_type: str = 'general', patient_id: str = None,
+                model_id: str = None) -> str:
+    """Call Claude via Bedrock through the shared rate limiter, retrying throttles with jittered backoff"""
+    started = time.perf_counter()
+    model_id = model_id or MODEL_ID
+    
+    def invoke() -> Dict[str, Any]:
+        response = bedrock_runtime.invoke_model(
+            modelId=model_id,
+            body=_request_body(prompt)
+        )
+        return json.loads(response['body'].read())
+    
+    try:
+        result = bedrock_limiter.call(
+            invoke,
+            tokens=estimate_tokens(prompt) + MAX_TOKENS,
+            usage=lambda r: _usage_tokens(r.get('usage', {})) if r.get('usage') else None,
+            max_retries=max_retries
+        )
+        _record_usage(prompt, agent_type, patient_id, model_id, result.get('usage', {}), started)
+        return result['content'][0]['text']
+        
+    except RateLimitTimeout as e:
+        print(f"⚠️  {e}")
+        return THROTTLED_MESSAGE
+        
+    except ClientError as e:
+        if is_throttling_error(e):
+            return THROTTLED_MESSAGE
+        print(f"Bedrock API Error: {e}")
+        return f"I encountered an error: {str(e)}. Please try again in a moment."
+            
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return f"An unexpected error occurred. Please try again."
+
+def call_claude_stream(prompt: str, max_retries: int = 5, agent_type: str = 'general',
+                       patient_id: str = None, model_id: str = None) -> Iterator[str]:
+    """
+    Stream Claude's reply via Bedrock, yielding text chunks as they arrive
+    
+    Calls go through the shared rate limiter like call_claude. Throttling is
+    retried with jittered backoff, but only until the first chunk has been
+    yielded; after that an error ends the stream.
+    """
+    with tracer.span('call_claude_stream', agent=agent_type):
+        yield from _stream_claude(prompt, max_retries, agent_type, patient_id, model_id or MODEL_ID)
+
+def _stream_claude(prompt: str, max_retries: int, agent_type: str, patient_id: str, model_id: str) -> Iterator[str]:
+    call_started = time.perf_counter()
+    reserved = estimate_tokens(prompt) + MAX_TOKENS
+    deadline = time.monotonic() + bedrock_limiter.acquire_timeout
     
     for attempt in range(max_retries):
         try:
-            response = bedrock_runtime.invoke_model(
-                modelId='anthropic.claude-3-5-sonnet-20240620-v1:0',
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 2000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                })
-            )
+            with tracer.span('bedrock.rate_limit_wait', tokens=reserved):
+                waited = bedrock_limiter.acquire(reserved, timeout=max(0.0, deadline - time.monotonic()))
+        except RateLimitTimeout as e:
+            print(f"⚠️  {e}")
+            yield THROTTLED_MESSAGE
+            return
+        
+        metrics.observe('BedrockQueueWait', waited * 1000)
+        started = False
+        usage: Dict[str, Any] = {}
+        try:
+            invoked = time.perf_counter()
+            with tracer.span('bedrock.invoke', attempt=attempt + 1, stream=True):
+                response = bedrock_runtime.invoke_model_with_response_stream(
+                    modelId=model_id,
+                    body=_request_body(prompt)
+                )
             
-            result = json.loads(response['body'].read())
-            return result['content'][0]['text']
+            for event in response['body']:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                payload = json.loads(chunk['bytes'])
+                if payload.get('type') == 'message_start':
+                    usage.update(payload.get('message', {}).get('usage', {}))
+                elif payload.get('type') == 'message_delta':
+                    usage.update(payload.get('usage', {}))
+                elif payload.get('type') == 'content_block_delta':
+                    text = payload.get('delta', {}).get('text', '')
+                    if text:
+                        if not started:
+                            metrics.observe('BedrockFirstTokenLatency', (time.perf_counter() - invoked) * 1000)
+                        started = True
+                        yield text
+            metrics.observe('BedrockLatency', (time.perf_counter() - invoked) * 1000)
+            bedrock_limiter.on_success(reserved, _usage_tokens(usage) if usage else None)
+            _record_usage(prompt, agent_type, patient_id, model_id, usage, call_started)
+            return
             
         except ClientError as e:
-            error_code = e.response.get('Error', {}).get('Code', '')
-            
-            # Handle throttling with exponential backoff
-            if error_code == 'ThrottlingException':
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + 1  # 1, 3, 7, 15, 31 seconds
-                    print(f"⚠️  Rate limited. Waiting {wait_time} seconds... (Attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return "I apologize, but I'm experiencing high demand right now. Please wait 30 seconds and try again. This is a temporary AWS rate limit that will reset shortly."
+            if is_throttling_error(e):
+                metrics.increment('BedrockThrottles')
+                bedrock_limiter.on_throttle(reserved)
+                if not started:
+                    wait_time = bedrock_limiter.backoff(attempt)
+                    if attempt < max_retries - 1 and time.monotonic() + wait_time < deadline:
+                        print(f"⚠️  Rate limited. Retrying in {wait_time:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+                        with tracer.span('bedrock.throttle_backoff', attempt=attempt + 1):
+                            time.sleep(wait_time)
+                        continue
+                    yield THROTTLED_MESSAGE
+                    return
             else:
-                print(f"Bedrock API Error: {e}")
-                return f"I encountered an error: {str(e)}. Please try again in a moment."
-                
+                metrics.increment('BedrockErrors')
+                bedrock_limiter.release(reserved)
+            print(f"Bedrock API Error: {e}")
+            if started:
+                yield INTERRUPTED_MESSAGE
+            else:
+                yield f"I encountered an error: {str(e)}. Please try again in a moment."
+            return
+            
         except Exception as e:
+            metrics.increment('BedrockErrors')
+            bedrock_limiter.release(reserved)
             print(f"Unexpected error: {e}")
-            return f"An unexpected error occurred. Please try again."
+            yield "An unexpected error occurred. Please try again."
+            return
     
-    return "Service temporarily unavailable. Please wait 30 seconds and try again."
+    yield UNAVAILABLE_MESSAGE
 
+@traced('get_patient_context')
 def get_patient_context(patient_id: str) -> Dict[str, Any]:
     """Get patient context"""
     patient = PATIENTS.get(patient_id, {})
     return {
         'medical_history': patient.get('medical_history', {}),
-        'appointments': list(APPOINTMENTS.values()) if APPOINTMENTS else [],
-        'recent_interactions': MEMORY.get(patient_id, [])
+        'appointments': MEMORY_STORE.get(patient_id, 'appointment'),
+        'recent_interactions': MEMORY.turns(patient_id),
+        'conversation_summary': MEMORY.summary(patient_id)
     }
 
-def handle_query(prompt: str, patient_id: str) -> str:
-    """Handle user query"""
+def _is_error_response(response: str) -> bool:
+    """Fallback messages from call_claude/call_claude_stream must never be cached"""
+    return (
+        response in (THROTTLED_MESSAGE, UNAVAILABLE_MESSAGE)
+        or response.startswith(("I encountered an error", "An unexpected error"))
+        or response.endswith(INTERRUPTED_MESSAGE)
+    )
+
+def _prompt_fields(agent_type: str, patient: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    """Patient-context values rendered into each agent's prompt (also the cache key)"""
+    fields = {'name': patient.get('name', 'Unknown')}
+    if agent_type == 'triage':
+        fields['allergies'] = context['medical_history'].get('allergies', [])
+        fields['conditions'] = context['medical_history'].get('conditions', [])
+    elif agent_type in ('booking', 'reminder'):
+        fields['appointment_count'] = len(context['appointments'])
+    return fields
+
+@traced('build_agent_prompt')
+def build_agent_prompt(prompt: str, patient_id: str, agent_type: str = None) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Pick the agent for a query and build its prompt
+    
+    Args:
+        prompt: User query
+        patient_id: Patient identifier
+        agent_type: Skip intent classification and use this agent
+    
+    Returns:
+        (agent_type, system_prompt, prompt_fields)
+    """
     
     # Get patient context
     context = get_patient_context(patient_id)
     patient = PATIENTS.get(patient_id, {})
     
     # Determine which agent to use
-    prompt_lower = prompt.lower()
+    if agent_type is None:
+        agent_type, _ = INTENT_CLASSIFIER.predict(prompt)
+    fields = _prompt_fields(agent_type, patient, context)
     
-    if any(word in prompt_lower for word in ['symptom', 'fever', 'cough', 'pain', 'sick', 'hurt']):
-        agent_type = 'triage'
+    if agent_type == 'triage':
         system_prompt = f"""You are a hospital triage agent. Analyze symptoms and provide recommendations.
 
 Patient Info:
-- Name: {patient.get('name', 'Unknown')}
-- Allergies: {', '.join(context['medical_history'].get('allergies', []))}
-- Conditions: {', '.join(context['medical_history'].get('conditions', []))}
+- Name: {fields['name']}
+- Allergies: {', '.join(fields['allergies'])}
+- Conditions: {', '.join(fields['conditions'])}
 
 Analyze the symptoms and provide:
 1. Urgency level (Low/Medium/High/Emergency)
@@ -142,57 +353,181 @@ Analyze the symptoms and provide:
 
 User Query: {prompt}"""
     
-    elif any(word in prompt_lower for word in ['appointment', 'book', 'schedule', 'availability']):
-        agent_type = 'booking'
+    elif agent_type == 'booking':
         system_prompt = f"""You are a hospital booking agent. Help with appointment scheduling.
 
 Patient Info:
-- Name: {patient.get('name', 'Unknown')}
-- Recent Appointments: {len(context['appointments'])}
+- Name: {fields['name']}
+- Recent Appointments: {fields['appointment_count']}
 
 Provide available slots and help book appointments.
 
 User Query: {prompt}"""
     
-    elif any(word in prompt_lower for word in ['remind', 'notification', 'follow-up']):
-        agent_type = 'reminder'
+    elif agent_type == 'reminder':
         system_prompt = f"""You are a hospital reminder agent. Manage notifications and follow-ups.
 
 Patient Info:
-- Name: {patient.get('name', 'Unknown')}
-- Upcoming: {len(context['appointments'])} appointments
+- Name: {fields['name']}
+- Upcoming: {fields['appointment_count']} appointments
 
 User Query: {prompt}"""
     
     else:
-        agent_type = 'general'
         system_prompt = f"""You are a helpful hospital AI assistant. You can help with:
 - Symptom triage and health concerns
 - Appointment booking and scheduling  
 - Reminders and follow-ups
 
-Patient: {patient.get('name', 'Unknown')}
+Patient: {fields['name']}
 
 User Query: {prompt}"""
     
-    # Call Claude via Bedrock
-    print(f"\n🤖 Routing to: {agent_type.upper()} Agent")
-    print(f"📞 Calling Claude via Bedrock...")
-    
-    response = call_claude(system_prompt)
-    
-    # Store in memory
-    if patient_id not in MEMORY:
-        MEMORY[patient_id] = []
-    MEMORY[patient_id].append({
+    return agent_type, system_prompt, fields
+
+def _remember(patient_id: str, prompt: str, response: str, agent_type: str) -> Dict[str, Any]:
+    """Store an interaction in memory; returns the stored turn"""
+    turn = {
         'query': prompt,
         'response': response[:200],  # Store truncated
         'agent': agent_type,
         'timestamp': datetime.now().isoformat()
-    })
+    }
+    MEMORY.append(patient_id, turn)
+    return turn
+
+def _triage_message(prompt: str) -> Tuple[str, str]:
+    """Decide urgency with the local rules before any model call; returns (urgency, keyword)"""
+    started = time.perf_counter()
+    intent, _ = INTENT_CLASSIFIER.predict(prompt)
+    urgency, keyword = triage_rules.match_message(prompt, intent)
+    urgency_decisions.record('rules', urgency, time.perf_counter() - started)
+    return urgency, keyword
+
+def _emergency_prompt(prompt: str, patient_id: str) -> str:
+    """Triage prompt for the elaboration that follows the templated emergency reply"""
+    _, system_prompt, _ = build_agent_prompt(prompt, patient_id, agent_type='triage')
+    return system_prompt + "\n\nThe patient has already been told to call 911. Briefly explain what to do while waiting for help."
+
+@traced('emergency_elaboration')
+def _elaborate_emergency(prompt: str, patient_id: str, turn: Dict[str, Any], started: float) -> str:
+    elaboration = call_claude(_emergency_prompt(prompt, patient_id), agent_type='triage', patient_id=patient_id)
+    urgency_decisions.record('llm', 'Emergency', time.perf_counter() - started)
+    MEMORY.update(patient_id, turn, elaboration=elaboration[:200])
+    return elaboration
+
+def emergency_followup(patient_id: str, timeout: float = None) -> str:
+    """The model's elaboration of the last emergency reply handle_query sent this patient (None if none)"""
+    future = EMERGENCY_FOLLOWUPS.get(patient_id)
+    return future.result(timeout) if future is not None else None
+
+def _cached_response(agent_type: str, prompt: str, fields: Dict[str, Any], model_id: str) -> Optional[str]:
+    """Look up the response cache, counting the hit or miss"""
+    if not RESPONSE_CACHE:
+        return None
+    cached = RESPONSE_CACHE.get(agent_type, prompt, fields, model_id)
+    metrics.increment('CacheHits' if cached is not None else 'CacheMisses', cache='response')
+    return cached
+
+def _count_request(agent_type: str, started: float):
+    """Count a handled request and its end-to-end latency"""
+    metrics.increment('Requests', agent=agent_type)
+    metrics.observe('RequestLatency', (time.perf_counter() - started) * 1000, agent=agent_type)
+
+@traced('handle_query')
+def handle_query(prompt: str, patient_id: str) -> str:
+    """Handle user query"""
+    started = time.perf_counter()
+    urgency, keyword = _triage_message(prompt)
+    if urgency == 'Emergency':
+        # Answer now; the model's elaboration follows in the background (see emergency_followup)
+        print(f"\n🚨 Emergency keyword '{keyword}': answering without waiting for Claude")
+        response = emergency_response(keyword)
+        turn = _remember(patient_id, prompt, response, 'triage')
+        EMERGENCY_FOLLOWUPS.set(patient_id, EMERGENCY_EXECUTOR.submit(_elaborate_emergency, prompt, patient_id,
+                                                                      turn, started))
+        _count_request('emergency', started)
+        return response
+    
+    agent_type, system_prompt, fields = build_agent_prompt(prompt, patient_id)
+    model_id = select_model(prompt, agent_type)
+    
+    cached = _cached_response(agent_type, prompt, fields, model_id)
+    if cached is not None:
+        print(f"\n⚡ Serving {agent_type.upper()} response from cache")
+        response = cached
+    else:
+        # Call Claude via Bedrock
+        print(f"\n🤖 Routing to: {agent_type.upper()} Agent")
+        print(f"📞 Calling Claude via Bedrock...")
+        
+        response = call_claude(system_prompt, agent_type=agent_type, patient_id=patient_id, model_id=model_id)
+        if RESPONSE_CACHE and not _is_error_response(response):
+            RESPONSE_CACHE.put(agent_type, prompt, fields, response, model_id)
+    
+    if agent_type == 'triage':
+        urgency_decisions.record('llm', urgency, time.perf_counter() - started)
+    
+    # Store in memory
+    _remember(patient_id, prompt, response, agent_type)
+    _count_request(agent_type, started)
     
     return response
 
+def handle_query_stream(prompt: str, patient_id: str) -> Iterator[str]:
+    """Handle user query, yielding the response as it streams from Bedrock"""
+    with tracer.span('handle_query_stream'):
+        yield from _handle_query_stream(prompt, patient_id)
+
+def _handle_query_stream(prompt: str, patient_id: str) -> Iterator[str]:
+    started = time.perf_counter()
+    urgency, keyword = _triage_message(prompt)
+    if urgency == 'Emergency':
+        # The templated instructions go out first; Claude's elaboration streams in after them
+        print(f"\n🚨 Emergency keyword '{keyword}': sending emergency instructions before Claude")
+        reply = emergency_response(keyword)
+        turn = _remember(patient_id, prompt, reply, 'triage')
+        yield reply
+        chunks = []
+        for chunk in call_claude_stream(_emergency_prompt(prompt, patient_id), agent_type='triage',
+                                        patient_id=patient_id):
+            if not chunks:
+                urgency_decisions.record('llm', 'Emergency', time.perf_counter() - started)
+            chunks.append(chunk)
+            yield chunk
+        MEMORY.update(patient_id, turn, elaboration=''.join(chunks)[:200])
+        _count_request('emergency', started)
+        return
+    
+    agent_type, system_prompt, fields = build_agent_prompt(prompt, patient_id)
+    model_id = select_model(prompt, agent_type)
+    
+    cached = _cached_response(agent_type, prompt, fields, model_id)
+    if cached is not None:
+        print(f"\n⚡ Serving {agent_type.upper()} response from cache")
+        yield cached
+        _remember(patient_id, prompt, cached, agent_type)
+        _count_request(agent_type, started)
+        return
+    
+    print(f"\n🤖 Routing to: {agent_type.upper()} Agent")
+    print(f"📡 Streaming Claude via Bedrock...")
+    
+    chunks = []
+    for chunk in call_claude_stream(system_prompt, agent_type=agent_type, patient_id=patient_id,
+                                    model_id=model_id):
+        if not chunks and agent_type == 'triage':
+            urgency_decisions.record('llm', urgency, time.perf_counter() - started)
+        chunks.append(chunk)
+        yield chunk
+    
+    # Store in memory once the full response is known
+    response = ''.join(chunks)
+    if RESPONSE_CACHE and not _is_error_response(response):
+        RESPONSE_CACHE.put(agent_type, prompt, fields, response, model_id)
+    _remember(patient_id, prompt, response, agent_type)
+    _count_request(agent_type, started)
+
 def main():
     """Main CLI interface"""
     print("\n" + "="*60)
@@ -228,13 +563,14 @@ def main():
             if not query:
                 continue
             
-            # Process query
-            response = handle_query(query, patient_id)
-            
             print("\n" + "="*60)
             print("🤖 AI Assistant Response:")
             print("="*60)
-            print(response)
+            
+            # Process query, printing the response as it streams in
+            for chunk in handle_query_stream(query, patient_id):
+                print(chunk, end='', flush=True)
+            print()
             print("="*60)
 
 if __name__ == '__main__':
@@ -9,14 +9,24 @@ import uuid
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
-import boto3
 from botocore.exceptions import ClientError
 
+from core.aws_clients import get_resource
+from core.pagination import QueryPaginator
+from core.patient_cache import patient_cache
+from core.tracing import traced
+from tools.slot_inventory import SlotInventory
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
 
+# Per-doctor calendars built from hospital.hours in config.yaml
+slot_inventory = SlotInventory(lambda: get_resource('dynamodb'))
 
+# Attributes returned by appointment reads (date, time and status are reserved words)
+APPOINTMENT_FIELDS = 'appointment_id, patient_id, department, doctor, #date, #time, reason, #status, reminder_sent'
+APPOINTMENT_FIELD_NAMES = {'#date': 'date', '#time': 'time', '#status': 'status'}
+
+
+@traced('tool.check_availability')
 def check_availability(department: str, date: str, doctor_name: str = None) -> Dict[str, Any]:
     """
     Check available appointment slots
@@ -29,40 +39,44 @@ def check_availability(department: str, date: str, doctor_name: str = None) -> D
     Returns:
         Dictionary with available slots
     """
-    # For MVP, generate mock availability
-    # In production, this would query a real scheduling system
-    
     try:
-        target_date = datetime.strptime(date, "%Y-%m-%d")
+        datetime.strptime(date, "%Y-%m-%d")
     except ValueError:
         return {
             "error": "Invalid date format. Use YYYY-MM-DD",
             "available_slots": []
         }
     
-    # Generate available slots (9 AM to 5 PM, every 30 min)
-    slots = []
-    start_hour = 9
-    end_hour = 17
+    doctor = doctor_name or _get_available_doctor(department)
     
-    for hour in range(start_hour, end_hour):
-        for minute in [0, 30]:
-            slot_time = f"{hour:02d}:{minute:02d}"
-            slots.append({
-                "time": slot_time,
-                "doctor": doctor_name or _get_available_doctor(department),
-                "department": department,
-                "available": True
-            })
+    try:
+        free_times = slot_inventory.free_slots(doctor, date)
+    except ClientError as e:
+        print(f"Error checking availability: {e}")
+        return {
+            "error": "Unable to check availability. Please try again.",
+            "available_slots": []
+        }
+    
+    slots = [
+        {
+            "time": slot_time,
+            "doctor": doctor,
+            "department": department,
+            "available": True
+        }
+        for slot_time in free_times
+    ]
     
     return {
         "date": date,
         "department": department,
-        "available_slots": slots[:10],  # Return first 10 slots for MVP
+        "available_slots": slots[:10],  # Return first 10 slots
         "total_available": len(slots)
     }
 
 
+@traced('tool.book_appointment')
 def book_appointment(patient_id: str, department: str, date: str, 
                     time: str, reason: str) -> Dict[str, Any]:
     """
@@ -79,9 +93,27 @@ def book_appointment(patient_id: str, department: str, date: str,
         Dictionary with booking confirmation
     """
     try:
-        table = dynamodb.Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        return {
+            "status": "failed",
+            "error": "Invalid date format. Use YYYY-MM-DD"
+        }
+    
+    doctor = _get_available_doctor(department)
+    appointment_id = str(uuid.uuid4())
+    
+    try:
+        # Claim the slot first; a conditional write guarantees a single winner
+        if not slot_inventory.reserve(doctor, date, time, appointment_id):
+            return {
+                "status": "failed",
+                "error": f"The {time} slot on {date} is not available",
+                "alternatives": slot_inventory.free_slots(doctor, date)[:3]
+            }
+        
+        table = get_resource('dynamodb').Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
         
-        appointment_id = str(uuid.uuid4())
         appointment = {
             'appointment_id': appointment_id,
             'patient_id': patient_id,
@@ -89,14 +121,19 @@ def book_appointment(patient_id: str, department: str, date: str,
             'date': date,
             'time': time,
             'reason': reason,
-            'doctor': _get_available_doctor(department),
+            'doctor': doctor,
             'status': 'confirmed',
             'created_at': datetime.utcnow().isoformat(),
             'reminder_sent': False
         }
         
         # Store in DynamoDB
-        table.put_item(Item=appointment)
+        try:
+            table.put_item(Item=appointment)
+        except ClientError:
+            slot_inventory.release(doctor, date, time, appointment_id)
+            raise
+        patient_cache.invalidate(patient_id, 'appointments')
         
         return {
             "status": "success",
@@ -115,40 +152,85 @@ def book_appointment(patient_id: str, department: str, date: str,
         }
 
 
-def get_appointments(patient_id: str, status: str = "all") -> Dict[str, Any]:
+def iter_appointments(patient_id: str, status: str = "all", start_date: str = None,
+                      end_date: str = None, limit: int = None, cursor: str = None,
+                      newest_first: bool = True) -> QueryPaginator:
+    """
+    Page through a patient's appointments on PatientIndex
+
+    The date range is part of the key condition (date is the index range
+    key), so DynamoDB only reads appointments inside it; status is a
+    FilterExpression and only APPOINTMENT_FIELDS are returned.
+
+    Args:
+        patient_id: Patient identifier
+        status: Filter by status (confirmed, cancelled, completed, all)
+        start_date: Earliest date (YYYY-MM-DD), inclusive
+        end_date: Latest date (YYYY-MM-DD), inclusive
+        limit: Maximum appointments to return, None for all
+        cursor: next_cursor from a previous call
+        newest_first: Order by date descending
+
+    Returns:
+        Iterable of appointments; its next_cursor is set once exhausted
+    """
+    key_condition = 'patient_id = :pid'
+    values: Dict[str, Any] = {':pid': patient_id}
+    if start_date and end_date:
+        key_condition += ' AND #date BETWEEN :start AND :end'
+        values.update({':start': start_date, ':end': end_date})
+    elif start_date:
+        key_condition += ' AND #date >= :start'
+        values[':start'] = start_date
+    elif end_date:
+        key_condition += ' AND #date <= :end'
+        values[':end'] = end_date
+
+    query: Dict[str, Any] = {
+        'IndexName': 'PatientIndex',
+        'KeyConditionExpression': key_condition,
+        'ProjectionExpression': APPOINTMENT_FIELDS,
+        'ExpressionAttributeNames': dict(APPOINTMENT_FIELD_NAMES),
+        'ExpressionAttributeValues': values,
+        'ScanIndexForward': not newest_first
+    }
+    if status != "all":
+        query['FilterExpression'] = '#status = :status'
+        values[':status'] = status
+
+    table = get_resource('dynamodb').Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
+    return QueryPaginator(table, limit=limit, cursor=cursor, **query)
+
+
+@traced('tool.get_appointments')
+def get_appointments(patient_id: str, status: str = "all", start_date: str = None,
+                     end_date: str = None, limit: int = None, cursor: str = None) -> Dict[str, Any]:
     """
     Retrieve patient appointments
     
     Args:
         patient_id: Patient identifier
         status: Filter by status (confirmed, cancelled, completed, all)
+        start_date: Earliest date (YYYY-MM-DD), inclusive
+        end_date: Latest date (YYYY-MM-DD), inclusive
+        limit: Maximum appointments to return, None for all
+        cursor: next_cursor from a previous call to continue from
     
     Returns:
-        Dictionary with list of appointments
+        Dictionary with list of appointments and next_cursor (None when done)
     """
     try:
-        table = dynamodb.Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
+        pages = iter_appointments(patient_id, status, start_date, end_date, limit, cursor)
+        appointments = list(pages)
         
-        # Query appointments for patient
-        response = table.query(
-            IndexName='PatientIndex',  # Assuming GSI exists
-            KeyConditionExpression='patient_id = :pid',
-            ExpressionAttributeValues={':pid': patient_id}
-        )
-        
-        appointments = response.get('Items', [])
-        
-        # Filter by status if specified
-        if status != "all":
-            appointments = [apt for apt in appointments if apt.get('status') == status]
-        
-        # Sort by date
+        # Newest first; the index orders by date only, so settle times within a day
         appointments.sort(key=lambda x: f"{x.get('date', '')} {x.get('time', '')}", reverse=True)
         
         return {
             "patient_id": patient_id,
             "appointments": appointments,
-            "total": len(appointments)
+            "total": len(appointments),
+            "next_cursor": pages.next_cursor
         }
         
     except ClientError as e:
@@ -158,10 +240,12 @@ def get_appointments(patient_id: str, status: str = "all") -> Dict[str, Any]:
             "patient_id": patient_id,
             "appointments": [],
             "total": 0,
+            "next_cursor": None,
             "note": "Using mock data - DynamoDB not yet configured"
         }
 
 
+@traced('tool.cancel_appointment')
 def cancel_appointment(appointment_id: str, reason: str = "") -> Dict[str, Any]:
     """
     Cancel an appointment
@@ -174,7 +258,7 @@ def cancel_appointment(appointment_id: str, reason: str = "") -> Dict[str, Any]:
         Cancellation confirmation
     """
     try:
-        table = dynamodb.Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
+        table = get_resource('dynamodb').Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
         
         # Update appointment status
         response = table.update_item(
@@ -189,6 +273,12 @@ def cancel_appointment(appointment_id: str, reason: str = "") -> Dict[str, Any]:
             ReturnValues='ALL_NEW'
         )
         
+        appointment = response.get('Attributes', {})
+        if appointment.get('patient_id'):
+            patient_cache.invalidate(appointment['patient_id'], 'appointments')
+        if appointment.get('doctor') and appointment.get('date') and appointment.get('time'):
+            slot_inventory.release(appointment['doctor'], appointment['date'], appointment['time'], appointment_id)
+        
         return {
             "status": "success",
             "message": "Appointment cancelled successfully",
@@ -6,68 +6,85 @@ Functions for notifications and follow-up management
 import os
 import json
 import uuid
+import sqlite3
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
-import boto3
 from botocore.exceptions import ClientError
 
+from core.aws_clients import get_resource
+from core.notifications import get_dispatcher
+from core.reminder_campaign import AppointmentReminderCampaign, appointment_reminder_message
+from core.pagination import QueryPaginator
+from core.reminder_sweeper import ReminderSweeper, due_bucket
+from core.patient_cache import patient_cache
+from core.tracing import traced
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
-sns = boto3.client('sns', region_name=os.getenv('AWS_REGION', 'us-east-1'))
 
+# Attributes returned by reminder reads (status and type are reserved words)
+REMINDER_FIELDS = 'memory_id, reminder_id, patient_id, #type, message, scheduled_date, #status, sent'
 
+# send_notification's reply per delivery state (outbox statuses plus 'queued' and 'duplicate')
+DELIVERY_MESSAGES = {
+    'queued': "Notification queued for delivery",
+    'pending': "Notification queued for delivery (retrying)",
+    'sending': "Notification is being delivered",
+    'sent': "Notification sent",
+    'failed': "Notification could not be delivered",
+    'duplicate': "Notification was already sent"
+}
+
+
+@traced('tool.send_notification')
 def send_notification(patient_id: str, message: str, 
-                     notification_type: str = "general") -> Dict[str, Any]:
+                     notification_type: str = "general", channel: str = "email",
+                     ref: str = None) -> Dict[str, Any]:
     """
     Send notification to patient
     
+    The notification is queued in the dispatcher's outbox and delivered
+    (SNS/SES, with retries) in the background, so this returns without
+    waiting on delivery. In a Lambda it waits (up to NOTIFY_FLUSH_TIMEOUT
+    seconds) for the delivery attempt, since the background workers are
+    frozen with the function once it returns. Re-sending the same
+    notification is ignored.
+    
     Args:
         patient_id: Patient identifier
         message: Notification message
         notification_type: Type (appointment, reminder, alert, general)
+        channel: Delivery channel (email, sms)
+        ref: Record the notification is about, e.g. an appointment_id
     
     Returns:
         Notification confirmation
     """
     try:
-        # For MVP, we'll log the notification
-        # In production, integrate with SNS/SES for actual delivery
-        
-        notification = {
-            'notification_id': str(uuid.uuid4()),
-            'patient_id': patient_id,
-            'type': notification_type,
-            'message': message,
-            'sent_at': datetime.utcnow().isoformat(),
-            'status': 'sent',
-            'channel': 'email'  # Could be email, sms, push
-        }
-        
-        # Store in DynamoDB for tracking
-        table = dynamodb.Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
-        table.put_item(Item={
-            **notification,
-            'memory_type': 'notification'
-        })
+        dispatcher = get_dispatcher()
+        queued = dispatcher.enqueue(
+            patient_id=patient_id,
+            message=message,
+            notification_type=notification_type,
+            channel=channel,
+            ref=ref
+        )
         
-        # TODO: In production, send actual notification via SNS/SES
-        # sns.publish(
-        #     TopicArn=f'arn:aws:sns:us-east-1:123456789012:patient-notifications',
-        #     Message=message,
-        #     Subject=f"Hospital Notification - {notification_type}"
-        # )
+        delivery = queued['status']
+        if delivery == 'queued' and os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+            dispatcher.flush(float(os.getenv('NOTIFY_FLUSH_TIMEOUT', '20')))
+            record = dispatcher.outbox.get_many([queued['idempotency_key']]).get(queued['idempotency_key'])
+            delivery = record['status'] if record else delivery
         
         return {
-            "status": "success",
-            "notification_id": notification['notification_id'],
-            "message": "Notification sent successfully",
-            "channel": "email",
-            "timestamp": notification['sent_at']
+            "status": "failed" if delivery == 'failed' else "success",
+            "notification_id": queued['notification_id'],
+            "delivery": delivery,
+            "message": DELIVERY_MESSAGES.get(delivery, "Notification queued for delivery"),
+            "channel": channel,
+            "timestamp": queued['queued_at']
         }
         
-    except ClientError as e:
+    except (ValueError, sqlite3.Error) as e:
         print(f"Error sending notification: {e}")
         return {
             "status": "failed",
@@ -75,6 +92,7 @@ def send_notification(patient_id: str, message: str,
         }
 
 
+@traced('tool.schedule_reminder')
 def schedule_reminder(patient_id: str, reminder_type: str, 
                      scheduled_date: str, message: str) -> Dict[str, Any]:
     """
@@ -90,25 +108,35 @@ def schedule_reminder(patient_id: str, reminder_type: str,
         Scheduling confirmation
     """
     try:
-        table = dynamodb.Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
+        datetime.strptime(scheduled_date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return {
+            "status": "failed",
+            "error": "Invalid date format. Use YYYY-MM-DD"
+        }
+
+    try:
+        table = get_resource('dynamodb').Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
         
         reminder_id = str(uuid.uuid4())
         reminder = {
+            'memory_id': reminder_id,
             'reminder_id': reminder_id,
             'patient_id': patient_id,
             'memory_type': 'reminder',
             'type': reminder_type,
             'message': message,
             'scheduled_date': scheduled_date,
+            # Makes the reminder visible to the sweeper (DueReminderIndex)
+            'due_bucket': due_bucket(scheduled_date, reminder_id),
             'status': 'scheduled',
             'created_at': datetime.utcnow().isoformat(),
             'sent': False
         }
         
-        # Store in DynamoDB
+        # Store in DynamoDB; sweep_due_reminders queues it on its scheduled date
         table.put_item(Item=reminder)
-        
-        # TODO: In production, use EventBridge to trigger reminder at scheduled time
+        patient_cache.invalidate(patient_id, 'reminders')
         
         return {
             "status": "success",
@@ -125,50 +153,67 @@ def schedule_reminder(patient_id: str, reminder_type: str,
         }
 
 
-def get_upcoming_reminders(patient_id: str, days_ahead: int = 7) -> Dict[str, Any]:
+def iter_upcoming_reminders(patient_id: str, days_ahead: int = 7, limit: int = None,
+                            cursor: str = None) -> QueryPaginator:
+    """
+    Page through a patient's scheduled reminders due within `days_ahead`
+
+    Reads PatientReminderIndex (patient_id + scheduled_date), which only
+    holds reminders, so the due-date cutoff is a key condition and results
+    come back in date order; only REMINDER_FIELDS are returned.
+
+    Args:
+        patient_id: Patient identifier
+        days_ahead: Number of days to look ahead
+        limit: Maximum reminders to return, None for all
+        cursor: next_cursor from a previous call
+
+    Returns:
+        Iterable of reminders; its next_cursor is set once exhausted
+    """
+    cutoff_date = (datetime.utcnow() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+    table = get_resource('dynamodb').Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
+    return QueryPaginator(
+        table, limit=limit, cursor=cursor,
+        IndexName='PatientReminderIndex',
+        KeyConditionExpression='patient_id = :pid AND scheduled_date <= :cutoff',
+        FilterExpression='memory_type = :mtype AND #status = :status',
+        ProjectionExpression=REMINDER_FIELDS,
+        ExpressionAttributeNames={'#status': 'status', '#type': 'type'},
+        ExpressionAttributeValues={
+            ':pid': patient_id,
+            ':cutoff': cutoff_date,
+            ':mtype': 'reminder',
+            ':status': 'scheduled'
+        }
+    )
+
+
+@traced('tool.get_upcoming_reminders')
+def get_upcoming_reminders(patient_id: str, days_ahead: int = 7, limit: int = None,
+                           cursor: str = None) -> Dict[str, Any]:
     """
     Get upcoming reminders for patient
     
     Args:
         patient_id: Patient identifier
         days_ahead: Number of days to look ahead
+        limit: Maximum reminders to return, None for all
+        cursor: next_cursor from a previous call to continue from
     
     Returns:
-        List of upcoming reminders
+        List of upcoming reminders, earliest first, and next_cursor (None when done)
     """
     try:
-        table = dynamodb.Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
-        
-        # Query reminders
-        response = table.query(
-            IndexName='PatientMemoryIndex',
-            KeyConditionExpression='patient_id = :pid',
-            FilterExpression='memory_type = :mtype AND #status = :status',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':pid': patient_id,
-                ':mtype': 'reminder',
-                ':status': 'scheduled'
-            }
-        )
-        
-        reminders = response.get('Items', [])
-        
-        # Filter by date range
-        cutoff_date = (datetime.utcnow() + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
-        upcoming = [
-            r for r in reminders 
-            if r.get('scheduled_date', '') <= cutoff_date
-        ]
-        
-        # Sort by date
-        upcoming.sort(key=lambda x: x.get('scheduled_date', ''))
+        pages = iter_upcoming_reminders(patient_id, days_ahead, limit, cursor)
+        upcoming = list(pages)
         
         return {
             "patient_id": patient_id,
             "reminders": upcoming,
             "total": len(upcoming),
-            "days_ahead": days_ahead
+            "days_ahead": days_ahead,
+            "next_cursor": pages.next_cursor
         }
         
     except ClientError as e:
@@ -177,10 +222,41 @@ def get_upcoming_reminders(patient_id: str, days_ahead: int = 7) -> Dict[str, An
             "patient_id": patient_id,
             "reminders": [],
             "total": 0,
+            "next_cursor": None,
             "note": "Using mock data"
         }
 
 
+@traced('tool.sweep_due_reminders')
+def sweep_due_reminders(event: Dict[str, Any] = None, context: Any = None) -> Dict[str, Any]:
+    """
+    Queue every scheduled reminder that is due (run on a schedule, e.g. an EventBridge rule)
+    
+    Args:
+        event: Optional {'today': 'YYYY-MM-DD'} to sweep up to another date
+        context: Lambda context (unused)
+    
+    Returns:
+        Sweep summary
+    """
+    sweeper = ReminderSweeper(lambda: get_resource('dynamodb'),
+                              workers=int(os.getenv('REMINDER_SWEEP_WORKERS', '8')),
+                              lookback_days=int(os.getenv('REMINDER_SWEEP_LOOKBACK_DAYS', '7')),
+                              lease_seconds=float(os.getenv('REMINDER_SWEEP_LEASE', '900')))
+    # Waits for delivery before returning: a frozen Lambda would otherwise strand an in-memory outbox
+    result = sweeper.sweep(today=(event or {}).get('today'),
+                           flush_timeout=float(os.getenv('REMINDER_SWEEP_TIMEOUT', '600')))
+    print(f"Queued {result['queued']:,} reminders due {result['dates'][0]}..{result['dates'][-1]} "
+          f"in {result['seconds']:.1f}s" + ("" if result['delivered'] else " (not all delivered yet)"))
+    return {
+        "status": "failed" if result['failed_buckets'] else "success",
+        "queued": result['queued'],
+        "delivered": result['delivered'],
+        "failed_buckets": result['failed_buckets']
+    }
+
+
+@traced('tool.send_appointment_reminder')
 def send_appointment_reminder(appointment_id: str, patient_id: str) -> Dict[str, Any]:
     """
     Send reminder for upcoming appointment
@@ -194,7 +270,7 @@ def send_appointment_reminder(appointment_id: str, patient_id: str) -> Dict[str,
     """
     try:
         # Get appointment details
-        appointments_table = dynamodb.Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
+        appointments_table = get_resource('dynamodb').Table(os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments'))
         response = appointments_table.get_item(Key={'appointment_id': appointment_id})
         
         if 'Item' not in response:
@@ -204,41 +280,22 @@ def send_appointment_reminder(appointment_id: str, patient_id: str) -> Dict[str,
             }
         
         appointment = response['Item']
+        if appointment.get('reminder_sent'):
+            return {
+                "status": "success",
+                "delivery": "duplicate",
+                "message": "Appointment reminder was already sent",
+                "timestamp": appointment.get('reminder_sent_at')
+            }
         
-        # Create reminder message
-        message = f"""
-Appointment Reminder
-
-Date: {appointment['date']}
-Time: {appointment['time']}
-Department: {appointment['department']}
-Doctor: {appointment.get('doctor', 'TBD')}
-
-Please arrive 15 minutes early.
-Bring your insurance card and ID.
-
-To cancel or reschedule, please call (555) 123-4567.
-        """.strip()
-        
-        # Send notification
-        result = send_notification(
+        # Queue it; the appointment is marked once the reminder is delivered
+        return send_notification(
             patient_id=patient_id,
-            message=message,
-            notification_type="appointment_reminder"
+            message=appointment_reminder_message(appointment),
+            notification_type="appointment_reminder",
+            ref=appointment_id
         )
         
-        # Mark reminder as sent in appointment
-        appointments_table.update_item(
-            Key={'appointment_id': appointment_id},
-            UpdateExpression='SET reminder_sent = :val, reminder_sent_at = :time',
-            ExpressionAttributeValues={
-                ':val': True,
-                ':time': datetime.utcnow().isoformat()
-            }
-        )
-        
-        return result
-        
     except ClientError as e:
         print(f"Error sending appointment reminder: {e}")
         return {
@@ -247,6 +304,55 @@ To cancel or reschedule, please call (555) 123-4567.
         }
 
 
+@traced('tool.send_appointment_reminders')
+def send_appointment_reminders(start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+    """
+    Send reminders for every confirmed appointment in a date range that has not had one
+    
+    Safe to re-run (e.g. after a crash): appointments already reminded are
+    skipped and reminders still in the outbox are not queued twice.
+    
+    Args:
+        start_date: First appointment date (YYYY-MM-DD), defaults to tomorrow
+        end_date: Last appointment date, defaults to start_date
+    
+    Returns:
+        Campaign report (due, queued, delivered, failed, pending, throughput)
+    """
+    start_date = start_date or (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%d')
+    campaign = AppointmentReminderCampaign(lambda: get_resource('dynamodb'),
+                                           workers=int(os.getenv('REMINDER_CAMPAIGN_WORKERS', '4')))
+    try:
+        report = campaign.run(start_date, end_date,
+                              timeout=float(os.getenv('REMINDER_CAMPAIGN_TIMEOUT', '900')))
+    except ValueError as e:
+        return {
+            "status": "failed",
+            "error": str(e)
+        }
+    
+    print(f"Appointment reminders {report['dates'][0]}..{report['dates'][-1]}: {report['due']:,} due, "
+          f"{report['delivered']:,} delivered, {report['failed']:,} failed, {report['pending']:,} pending "
+          f"in {report['seconds']:.1f}s ({report['delivered_per_second']:.0f}/s)")
+    return {
+        "status": "failed" if report['failed_dates'] else "success",
+        **report
+    }
+
+
+def run_reminder_campaign(event: Dict[str, Any] = None, context: Any = None) -> Dict[str, Any]:
+    """
+    Lambda entry point for send_appointment_reminders (run daily by an EventBridge rule)
+    
+    Args:
+        event: Optional {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}
+        context: Lambda context (unused)
+    """
+    event = event or {}
+    return send_appointment_reminders(event.get('start_date'), event.get('end_date'))
+
+
+@traced('tool.create_follow_up_task')
 def create_follow_up_task(patient_id: str, task_type: str, 
                          due_date: str, notes: str = "") -> Dict[str, Any]:
     """
@@ -262,10 +368,11 @@ def create_follow_up_task(patient_id: str, task_type: str,
         Task creation confirmation
     """
     try:
-        table = dynamodb.Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
+        table = get_resource('dynamodb').Table(os.getenv('MEMORY_TABLE', 'hospital-memory'))
         
         task_id = str(uuid.uuid4())
         task = {
+            'memory_id': task_id,
             'task_id': task_id,
             'patient_id': patient_id,
             'memory_type': 'follow_up_task',
@@ -278,6 +385,7 @@ def create_follow_up_task(patient_id: str, task_type: str,
         }
         
         table.put_item(Item=task)
+        patient_cache.invalidate(patient_id, 'memory')
         
         return {
             "status": "success",
@@ -0,0 +1,259 @@
+"""
+Slot Inventory
+Per-doctor appointment calendars with conflict-free booking
+"""
+
+import os
+import threading
+from time import monotonic
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+import yaml
+from botocore.exceptions import ClientError
+
+
+SLOT_MINUTES = 30
+DEFAULT_HOURS = {'weekday': '08:00-18:00', 'weekend': '09:00-14:00'}
+CONFIG_PATH = Path(__file__).parent.parent / 'config.yaml'
+
+
+def load_hospital_hours(config_path: Path = CONFIG_PATH) -> Dict[str, str]:
+    """Read `hospital.hours` from config.yaml, falling back to the defaults"""
+    try:
+        with open(config_path, 'r') as f:
+            return yaml.safe_load(f).get('hospital', {}).get('hours', DEFAULT_HOURS)
+    except FileNotFoundError:
+        return DEFAULT_HOURS
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def slot_key(doctor: str, date: str, time: str) -> str:
+    """Appointments-table key of the lock item that owns a slot"""
+    return f"SLOT#{doctor}#{date}#{time}"
+
+
+class SlotInventory:
+    """
+    Bitset calendar per doctor-day backed by conditional DynamoDB writes
+
+    Each doctor-day is one integer whose bit i is set when slot i is taken,
+    so "is this slot free" and "first free slot" are single bit operations.
+    A doctor-day is hydrated from DynamoDB with one BatchGetItem over its
+    (at most 20) slot-lock keys, and hydrated again once it is older than
+    `ttl_seconds`, so bookings and cancellations made by other processes
+    show up. Past days and expired entries are evicted.
+
+    The lock item (`SLOT#doctor#date#time` in the appointments table, with
+    no patient_id so it stays out of PatientIndex) is written with
+    attribute_not_exists, so two bookings of the same slot cannot both
+    succeed even across processes whose bitsets are stale.
+
+    Args:
+        get_dynamodb: Callable returning the DynamoDB resource to use
+        hours: {'weekday': 'HH:MM-HH:MM', 'weekend': 'HH:MM-HH:MM'}
+        slot_minutes: Length of one appointment slot
+        ttl_seconds: How long a hydrated doctor-day is trusted, defaults to env SLOT_CACHE_TTL
+    """
+
+    def __init__(self, get_dynamodb: Callable[[], Any], hours: Dict[str, str] = None,
+                 slot_minutes: int = SLOT_MINUTES, ttl_seconds: float = None):
+        self.get_dynamodb = get_dynamodb
+        self.slot_minutes = slot_minutes
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv('SLOT_CACHE_TTL', '30'))
+        self._day_slots = {kind: self._build_slots(span) for kind, span in (hours or load_hospital_hours()).items()}
+        # (doctor, date) -> [booked bitset, monotonic time it was hydrated]
+        self._calendars: Dict[Tuple[str, str], List] = {}
+        # (doctor, date) -> {slot bit: monotonic time its lock write finished (None while in flight)}
+        self._reserved: Dict[Tuple[str, str], Dict[int, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._hydrating: Dict[Tuple[str, str], threading.Event] = {}
+        self._next_eviction = 0.0
+
+    @property
+    def table_name(self) -> str:
+        return os.getenv('APPOINTMENTS_TABLE', 'hospital-appointments')
+
+    def _build_slots(self, span: str) -> List[str]:
+        start, end = (_minutes(part) for part in span.split('-'))
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in range(start, end - self.slot_minutes + 1, self.slot_minutes)]
+
+    def slot_times(self, date: str) -> List[str]:
+        """All bookable slot times on a date (weekday or weekend hours)"""
+        day = datetime.strptime(date, "%Y-%m-%d")
+        return self._day_slots['weekend' if day.weekday() >= 5 else 'weekday']
+
+    def _slot_index(self, date: str, time: str) -> Optional[int]:
+        try:
+            return self.slot_times(date).index(time)
+        except ValueError:
+            return None
+
+    def _fresh(self, key: Tuple[str, str], now: float) -> Optional[List]:
+        entry = self._calendars.get(key)
+        return entry if entry is not None and now - entry[1] < self.ttl_seconds else None
+
+    def _calendar(self, doctor: str, date: str) -> int:
+        """Booked-slot bitset for a doctor-day, hydrating it from DynamoDB when missing or expired"""
+        key = (doctor, date)
+        with self._lock:
+            entry = self._fresh(key, monotonic())
+            if entry is not None:
+                return entry[0]
+            event = self._hydrating.get(key)
+            owner = event is None
+            if owner:
+                event = self._hydrating[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                entry = self._calendars.get(key)
+                return entry[0] if entry else 0
+
+        started = monotonic()
+        try:
+            booked = self._hydrate(doctor, date)
+        except ClientError as e:
+            print(f"Error loading calendar for {doctor} on {date}: {e}")
+            booked = None
+        with self._lock:
+            now = monotonic()
+            if booked is None:
+                # Keep what we had (or nothing) and retry on the next call
+                entry = self._calendars.get(key)
+                booked, loaded_at = (entry[0], entry[1]) if entry else (0, now - self.ttl_seconds)
+            else:
+                loaded_at = now
+            # Lock writes in flight, or finished after the read started, may be missing from it
+            reserved = self._reserved.get(key, {})
+            for bit, finished in list(reserved.items()):
+                if finished is None or finished >= started:
+                    booked |= bit
+                else:
+                    del reserved[bit]
+            if key in self._reserved and not reserved:
+                del self._reserved[key]
+            self._calendars[key] = [booked, loaded_at]
+            del self._hydrating[key]
+            event.set()
+            self._evict(now)
+            return booked
+
+    def _evict(self, now: float):
+        """Drop past days and expired doctor-days (at most once per TTL; caller holds the lock)"""
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + self.ttl_seconds
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        for key, (_, loaded_at) in list(self._calendars.items()):
+            in_flight = None in self._reserved.get(key, {}).values()
+            if (key[1] < today or now - loaded_at >= self.ttl_seconds) and not in_flight:
+                # The next hydration reads every finished lock write from the table
+                del self._calendars[key]
+                self._reserved.pop(key, None)
+
+    def _hydrate(self, doctor: str, date: str) -> int:
+        times = self.slot_times(date)
+        request = {self.table_name: {
+            'Keys': [{'appointment_id': slot_key(doctor, date, t)} for t in times],
+            'ProjectionExpression': 'slot_time'
+        }}
+        booked = 0
+        while request:
+            response = self.get_dynamodb().batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(self.table_name, []):
+                booked |= 1 << times.index(item['slot_time'])
+            request = response.get('UnprocessedKeys') or {}
+        return booked
+
+    def free_slots(self, doctor: str, date: str) -> List[str]:
+        """Free slot times for a doctor-day, earliest first"""
+        times = self.slot_times(date)
+        free = ((1 << len(times)) - 1) & ~self._calendar(doctor, date)
+        slots = []
+        while free:
+            lowest = free & -free
+            slots.append(times[lowest.bit_length() - 1])
+            free ^= lowest
+        return slots
+
+    def is_free(self, doctor: str, date: str, time: str) -> bool:
+        index = self._slot_index(date, time)
+        return index is not None and not (self._calendar(doctor, date) >> index) & 1
+
+    def reserve(self, doctor: str, date: str, time: str, appointment_id: str) -> bool:
+        """
+        Claim a slot for an appointment
+
+        Returns:
+            True if this call now owns the slot, False if it is taken or invalid
+
+        Raises:
+            ClientError: For DynamoDB errors other than a lost race
+        """
+        index = self._slot_index(date, time)
+        if index is None:
+            return False
+
+        self._calendar(doctor, date)
+        key = (doctor, date)
+        bit = 1 << index
+        with self._lock:
+            entry = self._calendars.setdefault(key, [0, monotonic() - self.ttl_seconds])
+            if entry[0] & bit:
+                return False
+            # Hold the bit while the conditional write is in flight
+            entry[0] |= bit
+            self._reserved.setdefault(key, {})[bit] = None
+
+        try:
+            self.get_dynamodb().Table(self.table_name).put_item(
+                Item={
+                    'appointment_id': slot_key(doctor, date, time),
+                    'slot_doctor': doctor,
+                    'slot_date': date,
+                    'slot_time': time,
+                    'held_by': appointment_id,
+                    'created_at': datetime.utcnow().isoformat()
+                },
+                ConditionExpression='attribute_not_exists(appointment_id)'
+            )
+            taken = True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                with self._lock:
+                    self._calendars[key][0] &= ~bit
+                    self._reserved[key].pop(bit, None)
+                raise
+            # Another process booked it; our bitset was stale and now isn't
+            taken = False
+        with self._lock:
+            self._reserved[key][bit] = monotonic()
+        return taken
+
+    def release(self, doctor: str, date: str, time: str, appointment_id: str):
+        """Free a slot held by an appointment (cancellation or failed booking)"""
+        try:
+            self.get_dynamodb().Table(self.table_name).delete_item(
+                Key={'appointment_id': slot_key(doctor, date, time)},
+                ConditionExpression='held_by = :aid',
+                ExpressionAttributeValues={':aid': appointment_id}
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            return
+
+        index = self._slot_index(date, time)
+        if index is not None:
+            with self._lock:
+                key = (doctor, date)
+                if key in self._calendars:
+                    self._calendars[key][0] &= ~(1 << index)
+                self._reserved.get(key, {}).pop(1 << index, None)
@@ -0,0 +1,312 @@
+"""
+Triage Rules
+Compiled symptom lexicon and urgency scoring shared by the triage tools
+"""
+
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import yaml
+
+from core.stats import summarize_latencies
+
+# NumPy makes batch scoring vectorized; without it batches are scored one list at a time
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+CONFIG_PATH = Path(__file__).parent.parent / 'config.yaml'
+
+# Overridable with `agents.triage.rules` in config.yaml
+DEFAULT_RULES = {
+    # Checked in order; a symptom takes the first tier with a keyword in it (substring match)
+    'symptom_tiers': [
+        {'urgency': 'Emergency', 'weight': 3,
+         'keywords': ['chest pain', 'difficulty breathing', 'severe bleeding', 'unconscious',
+                      'seizure', 'stroke', 'heart attack']},
+        {'urgency': 'Medium', 'weight': 2,
+         'keywords': ['fever', 'vomiting', 'severe pain', 'injury', 'infection']}
+    ],
+    'default_urgency': 'Low',
+    'default_weight': 1,
+    # Each group adds its weight once when any patient condition contains one of its keywords
+    'condition_modifiers': [
+        {'weight': 1, 'keywords': ['diabetes', 'heart disease', 'asthma', 'copd', 'immunocompromised']}
+    ],
+    # Minimum history-adjusted score per urgency, highest first
+    'thresholds': [['Emergency', 4], ['High', 3], ['Medium', 2]]
+}
+
+# Intents (core.intent) under which a free-text message may be answered from the rules;
+# "general" means the classifier found no booking or reminder request either
+MESSAGE_INTENTS = ('triage', 'general')
+
+# Free-text mentions that are not a present complaint: "no chest pain", "my stroke rehab",
+# "heart attack last year". Negations count within the few words before the symptom,
+# past-time cues anywhere in its clause, and qualifiers right after it.
+_CLAUSE_BREAK = re.compile(r"[.!?;,\n]|\b(?:but|and|although|though)\b")
+_NEGATION = re.compile(
+    r"\b(?:no|not|never|without|denies|deny|don'?t|doesn'?t|didn'?t|haven'?t|hasn'?t|"
+    r"isn'?t|wasn'?t|free of|no longer)\b"
+)
+_NEGATION_WORDS = 3
+_PAST = re.compile(
+    r"\b(?:history of|used to|recovered from|anymore|no longer|last (?:year|month|week|spring|summer|fall|winter)|"
+    r"(?:years|months|weeks) ago|in (?:19|20)\d\d)\b"
+)
+_QUALIFIER = re.compile(
+    r"\s*(?:medications?|medicines?|meds|rehab|rehabilitation|appointments?|clinic|specialist|"
+    r"follow-?up|prescriptions?|refills?|history|check-?ups?|survivors?|support|class(?:es)?)\b"
+)
+
+
+def load_triage_rules(config_path: Path = CONFIG_PATH) -> Dict[str, Any]:
+    """Read `agents.triage.rules` from config.yaml, falling back to the defaults"""
+    try:
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return DEFAULT_RULES
+    rules = config.get('agents', {}).get('triage', {}).get('rules') or {}
+    return {**DEFAULT_RULES, **rules}
+
+
+def _compile(keywords: Sequence[str], rest_of_line: bool = False) -> Optional['re.Pattern']:
+    """
+    One alternation per keyword set, longest keyword first
+
+    With `rest_of_line` a match also consumes the rest of its line, so a
+    scan over newline-joined texts yields at most one match per text.
+    """
+    if not keywords:
+        return None
+    alternation = '|'.join(re.escape(k.lower()) for k in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(f"(?:{alternation})[^\n]*" if rest_of_line else alternation)
+
+
+def _compile_words(keywords: Sequence[str]) -> Optional['re.Pattern']:
+    """Whole-word alternation for free text, allowing a plural ending ("seizures")"""
+    if not keywords:
+        return None
+    alternation = '|'.join(re.escape(k.lower()) for k in sorted(set(keywords), key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})(?:s|es)?\b")
+
+
+def _is_current(text: str, match: 're.Match') -> bool:
+    """False when the matched symptom is negated, in the past, or qualifies another noun"""
+    breaks = [b for b in _CLAUSE_BREAK.finditer(text)]
+    start = max((b.end() for b in breaks if b.end() <= match.start()), default=0)
+    end = min((b.start() for b in breaks if b.start() >= match.end()), default=len(text))
+    before = text[start:match.start()].split()[-_NEGATION_WORDS:]
+    if _NEGATION.search(' '.join(before)) or _PAST.search(text[start:end]):
+        return False
+    return not _QUALIFIER.match(text, match.end())
+
+
+class TriageRules:
+    """
+    Symptom and condition lexicon compiled to one regex per tier
+
+    `urgency` is the highest tier any symptom reaches (the search_symptoms
+    answer). `urgency_with_history` sums a weight per symptom plus the
+    condition modifiers and maps the score through the thresholds (the
+    assess_urgency_with_history answer). `score_batch` does both for
+    thousands of symptom lists in one regex pass over the joined text.
+
+    Args:
+        rules: Same shape as DEFAULT_RULES
+    """
+
+    def __init__(self, rules: Dict[str, Any] = None):
+        rules = rules or DEFAULT_RULES
+        self.tiers = rules['symptom_tiers']
+        self.labels = [tier['urgency'] for tier in self.tiers] + [rules.get('default_urgency', 'Low')]
+        self.weights = [tier['weight'] for tier in self.tiers] + [rules.get('default_weight', 1)]
+        self.patterns = [_compile(tier['keywords']) for tier in self.tiers]
+        self.message_patterns = [_compile_words(tier['keywords']) for tier in self.tiers]
+        self.batch_patterns = [_compile(tier['keywords'], rest_of_line=True) for tier in self.tiers]
+        self.modifiers = [
+            (_compile(group['keywords']), _compile(group['keywords'], rest_of_line=True), group['weight'])
+            for group in rules.get('condition_modifiers', [])
+        ]
+        self.thresholds = [(label, minimum) for label, minimum in rules.get('thresholds', [])]
+        self.lowest = rules.get('default_urgency', 'Low')
+
+    @classmethod
+    def from_config(cls, config_path: Path = CONFIG_PATH) -> 'TriageRules':
+        return cls(load_triage_rules(config_path))
+
+    def symptom_tier(self, symptom: str) -> int:
+        """Index of the first tier the symptom matches (len(tiers) when none)"""
+        text = symptom.lower()
+        for index, pattern in enumerate(self.patterns):
+            if pattern is not None and pattern.search(text):
+                return index
+        return len(self.tiers)
+
+    def match_message(self, message: str, intent: str = None) -> Tuple[str, Optional[str]]:
+        """
+        Urgency of a free-text message and the keyword that decided it (None when no tier matched)
+
+        Symptoms match as whole words and only count as a present complaint:
+        negated, past or qualifying mentions ("no chest pain", "stroke last
+        year", "seizure medication") are skipped. When the caller passes the
+        classified intent, only MESSAGE_INTENTS are scored, so booking and
+        reminder requests that mention a symptom are never answered here.
+        """
+        if intent is not None and intent not in MESSAGE_INTENTS:
+            return self.lowest, None
+        text = message.lower()
+        for index, pattern in enumerate(self.message_patterns):
+            if pattern is None:
+                continue
+            for match in pattern.finditer(text):
+                if _is_current(text, match):
+                    return self.labels[index], match.group(0)
+        return self.lowest, None
+
+    def condition_modifier(self, conditions: Sequence[str]) -> int:
+        text = '\n'.join(c.lower() for c in conditions)
+        return sum(weight for pattern, _, weight in self.modifiers if pattern is not None and pattern.search(text))
+
+    def _label(self, score: float) -> str:
+        for label, minimum in self.thresholds:
+            if score >= minimum:
+                return label
+        return self.lowest
+
+    def urgency(self, symptoms: Sequence[str]) -> str:
+        """Urgency of the most urgent symptom"""
+        return self.labels[min((self.symptom_tier(s) for s in symptoms), default=len(self.tiers))]
+
+    def score(self, symptoms: Sequence[str], conditions: Sequence[str] = ()) -> int:
+        """Sum of per-symptom weights plus condition modifiers"""
+        return sum(self.weights[self.symptom_tier(s)] for s in symptoms) + self.condition_modifier(conditions)
+
+    def urgency_with_history(self, symptoms: Sequence[str], conditions: Sequence[str] = ()) -> str:
+        return self._label(self.score(symptoms, conditions))
+
+    def score_batch(self, symptom_lists: Sequence[Sequence[str]],
+                    condition_lists: Sequence[Sequence[str]] = None) -> Dict[str, List[Any]]:
+        """
+        Score many symptom lists at once (e.g. the whole inbound queue before any LLM call)
+
+        Args:
+            symptom_lists: One list of symptom strings per patient/message
+            condition_lists: Matching lists of patient conditions (none when omitted)
+
+        Returns:
+            {'urgency': [...], 'history_urgency': [...], 'score': [...]}, one entry per list
+        """
+        if not HAS_NUMPY:
+            conditions = condition_lists or [()] * len(symptom_lists)
+            scores = [self.score(s, c) for s, c in zip(symptom_lists, conditions)]
+            return {
+                'urgency': [self.urgency(s) for s in symptom_lists],
+                'history_urgency': [self._label(score) for score in scores],
+                'score': scores
+            }
+
+        count = len(symptom_lists)
+        owners = np.repeat(np.arange(count), [len(s) for s in symptom_lists])
+        tiers = self._tiers_of(*_join([s for symptoms in symptom_lists for s in symptoms]))
+
+        best = np.full(count, len(self.tiers))
+        np.minimum.at(best, owners, tiers)
+        scores = np.bincount(owners, weights=np.asarray(self.weights)[tiers], minlength=count)
+
+        if condition_lists is not None:
+            condition_owners = np.repeat(np.arange(count), [len(c) for c in condition_lists])
+            text, starts = _join([c for conditions in condition_lists for c in conditions])
+            for _, pattern, weight in self.modifiers:
+                matched = np.zeros(count, dtype=bool)
+                matched[condition_owners[_matches(pattern, text, starts)]] = True
+                scores += weight * matched
+
+        labels = np.asarray(self.labels, dtype=object)
+        history = np.full(count, self.lowest, dtype=object)
+        for label, minimum in reversed(self.thresholds):
+            history[scores >= minimum] = label
+        return {
+            'urgency': labels[best].tolist(),
+            'history_urgency': history.tolist(),
+            'score': scores.astype(int).tolist()
+        }
+
+    def _tiers_of(self, text: str, starts):
+        """Tier index per joined text: the first tier whose pattern matches it"""
+        tiers = np.full(len(starts), len(self.tiers))
+        for index in reversed(range(len(self.batch_patterns))):
+            tiers[_matches(self.batch_patterns[index], text, starts)] = index
+        return tiers
+
+
+def _join(texts: List[str]):
+    """Lowercased newline-joined batch and the offset where each text starts"""
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) + 1
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if texts else np.zeros(0, dtype=np.int64)
+    text = '\n'.join(texts)
+    lowered = text.lower()
+    # Lowercasing only lengthens strings (e.g. 'İ'), so equal length means offsets still line up
+    if len(lowered) != len(text):
+        lowered = '\n'.join(t.lower() for t in texts)
+        lengths = np.fromiter((len(t.lower()) + 1 for t in texts), dtype=np.int64, count=len(texts))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return lowered, starts
+
+
+def _matches(pattern: Optional['re.Pattern'], text: str, starts):
+    """Indices of the joined texts containing a match (pattern compiled with rest_of_line)"""
+    if pattern is None or not len(starts):
+        return np.zeros(0, dtype=np.int64)
+    # Keywords never contain a newline, so every match lies inside one text
+    hits = np.fromiter((m.start() for m in pattern.finditer(text)), dtype=np.int64)
+    return np.searchsorted(starts, hits, side='right') - 1
+
+
+def emergency_response(keyword: str) -> str:
+    """Templated reply sent before any model call when a message reads as an emergency"""
+    return (
+        f"🚨 **This may be a medical emergency** (you mentioned *{keyword}*).\n\n"
+        "**Call 911 now or go to the nearest Emergency Room.** Do not drive yourself "
+        "if you feel faint, and do not wait for an online reply.\n\n"
+    )
+
+
+class UrgencyDecisionStats:
+    """
+    Latency from receiving a message to deciding its urgency, by decision path
+
+    `rules` decisions come from the local lexicon before any model call;
+    `llm` decisions are triage replies from the model.
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._urgency: Dict[str, Dict[str, int]] = {}
+        self.max_samples = max_samples
+
+    def record(self, path: str, urgency: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(path, deque(maxlen=self.max_samples)).append(seconds)
+            counts = self._urgency.setdefault(path, {})
+            counts[urgency] = counts.get(urgency, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency summary (seconds) and urgency counts per path"""
+        with self._lock:
+            return {
+                path: {**summarize_latencies(list(samples)), 'urgency': dict(self._urgency[path])}
+                for path, samples in self._samples.items()
+            }
+
+
+triage_rules = TriageRules.from_config()
+urgency_decisions = UrgencyDecisionStats()
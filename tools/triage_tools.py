@@ -8,14 +8,15 @@ import json
 from typing import Dict, Any, List
 from datetime import datetime
 
-import boto3
 from botocore.exceptions import ClientError
 
-
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.getenv('AWS_REGION', 'us-east-1'))
+from core.aws_clients import get_resource
+from core.patient_cache import patient_cache
+from core.tracing import traced
+from tools.triage_rules import triage_rules
 
 
+@traced('tool.search_symptoms')
 def search_symptoms(patient_id: str, symptoms: List[str]) -> Dict[str, Any]:
     """
     Analyze symptoms and provide triage recommendation
@@ -27,21 +28,8 @@ def search_symptoms(patient_id: str, symptoms: List[str]) -> Dict[str, Any]:
     Returns:
         Dictionary with urgency level and recommendations
     """
-    # Symptom urgency mapping (simplified for MVP)
-    high_risk_keywords = ['chest pain', 'difficulty breathing', 'severe bleeding', 
-                          'unconscious', 'seizure', 'stroke', 'heart attack']
-    medium_risk_keywords = ['fever', 'vomiting', 'severe pain', 'injury', 'infection']
-    
-    symptoms_lower = [s.lower() for s in symptoms]
-    
-    # Determine urgency
-    urgency = "Low"
-    for symptom in symptoms_lower:
-        if any(keyword in symptom for keyword in high_risk_keywords):
-            urgency = "Emergency"
-            break
-        elif any(keyword in symptom for keyword in medium_risk_keywords):
-            urgency = "Medium"
+    # Determine urgency (compiled lexicon shared with assess_urgency_with_history)
+    urgency = triage_rules.urgency(symptoms)
     
     # Get patient history for additional context
     patient_history = _get_patient_medical_history(patient_id)
@@ -68,6 +56,7 @@ def search_symptoms(patient_id: str, symptoms: List[str]) -> Dict[str, Any]:
     }
 
 
+@traced('tool.get_patient_history')
 def get_patient_history(patient_id: str) -> Dict[str, Any]:
     """
     Retrieve patient medical history from DynamoDB
@@ -82,13 +71,15 @@ def get_patient_history(patient_id: str) -> Dict[str, Any]:
 
 
 def _get_patient_medical_history(patient_id: str) -> Dict[str, Any]:
-    """Internal function to fetch patient history from DynamoDB"""
+    """Internal function to fetch patient history from DynamoDB (via the shared patient cache)"""
     try:
-        table = dynamodb.Table(os.getenv('PATIENTS_TABLE', 'hospital-patients'))
-        response = table.get_item(Key={'patient_id': patient_id})
+        table = get_resource('dynamodb').Table(os.getenv('PATIENTS_TABLE', 'hospital-patients'))
+        patient = patient_cache.get_or_load(
+            patient_id, 'record',
+            lambda: table.get_item(Key={'patient_id': patient_id}).get('Item', {})
+        )
         
-        if 'Item' in response:
-            patient = response['Item']
+        if patient:
             return {
                 'conditions': patient.get('medical_history', {}).get('conditions', []),
                 'allergies': patient.get('medical_history', {}).get('allergies', []),
@@ -113,6 +104,7 @@ def _get_patient_medical_history(patient_id: str) -> Dict[str, Any]:
         }
 
 
+@traced('tool.assess_urgency_with_history')
 def assess_urgency_with_history(symptoms: List[str], medical_history: Dict[str, Any]) -> str:
     """
     Assess urgency considering patient medical history
@@ -124,35 +116,4 @@ def assess_urgency_with_history(symptoms: List[str], medical_history: Dict[str,
     Returns:
         Urgency level: Emergency, High, Medium, or Low
     """
-    urgency_score = 0
-    
-    # Base score from symptoms
-    high_risk_symptoms = ['chest pain', 'difficulty breathing', 'severe bleeding']
-    medium_risk_symptoms = ['fever', 'vomiting', 'severe pain']
-    
-    for symptom in symptoms:
-        symptom_lower = symptom.lower()
-        if any(hrs in symptom_lower for hrs in high_risk_symptoms):
-            urgency_score += 3
-        elif any(mrs in symptom_lower for mrs in medium_risk_symptoms):
-            urgency_score += 2
-        else:
-            urgency_score += 1
-    
-    # Adjust based on history
-    high_risk_conditions = ['diabetes', 'heart disease', 'asthma', 'copd', 'immunocompromised']
-    patient_conditions = [c.lower() for c in medical_history.get('conditions', [])]
-    
-    if any(hrc in pc for hrc in high_risk_conditions for pc in patient_conditions):
-        urgency_score += 1
-    
-    # Determine final urgency
-    if urgency_score >= 4:
-        return "Emergency"
-    elif urgency_score >= 3:
-        return "High"
-    elif urgency_score >= 2:
-        return "Medium"
-    else:
-        return "Low"
-
+    return triage_rules.urgency_with_history(symptoms, medical_history.get('conditions', []))
@@ -8,7 +8,6 @@ import requests
 import json
 import os
 from datetime import datetime
-import time
 import sys
 from pathlib import Path
 
@@ -16,9 +15,11 @@ from pathlib import Path
 parent_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(parent_dir))
 
+from core.intent import IntentClassifier
+
 # Import local agent for direct Bedrock integration
 try:
-    from local_agent import handle_query, PATIENTS
+    from local_agent import handle_query, handle_query_stream, PATIENTS
     BEDROCK_AVAILABLE = True
 except ImportError:
     BEDROCK_AVAILABLE = False
@@ -519,6 +520,10 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Shared keyword routing (same classifier as local_agent and the supervisor fast path)
+intent_classifier = IntentClassifier()
+
+
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state.messages = []
@@ -533,6 +538,86 @@ if 'agent_stats' not in st.session_state:
     }
 
 
+def update_agent_stats(prompt: str):
+    """Update sidebar statistics based on query type"""
+    st.session_state.agent_stats['total_queries'] += 1
+    agent_type, _ = intent_classifier.predict(prompt)
+    if agent_type == 'triage':
+        st.session_state.agent_stats['triage_count'] += 1
+    elif agent_type == 'booking':
+        st.session_state.agent_stats['booking_count'] += 1
+    elif agent_type == 'reminder':
+        st.session_state.agent_stats['reminder_count'] += 1
+
+
+def render_streaming_message(placeholder, content: str):
+    """Render a partially streamed assistant message with a typing cursor"""
+    placeholder.markdown(f'''
+        <div style="background: #ffffff; 
+                    color: #334155; 
+                    padding: 0.75rem; 
+                    border-radius: 12px 12px 12px 4px; 
+                    margin: 0.25rem 0;
+                    border: 1px solid #e2e8f0;
+                    font-size: 0.9rem;
+                    line-height: 1.5;">
+            <div style="font-size: 0.85rem; font-weight: 600; color: #3b82f6; margin-bottom: 0.5rem;">
+                🤖 AI Assistant
+            </div>
+            {content}▌
+        </div>
+        ''', unsafe_allow_html=True)
+
+
+def stream_agent_api(prompt: str, patient_id: str):
+    """Stream a live Bedrock response into the chat as it is generated"""
+    print(f"🔥 Streaming live Bedrock LLM for patient {patient_id}...")
+    
+    cols = st.columns([3, 1])
+    with cols[0]:
+        placeholder = st.empty()
+    
+    result = ""
+    try:
+        stream = handle_query_stream(prompt, patient_id)
+        
+        # Only the wait for the first token sits behind the spinner
+        with st.spinner("🏥 Adira Healthcare AI is analyzing..."):
+            result = next(stream, "")
+        
+        render_streaming_message(placeholder, result)
+        for chunk in stream:
+            result += chunk
+            render_streaming_message(placeholder, result)
+    except Exception as e:
+        print(f"❌ Bedrock error: {e}")
+        placeholder.empty()
+        # Fall back to mock on error
+        return mock_agent_response(prompt, patient_id)
+    
+    placeholder.empty()
+    
+    # Check if result contains throttling message
+    if "high demand" in result.lower() or "rate limit" in result.lower():
+        return {
+            "result": result,
+            "patient_id": patient_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "status": "throttled",
+            "bedrock": True
+        }
+    
+    update_agent_stats(prompt)
+    
+    return {
+        "result": result,
+        "patient_id": patient_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "status": "success",
+        "bedrock": True
+    }
+
+
 def call_agent_api(prompt: str, patient_id: str, local_mode: bool = True):
     """Call the multi-agent system with rate limiting protection"""
     
@@ -541,10 +626,7 @@ def call_agent_api(prompt: str, patient_id: str, local_mode: bool = True):
         try:
             print(f"🔥 Calling live Bedrock LLM for patient {patient_id}...")
             
-            # Add a small delay to prevent rapid-fire requests
-            time.sleep(0.5)
-            
-            # Call the local_agent which uses Bedrock directly (now has retry logic)
+            # Call the local_agent, which paces requests through the shared Bedrock rate limiter
             result = handle_query(prompt, patient_id)
             
             # Check if result contains throttling message
@@ -558,14 +640,7 @@ def call_agent_api(prompt: str, patient_id: str, local_mode: bool = True):
                 }
             
             # Update stats based on query type
-            st.session_state.agent_stats['total_queries'] += 1
-            prompt_lower = prompt.lower()
-            if any(word in prompt_lower for word in ['symptom', 'fever', 'cough', 'pain', 'sick']):
-                st.session_state.agent_stats['triage_count'] += 1
-            elif any(word in prompt_lower for word in ['appointment', 'book', 'schedule']):
-                st.session_state.agent_stats['booking_count'] += 1
-            elif any(word in prompt_lower for word in ['remind', 'notification']):
-                st.session_state.agent_stats['reminder_count'] += 1
+            update_agent_stats(prompt)
             
             return {
                 "result": result,
@@ -617,10 +692,9 @@ def call_agent_api(prompt: str, patient_id: str, local_mode: bool = True):
 
 def mock_agent_response(prompt: str, patient_id: str):
     """Mock response for demo when backend is not running"""
-    prompt_lower = prompt.lower()
+    agent_type, _ = intent_classifier.predict(prompt)
     
-    if any(word in prompt_lower for word in ['symptom', 'fever', 'cough', 'pain', 'sick']):
-        agent_type = 'triage'
+    if agent_type == 'triage':
         result = """Based on your symptoms, I recommend the following:
 
 **Urgency Level:** Medium
@@ -635,8 +709,7 @@ def mock_agent_response(prompt: str, patient_id: str):
 
 **Note:** I've checked your medical history and noted your allergies to Penicillin and Peanuts."""
     
-    elif any(word in prompt_lower for word in ['appointment', 'book', 'schedule', 'availability']):
-        agent_type = 'booking'
+    elif agent_type == 'booking':
         result = """I can help you schedule an appointment!
 
 **Available Slots:**
@@ -646,8 +719,7 @@ def mock_agent_response(prompt: str, patient_id: str):
 
 Would you like to book one of these slots? Please specify your preferred date and time."""
     
-    elif any(word in prompt_lower for word in ['remind', 'notification', 'follow-up']):
-        agent_type = 'reminder'
+    elif agent_type == 'reminder':
         result = """I've set up your reminders!
 
 **Upcoming Reminders:**
@@ -658,7 +730,6 @@ Would you like to book one of these slots? Please specify your preferred date an
 You'll receive notifications via email 24 hours before each event."""
     
     else:
-        agent_type = 'general'
         result = """Hello! I'm your hospital AI assistant. I can help you with:
 
 - 🩺 **Symptom Analysis & Triage**: Assess your symptoms and recommend next steps
@@ -668,13 +739,7 @@ You'll receive notifications via email 24 hours before each event."""
 How can I assist you today?"""
     
     # Update stats
-    st.session_state.agent_stats['total_queries'] += 1
-    if agent_type == 'triage':
-        st.session_state.agent_stats['triage_count'] += 1
-    elif agent_type == 'booking':
-        st.session_state.agent_stats['booking_count'] += 1
-    elif agent_type == 'reminder':
-        st.session_state.agent_stats['reminder_count'] += 1
+    update_agent_stats(prompt)
     
     return {
         "result": result,
@@ -877,10 +942,14 @@ if user_input:
         "timestamp": datetime.now()
     })
     
-    # Show professional loading indicator with rate limit notice
-    with st.spinner("🏥 Adira Healthcare AI is analyzing... (This may take 5-30 seconds)"):
-        # Call agent API (now includes retry logic)
-        response = call_agent_api(user_input, st.session_state.patient_id, local_mode)
+    if BEDROCK_AVAILABLE:
+        # Render the response token by token as Bedrock generates it
+        response = stream_agent_api(user_input, st.session_state.patient_id)
+    else:
+        # Show professional loading indicator with rate limit notice
+        with st.spinner("🏥 Adira Healthcare AI is analyzing... (This may take 5-30 seconds)"):
+            # Call agent API (now includes retry logic)
+            response = call_agent_api(user_input, st.session_state.patient_id, local_mode)
     
     # Add assistant response
     if response.get('status') == 'success':